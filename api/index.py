@@ -14,10 +14,25 @@ from fastapi.staticfiles import StaticFiles
 import os
 
 # Import app components
-from backend.app.routes import auth, items, reviews, feed, users, external, follows, likes, ratings, lists, comments
-from backend.app.database import init_db
+from backend.app.routes import auth, items, reviews, feed, users, external, follows, likes, ratings, lists, comments, admin
+from backend.app.database import engine, init_db
+from backend.app.services.sql_instrumentation import install_sql_instrumentation
+from backend.app.services.metrics import install_metrics
+from backend.app.services.tracing import install_tracing
+from backend.app.services.slow_query_log import install_slow_query_log
+from backend.app.services.profiling import install_profiling
+from backend.app.services.compression import install_compression
+from backend.app.services.activity_service import install_activity_compactor
+from backend.app.services.activity_partitions import install_partition_maintenance
+from backend.app.services.invalidation import install_invalidation_bus
+from backend.app.services.feed_cache import install_feed_cache
+from backend.app.services.auth_cache import install_auth_cache
+from backend.app.services.tokens import install_token_revocation, load_revocations
+from backend.app.services.feed_events import install_feed_stream
+from backend.app.services.json_response import FastJSONResponse
 
-app = FastAPI(title="ReaView API")
+# orjson tabanlı response sınıfı (datetime native, Decimal -> float)
+app = FastAPI(title="ReaView API", default_response_class=FastJSONResponse)
 
 # === CORS CONFIGURATION (MUST be FIRST - before routes) ===
 app.add_middleware(
@@ -26,8 +41,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],  # api-client.js conditional GET
 )
 
+# Per-request SQL statement counts / DB time (Server-Timing + N+1 detection)
+install_sql_instrumentation(app, engine)
+
+# Prometheus metrics: per-route latency histograms, in-flight requests, DB pool (GET /metrics)
+install_metrics(app, engine)
+
+# Sampled request tracing with DB / external HTTP child spans (TRACING_ENABLED=1)
+install_tracing(app, engine)
+
+# Slow statement log with async EXPLAIN capture (/admin/slow-queries)
+install_slow_query_log(engine)
+
+# On-demand (?__profile=1) and 1-in-N sampling profiler (PROFILING_ENABLED=1)
+install_profiling(app)
+
+# gzip / brotli for JSON and HTML responses over COMPRESSION_MIN_SIZE (outermost middleware)
+install_compression(app)
+
+# Batched cleanup of duplicate / orphaned activities (ACTIVITY_COMPACTOR_INTERVAL_S > 0)
+install_activity_compactor(engine)
+
+# Monthly activity partitions ahead of time + retention / archival (ACTIVITY_PARTITIONING=1)
+install_partition_maintenance(engine)
+
+# Cross-worker cache invalidation: LISTEN/NOTIFY on PostgreSQL, in-process otherwise (INVALIDATION_BUS)
+install_invalidation_bus(engine)
+
+# Per-user feed page cache, invalidated after commit by activity writes (FEED_CACHE_ENABLED=1)
+install_feed_cache()
+
+# Token -> user lookups cached per worker for a few seconds, evicted via the bus (AUTH_USER_CACHE_ENABLED=1)
+install_auth_cache()
+
+# Logout / password-reset token revocations, applied on every worker via the bus
+install_token_revocation()
+
+# /feed/stream pub/sub: committed activities, over LISTEN/NOTIFY on PostgreSQL (FEED_STREAM_ENABLED=1)
+install_feed_stream(engine)
+
 # Run pending migrations (e.g., sequence resets) on every cold start.
 # All SQL migrations are idempotent (use IF EXISTS / OR REPLACE patterns).
 @app.on_event("startup")
@@ -36,6 +91,11 @@ def startup_event():
         init_db()
     except Exception as e:
         print(f"[WARNING] DB init failed (continuing): {e}")
+    # Every cold start: logout / password-reset revocations issued by other instances
+    try:
+        load_revocations(engine)
+    except Exception as e:
+        print(f"[WARNING] Could not load token revocations: {e}")
     print("[OK] Application started on Vercel")
 
 # Mount avatars directory as static files (if exists)
@@ -59,6 +119,7 @@ routers_config = [
     (ratings, "/ratings", "Ratings"),
     (lists, "/lists", "Lists"),
     (comments, "/comments", "Comments"),
+    (admin, "/admin", "Admin"),
 ]
 
 for module, prefix, tag in routers_config:
@@ -33,8 +33,9 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 # Run migrations and table initialization on startup
-def init_db():
+def init_db(bind=None):
     """Initialize database tables and run migrations safely"""
+    bind = bind if bind is not None else engine
     try:
         from sqlalchemy import text
         from pathlib import Path
@@ -43,7 +44,7 @@ def init_db():
         # 1. Create tables from SQLAlchemy models if they don't exist
         try:
             from . import models
-            Base.metadata.create_all(bind=engine)
+            Base.metadata.create_all(bind=bind)
             print("[OK] Base.metadata.create_all completed")
         except Exception as e:
             print(f"[WARNING] Base.metadata.create_all warning: {e}")
@@ -75,7 +76,7 @@ def init_db():
                             continue
                         if len(statement) > 3:
                             try:
-                                with engine.begin() as conn:
+                                with bind.begin() as conn:
                                     conn.execute(text(statement))
                             except Exception as e:
                                 error_msg = str(e).lower()
@@ -118,7 +119,7 @@ def init_db():
         
         for ddl in auto_healing_statements:
             try:
-                with engine.begin() as conn:
+                with bind.begin() as conn:
                     conn.execute(text(ddl))
             except Exception:
                 pass
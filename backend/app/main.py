@@ -1,13 +1,29 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from .routes import auth, items, reviews, feed, users, external, follows, likes
+from .routes import auth, items, reviews, feed, users, external, follows, likes, admin
 from sqlalchemy import text
 from .database import SessionLocal, engine, init_db
+from .services.sql_instrumentation import install_sql_instrumentation
+from .services.metrics import install_metrics
+from .services.tracing import install_tracing
+from .services.slow_query_log import install_slow_query_log
+from .services.profiling import install_profiling
+from .services.compression import install_compression
+from .services.activity_service import install_activity_compactor
+from .services.activity_partitions import install_partition_maintenance
+from .services.invalidation import install_invalidation_bus
+from .services.feed_cache import install_feed_cache
+from .services.auth_cache import install_auth_cache
+from .services.tokens import install_token_revocation, load_revocations
+from .services import passwords
+from .services.feed_events import install_feed_stream
+from .services.json_response import FastJSONResponse
 from pathlib import Path
 
 
-app = FastAPI(title="ReaView API")
+# orjson tabanlı response sınıfı (datetime native, Decimal -> float)
+app = FastAPI(title="ReaView API", default_response_class=FastJSONResponse)
 
 # === CORS CONFIGURATION (MUST be FIRST - before routes) ===
 # Use built-in CORSMiddleware
@@ -17,14 +33,63 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],  # api-client.js conditional GET
 )
 
+# Per-request SQL statement counts / DB time (Server-Timing + N+1 detection)
+install_sql_instrumentation(app, engine)
+
+# Prometheus metrics: per-route latency histograms, in-flight requests, DB pool (GET /metrics)
+install_metrics(app, engine)
+
+# Sampled request tracing with DB / external HTTP child spans (TRACING_ENABLED=1)
+install_tracing(app, engine)
+
+# Slow statement log with async EXPLAIN capture (/admin/slow-queries)
+install_slow_query_log(engine)
+
+# On-demand (?__profile=1) and 1-in-N sampling profiler (PROFILING_ENABLED=1)
+install_profiling(app)
+
+# gzip / brotli for JSON and HTML responses over COMPRESSION_MIN_SIZE (outermost middleware)
+install_compression(app)
+
+# Batched cleanup of duplicate / orphaned activities (ACTIVITY_COMPACTOR_INTERVAL_S > 0)
+install_activity_compactor(engine)
+
+# Monthly activity partitions ahead of time + retention / archival (ACTIVITY_PARTITIONING=1)
+install_partition_maintenance(engine)
+
+# Cross-worker cache invalidation: LISTEN/NOTIFY on PostgreSQL, in-process otherwise (INVALIDATION_BUS)
+install_invalidation_bus(engine)
+
+# Per-user feed page cache, invalidated after commit by activity writes (FEED_CACHE_ENABLED=1)
+install_feed_cache()
+
+# Token -> user lookups cached per worker for a few seconds, evicted via the bus (AUTH_USER_CACHE_ENABLED=1)
+install_auth_cache()
+
+# Logout / password-reset token revocations, applied on every worker via the bus
+install_token_revocation()
+
+# /feed/stream pub/sub: committed activities, over LISTEN/NOTIFY on PostgreSQL (FEED_STREAM_ENABLED=1)
+install_feed_stream(engine)
+
 # Initialize database on startup
 @app.on_event("startup")
 def startup_event():
 	init_db()
+	# Kalıcı token iptalleri: yeniden başlatmada / geç açılan worker'da kaybolmasın
+	load_revocations(engine)
+	# PBKDF2 executor'ının worker'larını ilk login'den önce başlat (PASSWORD_HASH_EXECUTOR)
+	passwords.warm_up()
 	print("[OK] Application started")
 
+
+@app.on_event("shutdown")
+def shutdown_event():
+	passwords.shutdown_executor()
+
 # Mount avatars directory as static files
 avatars_dir = Path(__file__).parent.parent / "avatars"
 if avatars_dir.exists():
@@ -42,6 +107,7 @@ for module, prefix, tag in (
 	(external, "/external", "External API"),
 	(follows, "/users", "Follow System"),
 	(likes, "/likes", "Likes"),
+	(admin, "/admin", "Admin"),
 ):
 	if hasattr(module, "router"):
 		app.include_router(module.router, prefix=prefix, tags=[tag])
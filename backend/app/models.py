@@ -20,6 +20,7 @@ class Item(Base):
 	external_api_source = Column(String(50), nullable=True)  # 'tmdb', 'google_books', etc
 	external_rating = Column(Integer, nullable=True, default=0)  # API'den gelen rating (0-10)
 	created_at = Column(DateTime, server_default=func.now(), nullable=False)
+	updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)  # ETag / Last-Modified
 
 
 class Review(Base):
@@ -55,6 +56,7 @@ class User(Base):
     bio = Column(String, nullable=True)
     avatar_url = Column(String(500), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
 
 class Activity(Base):
@@ -0,0 +1,120 @@
+from fastapi import APIRouter, Depends, HTTPException
+from ..services.sql_instrumentation import route_report
+from ..services.slow_query_log import slow_query_log
+from ..services.profiling import profile_store
+from ..services.compression import compression_stats
+from ..services.activity_service import compact_activities
+from ..services.feed_cache import feed_cache
+from ..services.cache import cache_stats, find_cache
+from ..database import engine
+from .deps import require_admin_token
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+
+
+# ============ SQL RAPORU ============
+
+@router.get("/sql-report")
+def get_sql_report():
+    """
+    Route bazında SQL istatistikleri: ortalama/maksimum statement sayısı,
+    DB süresi ve N+1 şüphesi taşıyan tekrar eden statement şekilleri
+    """
+    return {"routes": route_report.snapshot()}
+
+
+@router.delete("/sql-report")
+def reset_sql_report():
+    """SQL raporunu sıfırla"""
+    route_report.reset()
+    return {"message": "SQL raporu sıfırlandı"}
+
+
+# ============ SLOW QUERY LOG ============
+
+@router.get("/slow-queries")
+def get_slow_queries():
+    """
+    Eşiği aşan statement'lar: şekil bazında sayı, p50/p95/p99 süreleri ve
+    son yakalanan EXPLAIN planı, ayrıca en son kayıtlar (ring buffer)
+    """
+    return slow_query_log.snapshot()
+
+
+@router.delete("/slow-queries")
+def reset_slow_queries():
+    """Slow query buffer'ını ve şekil istatistiklerini sıfırla"""
+    slow_query_log.reset()
+    return {"message": "Slow query log sıfırlandı"}
+
+
+# ============ PROFILLER ============
+
+@router.get("/profiles")
+def get_profiles(limit: int = 50):
+    """
+    PROFILE_DIR'deki en yeni profil raporları (HTML özeti + collapsed stack dosyası).
+    Yeni rapor için isteğe ?__profile=1 ekleyin (PROFILING_ENABLED=1 gerekir).
+    """
+    return {"profiles": profile_store.list(limit)}
+
+
+# ============ COMPRESSION ============
+
+@router.get("/compression")
+def get_compression_report():
+    """Route ve kodlama bazında ortalama ham / sıkıştırılmış boyut, kazanılan byte ve CPU maliyeti"""
+    return {"routes": compression_stats.snapshot()}
+
+
+@router.delete("/compression")
+def reset_compression_report():
+    """Sıkıştırma istatistiklerini sıfırla"""
+    compression_stats.reset()
+    return {"message": "Sıkıştırma istatistikleri sıfırlandı"}
+
+
+# ============ ACTIVITY COMPACTION ============
+
+@router.post("/activities/compact")
+def compact_activity_rows(dry_run: bool = False, max_batches: int = 10):
+    """
+    Tekrarlayan ve karşılığı kalmamış (unlike / unfollow / silinen puan)
+    aktiviteleri batch'ler halinde sil. Büyük tablolarda max_batches ile
+    sınırlayıp tekrar çağırın veya backend.tools.compact_activities'i kullanın.
+    """
+    removed = compact_activities(engine, max_batches=max_batches, dry_run=dry_run)
+    return {"dry_run": dry_run, "removed": removed, "total": sum(removed.values())}
+
+
+# ============ FEED CACHE ============
+
+@router.get("/feed-cache")
+def get_feed_cache_stats():
+    """Feed cache doluluğu, hit oranı ve LRU tahliyeleri"""
+    return feed_cache.stats()
+
+
+@router.delete("/feed-cache")
+def clear_feed_cache():
+    """Tüm feed cache'ini boşalt"""
+    feed_cache.clear()
+    return {"message": "Feed cache temizlendi"}
+
+
+# ============ CACHES ============
+
+@router.get("/caches")
+def get_cache_namespaces():
+    """services/cache.py namespace'lerinin backend'i, hit oranı ve tahliyeleri"""
+    return cache_stats()
+
+
+@router.delete("/caches/{namespace}")
+def clear_cache_namespace(namespace: str):
+    """Bir cache namespace'ini boşalt"""
+    cache = find_cache(namespace)
+    if cache is None:
+        raise HTTPException(status_code=404, detail="Cache bulunamadı")
+    cache.clear()
+    return {"message": f"{namespace} cache temizlendi"}
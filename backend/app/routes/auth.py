@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, Header
+from fastapi import APIRouter, Depends, HTTPException, Body, Header, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import text, func
 from ..database import get_db
 from .. import models, schemas
 from ..services.email_service import send_password_reset_email
+from ..services.auth_cache import resolve_user
+from ..services.invalidation import invalidate
+from ..services.tokens import InvalidToken, decode_token, issue_token, revoke_token, revoke_user_tokens
+# hash_password / verify_password senkron sürümler; script'ler ve benchmark'lar buradan import ediyor
+from ..services.passwords import (
+    PasswordHasherBusy, hash_password, hash_password_async, needs_rehash, verify_password,
+    verify_password_async,
+)
+from ..services.rate_limit import (
+    FORGOT_ACCOUNT, FORGOT_IP, LOGIN_ACCOUNT, LOGIN_IP, REGISTER_ACCOUNT, REGISTER_IP, RESET_ACCOUNT,
+    RESET_IP, account_ip_key, account_key, enforce, enforce_async,
+)
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
-import hashlib
 import secrets
 import os
 
@@ -14,27 +26,18 @@ router = APIRouter()
 
 # ============== HELPER FUNCTIONS ==============
 
-def hash_password(password: str) -> str:
-    """Şifreyi hash'le"""
-    salt = secrets.token_hex(16)
-    pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-    return f"{salt}${pwd_hash.hex()}"
-
-
-def verify_password(password: str, password_hash: str) -> bool:
-    """Hash'lenmiş şifreyi doğrula"""
-    try:
-        salt, pwd_hash = password_hash.split('$')
-        pwd_check = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-        return pwd_check.hex() == pwd_hash
-    except:
-        return False
+def _hasher_busy() -> HTTPException:
+    """Şifre hash executor'ı dolu: istemci kısa süre sonra tekrar denesin"""
+    return HTTPException(
+        status_code=503,
+        detail="Sunucu yoğun, lütfen birkaç saniye sonra tekrar deneyin",
+        headers={"Retry-After": "1"},
+    )
 
 
-def generate_token(user_id: int) -> str:
-    """JWT token oluştur"""
-    token = secrets.token_urlsafe(32)
-    return f"token_{user_id}_{token}"
+def generate_token(user_id: int, username: str = None) -> str:
+    """İmzalı, süreli JWT oturum token'ı oluştur (bkz. services/tokens.py)"""
+    return issue_token(user_id, username)
 
 
 # ============== AUTH ENDPOINTS ==============
@@ -46,22 +49,41 @@ async def ping():
 
 
 @router.post("/login")
-def login(
+async def login(
+    http_request: Request,
     email: str = Body(...),
     password: str = Body(...),
     db: Session = Depends(get_db)
 ):
-    """Kullanıcı giriş yap"""
+    """
+    Kullanıcı giriş yap
+    PBKDF2 request thread pool'u dışında, ayrı bir executor'da çalışır
+    (services/passwords.py); executor doluysa 503 + Retry-After.
+    IP ve (e-posta, IP) başına deneme sınırı aşılırsa 429 + Retry-After (services/rate_limit.py);
+    başka adreslerden yapılan denemeler hesabı sahibine kilitlemez.
+    """
+    account = account_ip_key(http_request, email)
+    await enforce_async(http_request, (LOGIN_IP, None), (LOGIN_ACCOUNT, account))
+    
     # Kullanıcıyı e-posta ile bul
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = await run_in_threadpool(
+        lambda: db.query(models.User).filter(models.User.email == email).first()
+    )
     
-    if not user or not verify_password(password, user.password_hash):
+    # Kullanıcı yoksa da bir doğrulama yapılır (cevap süresi e-postayı sızdırmasın)
+    try:
+        valid = await verify_password_async(password, user.password_hash if user else None)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    if not user or not valid:
         raise HTTPException(status_code=401, detail="E-posta veya şifre yanlış")
     
-    # Token oluştur
-    token = generate_token(user.user_id)
+    # Başarılı giriş hesabın başarısız deneme sayacını sıfırlar (IP sayacı kalır)
+    LOGIN_ACCOUNT.reset(account)
     
-    return {
+    # Token oluştur
+    token = generate_token(user.user_id, user.username)
+    response = {
         "user": {
             "user_id": user.user_id,
             "id": user.user_id,
@@ -70,16 +92,20 @@ def login(
         },
         "token": token
     }
+    
+    # Eski biçim / farklı iterasyon: şifreyi güncel parametrelerle yeniden hash'le
+    if needs_rehash(user.password_hash):
+        try:
+            user.password_hash = await hash_password_async(password)
+            invalidate(db, "user", user.user_id)
+            await run_in_threadpool(db.commit)
+        except PasswordHasherBusy:
+            pass  # bir sonraki girişte tekrar denenir
+    
+    return response
 
 
-@router.post("/register")
-def register(
-    username: str = Body(...),
-    email: str = Body(...),
-    password: str = Body(...),
-    db: Session = Depends(get_db)
-):
-    """Yeni kullanıcı kaydı"""
+def _check_available(db: Session, username: str, email: str):
     # E-posta zaten kayıtlı mı?
     existing_user = db.query(models.User).filter(models.User.email == email).first()
     if existing_user:
@@ -89,9 +115,9 @@ def register(
     existing_username = db.query(models.User).filter(models.User.username == username).first()
     if existing_username:
         raise HTTPException(status_code=400, detail="Bu kullanıcı adı zaten alınmış")
-    
-    # Yeni kullanıcı oluştur
-    password_hash = hash_password(password)
+
+
+def _create_user(db: Session, username: str, email: str, password_hash: str) -> models.User:
     new_user = models.User(
         username=username,
         email=email,
@@ -102,9 +128,30 @@ def register(
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    return new_user
+
+
+@router.post("/register")
+async def register(
+    http_request: Request,
+    username: str = Body(...),
+    email: str = Body(...),
+    password: str = Body(...),
+    db: Session = Depends(get_db)
+):
+    """Yeni kullanıcı kaydı"""
+    await enforce_async(http_request, (REGISTER_IP, None), (REGISTER_ACCOUNT, account_key(username)))
+    await run_in_threadpool(_check_available, db, username, email)
+    
+    # Şifreyi ayrı executor'da hash'le, sonra kullanıcıyı oluştur
+    try:
+        password_hash = await hash_password_async(password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    new_user = await run_in_threadpool(_create_user, db, username, email, password_hash)
     
     # Token oluştur
-    token = generate_token(new_user.user_id)
+    token = generate_token(new_user.user_id, new_user.username)
     
     return {
         "user": {
@@ -129,21 +176,19 @@ def verify_current_user(
     token = authorization.replace("Bearer ", "")
     
     try:
-        # Token'dan user_id'yi çıkar
-        parts = token.split('_')
-        if len(parts) < 2:
-            raise Exception("Invalid token format")
-        
-        user_id = int(parts[1])
+        # İmza, süre ve iptal listesi; veritabanına gitmez
+        claims = decode_token(token)
         
-        # Kullanıcıyı bul
-        user = db.query(models.User).filter(models.User.user_id == user_id).first()
+        # Kullanıcıyı bul (kısa süreli cache, yoksa veritabanı)
+        user = resolve_user(db, token, claims.user_id)
         if not user:
             raise HTTPException(status_code=401, detail="Token geçersiz")
         
         return user
     except HTTPException:
         raise
+    except InvalidToken as e:
+        raise HTTPException(status_code=401, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=401, detail="Token geçersiz")
 
@@ -160,22 +205,35 @@ def get_current_user(
 
 
 @router.post("/logout")
-def logout():
-    """Kullanıcı çıkış yap"""
+def logout(
+    authorization: str = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Kullanıcı çıkış yap - token'ı süresi dolana kadar iptal listesine ekle"""
+    if authorization and authorization.startswith("Bearer "):
+        try:
+            revoke_token(db, decode_token(authorization.replace("Bearer ", "")))
+            db.commit()
+        except InvalidToken:
+            pass  # zaten geçersiz; çıkış yine başarılı
     return {"message": "Başarıyla çıkış yapıldı"}
 
 
 # ============== PASSWORD RESET ==============
 
 @router.post("/forgot-password")
-def forgot_password(request: schemas.ForgotPasswordRequest, db: Session = Depends(get_db)):
+def forgot_password(
+    request: schemas.ForgotPasswordRequest, http_request: Request, db: Session = Depends(get_db)
+):
     """Kullanıcı e-posta ile şifre sıfırlama linki al"""
+    # Sınır, kullanıcı aramasından ve e-posta gönderiminden önce (e-posta bombalamasına karşı)
+    enforce(http_request, (FORGOT_IP, None), (FORGOT_ACCOUNT, account_key(request.email)))
     try:
         email = request.email.strip()
         
         # E-postayı users tablosundan ara (case-insensitive)
         user = db.query(models.User).filter(
-            models.User.email.ilike(email)
+            func.lower(models.User.email) == email.lower()
         ).first()
         
         if not user:
@@ -204,9 +262,26 @@ def forgot_password(request: schemas.ForgotPasswordRequest, db: Session = Depend
         raise HTTPException(status_code=500, detail="Bir hata oluştu")
 
 
+def _find_user_by_email(db: Session, email: str):
+    # E-postayı users tablosundan ara (case-insensitive)
+    return db.query(models.User).filter(
+        func.lower(models.User.email) == email.lower()
+    ).first()
+
+
+def _save_new_password(db: Session, user: models.User, password_hash: str):
+    user.password_hash = password_hash
+    invalidate(db, "user", user.user_id)
+    revoke_user_tokens(db, user.user_id)  # açık oturumlar kapansın
+    db.commit()
+
+
 @router.post("/reset-password")
-def reset_password(request: schemas.ResetPasswordRequest, db: Session = Depends(get_db)):
+async def reset_password(
+    request: schemas.ResetPasswordRequest, http_request: Request, db: Session = Depends(get_db)
+):
     """Yeni şifre belirle"""
+    await enforce_async(http_request, (RESET_IP, None), (RESET_ACCOUNT, account_key(request.email)))
     try:
         email = request.email.strip()
         token = request.token.strip()
@@ -216,17 +291,17 @@ def reset_password(request: schemas.ResetPasswordRequest, db: Session = Depends(
         if len(new_password) < 6:
             raise HTTPException(status_code=400, detail="Şifre en az 6 karakter olmalı")
         
-        # E-postayı users tablosundan ara (case-insensitive)
-        user = db.query(models.User).filter(
-            models.User.email.ilike(email)
-        ).first()
+        user = await run_in_threadpool(_find_user_by_email, db, email)
         
         if not user:
             raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
         
-        # Şifreyi hash'le ve güncelle
-        user.password_hash = hash_password(new_password)
-        db.commit()
+        # Şifreyi ayrı executor'da hash'le ve güncelle
+        try:
+            password_hash = await hash_password_async(new_password)
+        except PasswordHasherBusy:
+            raise _hasher_busy()
+        await run_in_threadpool(_save_new_password, db, user, password_hash)
         
         print(f"✅ Şifre sıfırlama başarılı: {email}")
         
@@ -2,7 +2,11 @@ from fastapi import Depends, HTTPException, status, Header
 from sqlalchemy.orm import Session
 from ..database import get_db
 from .. import models
+from ..services.auth_cache import resolve_user
+from ..services.tokens import InvalidToken, TokenClaims, decode_token
 from typing import Optional
+import hmac
+import os
 
 async def get_current_user(
     authorization: Optional[str] = Header(None),
@@ -10,7 +14,7 @@ async def get_current_user(
 ):
     """
     Authorization header'dan token al ve kullanıcıyı getir
-    Token format: "Bearer token_user_id_random"
+    Token format: "Bearer <imzalı JWT>" (services/tokens.py)
     """
     if not authorization or authorization.strip() in ["", "Bearer", "Bearer null", "Bearer undefined", "null", "undefined"]:
         raise HTTPException(
@@ -19,7 +23,7 @@ async def get_current_user(
         )
     
     try:
-        # "Bearer token_123_abc" formatını parse et
+        # "Bearer <token>" formatını parse et
         parts = authorization.strip().split(" ")
         if len(parts) != 2:
             raise HTTPException(
@@ -41,20 +45,17 @@ async def get_current_user(
                 detail="Oturum açılmamış",
             )
         
-        # Token'ı parse et: "token_<user_id>_<random>"
-        parts = token.split("_")
-        if len(parts) < 2 or parts[0] != "token":
+        # İmzalı token'ı doğrula (imza, süre, iptal listesi)
+        try:
+            claims = decode_token(token)
+        except InvalidToken as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Geçersiz token formatı",
+                detail=str(e),
             )
         
-        user_id = int(parts[1])
-        
-        # Kullanıcıyı veritabanından al
-        user = db.query(models.User).filter(
-            models.User.user_id == user_id
-        ).first()
+        # Kullanıcıyı al (kısa süreli cache, yoksa veritabanı)
+        user = resolve_user(db, token, claims.user_id)
         
         if not user:
             raise HTTPException(
@@ -99,14 +100,70 @@ async def get_current_user_optional(
         if scheme.lower() != "bearer" or token in ["null", "undefined", ""]:
             return None
         
-        token_parts = token.split("_")
-        if len(token_parts) < 2 or token_parts[0] != "token":
-            return None
-        
-        user_id = int(token_parts[1])
-        user = db.query(models.User).filter(
-            models.User.user_id == user_id
-        ).first()
-        return user
+        claims = decode_token(token)
+        return resolve_user(db, token, claims.user_id)
     except Exception:
         return None
+
+
+def _bearer_claims(authorization: Optional[str]) -> Optional[TokenClaims]:
+    """Header yoksa None; varsa ve geçersizse 401"""
+    if not authorization or authorization.strip() in ["", "Bearer", "Bearer null", "Bearer undefined", "null", "undefined"]:
+        return None
+    parts = authorization.strip().split(" ")
+    if len(parts) != 2 or parts[0].lower() != "bearer":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Geçersiz authorization header formatı",
+        )
+    try:
+        return decode_token(parts[1])
+    except InvalidToken as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+        )
+
+
+def get_token_claims(authorization: Optional[str] = Header(None)) -> TokenClaims:
+    """
+    Sadece token claim'leri (user_id, username) - veritabanına gitmez.
+    Kullanıcı satırına ihtiyaç duymayan endpoint'ler için get_current_user yerine.
+    """
+    claims = _bearer_claims(authorization)
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authorization header gereklidir",
+        )
+    return claims
+
+
+def get_token_claims_optional(authorization: Optional[str] = Header(None)) -> Optional[TokenClaims]:
+    """
+    Opsiyonel claim'ler (get_current_user_optional gibi):
+    token yoksa / geçersizse None döner, hata fırlatmaz
+    """
+    try:
+        return _bearer_claims(authorization)
+    except HTTPException:
+        return None
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """
+    Admin endpoint'leri için X-Admin-Token header'ını ADMIN_TOKEN env ile karşılaştır.
+    ADMIN_TOKEN tanımlı değilse admin endpoint'leri tamamen kapalıdır.
+    """
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoint'leri devre dışı (ADMIN_TOKEN tanımlı değil)",
+        )
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Geçersiz admin token",
+        )
+    return True
@@ -1,24 +1,24 @@
-from fastapi import APIRouter, Depends, Header, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from ..database import get_db
-from .auth import verify_current_user
+from sqlalchemy import text, bindparam
+from ..database import get_db, SessionLocal
+from .deps import get_token_claims, get_token_claims_optional
 from .. import models
-import requests
+from ..services.external_api import provider_get, TMDB_BASE_URL
+from ..services.json_response import dumps
+from ..services.feed_cache import FEED_CACHE_ENABLED, feed_cache
+from ..services import feed_events
+from ..services.tokens import InvalidToken, TokenClaims, decode_token, issue_token
+import asyncio
 import os
+from datetime import datetime, timezone
+from typing import Optional
 
 router = APIRouter()
 
 
-def get_optional_current_user(
-    authorization: str = Header(None),
-    db: Session = Depends(get_db)
-):
-    """Allow anonymous feed reads while still validating supplied tokens."""
-    if not authorization:
-        return None
-    return verify_current_user(authorization, db)
-
 def enrich_poster_if_missing(poster_url: str, title: str, external_api_source: str, external_api_id: str) -> str:
     """
     If poster_url is empty, try to fetch it from external APIs
@@ -31,8 +31,8 @@ def enrich_poster_if_missing(poster_url: str, title: str, external_api_source: s
         try:
             api_key = os.getenv("API_KEY")
             if api_key:
-                url = f"https://api.themoviedb.org/3/movie/{external_api_id}"
-                r = requests.get(url, params={"api_key": api_key}, timeout=3)
+                url = f"{TMDB_BASE_URL}/movie/{external_api_id}"
+                r = provider_get("tmdb", url, params={"api_key": api_key}, timeout=3)
                 if r.status_code == 200:
                     data = r.json()
                     poster_path = data.get('poster_path')
@@ -47,7 +47,7 @@ def enrich_poster_if_missing(poster_url: str, title: str, external_api_source: s
             api_key = os.getenv("API_KEY")
             if api_key and external_api_source == 'tmdb':
                 params = {"api_key": api_key, "query": title}
-                r = requests.get("https://api.themoviedb.org/3/search/movie", params=params, timeout=3)
+                r = provider_get("tmdb", f"{TMDB_BASE_URL}/search/movie", params=params, timeout=3)
                 if r.status_code == 200:
                     results = r.json().get("results", [])
                     if results and results[0].get("poster_path"):
@@ -77,140 +77,551 @@ def debug_items_with_posters(db: Session = Depends(get_db)):
     except Exception as e:
         return {"error": str(e)}
 
+
+# Feed'de gösterilen aktivite tipleri
+FEED_ACTIVITY_TYPES = ('review', 'rating', 'like_review', 'like_item', 'comment_review')
+REVIEW_COUNTER_TYPES = ('review', 'like_review')
+ITEM_COUNTER_TYPES = ('rating', 'like_item')
+
+# Aynı review / item'a aynı zaman penceresinde gelen beğeniler tek satırda toplanır
+# ("X ve N kişi daha beğendi"). 0 = toplama kapalı.
+FEED_AGGREGATION_WINDOW_HOURS = float(os.getenv("FEED_AGGREGATION_WINDOW_HOURS", "24"))
+FEED_SAMPLE_ACTORS = int(os.getenv("FEED_SAMPLE_ACTORS", "3"))
+# Toplamalı sayfa için index'ten okunan satır: (skip + limit) * FEED_AGGREGATION_SCAN_FACTOR
+FEED_AGGREGATION_SCAN_FACTOR = int(os.getenv("FEED_AGGREGATION_SCAN_FACTOR", "8"))
+# Tek bir toplamalı sayfa için okunabilecek en fazla satır; aşılırsa sayfa kısa döner
+FEED_AGGREGATION_MAX_SCAN = int(os.getenv("FEED_AGGREGATION_MAX_SCAN", "5000"))
+AGGREGATED_TYPES = ('like_review', 'like_item')
+
+
+def _expanding(sql: str, *names):
+    return text(sql).bindparams(*(bindparam(name, expanding=True) for name in names))
+
+
+_FOLLOWER_FILTER = "a.user_id IN (SELECT followee_id FROM follows WHERE follower_id = :uid) AND"
+
+# Faz 1: sadece sayfadaki activity_id'ler (activities üzerindeki covering index'ten)
+_FEED_PAGE_SQL = """
+    SELECT a.activity_id
+    FROM activities a
+    WHERE {follower_filter} a.activity_type IN :types
+    ORDER BY a.created_at DESC, a.activity_id DESC
+    LIMIT :limit OFFSET :skip
+"""
+
+# Faz 1 (toplamalı): aynı sayfa sorgusu (covering index), gruplama için hedef
+# kolonları sadece seçilen satırlar için okunur. Sonraki turlar son okunan
+# (created_at, activity_id)'den devam eder (keyset; OFFSET baştan okurdu).
+_FEED_SCAN_SQL = """
+    SELECT x.activity_id, x.user_id, x.activity_type, x.review_id, x.item_id, x.created_at
+    FROM activities x
+    WHERE x.activity_id IN (
+        SELECT a.activity_id
+        FROM activities a
+        WHERE {follower_filter} a.activity_type IN :types {after_cursor}
+        ORDER BY a.created_at DESC, a.activity_id DESC
+        LIMIT :limit
+    )
+    ORDER BY x.created_at DESC, x.activity_id DESC
+"""
+
+_AFTER_CURSOR = "AND (a.created_at, a.activity_id) < (:cursor_at, :cursor_id)"
+
+# Sayfadaki beğeni gruplarının tüm üyeleri (kesin actor_count ve en yeni aktörler için).
+# Hedef (review_id / item_id) index'inden sürülür; takip filtresi EXISTS ile satır başına.
+_GROUP_MEMBERS_SQL = """
+    SELECT a.activity_id, a.activity_type, a.review_id, a.item_id, a.user_id, a.created_at
+    FROM activities a
+    WHERE a.activity_type = 'like_review' AND a.review_id IN :review_ids
+    AND a.created_at >= :since AND a.created_at < :until {followee_exists}
+    UNION ALL
+    SELECT a.activity_id, a.activity_type, a.review_id, a.item_id, a.user_id, a.created_at
+    FROM activities a
+    WHERE a.activity_type = 'like_item' AND a.item_id IN :item_ids
+    AND a.created_at >= :since AND a.created_at < :until {followee_exists}
+    ORDER BY created_at DESC, activity_id DESC
+"""
+
+_FOLLOWEE_EXISTS = "AND EXISTS (SELECT 1 FROM follows f WHERE f.follower_id = :uid AND f.followee_id = a.user_id)"
+
+_page_queries = {}
+
+
+def _feed_query(sql: str, follower: bool, *expanding, after_cursor: bool = False):
+    key = (sql, follower, after_cursor)
+    query = _page_queries.get(key)
+    if query is None:
+        query = _page_queries[key] = _expanding(sql.format(
+            follower_filter=_FOLLOWER_FILTER if follower else "",
+            followee_exists=_FOLLOWEE_EXISTS if follower else "",
+            after_cursor=_AFTER_CURSOR if after_cursor else "",
+        ), *expanding)
+    return query
+
+
+def _feed_page_query(follower: bool):
+    """Toplamasız faz 1 sorgusu (sadece activity_id)"""
+    return _feed_query(_FEED_PAGE_SQL, follower, "types")
+
+
+def _epoch(value) -> float:
+    """created_at -> epoch saniyesi (SQLite string döndürür; naive değerler UTC kabul edilir)"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _group_key(row, window: int):
+    """Beğeniler (tip, hedef, zaman kovası) ile, diğer aktiviteler kendi id'leriyle gruplanır"""
+    if row.activity_type == 'like_review':
+        return (row.activity_type, row.review_id, int(_epoch(row.created_at) // window))
+    if row.activity_type == 'like_item':
+        return (row.activity_type, row.item_id, int(_epoch(row.created_at) // window))
+    return ('activity', row.activity_id, 0)
+
+
+def _feed_page(db: Session, user_id: int, follower: bool, limit: int, skip: int):
+    """
+    Faz 1: sayfadaki activity_id'ler ve (toplama açıksa) grup başına aktörler.
+    Dönüş: (activity_ids, groups) - groups: activity_id -> en yeniden eskiye actor id'leri
+
+    Toplama açıkken created_at index'i sırasıyla sınırlı sayıda satır okunur ve
+    gruplar ilk görüldükleri sırayla (= en yeni üyelerine göre) sayfalanır; yeterli
+    grup çıkmazsa okuma kaldığı yerden (keyset) devam eder. Toplam okuma
+    FEED_AGGREGATION_MAX_SCAN satırla sınırlıdır; sınıra gelinirse sayfa kısa
+    döner (beğeniler çok yoğun toplanıyorsa tablonun tamamı okunmaz). Grubun
+    temsilcisi en yeni aktivitesidir. Sayfadaki beğeni gruplarının tüm üyeleri (tarama dışında
+    kalan eski üyeler dahil) tek bir ek sorguyla okunur.
+    """
+    params = {"types": list(FEED_ACTIVITY_TYPES), "limit": limit, "skip": skip}
+    if follower:
+        params["uid"] = user_id
+    if FEED_AGGREGATION_WINDOW_HOURS <= 0:
+        return [row[0] for row in db.execute(_feed_page_query(follower), params)], {}
+
+    window = max(int(FEED_AGGREGATION_WINDOW_HOURS * 3600), 1)
+    wanted = skip + limit
+    heads = {}  # grup anahtarı -> temsilci activity_id (ilk görülme sırası korunur)
+    scanned = 0
+    batch = max(wanted * FEED_AGGREGATION_SCAN_FACTOR, 1)
+    scan_params = {key: value for key, value in params.items() if key != "skip"}
+    scan_query = _feed_query(_FEED_SCAN_SQL, follower, "types")
+    while len(heads) < wanted and scanned < FEED_AGGREGATION_MAX_SCAN:
+        batch = min(batch, FEED_AGGREGATION_MAX_SCAN - scanned)
+        rows = db.execute(scan_query, {**scan_params, "limit": batch}).fetchall()
+        for row in rows:
+            heads.setdefault(_group_key(row, window), row.activity_id)
+        scanned += len(rows)
+        if len(rows) < batch:
+            break
+        last = rows[-1]
+        scan_params.update(cursor_at=last.created_at, cursor_id=last.activity_id)
+        scan_query = _feed_query(_FEED_SCAN_SQL, follower, "types", after_cursor=True)
+        batch *= 4
+
+    page = list(heads.items())[skip:wanted]
+    activity_ids = [activity_id for _, activity_id in page]
+
+    # Sayfadaki beğeni gruplarının üyeleri
+    like_groups = {key: activity_id for key, activity_id in page if key[0] in AGGREGATED_TYPES}
+    buckets = [key[2] for key in like_groups]
+    member_params = {
+        "review_ids": [key[1] for key in like_groups if key[0] == 'like_review'],
+        "item_ids": [key[1] for key in like_groups if key[0] == 'like_item'],
+        "since": datetime.fromtimestamp(min(buckets) * window, timezone.utc) if buckets else None,
+        "until": datetime.fromtimestamp((max(buckets) + 1) * window, timezone.utc) if buckets else None,
+    }
+    if follower:
+        member_params["uid"] = user_id
+    if db.get_bind().dialect.name == "sqlite" and buckets:
+        # SQLite created_at'i naive UTC string olarak saklar
+        member_params["since"] = member_params["since"].replace(tzinfo=None)
+        member_params["until"] = member_params["until"].replace(tzinfo=None)
+    groups = {}
+    members_query = _feed_query(_GROUP_MEMBERS_SQL, follower, "review_ids", "item_ids")
+    for row in db.execute(members_query, member_params):
+        head = like_groups.get(_group_key(row, window))
+        if head is None:
+            continue
+        actors = groups.setdefault(head, [])
+        if row.user_id not in actors:
+            actors.append(row.user_id)
+    return activity_ids, {head: actors for head, actors in groups.items() if len(actors) > 1}
+
+
+# Faz 2: sayfadaki entity'ler IN (...) ile toplu yüklenir.
+# Rating aktiviteleri için puan ve (review_id yoksa) son review sadece sayfadaki
+# satırlar için index'li (user_id, item_id) lookup'larıyla hesaplanır.
+_ACTIVITIES_SQL = _expanding("""
+    SELECT
+        a.activity_id, a.user_id, a.activity_type, a.item_id, a.review_id,
+        a.list_id, a.related_user_id, a.created_at,
+        CASE WHEN a.activity_type = 'rating' AND a.review_id IS NULL THEN (
+            SELECT rev.review_id FROM reviews rev
+            WHERE rev.user_id = a.user_id AND rev.item_id = a.item_id
+            ORDER BY rev.created_at DESC LIMIT 1
+        ) END AS latest_review_id,
+        CASE WHEN a.activity_type = 'rating' THEN (
+            SELECT rat.score FROM ratings rat
+            WHERE rat.user_id = a.user_id AND rat.item_id = a.item_id
+            ORDER BY rat.rating_id DESC LIMIT 1
+        ) END AS rating_score
+    FROM activities a
+    WHERE a.activity_id IN :ids
+""", "ids")
+
+_REVIEWS_SQL = _expanding("""
+    SELECT review_id, user_id, item_id, review_text, rating, source_id
+    FROM reviews WHERE review_id IN :ids
+""", "ids")
+
+_USERS_SQL = _expanding("SELECT user_id, username, avatar_url FROM users WHERE user_id IN :ids", "ids")
+
+_ITEMS_SQL = _expanding("""
+    SELECT item_id, title, item_type, poster_url, year, description, external_api_source, external_api_id
+    FROM items WHERE item_id IN :ids
+""", "ids")
+
+# Beğeni / yorum sayaçları ve current user'ın beğenileri tek statement'ta
+_COUNTERS_SQL = _expanding("""
+    SELECT 'review_likes' AS kind, review_id AS target_id, COUNT(*) AS total,
+           MAX(CASE WHEN user_id = :uid THEN 1 ELSE 0 END) AS mine
+    FROM review_likes WHERE review_id IN :review_ids GROUP BY review_id
+    UNION ALL
+    SELECT 'item_likes', item_id, COUNT(*), MAX(CASE WHEN user_id = :uid THEN 1 ELSE 0 END)
+    FROM item_likes WHERE item_id IN :item_ids GROUP BY item_id
+    UNION ALL
+    SELECT 'review_comments', review_id, COUNT(*), 0
+    FROM review_comments WHERE review_id IN :review_ids GROUP BY review_id
+""", "review_ids", "item_ids")
+
+
+def _hydrate_feed(db: Session, activity_ids: list, user_id: int, groups: dict = None) -> list:
+    """
+    Faz 2: sayfadaki aktivitelerin kullanıcı, item, review ve sayaçlarını
+    toplu yükle ve eski tek-sorgu feed'iyle aynı anahtarlarla satırları kur.
+    Her entity sayfada kaç kez geçerse geçsin bir kez yüklenir.
+
+    groups (faz 1'den) toplanmış beğeni satırlarının aktörlerini taşır; bu
+    satırlara actor_count ve sample_actors eklenir.
+    """
+    groups = groups or {}
+    rows = {r.activity_id: dict(r._mapping) for r in db.execute(_ACTIVITIES_SQL, {"ids": activity_ids})}
+    activities = [rows[activity_id] for activity_id in activity_ids if activity_id in rows]
+    if not activities:
+        return []
+
+    # --- reviews: aktivitenin referans verdiği review'lar ---
+    review_ids = {a["review_id"] for a in activities if a["review_id"] is not None}
+    reviews = {}
+    if review_ids:
+        reviews = {r.review_id: dict(r._mapping) for r in db.execute(_REVIEWS_SQL, {"ids": list(review_ids)})}
+
+    # --- users: aktiviteyi yapanlar + review sahipleri ---
+    user_ids = {a["user_id"] for a in activities} | {r["user_id"] for r in reviews.values()}
+    for actors in groups.values():
+        user_ids.update(actors[:FEED_SAMPLE_ACTORS])
+    users = {r.user_id: r for r in db.execute(_USERS_SQL, {"ids": list(user_ids)})}
+
+    # --- items: aktivitenin item'ı + like_review için review'un item'ı ---
+    item_ids = {a["item_id"] for a in activities if a["item_id"] is not None}
+    item_ids |= {r["item_id"] for r in reviews.values() if r["item_id"] is not None}
+    items = {}
+    if item_ids:
+        items = {r.item_id: r for r in db.execute(_ITEMS_SQL, {"ids": list(item_ids)})}
+
+    # --- sayaçlar ---
+    counter_review_ids = review_ids
+    counter_item_ids = {
+        a["item_id"] for a in activities if a["activity_type"] in ITEM_COUNTER_TYPES and a["item_id"] is not None
+    }
+    counters = {}
+    if counter_review_ids or counter_item_ids:
+        params = {"uid": user_id, "review_ids": list(counter_review_ids), "item_ids": list(counter_item_ids)}
+        for r in db.execute(_COUNTERS_SQL, params):
+            counters[(r.kind, r.target_id)] = (r.total, r.mine)
+
+    result = []
+    for a in activities:
+        actor = users.get(a["user_id"])
+        if actor is None:
+            # Eski sorgudaki JOIN users ile aynı: kullanıcısı olmayan aktivite gösterilmez
+            continue
+        activity_type = a["activity_type"]
+        review = reviews.get(a["review_id"]) if a["review_id"] is not None else None
+        if activity_type == 'like_review':
+            # Beğenilen review'un item'ı gösterilir
+            item = items.get(review["item_id"]) if review else None
+        else:
+            item = items.get(a["item_id"])
+
+        review_id = a["review_id"] if a["review_id"] is not None else a["latest_review_id"]
+
+        like_count = 0
+        is_liked_by_user = 0
+        is_item_liked_by_user = 0
+        if activity_type in REVIEW_COUNTER_TYPES:
+            like_count, is_liked_by_user = counters.get(('review_likes', a["review_id"]), (0, 0))
+        elif activity_type in ITEM_COUNTER_TYPES:
+            like_count, is_item_liked_by_user = counters.get(('item_likes', a["item_id"]), (0, 0))
+        comment_count = counters.get(('review_comments', a["review_id"]), (0, 0))[0]
+
+        review_owner = users.get(review["user_id"]) if review else None
+        review_text = (review["review_text"] if review else None) or ''
+        # Temsilci aktivitenin sahibi her zaman ilk örnek aktördür
+        actors = [a["user_id"]] + [u for u in groups.get(a["activity_id"], ()) if u != a["user_id"]]
+        sample_actors = [
+            {"user_id": users[actor_id].user_id, "username": users[actor_id].username,
+             "avatar_url": users[actor_id].avatar_url}
+            for actor_id in actors[:FEED_SAMPLE_ACTORS] if actor_id in users
+        ]
+        result.append({
+            "activity_id": a["activity_id"],
+            "user_id": a["user_id"],
+            "username": actor.username,
+            "avatar_url": actor.avatar_url,
+            "activity_type": activity_type,
+            "item_id": a["item_id"],
+            "review_id": review_id,
+            "list_id": a["list_id"],
+            "related_user_id": a["related_user_id"],
+            "created_at": a["created_at"],
+            "title": (item.title if item else None) or '',
+            "item_type": (item.item_type if item else None) or '',
+            "poster_url": (item.poster_url if item else None) or None,
+            "year": (item.year if item else None) or 0,
+            "description": (item.description if item else None) or '',
+            "review_text": review_text,
+            "review_rating": (review["rating"] if review else None) or 0,
+            "rating_score": a["rating_score"] or 0,
+            "like_count": like_count,
+            "comment_count": comment_count,
+            "is_liked_by_user": is_liked_by_user,
+            "is_item_liked_by_user": is_item_liked_by_user,
+            "review_owner_username": (review_owner.username if review_owner else None) or '',
+            "referenced_review_text": review_text,
+            "source_id": (review["source_id"] if review else None) or '',
+            "external_api_source": (item.external_api_source if item else None) or '',
+            "external_api_id": (item.external_api_id if item else None) or '',
+            "actor_count": len(actors),
+            "sample_actors": sample_actors,
+        })
+    return result
+
+
+def _enrich_posters(activities: list):
+    """Enrich poster_url if missing (aynı item için sayfa içinde bir kez)"""
+    enriched = {}
+    for activity in activities:
+        if not activity.get('poster_url') or activity['poster_url'] == '':
+            key = (activity.get('title', ''), activity.get('external_api_source', ''), activity.get('external_api_id', ''))
+            if key not in enriched:
+                enriched[key] = enrich_poster_if_missing(
+                    activity.get('poster_url', ''),
+                    activity.get('title', ''),
+                    activity.get('external_api_source', ''),
+                    activity.get('external_api_id', '')
+                )
+            activity['poster_url'] = enriched[key]
+
+
 @router.get("/")
 def get_feed(
     skip: int = 0,
     limit: int = 15,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_optional_current_user)
+    # Süresi dolmuş / iptal edilmiş token'la feed misafir olarak döner, 401 değil
+    claims: Optional[TokenClaims] = Depends(get_token_claims_optional)
 ):
     """
     Feed = takip edilen kullanıcıların aktiviteleri (activities tablosundan)
     Activity types: review, rating, follow, like_review, like_item, comment_review, list_add
     
-    user_id artık token'dan otomatik alınıyor
+    user_id token claim'lerinden alınıyor (kullanıcı sorgusu yok)
+
+    İki fazlı: önce sayfadaki activity_id'ler dar bir index sorgusuyla seçilir,
+    sonra kullanıcı / item / review / rating / sayaçlar IN (...) ile toplu yüklenir
+    (_hydrate_feed). Satır anahtarları eski tek-sorgu feed'iyle aynıdır.
+
+    Aynı review / item'a FEED_AGGREGATION_WINDOW_HOURS içinde gelen beğeniler tek
+    satırda döner: actor_count (toplam kişi) ve sample_actors (en yeni
+    FEED_SAMPLE_ACTORS kişi). Toplanmamış satırlarda actor_count = 1.
+
+    İlk FEED_CACHE_PAGES sayfa kullanıcı başına cache'lenir (services/feed_cache.py);
+    takip edilenlerin yeni aktivitesi, sayfadaki review / item'ların sayaçları
+    ve follow / unfollow cache'i commit sonrası geçersiz kılar.
     """
     
-    user_id = current_user.user_id if current_user else 0
+    user_id = claims.user_id if claims else 0
+
+    cacheable = FEED_CACHE_ENABLED and feed_cache.cacheable(skip, limit)
+    if cacheable:
+        body = feed_cache.get(user_id, skip, limit)
+        if body is not None:
+            return Response(body, media_type="application/json")
+        version = feed_cache.begin(user_id)
     
-    query = text("""
-        SELECT 
-            a.activity_id,
-            a.user_id,
-            u.username,
-            u.avatar_url,
-            a.activity_type,
-            a.item_id,
-            CASE 
-                WHEN a.review_id IS NOT NULL THEN a.review_id
-                WHEN a.activity_type = 'rating' THEN (
-                    SELECT rev.review_id FROM reviews rev 
-                    WHERE rev.user_id = a.user_id AND rev.item_id = a.item_id 
-                    ORDER BY rev.created_at DESC LIMIT 1
-                )
-                ELSE a.review_id
-            END AS review_id,
-            a.list_id,
-            a.related_user_id,
-            a.created_at,
-            -- Review/Item details (review veya rating için)
-            CASE 
-                WHEN a.activity_type = 'like_review' THEN COALESCE(NULLIF(ri.title, ''), NULLIF(ri.title, 'Unknown'), '')
-                ELSE COALESCE(NULLIF(i.title, ''), NULLIF(i.title, 'Unknown'), '')
-            END AS title,
-            CASE 
-                WHEN a.activity_type = 'like_review' THEN COALESCE(ri.item_type, '')
-                ELSE COALESCE(i.item_type, '')
-            END AS item_type,
-            CASE 
-                WHEN a.activity_type = 'like_review' THEN NULLIF(ri.poster_url, '')
-                ELSE NULLIF(i.poster_url, '')
-            END AS poster_url,
-            CASE 
-                WHEN a.activity_type = 'like_review' THEN COALESCE(ri.year, 0)
-                ELSE COALESCE(i.year, 0)
-            END AS year,
-            CASE 
-                WHEN a.activity_type = 'like_review' THEN COALESCE(ri.description, '')
-                ELSE COALESCE(i.description, '')
-            END AS description,
-            -- Review details (review ise)
-            COALESCE(r.review_text, '') AS review_text,
-            COALESCE(r.rating, 0) AS review_rating,
-            -- Rating details (rating ise) - ratings tablosundan direct
-            CASE 
-                WHEN a.activity_type = 'rating' THEN COALESCE(rat.score, 0)
-                ELSE 0
-            END AS rating_score,
-            -- Beğeni sayısı (review için)
-            CASE
-                WHEN a.activity_type IN ('review', 'like_review') THEN
-                    COALESCE((SELECT COUNT(*) FROM review_likes WHERE review_id = a.review_id), 0)
-                WHEN a.activity_type IN ('rating', 'like_item') THEN
-                    COALESCE((SELECT COUNT(*) FROM item_likes WHERE item_id = a.item_id), 0)
-                ELSE 0
-            END AS like_count,
-            -- Yorum sayısı
-            COALESCE((SELECT COUNT(*) FROM review_comments WHERE review_id = a.review_id), 0) AS comment_count,
-            -- Current user'ın beğenip beğenmediği (review için)
-            CASE 
-                WHEN a.activity_type IN ('review', 'like_review') THEN 
-                    COALESCE((SELECT 1 FROM review_likes WHERE review_id = a.review_id AND user_id = :uid LIMIT 1), 0)
-                ELSE 0
-            END AS is_liked_by_user,
-            -- Current user'ın beğenip beğenmediği (item için)
-            CASE 
-                WHEN a.activity_type IN ('rating', 'like_item') THEN 
-                    COALESCE((SELECT 1 FROM item_likes WHERE item_id = a.item_id AND user_id = :uid LIMIT 1), 0)
-                ELSE 0
-            END AS is_item_liked_by_user,
-            -- Yorum yapılan review'un sahibinin username'i (comment_review ve like_review için)
-            COALESCE(ru.username, '') AS review_owner_username,
-            -- Yorum yapılan review'un text'i (comment_review ve like_review için)
-            COALESCE(r.review_text, '') AS referenced_review_text,
-            -- API items'in source_id'si (metadata referansı)
-            COALESCE(r.source_id, '') AS source_id,
-            -- External API info for poster enrichment
-            CASE 
-                WHEN a.activity_type = 'like_review' THEN COALESCE(ri.external_api_source, '')
-                ELSE COALESCE(i.external_api_source, '')
-            END AS external_api_source,
-            CASE 
-                WHEN a.activity_type = 'like_review' THEN COALESCE(ri.external_api_id, '')
-                ELSE COALESCE(i.external_api_id, '')
-            END AS external_api_id
-        FROM activities a
-        JOIN users u ON u.user_id = a.user_id
-        LEFT JOIN items i ON i.item_id = a.item_id
-        LEFT JOIN reviews r ON r.review_id = a.review_id
-        LEFT JOIN items ri ON ri.item_id = r.item_id
-        LEFT JOIN ratings rat ON rat.user_id = a.user_id AND rat.item_id = a.item_id
-        LEFT JOIN users ru ON ru.user_id = r.user_id
-        WHERE (:guest = 1 OR a.user_id IN (
-            SELECT followee_id FROM follows WHERE follower_id = :uid
-        ))
-        AND a.activity_type IN ('review', 'rating', 'like_review', 'like_item', 'comment_review')
-        ORDER BY a.created_at DESC
-        LIMIT :limit OFFSET :skip;
-    """)
-
-    result = db.execute(query, {
-        "uid": user_id,
-        "guest": 1 if current_user is None else 0,
-        "limit": limit,
-        "skip": skip
-    }).fetchall()
-    activities = [dict(r._mapping) for r in result]
+    activity_ids, groups = _feed_page(db, user_id, claims is not None, limit, skip)
+    activities = _hydrate_feed(db, activity_ids, user_id, groups) if activity_ids else []
     
-    # Enrich poster_url if missing
-    for activity in activities:
-        if not activity.get('poster_url') or activity['poster_url'] == '':
-            poster = enrich_poster_if_missing(
-                activity.get('poster_url', ''),
-                activity.get('title', ''),
-                activity.get('external_api_source', ''),
-                activity.get('external_api_id', '')
-            )
-            activity['poster_url'] = poster
+    _enrich_posters(activities)
     
-    return activities
+    # Satırlar DB'den geliyor; jsonable_encoder turunu atla
+    body = dumps(activities)
+    if cacheable:
+        feed_cache.put(
+            user_id, skip, limit, body,
+            review_ids={a["review_id"] for a in activities if a["review_id"]},
+            item_ids={a["item_id"] for a in activities if a["item_id"]},
+            version=version,
+        )
+    return Response(body, media_type="application/json")
+
+
+# ============ CANLI AKIŞ (SSE) ============
+
+# Yeniden bağlanınca kaçırılanlar: since'ten sonraki en yeni aktiviteler
+_CATCH_UP_SQL = """
+    SELECT a.activity_id
+    FROM activities a
+    WHERE {follower_filter} a.activity_type IN :types AND a.activity_id > :since
+    ORDER BY a.activity_id DESC
+    LIMIT :limit
+"""
+
+
+def _stream_claims(token: str, authorization: str) -> Optional[TokenClaims]:
+    """URL'deki token sadece kısa ömürlü stream token'ı olabilir; header'da oturum token'ı"""
+    if token:
+        try:
+            return decode_token(token, scope=feed_events.STREAM_TOKEN_SCOPE)
+        except InvalidToken as e:
+            raise HTTPException(status_code=401, detail=str(e))
+    if authorization:
+        return get_token_claims(authorization)
+    return None
+
+
+def _stream_subscriber(claims: Optional[TokenClaims]):
+    """(user_id, followees) - misafir için (0, None): tüm aktiviteler"""
+    if claims is None:
+        return 0, None
+    db = SessionLocal()
+    try:
+        followees = [row[0] for row in db.query(models.Follow.followee_id).filter(
+            models.Follow.follower_id == claims.user_id
+        )]
+        return claims.user_id, followees
+    finally:
+        db.close()
+
+
+def _stream_rows(user_id: int, activity_ids: list = None, since: int = None) -> list:
+    """Yeni aktiviteleri feed satırlarıyla aynı şekilde kur (eskiden yeniye)"""
+    db = SessionLocal()
+    try:
+        if activity_ids is None:
+            params = {"types": list(FEED_ACTIVITY_TYPES), "since": since, "limit": feed_events.FEED_STREAM_CATCHUP_LIMIT}
+            if user_id:
+                params["uid"] = user_id
+            activity_ids = [row[0] for row in db.execute(_feed_query(_CATCH_UP_SQL, bool(user_id), "types"), params)]
+        if not activity_ids:
+            return []
+        rows = _hydrate_feed(db, activity_ids, user_id)
+    finally:
+        db.close()
+    _enrich_posters(rows)
+    rows.sort(key=lambda row: row["activity_id"])
+    return rows
+
+
+def _sse(event: str, data: bytes, event_id: int = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: ".encode() + data + b"\n\n"
+
+
+async def _feed_stream(request: Request, subscription, user_id: int, cursor: int):
+    heartbeat = feed_events.FEED_STREAM_HEARTBEAT_S
+    try:
+        yield b"retry: 5000\n\n"
+        if cursor:
+            for row in await run_in_threadpool(_stream_rows, user_id, None, cursor):
+                cursor = max(cursor, row["activity_id"])
+                yield _sse("activity", dumps(row), cursor)
+        while True:
+            try:
+                first = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield b": heartbeat\n\n"
+                continue
+            batch = [first]
+            while not subscription.queue.empty():
+                batch.append(subscription.queue.get_nowait())
+            if subscription.dropped:
+                # İstemci geride kaldı: kapat, EventSource Last-Event-ID ile dönüp tamamlar
+                yield _sse("overflow", b"{}")
+                return
+            activity_ids = sorted({event["activity_id"] for event in batch})
+            for row in await run_in_threadpool(_stream_rows, user_id, activity_ids):
+                cursor = max(cursor, row["activity_id"])
+                yield _sse("activity", dumps(row), cursor)
+    finally:
+        feed_events.feed_broker.unsubscribe(subscription)
+
+
+@router.post("/stream-token")
+def create_stream_token(claims: TokenClaims = Depends(get_token_claims)):
+    """
+    GET /feed/stream için kısa ömürlü (FEED_STREAM_TOKEN_TTL_S) token.
+    EventSource header gönderemez; oturum token'ı URL'e (ve access log'lara)
+    yazılmasın diye sadece bağlantı açmaya yarayan bu token kullanılır.
+    """
+    ttl = feed_events.FEED_STREAM_TOKEN_TTL_S
+    token = issue_token(claims.user_id, claims.username, ttl=ttl, scope=feed_events.STREAM_TOKEN_SCOPE)
+    return {"token": token, "expires_in": ttl}
+
+
+@router.get("/stream")
+async def stream_feed(
+    request: Request,
+    since: int = Query(0, description="Bu activity_id'den sonraki aktiviteleri de gönder"),
+    token: str = Query(None, description="POST /feed/stream-token'dan alınan kısa ömürlü token (EventSource header gönderemez)"),
+    authorization: str = Header(None),
+    last_event_id: str = Header(None),
+):
+    """
+    Server-Sent Events: takip edilen kullanıcıların yeni aktiviteleri
+    (misafirde herkesinki), GET /feed/ satırlarıyla aynı şekilde.
+
+    since (veya yeniden bağlanırken tarayıcının gönderdiği Last-Event-ID)
+    verilirse önce aradaki aktiviteler (en fazla FEED_STREAM_CATCHUP_LIMIT)
+    veritabanından gönderilir, sonra sadece yeni olaylar gelir.
+
+    Olaylar: activity (id = activity_id), overflow (istemci geride kaldı,
+    bağlantı kapanır), ": heartbeat" yorumları.
+
+    Token sadece bağlantı açılırken doğrulanır; süresi dolmuş stream token'ıyla
+    yeniden bağlanma 401 alır, istemci yeni token ister.
+    """
+    if not feed_events.FEED_STREAM_ENABLED:
+        raise HTTPException(status_code=404, detail="Canlı akış kapalı")
+    claims = await run_in_threadpool(_stream_claims, token, authorization)
+    user_id, followees = await run_in_threadpool(_stream_subscriber, claims)
+
+    cursor = since
+    if last_event_id and last_event_id.isdigit():
+        cursor = max(cursor, int(last_event_id))
+
+    subscription = feed_events.feed_broker.subscribe(user_id, followees)
+    if subscription is None:
+        raise HTTPException(status_code=503, detail="Çok fazla canlı akış bağlantısı", headers={"Retry-After": "30"})
+    return StreamingResponse(
+        _feed_stream(request, subscription, user_id, cursor),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import text, func
 from typing import Optional
 from ..database import get_db
 from .. import models, schemas
 from .deps import get_current_user_optional
+from ..services.conditional import conditional_json, latest
+from ..services.activity_service import record_activity, retract_activity
 from datetime import datetime
 
 router = APIRouter()
@@ -44,12 +46,7 @@ def follow_user(
     db.flush()  # Get the ID before commit
     
     # Activity kaydı oluştur
-    activity = models.Activity(
-        user_id=effective_follower_id,
-        activity_type="follow",
-        related_user_id=followee_id
-    )
-    db.add(activity)
+    record_activity(db, effective_follower_id, "follow", related_user_id=followee_id)
     db.commit()
     db.refresh(follow)
     return {"message": "Takip edildi", "followee_id": followee_id, "follower_id": effective_follower_id}
@@ -77,6 +74,7 @@ def unfollow_user(
     if not record:
         raise HTTPException(status_code=404, detail="Takip kaydı bulunamadı.")
     db.delete(record)
+    retract_activity(db, effective_follower_id, "follow", related_user_id=followee_id)
     db.commit()
     return {"message": "Takipten çıkıldı", "followee_id": followee_id}
 
@@ -117,21 +115,27 @@ def get_followers(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{user_id}/follow-stats")
-def get_follow_stats(user_id: int, db: Session = Depends(get_db)):
-    """Bir kullanıcının takip istatistiklerini getir"""
-    following_count = db.query(models.Follow).filter(
-        models.Follow.follower_id == user_id
-    ).count()
+def get_follow_stats(user_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Bir kullanıcının takip istatistiklerini getir.
+    İki sayaç ve son takip zamanı tek sorguda; ETag sayaçlardan üretilir.
+    """
+    def follows_agg(column, condition):
+        return db.query(column).filter(condition).scalar_subquery()
+
+    following_count, followers_count, last_following, last_follower = db.query(
+        follows_agg(func.count(models.Follow.follower_id), models.Follow.follower_id == user_id),
+        follows_agg(func.count(models.Follow.follower_id), models.Follow.followee_id == user_id),
+        follows_agg(func.max(models.Follow.followed_at), models.Follow.follower_id == user_id),
+        follows_agg(func.max(models.Follow.followed_at), models.Follow.followee_id == user_id),
+    ).one()
     
-    followers_count = db.query(models.Follow).filter(
-        models.Follow.followee_id == user_id
-    ).count()
-    
-    return {
+    payload = {
         "user_id": user_id,
         "following_count": following_count,
         "followers_count": followers_count
     }
+    return conditional_json(request, payload, last_modified=latest(last_following, last_follower))
 
 
 @router.get("/{user_id}/is-following/{target_user_id}")
@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import text, desc, func
+from sqlalchemy import text, desc, func, bindparam
 from ..database import get_db
 from .. import models, schemas
-from ..services.external_api import get_tmdb_reviews, get_google_books_reviews, search_tmdb, search_google_books, search_openlibrary
-from .deps import get_current_user, get_current_user_optional
+from ..services.external_api import get_tmdb_reviews, get_google_books_reviews, search_tmdb, search_google_books, search_openlibrary, provider_get, TMDB_BASE_URL
+from ..services.json_response import trusted_json
+from ..services.conditional import conditional_json, etag_for, etag_matches, latest, not_modified
+from ..services.activity_service import record_activity, upsert_activity
+from ..services.invalidation import invalidate
+from ..services.feed_cache import invalidate_actor
+from .deps import get_current_user, get_token_claims_optional
+from ..services.tokens import TokenClaims
 from typing import Optional
-import requests
 import os
 
 router = APIRouter()
@@ -27,8 +32,8 @@ def enrich_item_poster(item: models.Item, db: Session = None):
             api_key = os.getenv("API_KEY")
             if not api_key:
                 return None
-            url = f"https://api.themoviedb.org/3/movie/{item.external_api_id}"
-            r = requests.get(url, params={"api_key": api_key, "language": "tr-TR"}, timeout=3)
+            url = f"{TMDB_BASE_URL}/movie/{item.external_api_id}"
+            r = provider_get("tmdb", url, params={"api_key": api_key, "language": "tr-TR"}, timeout=3)
             if r.status_code == 200:
                 data = r.json()
                 poster_path = data.get('poster_path')
@@ -46,7 +51,7 @@ def enrich_item_poster(item: models.Item, db: Session = None):
             
             # Item başlığını ara
             params = {"api_key": api_key, "query": item.title, "language": "tr-TR"}
-            r = requests.get(f"https://api.themoviedb.org/3/search/movie", params=params, timeout=3)
+            r = provider_get("tmdb", f"{TMDB_BASE_URL}/search/movie", params=params, timeout=3)
             if r.status_code == 200:
                 results = r.json().get("results", [])
                 if results:
@@ -70,35 +75,13 @@ def enrich_item_poster(item: models.Item, db: Session = None):
     return poster_url
 
 
-def calculate_hybrid_rating(item_id: int, item: models.Item, db: Session):
-    """
-    İçerik için hybrid rating hesapla:
-    - external_rating: API'den gelen rating
-    - user_rating: Kullanıcı reviews'lerinden
-    - combined_rating: İkisinin ortalaması
-    """
-    # User reviews'ten rating hesapla (reviews tablosundan)
-    rating_query = text("""
-        SELECT AVG(rating) as avg_rating, COUNT(*) as total_ratings
-        FROM reviews
-        WHERE item_id = :item_id AND rating IS NOT NULL
-    """)
-    rating_result = db.execute(rating_query, {"item_id": item_id}).first()
-    
-    user_rating_from_reviews = rating_result[0] or 0
-    review_count = rating_result[1] or 0
-    
-    # User ratings'ten rating hesapla (ratings tablosundan)
-    ratings_query = text("""
-        SELECT AVG(score) as avg_score, COUNT(*) as total_ratings
-        FROM ratings
-        WHERE item_id = :item_id
-    """)
-    ratings_result = db.execute(ratings_query, {"item_id": item_id}).first()
-    
-    user_rating_from_ratings = ratings_result[0] or 0
-    ratings_count = ratings_result[1] or 0
-    
+def _hybrid_rating(item: models.Item, user_rating_from_reviews, review_count, user_rating_from_ratings, ratings_count):
+    """Review ve rating ortalamalarını external_rating ile birleştir"""
+    user_rating_from_reviews = user_rating_from_reviews or 0
+    review_count = review_count or 0
+    user_rating_from_ratings = user_rating_from_ratings or 0
+    ratings_count = ratings_count or 0
+
     # Combine both ratings
     total_rating_count = review_count + ratings_count
     
@@ -106,10 +89,10 @@ def calculate_hybrid_rating(item_id: int, item: models.Item, db: Session):
         # Average of all ratings (both reviews and ratings table)
         user_rating = round((user_rating_from_reviews * review_count + user_rating_from_ratings * ratings_count) / total_rating_count, 1)
     else:
-        user_rating = 0
+        user_rating = 0.0
     
     # External rating (API'den)
-    external_rating = item.external_rating or 0
+    external_rating = item.external_rating or 0.0
     
     # Combined rating (ortalama)
     if external_rating > 0 and user_rating > 0:
@@ -128,6 +111,76 @@ def calculate_hybrid_rating(item_id: int, item: models.Item, db: Session):
     }
 
 
+def calculate_hybrid_rating(item_id: int, item: models.Item, db: Session):
+    """
+    İçerik için hybrid rating hesapla:
+    - external_rating: API'den gelen rating
+    - user_rating: Kullanıcı reviews'lerinden
+    - combined_rating: İkisinin ortalaması
+    """
+    # User reviews'ten rating hesapla (reviews tablosundan)
+    rating_query = text("""
+        SELECT AVG(rating) as avg_rating, COUNT(*) as total_ratings
+        FROM reviews
+        WHERE item_id = :item_id AND rating IS NOT NULL
+    """)
+    rating_result = db.execute(rating_query, {"item_id": item_id}).first()
+    
+    # User ratings'ten rating hesapla (ratings tablosundan)
+    ratings_query = text("""
+        SELECT AVG(score) as avg_score, COUNT(*) as total_ratings
+        FROM ratings
+        WHERE item_id = :item_id
+    """)
+    ratings_result = db.execute(ratings_query, {"item_id": item_id}).first()
+    
+    return _hybrid_rating(item, rating_result[0], rating_result[1], ratings_result[0], ratings_result[1])
+
+
+def calculate_hybrid_ratings(items: list, db: Session, all_items: bool = False) -> dict:
+    """
+    Birden fazla item için hybrid rating: item başına 2 sorgu yerine toplam 2 GROUP BY sorgusu.
+    all_items=True ise IN listesi yerine tüm tablo gruplanır (featured gibi tüm item'ları tarayan route'lar için).
+    Dönüş: {item_id: rating_info}
+    """
+    if not items:
+        return {}
+
+    where_reviews = "rating IS NOT NULL"
+    where_ratings = "1 = 1"
+    params = {}
+    if not all_items:
+        where_reviews += " AND item_id IN :item_ids"
+        where_ratings = "item_id IN :item_ids"
+        params["item_ids"] = [item.item_id for item in items]
+
+    reviews_query = text(f"""
+        SELECT item_id, AVG(rating) as avg_rating, COUNT(*) as total_ratings
+        FROM reviews
+        WHERE {where_reviews}
+        GROUP BY item_id
+    """)
+    ratings_query = text(f"""
+        SELECT item_id, AVG(score) as avg_score, COUNT(*) as total_ratings
+        FROM ratings
+        WHERE {where_ratings}
+        GROUP BY item_id
+    """)
+    if params:
+        reviews_query = reviews_query.bindparams(bindparam("item_ids", expanding=True))
+        ratings_query = ratings_query.bindparams(bindparam("item_ids", expanding=True))
+
+    review_stats = {row[0]: (row[1], row[2]) for row in db.execute(reviews_query, params)}
+    rating_stats = {row[0]: (row[1], row[2]) for row in db.execute(ratings_query, params)}
+
+    result = {}
+    for item in items:
+        reviews_avg, review_count = review_stats.get(item.item_id, (0, 0))
+        ratings_avg, ratings_count = rating_stats.get(item.item_id, (0, 0))
+        result[item.item_id] = _hybrid_rating(item, reviews_avg, review_count, ratings_avg, ratings_count)
+    return result
+
+
 # ============================================
 # 1️⃣ SPECIAL ROUTES (Sabit route'lar BAŞTA)
 # ============================================
@@ -154,10 +207,11 @@ def search_items(
         query = query.filter(models.Item.item_type == item_type)
     
     db_items = query.limit(20).all()
+    ratings_by_item = calculate_hybrid_ratings(db_items, db)
     
     result = []
     for item in db_items:
-        rating_info = calculate_hybrid_rating(item.item_id, item, db)
+        rating_info = ratings_by_item[item.item_id]
         item_dict = {
             "item_id": item.item_id,
             "title": item.title,
@@ -219,11 +273,12 @@ def get_top_rated(limit: int = Query(6, ge=1, le=50), db: Session = Depends(get_
     """En yüksek puanlı içerikleri getir (combined_rating'e göre sıralanmış)"""
     # Tüm items'ı getir ve combined rating hesapla
     all_items = db.query(models.Item).all()
+    ratings_by_item = calculate_hybrid_ratings(all_items, db, all_items=True)
     
     # Her item için combined rating hesapla
     items_with_ratings = []
     for item in all_items:
-        rating_info = calculate_hybrid_rating(item.item_id, item, db)
+        rating_info = ratings_by_item[item.item_id]
         combined = rating_info.get('combined_rating', 0)
         items_with_ratings.append((item, rating_info, combined))
     
@@ -291,11 +346,12 @@ def get_popular(limit: int = Query(6, ge=1, le=50), db: Session = Depends(get_db
     """En popüler içerikleri getir (review count'a göre, sonra rating'e göre sıralanmış)"""
     # Tüm items'ı getir
     all_items = db.query(models.Item).all()
+    ratings_by_item = calculate_hybrid_ratings(all_items, db, all_items=True)
     
     # Her item için combined rating ve review count hesapla
     items_with_scores = []
     for item in all_items:
-        rating_info = calculate_hybrid_rating(item.item_id, item, db)
+        rating_info = ratings_by_item[item.item_id]
         review_count = rating_info.get('review_count', 0)
         combined_rating = rating_info.get('combined_rating', 0)
         
@@ -407,10 +463,11 @@ def filter_items(
         query = query.filter(models.Item.external_rating >= rating_min)
     
     items = query.limit(50).all()
+    ratings_by_item = calculate_hybrid_ratings(items, db)
     
     result = []
     for item in items:
-        rating_info = calculate_hybrid_rating(item.item_id, item, db)
+        rating_info = ratings_by_item[item.item_id]
         item_dict = {
             "item_id": item.item_id,
             "title": item.title,
@@ -430,7 +487,8 @@ def filter_items(
         }
         result.append(item_dict)
     
-    return result
+    # DB'den kurduğumuz dict'ler ItemOut alanlarıyla uyumlu; doğrulama yerine izdüşüm
+    return trusted_json(result, schemas.ItemOut)
 
 
 # ============================================
@@ -442,10 +500,11 @@ def filter_items(
 def get_items(db: Session = Depends(get_db), limit: int = 20):
     """Tüm içerikleri listele"""
     items = db.query(models.Item).limit(limit).all()
+    ratings_by_item = calculate_hybrid_ratings(items, db)
     
     result = []
     for item in items:
-        rating_info = calculate_hybrid_rating(item.item_id, item, db)
+        rating_info = ratings_by_item[item.item_id]
         item_dict = {
             "item_id": item.item_id,
             "title": item.title,
@@ -465,7 +524,8 @@ def get_items(db: Session = Depends(get_db), limit: int = 20):
         }
         result.append(item_dict)
     
-    return result
+    # DB'den kurduğumuz dict'ler ItemOut alanlarıyla uyumlu; doğrulama yerine izdüşüm
+    return trusted_json(result, schemas.ItemOut)
 
 
 # ➕ Yeni içerik ekle
@@ -474,6 +534,8 @@ def create_item(item: schemas.ItemCreate, db: Session = Depends(get_db)):
     """Yeni içerik ekle"""
     new_item = models.Item(**item.dict())
     db.add(new_item)
+    db.flush()
+    invalidate(db, "item", new_item.item_id)
     db.commit()
     db.refresh(new_item)
     return new_item
@@ -493,13 +555,34 @@ def get_item_rating(item_id: int, db: Session = Depends(get_db)):
 
 # 🔍 Tekil içeriği id ile getir
 @router.get("/{item_id}", response_model=schemas.ItemOut)
-def get_item(item_id: int, db: Session = Depends(get_db)):
-    """Tekil içerik detayları"""
-    item = db.query(models.Item).filter(models.Item.item_id == item_id).first()
-    if not item:
+def get_item(item_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Tekil içerik detayları.
+    Item satırı ve rating aggregate'leri tek sorguda gelir; ETag payload'dan üretilir,
+    If-None-Match eşleşirse 304 döner.
+    """
+    def reviews_agg(column):
+        return db.query(column).filter(
+            models.Review.item_id == item_id, models.Review.rating.isnot(None)
+        ).scalar_subquery()
+
+    def ratings_agg(column):
+        return db.query(column).filter(models.Rating.item_id == item_id).scalar_subquery()
+
+    row = db.query(
+        models.Item,
+        reviews_agg(func.avg(models.Review.rating)),
+        reviews_agg(func.count(models.Review.review_id)),
+        reviews_agg(func.max(models.Review.created_at)),
+        ratings_agg(func.avg(models.Rating.score)),
+        ratings_agg(func.count(models.Rating.rating_id)),
+        ratings_agg(func.max(models.Rating.created_at)),
+    ).filter(models.Item.item_id == item_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="İçerik bulunamadı")
     
-    rating_info = calculate_hybrid_rating(item.item_id, item, db)
+    item, reviews_avg, review_count, last_review_at, ratings_avg, ratings_count, last_rating_at = row
+    rating_info = _hybrid_rating(item, reviews_avg, review_count, ratings_avg, ratings_count)
     item_dict = {
         "item_id": item.item_id,
         "title": item.title,
@@ -517,7 +600,8 @@ def get_item(item_id: int, db: Session = Depends(get_db)):
         "created_at": item.created_at,
         **rating_info
     }
-    return item_dict
+    last_modified = latest(item.updated_at, last_review_at, last_rating_at)
+    return conditional_json(request, item_dict, last_modified=last_modified, model=schemas.ItemOut)
 
 
 @router.get("/api/{source_id}")
@@ -594,6 +678,7 @@ def update_item(item_id: int, item_update: schemas.ItemCreate, db: Session = Dep
     for field, value in update_data.items():
         setattr(item, field, value)
     
+    invalidate(db, "item", item_id)
     db.commit()
     db.refresh(item)
     return item
@@ -608,6 +693,7 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="İçerik bulunamadı")
     
     db.delete(item)
+    invalidate(db, "item", item_id)
     db.commit()
     return {"message": "İçerik başarıyla silindi"}
 
@@ -639,14 +725,16 @@ def get_item_comments(item_id: int, db: Session = Depends(get_db)):
     if not item:
         raise HTTPException(status_code=404, detail="İçerik bulunamadı")
     
-    reviews = db.query(models.Review).filter(
+    # Kullanıcı bilgisi tek sorguda join ile gelir (review başına ayrı sorgu yok)
+    reviews = db.query(models.Review, models.User).outerjoin(
+        models.User, models.User.user_id == models.Review.user_id
+    ).filter(
         models.Review.item_id == item_id
     ).all()
     
     # Add username and avatar to each review
     result = []
-    for review in reviews:
-        user = db.query(models.User).filter(models.User.user_id == review.user_id).first()
+    for review, user in reviews:
         review_dict = {
             "review_id": review.review_id,
             "user_id": review.user_id,
@@ -670,14 +758,15 @@ def get_item_ratings(item_id: int, db: Session = Depends(get_db)):
     if not item:
         raise HTTPException(status_code=404, detail="İçerik bulunamadı")
     
-    ratings = db.query(models.Rating).filter(
+    ratings = db.query(models.Rating, models.User).outerjoin(
+        models.User, models.User.user_id == models.Rating.user_id
+    ).filter(
         models.Rating.item_id == item_id
     ).order_by(models.Rating.created_at.desc()).all()
     
     # Add username and avatar to each rating
     result = []
-    for rating in ratings:
-        user = db.query(models.User).filter(models.User.user_id == rating.user_id).first()
+    for rating, user in ratings:
         rating_dict = {
             "rating_id": rating.rating_id,
             "user_id": rating.user_id,
@@ -802,13 +891,7 @@ def add_comment(item_id: int, review: schemas.ReviewCreate, db: Session = Depend
     db.flush()  # Get the ID before commit
     
     # Activity kaydı oluştur
-    activity = models.Activity(
-        user_id=review.user_id,
-        activity_type="review",
-        item_id=item_id,
-        review_id=new_review.review_id
-    )
-    db.add(activity)
+    record_activity(db, review.user_id, "review", item_id=item_id, review_id=new_review.review_id)
     db.commit()
     db.refresh(new_review)
     
@@ -1089,13 +1172,7 @@ def add_api_comment(source_id: str, comment: dict = Body(...), db: Session = Dep
         db.flush()
         
         # Activity kaydı oluştur - item_id ile
-        activity = models.Activity(
-            user_id=user_id,
-            activity_type="review",
-            item_id=item_id,  # ← item_id'yi Activity'ye yaz
-            review_id=new_review.review_id
-        )
-        db.add(activity)
+        record_activity(db, user_id, "review", item_id=item_id, review_id=new_review.review_id)
         db.commit()
         db.refresh(new_review)
         
@@ -1166,6 +1243,8 @@ def rate_item(item_id: int, rating_data: dict, db: Session = Depends(get_db)):
             # Varsa güncelle
             print(f"📝 Updating existing rating {existing_rating.rating_id}")
             existing_rating.score = rating
+            # Güncellenen puan feed'de yeniden öne çıkar (yeni satır eklenmez)
+            upsert_activity(db, user_id, "rating", item_id=item_id)
             db.commit()
             db.refresh(existing_rating)
             
@@ -1190,12 +1269,7 @@ def rate_item(item_id: int, rating_data: dict, db: Session = Depends(get_db)):
             db.flush()
             
             # Activity kaydı oluştur (yeni rating oluşturulduğunda)
-            activity = models.Activity(
-                user_id=user_id,
-                activity_type="rating",
-                item_id=item_id
-            )
-            db.add(activity)
+            record_activity(db, user_id, "rating", item_id=item_id)
             db.commit()
             db.refresh(new_rating)
             
@@ -1305,6 +1379,8 @@ def rate_api_item(source_id: str, rating_data: dict = Body(...), db: Session = D
             # Varsa güncelle
             print(f"📝 Puan güncellenyor: rating_id={existing_rating.rating_id}")
             existing_rating.score = rating
+            # Güncellenen puan feed'de yeniden öne çıkar (yeni satır eklenmez)
+            upsert_activity(db, user_id, "rating", item_id=item_id)
             db.commit()
             db.refresh(existing_rating)
             
@@ -1329,12 +1405,7 @@ def rate_api_item(source_id: str, rating_data: dict = Body(...), db: Session = D
             db.flush()
             
             # Activity kaydı oluştur
-            activity = models.Activity(
-                user_id=user_id,
-                activity_type="rating",
-                item_id=item_id
-            )
-            db.add(activity)
+            record_activity(db, user_id, "rating", item_id=item_id)
             db.commit()
             db.refresh(new_rating)
             
@@ -1407,6 +1478,7 @@ def add_to_library(item_id: int, data: dict = Body(...), db: Session = Depends(g
                 
                 # Farklı status ise, GÜNCELLE (DELETE+INSERT yerine)
                 existing_entry.status = status
+                invalidate(db, "item", item_id)
                 db.commit()
                 db.refresh(existing_entry)
                 
@@ -1426,6 +1498,7 @@ def add_to_library(item_id: int, data: dict = Body(...), db: Session = Depends(g
                     status=status
                 )
                 db.add(library_entry)
+                invalidate(db, "item", item_id)
                 db.commit()
                 db.refresh(library_entry)
                 
@@ -1444,6 +1517,7 @@ def add_to_library(item_id: int, data: dict = Body(...), db: Session = Depends(g
                 models.UserLibrary.item_id == item_id,
                 models.UserLibrary.status == status
             ).delete()
+            invalidate(db, "item", item_id)
             db.commit()
             
             return {
@@ -1470,7 +1544,9 @@ def get_user_library(user_id: int, status: str = Query(None), db: Session = Depe
     status parametresi opsiyonel: 'read', 'toread', 'watched', 'towatch'
     """
     try:
-        query = db.query(models.UserLibrary).filter(
+        query = db.query(models.UserLibrary, models.Item).join(
+            models.Item, models.Item.item_id == models.UserLibrary.item_id
+        ).filter(
             models.UserLibrary.user_id == user_id
         )
         
@@ -1480,8 +1556,7 @@ def get_user_library(user_id: int, status: str = Query(None), db: Session = Depe
         library_entries = query.all()
         
         items = []
-        for entry in library_entries:
-            item = db.query(models.Item).filter(models.Item.item_id == entry.item_id).first()
+        for entry, item in library_entries:
             if item:
                 items.append({
                     "library_id": entry.library_id,
@@ -1531,12 +1606,8 @@ def create_custom_list(data: dict = Body(...), db: Session = Depends(get_db)):
         db.flush()  # Get the ID before commit
         
         # Activity kaydı oluştur
-        activity = models.Activity(
-            user_id=user_id,
-            activity_type="list_add",
-            list_id=new_list.list_id
-        )
-        db.add(activity)
+        record_activity(db, user_id, "list_add", list_id=new_list.list_id)
+        invalidate(db, "list", new_list.list_id)
         db.commit()
         db.refresh(new_list)
         
@@ -1590,6 +1661,7 @@ def update_custom_list(list_id: int, data: dict = Body(...), db: Session = Depen
             # Backward compatibility
             custom_list.is_public = 1 if privacy_level == 2 else 0
         
+        invalidate(db, "list", list_id)
         db.commit()
         db.refresh(custom_list)
         
@@ -1614,7 +1686,7 @@ def update_custom_list(list_id: int, data: dict = Body(...), db: Session = Depen
 def get_custom_lists(
     user_id: int, 
     db: Session = Depends(get_db),
-    current_user: Optional[models.User] = Depends(get_current_user_optional)
+    current_user: Optional[TokenClaims] = Depends(get_token_claims_optional)
 ):
     """
     Kullanıcının özel listelerini getir
@@ -1666,15 +1738,22 @@ def get_custom_lists(
                     if pl == 2:
                         lists.append(lst)
         
-        custom_lists = []
-        for lst in lists:
-            item_count = 0
+        # Liste başına COUNT yerine tek bir GROUP BY sorgusu
+        item_counts = {}
+        if lists:
             try:
-                item_count = db.query(models.ListItem).filter(
-                    models.ListItem.list_id == lst.list_id
-                ).count()
+                item_counts = dict(
+                    db.query(models.ListItem.list_id, func.count(models.ListItem.list_item_id))
+                    .filter(models.ListItem.list_id.in_([lst.list_id for lst in lists]))
+                    .group_by(models.ListItem.list_id)
+                    .all()
+                )
             except Exception:
-                item_count = 0
+                item_counts = {}
+        
+        custom_lists = []
+        for lst in lists:
+            item_count = item_counts.get(lst.list_id, 0)
             
             created_at_str = lst.created_at.isoformat() if hasattr(lst, 'created_at') and lst.created_at else None
             updated_at_str = lst.updated_at.isoformat() if hasattr(lst, 'updated_at') and lst.updated_at else None
@@ -1802,13 +1881,8 @@ def add_to_custom_list(list_id: int, data: dict = Body(...), db: Session = Depen
             db.flush()  # Get the ID before commit
             
             # Activity kaydı oluştur (item listeye eklendiğinde)
-            activity = models.Activity(
-                user_id=custom_list.user_id,
-                activity_type="list_add",
-                list_id=list_id,
-                item_id=item_id
-            )
-            db.add(activity)
+            record_activity(db, custom_list.user_id, "list_add", list_id=list_id, item_id=item_id)
+            invalidate(db, "list", list_id)
             db.commit()
         
         elif action == "remove":
@@ -1816,6 +1890,7 @@ def add_to_custom_list(list_id: int, data: dict = Body(...), db: Session = Depen
                 models.ListItem.list_id == list_id,
                 models.ListItem.item_id == item_id
             ).delete()
+            invalidate(db, "list", list_id)
             db.commit()
         
         return {
@@ -1897,6 +1972,8 @@ def add_api_item_to_library(source_id: str, data: dict = Body(...), db: Session
                     external_rating=0
                 )
                 db.add(new_item)
+                db.flush()
+                invalidate(db, "item", new_item.item_id)
                 db.commit()
                 db.refresh(new_item)
                 existing_item = new_item
@@ -1922,6 +1999,7 @@ def add_api_item_to_library(source_id: str, data: dict = Body(...), db: Session
                 
                 # Farklı status ise, GÜNCELLE (DELETE+INSERT yerine)
                 existing_entry.status = status
+                invalidate(db, "item", existing_item.item_id)
                 db.commit()
                 db.refresh(existing_entry)
                 
@@ -1941,6 +2019,7 @@ def add_api_item_to_library(source_id: str, data: dict = Body(...), db: Session
                     status=status
                 )
                 db.add(user_lib)
+                invalidate(db, "item", existing_item.item_id)
                 db.commit()
                 db.refresh(user_lib)
                 
@@ -1965,6 +2044,7 @@ def add_api_item_to_library(source_id: str, data: dict = Body(...), db: Session
                     models.UserLibrary.item_id == item.item_id,
                     models.UserLibrary.status == status
                 ).delete()
+                invalidate(db, "item", item.item_id)
                 db.commit()
                 
                 return {
@@ -2015,6 +2095,8 @@ def delete_custom_list(list_id: int, db: Session = Depends(get_db)):
         
         # Listeyi sil
         db.delete(custom_list)
+        invalidate(db, "list", list_id)
+        invalidate_actor(db, custom_list.user_id)  # list_add aktiviteleri feed'den düşer
         db.commit()
         
         # Sequence reset et (1'den başlasın)
@@ -2049,9 +2131,10 @@ def delete_custom_list(list_id: int, db: Session = Depends(get_db)):
 @router.get("/lists/{list_id}/items")
 def get_list_items(
     list_id: int, 
+    request: Request,
     current_user_id: int = Query(None, description="İsteği yapan kullanıcının ID'si"),
     db: Session = Depends(get_db),
-    current_user: Optional[models.User] = Depends(get_current_user_optional)
+    current_user: Optional[TokenClaims] = Depends(get_token_claims_optional)
 ):
     """
     Liste içindeki tüm itemleri getir
@@ -2104,11 +2187,49 @@ def get_list_items(
                 )
             # privacy_level == 2 (public) -> herkes erişebilir
         
+        # Conditional GET: liste satırı + item'ların özeti + isteyen kullanıcı (is_owner
+        # cevapta var) tek sorguda; eşleşirse item hydration'ı hiç çalışmaz
+        listed_items = models.Item.__table__.alias("listed_items")
+        source_items = models.Item.__table__.alias("source_items")
+        summary = db.query(
+            func.count(models.ListItem.list_item_id),
+            func.coalesce(func.sum(models.ListItem.list_item_id * (models.ListItem.position + 1)), 0),
+            func.max(models.ListItem.added_at),
+            func.max(listed_items.c.updated_at),
+            func.max(source_items.c.updated_at),
+        ).outerjoin(
+            listed_items, listed_items.c.item_id == models.ListItem.item_id
+        ).outerjoin(
+            source_items,
+            (models.ListItem.item_id.is_(None)) & (source_items.c.external_api_id == models.ListItem.source_id)
+        ).filter(models.ListItem.list_id == list_id).first()
+        etag = etag_for(
+            list_id, custom_list.name, custom_list.description, custom_list.privacy_level,
+            custom_list.is_public, custom_list.user_id, custom_list.updated_at, effective_user_id, is_owner,
+            *summary
+        )
+        last_modified = latest(custom_list.updated_at, summary[2], summary[3], summary[4])
+        if etag_matches(request, etag):
+            return not_modified(etag, last_modified, vary="Authorization")
+        
         # Listedeki itemleri getir
         list_items = db.query(models.ListItem).filter(
             models.ListItem.list_id == list_id
         ).order_by(models.ListItem.position).all()
         
+        # DB ve API item detaylarını item başına sorgu yerine iki IN sorgusuyla topla
+        item_ids = {li.item_id for li in list_items if li.item_id}
+        source_ids = {li.source_id for li in list_items if not li.item_id and li.source_id}
+        items_by_id = {}
+        if item_ids:
+            items_by_id = {
+                i.item_id: i for i in db.query(models.Item).filter(models.Item.item_id.in_(item_ids)).all()
+            }
+        items_by_source = {}
+        if source_ids:
+            for i in db.query(models.Item).filter(models.Item.external_api_id.in_(source_ids)).order_by(models.Item.item_id).all():
+                items_by_source.setdefault(i.external_api_id, i)
+        
         # Item detaylarıyla dönüş yap
         items = []
         for list_item in list_items:
@@ -2121,9 +2242,7 @@ def get_list_items(
             
             # DB itemse detaylar ekle
             if list_item.item_id:
-                db_item = db.query(models.Item).filter(
-                    models.Item.item_id == list_item.item_id
-                ).first()
+                db_item = items_by_id.get(list_item.item_id)
                 if db_item:
                     item_data.update({
                         "title": db_item.title,
@@ -2136,9 +2255,7 @@ def get_list_items(
                     })
             elif list_item.source_id:
                 # API item ise source_id'den bul
-                api_item = db.query(models.Item).filter(
-                    models.Item.external_api_id == list_item.source_id
-                ).first()
+                api_item = items_by_source.get(list_item.source_id)
                 if api_item:
                     item_data.update({
                         "title": api_item.title,
@@ -2159,7 +2276,7 @@ def get_list_items(
         if pl is None:
             pl = 2 if getattr(custom_list, 'is_public', 0) == 1 else 0
         
-        return {
+        return conditional_json(request, {
             "success": True,
             "list_id": list_id,
             "list_name": custom_list.name,
@@ -2172,7 +2289,7 @@ def get_list_items(
             "updated_at": updated_at_str,
             "items": items,
             "item_count": len(items)
-        }
+        }, etag=etag, last_modified=last_modified, vary="Authorization")
     
     except HTTPException as he:
         raise he
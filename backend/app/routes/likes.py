@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from ..database import get_db
 from .. import models
+from ..services.activity_service import record_activity, retract_activity, retract_comment_activity
 
 router = APIRouter()
 
@@ -34,8 +35,9 @@ def like_review(review_id: int, data: dict = Body(...), db: Session = Depends(ge
         ).first()
         
         if existing_like:
-            # Zaten beğenmişse, beğeniyi kaldır (toggle)
+            # Zaten beğenmişse, beğeniyi ve aktivitesini kaldır (toggle)
             db.delete(existing_like)
+            retract_activity(db, user_id, "like_review", review_id=review_id)
             db.commit()
             return {
                 "success": True,
@@ -54,12 +56,7 @@ def like_review(review_id: int, data: dict = Body(...), db: Session = Depends(ge
             db.flush()  # Get the ID before commit
             
             # Activity kaydı oluştur
-            activity = models.Activity(
-                user_id=user_id,
-                activity_type="like_review",
-                review_id=review_id
-            )
-            db.add(activity)
+            record_activity(db, user_id, "like_review", review_id=review_id)
             db.commit()
             db.refresh(new_like)
             
@@ -91,14 +88,15 @@ def get_review_likes(review_id: int, db: Session = Depends(get_db)):
             raise HTTPException(status_code=404, detail="Yorum bulunamadı")
         
         # Beğenileri getir
-        likes = db.query(models.ReviewLike).filter(
+        # Beğenen kullanıcı bilgileri join ile aynı sorguda gelir
+        likes = db.query(models.ReviewLike, models.User).outerjoin(
+            models.User, models.User.user_id == models.ReviewLike.user_id
+        ).filter(
             models.ReviewLike.review_id == review_id
         ).all()
         
-        # Beğenen kullanıcı bilgilerini getir
         likes_list = []
-        for like in likes:
-            user = db.query(models.User).filter(models.User.user_id == like.user_id).first()
+        for like, user in likes:
             likes_list.append({
                 "like_id": like.like_id,
                 "user_id": like.user_id,
@@ -171,12 +169,7 @@ def add_comment_to_review(review_id: int, data: dict = Body(...), db: Session =
         db.flush()  # Get the ID before commit
         
         # Activity kaydı oluştur
-        activity = models.Activity(
-            user_id=user_id,
-            activity_type="comment_review",
-            review_id=review_id
-        )
-        db.add(activity)
+        record_activity(db, user_id, "comment_review", review_id=review_id)
         db.commit()
         db.refresh(new_comment)
         
@@ -209,14 +202,15 @@ def get_review_comments(review_id: int, db: Session = Depends(get_db)):
             raise HTTPException(status_code=404, detail="Yorum bulunamadı")
         
         # Yorumları getir
-        comments = db.query(models.ReviewComment).filter(
+        comments = db.query(models.ReviewComment, models.User).outerjoin(
+            models.User, models.User.user_id == models.ReviewComment.user_id
+        ).filter(
             models.ReviewComment.review_id == review_id
         ).order_by(models.ReviewComment.created_at.desc()).all()
         
         # Kullanıcı bilgilerini ekle
         comments_list = []
-        for comment in comments:
-            user = db.query(models.User).filter(models.User.user_id == comment.user_id).first()
+        for comment, user in comments:
             comments_list.append({
                 "comment_id": comment.comment_id,
                 "review_id": comment.review_id,
@@ -264,6 +258,7 @@ def delete_review_comment(comment_id: int, data: dict = Body(...), db: Session =
             raise HTTPException(status_code=403, detail="Sadece kendi yorumunuzu silebilirsiniz")
         
         db.delete(comment)
+        retract_comment_activity(db, user_id, comment.review_id)
         db.commit()
         
         return {
@@ -304,8 +299,9 @@ def like_item(item_id: int, data: dict = Body(...), db: Session = Depends(get_db
         ).first()
         
         if existing_like:
-            # Zaten beğenmişse, beğeniyi kaldır
+            # Zaten beğenmişse, beğeniyi ve aktivitesini kaldır
             db.delete(existing_like)
+            retract_activity(db, user_id, "like_item", item_id=item_id)
             db.commit()
             return {
                 "success": True,
@@ -324,12 +320,7 @@ def like_item(item_id: int, data: dict = Body(...), db: Session = Depends(get_db
             db.flush()  # Get the ID before commit
             
             # Activity kaydı oluştur
-            activity = models.Activity(
-                user_id=user_id,
-                activity_type="like_item",
-                item_id=item_id
-            )
-            db.add(activity)
+            record_activity(db, user_id, "like_item", item_id=item_id)
             db.commit()
             db.refresh(new_like)
             
@@ -360,14 +351,15 @@ def get_item_likes(item_id: int, db: Session = Depends(get_db)):
             raise HTTPException(status_code=404, detail="İçerik bulunamadı")
         
         # Beğenileri getir
-        likes = db.query(models.ItemLike).filter(
+        likes = db.query(models.ItemLike, models.User).outerjoin(
+            models.User, models.User.user_id == models.ItemLike.user_id
+        ).filter(
             models.ItemLike.item_id == item_id
         ).all()
         
         # Beğenen kullanıcı bilgilerini getir
         likes_list = []
-        for like in likes:
-            user = db.query(models.User).filter(models.User.user_id == like.user_id).first()
+        for like, user in likes:
             likes_list.append({
                 "like_id": like.like_id,
                 "user_id": like.user_id,
@@ -3,6 +3,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from ..database import get_db
 from .. import models, schemas
+from ..services.activity_service import record_activity, retract_activity
+from ..services.feed_cache import invalidate_actor, invalidate_targets
 
 router = APIRouter()
 
@@ -59,13 +61,7 @@ def create_review(review: schemas.ReviewCreate, db: Session = Depends(get_db)):
     db.flush()  # Get the ID before commit
     
     # Activity kaydı oluştur - item_id'yi review'dan al
-    activity = models.Activity(
-        user_id=review.user_id,
-        activity_type="review",
-        item_id=review.item_id,  # ← Review'daki item_id'yi kullan
-        review_id=new_review.review_id
-    )
-    db.add(activity)
+    record_activity(db, review.user_id, "review", item_id=review.item_id, review_id=new_review.review_id)
     db.commit()
     db.refresh(new_review)
     
@@ -94,6 +90,9 @@ def delete_review(review_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Yorum bulunamadı")
     
     db.delete(review)
+    # review'ın aktiviteleri cascade ile gidiyor; feed cache'i ayrıca temizle
+    invalidate_actor(db, review.user_id)
+    invalidate_targets(db, review_ids=(review_id,), item_ids=(review.item_id,))
     db.commit()
     return {"message": "✅ Yorum başarıyla silindi", "review_id": review_id}
 
@@ -116,6 +115,7 @@ def delete_rating(rating_id: int, db: Session = Depends(get_db)):
         print(f"📝 Siliniyor: rating_id={rating_id}, user_id={rating.user_id}, item_id={rating.item_id}")
         
         db.delete(rating)
+        retract_activity(db, rating.user_id, "rating", item_id=rating.item_id)
         db.commit()
         
         print(f"✅ Puan silindi: {rating_id}")
@@ -148,6 +148,7 @@ def update_review(
         if review_update.rating is not None and 1 <= review_update.rating <= 10:
             review.rating = review_update.rating
         
+        invalidate_targets(db, review_ids=(review_id,))
         db.commit()
         db.refresh(review)
         print(f"✅ Review {review_id} güncellendi")
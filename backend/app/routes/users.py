@@ -1,21 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from ..database import get_db
 from .. import models, schemas
 from .auth import verify_current_user
+from ..services.conditional import conditional_json
+from ..services.invalidation import invalidate
+from ..services.feed_cache import invalidate_actor
 import os
 
 router = APIRouter()
 
 # 1) Tek kullanıcı bilgisi
 @router.get("/{user_id}", response_model=schemas.UserOut)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int, request: Request, db: Session = Depends(get_db)):
     user = db.query(models.User).filter(models.User.user_id == user_id).first()
     if not user:
         raise HTTPException(404, "Kullanıcı bulunamadı")
-    return user
+    # ETag payload'dan; If-None-Match eşleşirse 304
+    payload = {
+        "user_id": user.user_id,
+        "username": user.username,
+        "email": user.email,
+        "bio": user.bio,
+        "avatar_url": user.avatar_url,
+        "created_at": user.created_at,
+    }
+    return conditional_json(request, payload, last_modified=user.updated_at, model=schemas.UserOut)
 
 # 2) Kullanıcının yorumları (son 20)
 @router.get("/{user_id}/reviews", response_model=list[schemas.ReviewOut])
@@ -105,6 +117,9 @@ def update_user(user_id: int, user_update: schemas.UserUpdate, db: Session = Dep
     if user_update.avatar_url is not None:
         user.avatar_url = user_update.avatar_url
     
+    # Kullanıcı adı / avatar feed satırlarında da görünüyor
+    invalidate(db, "user", user_id)
+    invalidate_actor(db, user_id)
     db.commit()
     db.refresh(user)
     return user
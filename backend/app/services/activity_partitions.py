@@ -0,0 +1,474 @@
+"""
+Activity Partitions - activities tablosu için aylık partition, retention ve arşiv
+
+PostgreSQL'de (opsiyonel) activities tablosu created_at üzerinden aylık RANGE
+partition'lara bölünür: activities_pYYYYMM. Feed sayfa sorguları
+created_at DESC sırasıyla LIMIT'li okuduğu için planner partition'ları en
+yeniden başlayarak sırayla tarar (ordered append) ve sayfa dolunca eski
+partition'lara hiç girmez; toplama grubu üyeleri sorgusu since / until
+sınırıyla sadece ilgili ay(lar)ı açar (partition pruning).
+
+İşlemler (CLI: python -m backend.tools.activity_partitions):
+
+    convert     Mevcut tabloyu online dönüştür: yeni partitioned tablo yaratılır,
+                trigger eşzamanlı yazmaları aynalar, satırlar batch'ler halinde
+                kopyalanır, sonunda kısa bir kilit altında tablolar yer değiştirir.
+                Eski tablo activities_unpartitioned adıyla kalır.
+    ensure      Bu ay + ACTIVITY_PARTITION_MONTHS_AHEAD ay için partition'ları yarat.
+    retention   ACTIVITY_RETENTION_MONTHS'tan eski veriyi arşivle ve sil:
+                archive -> activities_archive tablosuna taşı
+                jsonl   -> ACTIVITY_ARCHIVE_DIR altına gzip'li JSONL olarak yaz
+                Partitioned tabloda ay partition'ı detach edilip bütün olarak
+                taşınır; diğer durumlarda (SQLite dahil) batch'li DELETE yapılır.
+
+ACTIVITY_PARTITIONING=1 ise uygulama içinde günlük bir thread ensure + retention
+çalıştırır (install_partition_maintenance).
+
+Ayarlar (env):
+    ACTIVITY_PARTITIONING=0
+    ACTIVITY_PARTITION_MONTHS_AHEAD=3
+    ACTIVITY_RETENTION_MONTHS=0          # 0 = retention kapalı
+    ACTIVITY_RETENTION_MODE=archive      # archive | jsonl
+    ACTIVITY_ARCHIVE_DIR=backend/archive
+    ACTIVITY_PARTITION_BATCH_SIZE=5000
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import text
+
+from .json_response import dumps
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_PARTITIONING = os.getenv("ACTIVITY_PARTITIONING", "0") == "1"
+ACTIVITY_PARTITION_MONTHS_AHEAD = int(os.getenv("ACTIVITY_PARTITION_MONTHS_AHEAD", "3"))
+ACTIVITY_RETENTION_MONTHS = int(os.getenv("ACTIVITY_RETENTION_MONTHS", "0"))
+ACTIVITY_RETENTION_MODE = os.getenv("ACTIVITY_RETENTION_MODE", "archive")
+ACTIVITY_ARCHIVE_DIR = os.getenv(
+    "ACTIVITY_ARCHIVE_DIR",
+    str(Path(__file__).resolve().parent.parent.parent / "archive"),
+)
+ACTIVITY_PARTITION_BATCH_SIZE = int(os.getenv("ACTIVITY_PARTITION_BATCH_SIZE", "5000"))
+MAINTENANCE_INTERVAL_S = 24 * 3600
+
+TABLE = "activities"
+STAGING_TABLE = "activities_partitioned"
+OLD_TABLE = "activities_unpartitioned"
+ARCHIVE_TABLE = "activities_archive"
+COLUMNS = ("activity_id", "activity_type", "user_id", "item_id", "review_id", "list_id",
+           "related_user_id", "created_at")
+
+# Partitioned parent üzerinde yaratılan index'ler (her partition'a otomatik iner)
+PARTITION_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS {table}_created_id_type ON {table} (created_at DESC, activity_id DESC, activity_type)",
+    "CREATE INDEX IF NOT EXISTS {table}_user_created_id_type ON {table} (user_id, created_at DESC, activity_id DESC, activity_type)",
+    "CREATE INDEX IF NOT EXISTS {table}_activity_id ON {table} (activity_id)",
+    "CREATE INDEX IF NOT EXISTS {table}_review_id ON {table} (review_id)",
+    "CREATE INDEX IF NOT EXISTS {table}_item_id ON {table} (item_id)",
+    "CREATE INDEX IF NOT EXISTS {table}_related_user ON {table} (related_user_id)",
+)
+
+
+def _month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date, table: str = TABLE) -> str:
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+
+def _is_postgres(engine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def is_partitioned(conn, table: str = TABLE) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(text("""
+        SELECT 1 FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+        WHERE c.relname = :table AND pg_table_is_visible(c.oid)
+    """), {"table": table}).scalar())
+
+
+def list_partitions(conn, table: str = TABLE) -> list:
+    """[(partition adı, alt sınır ayı)] - DEFAULT partition hariç, eskiden yeniye"""
+    rows = conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :table AND pg_table_is_visible(p.oid)
+        ORDER BY c.relname
+    """), {"table": table}).fetchall()
+    partitions = []
+    prefix = f"{table}_p"
+    for (name,) in rows:
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            partitions.append((name, date(int(suffix[:4]), int(suffix[4:]), 1)))
+    return partitions
+
+
+def _create_partition(conn, month: date, table: str = TABLE):
+    name = partition_name(month, table)
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+    ))
+    return name
+
+
+def ensure_partitions(engine, months_ahead: int = None, table: str = TABLE) -> list:
+    """Bu ay ve ileriki months_ahead ay için eksik partition'ları yarat"""
+    months_ahead = ACTIVITY_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    created = []
+    with engine.begin() as conn:
+        if not is_partitioned(conn, table):
+            return created
+        existing = {name for name, _ in list_partitions(conn, table)}
+        current = _month_start(datetime.now(timezone.utc))
+        for offset in range(months_ahead + 1):
+            month = _add_months(current, offset)
+            if partition_name(month, table) not in existing:
+                created.append(_create_partition(conn, month, table))
+    if created:
+        logger.info("created activity partitions %s", created)
+    return created
+
+
+# ============ ONLINE DÖNÜŞÜM ============
+
+_MIRROR_FUNCTION = """
+CREATE OR REPLACE FUNCTION {staging}_mirror() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM {staging} WHERE activity_id = OLD.activity_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO {staging} ({columns}) VALUES ({values});
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def _table_columns(conn, table: str) -> list:
+    # Veritabanındaki tablo modelden fazla kolon taşıyabilir (ör. updated_at)
+    return [row[0] for row in conn.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = :table AND table_schema = current_schema()
+        ORDER BY ordinal_position
+    """), {"table": table})]
+
+
+def _wait_for_older_transactions(engine, log, timeout_s: float = 600, poll_s: float = 1.0):
+    """Trigger commit'inden önce başlamış (aynalanmayan yazma yapmış olabilecek) transaction'ları bekle"""
+    with engine.connect() as conn:
+        since = conn.execute(text("SELECT now()")).scalar()
+        deadline = time.monotonic() + timeout_s
+        while True:
+            waiting = conn.execute(text("""
+                SELECT COUNT(*) FROM pg_stat_activity
+                WHERE datname = current_database() AND pid <> pg_backend_pid()
+                AND xact_start IS NOT NULL AND xact_start < :since
+            """), {"since": since}).scalar()
+            conn.rollback()
+            if not waiting:
+                return
+            if time.monotonic() >= deadline:
+                log(f"[WARNING] {waiting} eski transaction hâlâ açık; beklemeden devam ediliyor")
+                return
+            time.sleep(poll_s)
+
+
+def convert_to_partitioned(engine, batch_size: int = None, months_ahead: int = None, log=print) -> dict:
+    """
+    activities'i online olarak aylık partitioned tabloya dönüştür (sadece PostgreSQL).
+
+    1. activities_partitioned (PARTITION BY RANGE created_at) + mevcut veri
+       aralığı ve ileriki aylar için partition'lar + DEFAULT partition
+    2. activities üzerinde trigger: dönüşüm süresince INSERT / UPDATE / DELETE
+       yeni tabloya aynalanır
+    3. activity_id sırasıyla batch'ler halinde kopya (her batch ayrı transaction)
+    4. Kısa EXCLUSIVE kilit altında son fark kapatılır, tablolar yer değiştirir;
+       eski tablo activities_unpartitioned olarak kalır (geri dönüş için)
+
+    Trigger yaratıldıktan sonraki her değişiklik aynalanır. Eksik kalabilecek
+    tek satırlar, trigger yaratılırken açık olan transaction'ların commit
+    ettikleridir; bunların hepsi activity_id > max_id'dir. Bu yüzden son fark
+    sadece o aralıkta (index'le) kapatılır, kilit tablo boyutundan bağımsız kısa
+    kalır. Kopyaya başlamadan önce o transaction'ların bitmesi beklenir; aksi
+    halde trigger'dan önce başlayıp kopyadan sonra commit eden bir UPDATE /
+    DELETE kaybolabilirdi.
+
+    Dönüşümden sonra worker'lar yeniden başlatılmalı: record_activity upsert
+    desteğini (unique index'ler partitioned tabloda yok) engine başına önbelleğe alır.
+    """
+    if not _is_postgres(engine):
+        raise RuntimeError("Partitioning sadece PostgreSQL'de destekleniyor")
+    batch_size = batch_size or ACTIVITY_PARTITION_BATCH_SIZE
+    months_ahead = ACTIVITY_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            log("[OK] activities zaten partitioned")
+            return {"copied": 0, "partitions": len(list_partitions(conn))}
+        columns = ", ".join(_table_columns(conn, TABLE))
+        values = ", ".join("NEW." + column for column in _table_columns(conn, TABLE))
+        oldest, max_id = conn.execute(text(f"SELECT MIN(created_at), MAX(activity_id) FROM {TABLE}")).fetchone()
+        oldest, max_id = oldest or datetime.now(timezone.utc), max_id or 0
+
+        # 1. Yeni parent tablo: PK partition anahtarını içermek zorunda.
+        # activity_id default'u (nextval) aynı sequence'ı göstermeye devam eder.
+        conn.execute(text(f"DROP TABLE IF EXISTS {STAGING_TABLE} CASCADE"))
+        conn.execute(text(f"""
+            CREATE TABLE {STAGING_TABLE} (
+                LIKE {TABLE} INCLUDING DEFAULTS,
+                PRIMARY KEY (activity_id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """))
+        # Foreign key ve CHECK'ler LIKE ile kopyalanmaz; tanımları eski tablodan al
+        # (constraint adları tablo başına tekil, migration 029'un DROP/ADD'i çalışmaya devam eder)
+        for name, definition in conn.execute(text("""
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = CAST(:table AS regclass) AND contype IN ('f', 'c')
+        """), {"table": TABLE}).fetchall():
+            conn.execute(text(f"ALTER TABLE {STAGING_TABLE} ADD CONSTRAINT {name} {definition}"))
+        month = _month_start(oldest)
+        last = _add_months(_month_start(datetime.now(timezone.utc)), months_ahead)
+        partitions = 0
+        while month <= last:
+            _create_partition(conn, month, STAGING_TABLE)
+            month = _add_months(month, 1)
+            partitions += 1
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {STAGING_TABLE}_default PARTITION OF {STAGING_TABLE} DEFAULT"))
+        for statement in PARTITION_INDEXES:
+            conn.execute(text(statement.format(table=STAGING_TABLE)))
+
+        # 2. Eşzamanlı yazmaları aynala
+        conn.execute(text(_MIRROR_FUNCTION.format(staging=STAGING_TABLE, columns=columns, values=values)))
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {STAGING_TABLE}_mirror ON {TABLE}"))
+        conn.execute(text(f"""
+            CREATE TRIGGER {STAGING_TABLE}_mirror AFTER INSERT OR UPDATE OR DELETE ON {TABLE}
+            FOR EACH ROW EXECUTE FUNCTION {STAGING_TABLE}_mirror()
+        """))
+    log(f"[OK] {STAGING_TABLE} yaratıldı ({partitions} partition), trigger aktif")
+    _wait_for_older_transactions(engine, log)
+
+    # 3. Batch'li kopya (trigger'ın eklediği satırlar NOT EXISTS ile atlanır)
+    copied = 0
+    last_id = 0
+    while last_id < max_id:
+        upper = last_id + batch_size
+        with engine.begin() as conn:
+            result = conn.execute(text(f"""
+                INSERT INTO {STAGING_TABLE} ({columns})
+                SELECT {columns} FROM {TABLE} a
+                WHERE a.activity_id > :low AND a.activity_id <= :high
+                AND NOT EXISTS (SELECT 1 FROM {STAGING_TABLE} s WHERE s.activity_id = a.activity_id)
+            """), {"low": last_id, "high": upper})
+        copied += result.rowcount or 0
+        last_id = upper
+        log(f"  kopyalandı: activity_id <= {min(upper, max_id)} ({copied} satır)")
+
+    # 4. Son fark (sadece trigger'dan önce açılmış transaction'ların eklediği satırlar) + yer değiştirme
+    with engine.begin() as conn:
+        conn.execute(text(f"LOCK TABLE {TABLE} IN EXCLUSIVE MODE"))
+        conn.execute(text(f"""
+            INSERT INTO {STAGING_TABLE} ({columns})
+            SELECT {columns} FROM {TABLE} a
+            WHERE a.activity_id > :max_id
+            AND NOT EXISTS (SELECT 1 FROM {STAGING_TABLE} s WHERE s.activity_id = a.activity_id)
+        """), {"max_id": max_id})
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {STAGING_TABLE}_mirror ON {TABLE}"))
+        conn.execute(text(f"DROP FUNCTION IF EXISTS {STAGING_TABLE}_mirror()"))
+        staged = list_partitions(conn, STAGING_TABLE)
+        conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}"))
+        conn.execute(text(f"ALTER TABLE {STAGING_TABLE} RENAME TO {TABLE}"))
+        for name, month in staged:
+            conn.execute(text(f"ALTER TABLE {name} RENAME TO {partition_name(month)}"))
+        conn.execute(text(f"ALTER TABLE {STAGING_TABLE}_default RENAME TO {TABLE}_default"))
+        # Eski tablo silinince sequence de gitmesin
+        conn.execute(text(f"ALTER SEQUENCE {TABLE}_activity_id_seq OWNED BY {TABLE}.activity_id"))
+    log(f"[OK] activities partitioned; eski tablo {OLD_TABLE} olarak duruyor ({copied} satır kopyalandı)")
+    log("[INFO] Worker'ları yeniden başlatın (record_activity upsert desteğini önbelleğe alır)")
+    return {"copied": copied, "partitions": partitions}
+
+
+# ============ RETENTION ============
+
+def _archive_path(label: str) -> Path:
+    directory = Path(ACTIVITY_ARCHIVE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"activities_{label}.jsonl.gz"
+
+
+def _export_rows(rows, path: Path) -> int:
+    """Satırları gzip'li JSONL'e ekle (aynı ay birden fazla batch'te gelebilir)"""
+    count = 0
+    with gzip.open(path, "ab") as handle:
+        for row in rows:
+            handle.write(dumps(dict(zip(COLUMNS, row))) + b"\n")
+            count += 1
+    return count
+
+
+def _ensure_archive_table(conn):
+    # Migration 035 ile aynı tanım; migration'lar çalışmamış bir DB'de de retention çalışabilsin
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (
+            activity_id INTEGER PRIMARY KEY,
+            activity_type VARCHAR(50) NOT NULL,
+            user_id INTEGER NOT NULL,
+            item_id INTEGER,
+            review_id INTEGER,
+            list_id INTEGER,
+            related_user_id INTEGER,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            archived_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+
+
+def apply_retention(engine, months: int = None, mode: str = None, batch_size: int = None, log=print) -> dict:
+    """
+    months aydan eski aktiviteleri arşivle ve activities'ten sil.
+    Dönüş: {"mode": ..., "cutoff": ..., "moved": satır, "partitions": [taşınan partition'lar]}
+    """
+    months = ACTIVITY_RETENTION_MONTHS if months is None else months
+    mode = mode or ACTIVITY_RETENTION_MODE
+    batch_size = batch_size or ACTIVITY_PARTITION_BATCH_SIZE
+    if mode not in ("archive", "jsonl"):
+        raise ValueError(f"Bilinmeyen retention modu: {mode}")
+    report = {"mode": mode, "cutoff": None, "moved": 0, "partitions": []}
+    if months <= 0:
+        return report
+    cutoff = _add_months(_month_start(datetime.now(timezone.utc)), -months)
+    report["cutoff"] = cutoff.isoformat()
+    columns = ", ".join(COLUMNS)
+
+    if mode == "archive":
+        with engine.begin() as conn:
+            _ensure_archive_table(conn)
+
+    # Partitioned: cutoff'tan tamamen eski partition'lar bütün olarak taşınır
+    with engine.connect() as conn:
+        partitioned = is_partitioned(conn)
+        old_partitions = [
+            (name, month) for name, month in (list_partitions(conn) if partitioned else [])
+            if _add_months(month, 1) <= cutoff
+        ]
+    for name, month in old_partitions:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+            if mode == "archive":
+                moved = conn.execute(text(
+                    f"INSERT INTO {ARCHIVE_TABLE} ({columns}) SELECT {columns} FROM {name} ON CONFLICT DO NOTHING"
+                )).rowcount or 0
+            else:
+                moved = _export_rows(
+                    conn.execute(text(f"SELECT {columns} FROM {name} ORDER BY activity_id")),
+                    _archive_path(f"{month.year:04d}{month.month:02d}"),
+                )
+            conn.execute(text(f"DROP TABLE {name}"))
+        report["moved"] += moved
+        report["partitions"].append(name)
+        log(f"[OK] {name} -> {mode} ({moved} satır)")
+
+    # Partition'sız tablo (veya DEFAULT partition'daki eski satırlar): batch'li taşıma
+    cutoff_value = datetime(cutoff.year, cutoff.month, 1, tzinfo=timezone.utc)
+    if engine.dialect.name == "sqlite":
+        cutoff_value = cutoff_value.replace(tzinfo=None)  # SQLite naive UTC string saklar
+    label = f"before_{cutoff.year:04d}{cutoff.month:02d}"
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(f"""
+                SELECT {columns} FROM {TABLE} WHERE created_at < :cutoff
+                ORDER BY activity_id LIMIT :batch
+            """), {"cutoff": cutoff_value, "batch": batch_size}).fetchall()
+            if not rows:
+                break
+            if mode == "archive":
+                conn.execute(
+                    text(f"INSERT INTO {ARCHIVE_TABLE} ({columns}) VALUES ({', '.join(':' + c for c in COLUMNS)}) "
+                         "ON CONFLICT DO NOTHING"),
+                    [dict(zip(COLUMNS, row)) for row in rows],
+                )
+            else:
+                _export_rows(rows, _archive_path(label))
+            conn.execute(
+                text(f"DELETE FROM {TABLE} WHERE activity_id IN ({', '.join(str(row[0]) for row in rows)})")
+            )
+        report["moved"] += len(rows)
+        if len(rows) < batch_size:
+            break
+    if report["moved"]:
+        log(f"[OK] retention: {report['moved']} aktivite {cutoff} öncesi -> {mode}")
+    return report
+
+
+def partition_status(engine) -> dict:
+    with engine.connect() as conn:
+        partitioned = is_partitioned(conn)
+        status = {"dialect": engine.dialect.name, "partitioned": partitioned, "partitions": []}
+        for name, month in (list_partitions(conn) if partitioned else []):
+            rows = conn.execute(text(f"SELECT COUNT(*) FROM {name}")).scalar()
+            status["partitions"].append({"name": name, "month": month.isoformat(), "rows": rows})
+        if partitioned:
+            status["default_rows"] = conn.execute(text(f"SELECT COUNT(*) FROM {TABLE}_default")).scalar()
+    return status
+
+
+# ============ ARKA PLAN BAKIMI ============
+
+class PartitionMaintenance:
+    """Günde bir ensure_partitions + apply_retention çalıştıran daemon thread"""
+
+    def __init__(self, engine, interval: float = MAINTENANCE_INTERVAL_S):
+        self.engine = engine
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="activity-partitions", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self):
+        ensure_partitions(self.engine)
+        apply_retention(self.engine, log=logger.info)
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("activity partition maintenance failed")
+            if self._stop.wait(self.interval):
+                return
+
+
+def install_partition_maintenance(engine):
+    """ACTIVITY_PARTITIONING=1 ise partition / retention bakım thread'ini başlat"""
+    if not ACTIVITY_PARTITIONING:
+        return None
+    return PartitionMaintenance(engine).start()
@@ -0,0 +1,345 @@
+"""
+Activity Service - activities tablosunun yaşam döngüsü
+
+Route'lar Activity satırını doğrudan eklemek yerine bu modülü kullanır:
+
+    record_activity(db, user_id, "like_review", review_id=review_id)    # beğeni
+    retract_activity(db, user_id, "like_review", review_id=review_id)   # beğeni geri alındı
+    upsert_activity(db, user_id, "rating", item_id=item_id)            # puan güncellendi
+
+Tekilleştirilen tipler (DEDUPED_TARGETS) için (aktör, tip, hedef) başına tek
+satır tutulur: tekrar eden olay mevcut satırın created_at'ini ilerletir, geri
+alınan olay satırı siler. Tekillik tip başına kısmi unique index'lerle
+(migration 036) garanti edilir ve kayıt tek bir INSERT ... ON CONFLICT DO
+UPDATE'tir; eşzamanlı iki beğeni / takip iki satır üretemez. Index'i olmayan
+tipler (partitioned tablo - activity_partitions - veya migration'ı henüz
+uygulanamamış veritabanı) anahtar başına transaction advisory lock'u altında
+kontrol edilip eklenir; hangi index'lerin olduğu süreç başına bir kez okunur. review / comment_review / list_add her olayda yeni
+satır üretir (her biri ayrı bir içerik).
+
+Eski verideki tekrarları ve karşılığı kalmamış satırları (beğenisi kaldırılmış
+like_*, takibi bırakılmış follow, silinmiş rating) compact_activities()
+küçük batch'ler halinde temizler; ACTIVITY_COMPACTOR_INTERVAL_S > 0 ise
+arka planda periyodik olarak çalışır.
+
+Her kayıt / geri alma, aktörün takipçilerinin ve hedef review / item'ı
+gösteren feed sayfalarının cache'ini commit sonrası geçersiz kılar (feed_cache)
+ve olayı /feed/stream abonelerine iletir (feed_events).
+
+Ayarlar (env):
+    ACTIVITY_COMPACTOR_INTERVAL_S=0      # 0 = arka plan compactor kapalı
+    ACTIVITY_COMPACTOR_BATCH_SIZE=1000   # batch başına silinen satır
+"""
+
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import func, inspect, text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .. import models
+from .activity_partitions import is_partitioned
+from .feed_cache import invalidate_actor, invalidate_targets
+from .feed_events import queue_activity, queue_retraction
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_COMPACTOR_INTERVAL_S = float(os.getenv("ACTIVITY_COMPACTOR_INTERVAL_S", "0"))
+ACTIVITY_COMPACTOR_BATCH_SIZE = int(os.getenv("ACTIVITY_COMPACTOR_BATCH_SIZE", "1000"))
+
+# Tip -> hedef kolonu: bu tiplerde (user_id, activity_type, hedef) başına tek satır
+DEDUPED_TARGETS = {
+    "like_review": "review_id",
+    "like_item": "item_id",
+    "rating": "item_id",
+    "follow": "related_user_id",
+}
+
+
+# Tip -> ON CONFLICT'in dayandığı kısmi unique index (migration 036)
+DEDUPE_INDEXES = {activity_type: f"uq_activities_{activity_type}" for activity_type in DEDUPED_TARGETS}
+
+_UPSERT_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+# id(engine) -> upsert edilebilen tipler; index'ler sonradan eklenir veya tablo dönüştürülürse
+# worker'lar yeniden başlatılmalı
+_upsert_types = {}
+
+
+def _supports_upsert(db, activity_type: str) -> bool:
+    """activities üzerinde bu tipin unique index'i var mı (yoksa ON CONFLICT hata verirdi)"""
+    bind = db.get_bind()
+    types = _upsert_types.get(id(bind))
+    if types is None:
+        types = frozenset()
+        if bind.dialect.name in _UPSERT_INSERTS:
+            names = {index["name"] for index in inspect(db.connection()).get_indexes(models.Activity.__tablename__)}
+            types = frozenset(t for t, index in DEDUPE_INDEXES.items() if index in names)
+            missing = sorted(set(DEDUPE_INDEXES) - types)
+            if missing:
+                logger.warning("activity dedupe indexes missing for %s; using advisory-lock inserts",
+                               ", ".join(missing))
+        _upsert_types[id(bind)] = types
+    return activity_type in types
+
+
+def _upsert(db, activity_type: str, values: dict):
+    """Tek statement'ta ekle veya mevcut satırı öne taşı; dönen satırdan (session dışı) Activity"""
+    column = DEDUPED_TARGETS[activity_type]
+    table = models.Activity.__table__
+    statement = _UPSERT_INSERTS[db.get_bind().dialect.name](table).values(**values, created_at=func.now())
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id", column],
+        index_where=table.c.activity_type == activity_type,
+        set_={"created_at": func.now()},
+    ).returning(*table.c)
+    return models.Activity(**db.execute(statement).one()._mapping)
+
+
+def _locked_insert(db, user_id: int, activity_type: str, targets: dict):
+    """Unique index'in olmadığı tablo: aynı anahtarın kayıtları transaction sonuna kadar sıraya girer"""
+    if db.get_bind().dialect.name == "postgresql":
+        key = f"activity:{user_id}:{activity_type}:{targets[DEDUPED_TARGETS[activity_type]]}"
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": key})
+    existing = _matching(db, user_id, activity_type, targets).order_by(
+        models.Activity.activity_id.desc()
+    ).first()
+    if existing is not None:
+        existing.created_at = func.now()
+        return existing
+    activity = models.Activity(user_id=user_id, activity_type=activity_type, **targets)
+    db.add(activity)
+    return activity
+
+
+def _target_filter(query, activity_type: str, targets: dict):
+    column = DEDUPED_TARGETS[activity_type]
+    return query.filter(getattr(models.Activity, column) == targets[column])
+
+
+def _matching(db, user_id: int, activity_type: str, targets: dict):
+    query = db.query(models.Activity).filter(
+        models.Activity.user_id == user_id,
+        models.Activity.activity_type == activity_type,
+    )
+    return _target_filter(query, activity_type, targets)
+
+
+def _invalidate_feeds(db, user_id: int, targets: dict):
+    invalidate_actor(db, user_id)
+    invalidate_targets(db, review_ids=(targets.get("review_id"),), item_ids=(targets.get("item_id"),))
+
+
+def record_activity(db, user_id: int, activity_type: str, item_id: int = None, review_id: int = None,
+                    list_id: int = None, related_user_id: int = None):
+    """
+    Aktivite kaydet (commit etmez, çağıranın transaction'ına katılır).
+    Tekilleştirilen tiplerde aynı (aktör, tip, hedef) satırı varsa yeni satır
+    eklenmez; mevcut satır en yeni olay zamanına taşınır. Upsert yolunda dönen
+    Activity session'a bağlı değildir (satır statement'la yazıldı).
+    """
+    targets = {"item_id": item_id, "review_id": review_id, "list_id": list_id, "related_user_id": related_user_id}
+    _invalidate_feeds(db, user_id, targets)
+    if activity_type not in DEDUPED_TARGETS:
+        activity = models.Activity(user_id=user_id, activity_type=activity_type, **targets)
+        db.add(activity)
+    elif _supports_upsert(db, activity_type):
+        activity = _upsert(db, activity_type, {"user_id": user_id, "activity_type": activity_type, **targets})
+    else:
+        activity = _locked_insert(db, user_id, activity_type, targets)
+    queue_activity(db, activity)
+    return activity
+
+
+def upsert_activity(db, user_id: int, activity_type: str, **targets):
+    """Olay güncellendi (ör. puan değişti): satır varsa öne taşı, yoksa oluştur"""
+    if activity_type not in DEDUPED_TARGETS:
+        raise ValueError(f"{activity_type} tekilleştirilen bir aktivite tipi değil")
+    return record_activity(db, user_id, activity_type, **targets)
+
+
+def retract_activity(db, user_id: int, activity_type: str, **targets) -> int:
+    """Geri alınan olayın (unlike, unfollow, puan silme) aktivite satırlarını sil"""
+    if activity_type not in DEDUPED_TARGETS:
+        raise ValueError(f"{activity_type} geri alınabilen bir aktivite tipi değil")
+    targets.setdefault(DEDUPED_TARGETS[activity_type], None)
+    _invalidate_feeds(db, user_id, targets)
+    queue_retraction(db, user_id, activity_type, related_user_id=targets.get("related_user_id"))
+    return _matching(db, user_id, activity_type, targets).delete(synchronize_session=False)
+
+
+def retract_comment_activity(db, user_id: int, review_id: int) -> int:
+    """
+    Yorum silindi: kullanıcının bu review'daki comment_review aktivitelerini
+    kalan yorum sayısına indir. Aktivite comment_id taşımadığı için en eski
+    aktiviteler (eski yorumlara karşılık gelenler) tutulur.
+    """
+    db.flush()  # silinen yorum henüz flush edilmemiş olabilir (autoflush=False)
+    _invalidate_feeds(db, user_id, {"review_id": review_id})
+    remaining = db.query(func.count(models.ReviewComment.comment_id)).filter(
+        models.ReviewComment.review_id == review_id,
+        models.ReviewComment.user_id == user_id,
+    ).scalar()
+    activity_ids = [row[0] for row in db.query(models.Activity.activity_id).filter(
+        models.Activity.user_id == user_id,
+        models.Activity.activity_type == "comment_review",
+        models.Activity.review_id == review_id,
+    ).order_by(models.Activity.activity_id).all()]
+    extra = activity_ids[remaining:]
+    if not extra:
+        return 0
+    return db.query(models.Activity).filter(
+        models.Activity.activity_id.in_(extra)
+    ).delete(synchronize_session=False)
+
+
+# ============ COMPACTOR ============
+
+# Her sorgu en fazla :batch silinecek activity_id döndürür
+_COMPACTION_QUERIES = {
+    # Aynı (aktör, tip, hedef) için en yeni satır dışındakiler (unique index'ler öncesinden
+    # kalan veya partitioned tabloya kopyalanan tekrarlar); tek sıralı geçiş, satır başına alt sorgu yok
+    "duplicates": """
+        SELECT activity_id FROM (
+            SELECT a.activity_id,
+                   CASE a.activity_type WHEN 'like_review' THEN a.review_id
+                        WHEN 'follow' THEN a.related_user_id ELSE a.item_id END AS target_id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY a.user_id, a.activity_type,
+                                    CASE a.activity_type WHEN 'like_review' THEN a.review_id
+                                         WHEN 'follow' THEN a.related_user_id ELSE a.item_id END
+                       ORDER BY a.activity_id DESC
+                   ) AS duplicate_rank
+            FROM activities a
+            WHERE a.activity_type IN ('like_review', 'like_item', 'rating', 'follow')
+        ) ranked
+        WHERE duplicate_rank > 1 AND target_id IS NOT NULL
+        LIMIT :batch
+    """,
+    "unliked_reviews": """
+        SELECT a.activity_id FROM activities a
+        WHERE a.activity_type = 'like_review'
+        AND NOT EXISTS (
+            SELECT 1 FROM review_likes rl WHERE rl.review_id = a.review_id AND rl.user_id = a.user_id
+        )
+        LIMIT :batch
+    """,
+    "unliked_items": """
+        SELECT a.activity_id FROM activities a
+        WHERE a.activity_type = 'like_item'
+        AND NOT EXISTS (
+            SELECT 1 FROM item_likes il WHERE il.item_id = a.item_id AND il.user_id = a.user_id
+        )
+        LIMIT :batch
+    """,
+    "unfollowed": """
+        SELECT a.activity_id FROM activities a
+        WHERE a.activity_type = 'follow'
+        AND NOT EXISTS (
+            SELECT 1 FROM follows f WHERE f.follower_id = a.user_id AND f.followee_id = a.related_user_id
+        )
+        LIMIT :batch
+    """,
+    "deleted_ratings": """
+        SELECT a.activity_id FROM activities a
+        WHERE a.activity_type = 'rating'
+        AND NOT EXISTS (
+            SELECT 1 FROM ratings r WHERE r.user_id = a.user_id AND r.item_id = a.item_id
+        )
+        LIMIT :batch
+    """,
+}
+
+
+def ensure_dedupe_indexes(engine) -> list:
+    """
+    Migration 036'nın index'lerini (eksikse) yarat; tekrarlar temizlendikten
+    sonra çağrılır. Partitioned tabloda bir şey yapmaz. Dönüş: yaratılamayanlar.
+    """
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql" and is_partitioned(conn):
+            return []
+    failed = []
+    for activity_type, index in DEDUPE_INDEXES.items():
+        column = DEDUPED_TARGETS[activity_type]
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS {index} ON activities(user_id, {column}) "
+                    f"WHERE activity_type = '{activity_type}'"
+                ))
+        except Exception as exc:
+            logger.warning("could not create %s: %s", index, exc)
+            failed.append(index)
+    _upsert_types.pop(id(engine), None)
+    return failed
+
+
+def compact_activities(engine, batch_size: int = None, max_batches: int = None, dry_run: bool = False) -> dict:
+    """
+    Tekrarlayan ve karşılığı kalmamış aktiviteleri batch'ler halinde sil.
+    Her batch kendi kısa transaction'ında çalışır; tabloyu uzun süre kilitlemez.
+    Dönüş: kural başına silinen satır sayısı (dry_run'da her kural için en
+    fazla bir batch'lik silinecek satır sayılır, hiçbir şey silinmez).
+    """
+    batch_size = batch_size or ACTIVITY_COMPACTOR_BATCH_SIZE
+    removed = {}
+    for rule, sql in _COMPACTION_QUERIES.items():
+        removed[rule] = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            with engine.begin() as conn:
+                ids = [row[0] for row in conn.execute(text(sql), {"batch": batch_size})]
+                if not ids or dry_run:
+                    removed[rule] += len(ids)
+                    break
+                conn.execute(
+                    models.Activity.__table__.delete().where(models.Activity.activity_id.in_(ids))
+                )
+            removed[rule] += len(ids)
+            batches += 1
+            if len(ids) < batch_size:
+                break
+    return removed
+
+
+class ActivityCompactor:
+    """compact_activities'i ACTIVITY_COMPACTOR_INTERVAL_S'de bir çalıştıran daemon thread"""
+
+    def __init__(self, engine, interval: float, batch_size: int = None):
+        self.engine = engine
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_run = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="activity-compactor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            started = time.perf_counter()
+            try:
+                removed = compact_activities(self.engine, self.batch_size)
+            except Exception:
+                logger.exception("activity compaction failed")
+                continue
+            self.last_run = {"removed": removed, "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+            if any(removed.values()):
+                logger.info("activity compaction removed %s", removed)
+
+
+def install_activity_compactor(engine):
+    """ACTIVITY_COMPACTOR_INTERVAL_S > 0 ise arka plan compactor'ını başlat"""
+    if ACTIVITY_COMPACTOR_INTERVAL_S <= 0:
+        return None
+    return ActivityCompactor(engine, ACTIVITY_COMPACTOR_INTERVAL_S).start()
@@ -0,0 +1,84 @@
+"""
+Auth Cache - token -> kullanıcı çözümlemesi için kısa ömürlü süreç içi cache
+
+get_current_user / get_current_user_optional / verify_current_user her
+istekte users tablosuna gidiyordu. Çözümlenen kullanıcının kolonları token
+anahtarıyla AUTH_USER_CACHE_TTL_S saniye saklanır; cache'ten dönen kullanıcı
+isteğin session'ına SQL çalıştırmadan bağlanır (merge(load=False)), yani
+route'lar onu normal bir ORM nesnesi gibi kullanabilir.
+
+Geçersiz kılma invalidation bus'taki "user" mesajlarıyladır (update_user,
+şifre sıfırlama, follow / unfollow); kullanıcı başına bir sürüm sayacı
+artırılır ve eski sürümle saklanan kayıtlar miss sayılır. Bus, commit'ten
+sonra tüm worker'lara ulaştığı için çok worker'lı kurulumda da güncellemeler
+bir sonraki istekte görünür.
+
+Ayarlar (env):
+    AUTH_USER_CACHE_ENABLED=1
+    AUTH_USER_CACHE_TTL_S=30
+    AUTH_USER_CACHE_MAX_ENTRIES=10000
+"""
+
+import os
+import threading
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from .. import models
+from .cache import MemoryBackend, get_cache
+from .invalidation import subscribe
+
+AUTH_USER_CACHE_ENABLED = os.getenv("AUTH_USER_CACHE_ENABLED", "1") == "1"
+AUTH_USER_CACHE_TTL_S = float(os.getenv("AUTH_USER_CACHE_TTL_S", "30"))
+AUTH_USER_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "10000"))
+
+_COLUMNS = tuple(attr.key for attr in inspect(models.User).column_attrs)
+
+user_cache = get_cache(
+    "auth_user", ttl=AUTH_USER_CACHE_TTL_S, backend=MemoryBackend(max_entries=AUTH_USER_CACHE_MAX_ENTRIES)
+)
+_versions = {}  # user_id -> int
+_generation = 0  # tüm kullanıcılar birden geçersiz kılınınca (bus flush) artar
+_versions_lock = threading.Lock()
+_installed = False  # bus'a abone olmadan cache'lenen kullanıcı hiç geçersiz kılınmazdı
+
+
+def resolve_user(db, token: str, user_id: int):
+    """Token'ın kullanıcısını döndür (yoksa None); cache'te varsa SQL çalıştırmaz"""
+    if not _installed:
+        return db.query(models.User).filter(models.User.user_id == user_id).first()
+
+    cached = user_cache.get(token)
+    version = (_generation, _versions.get(user_id, 0))
+    if cached is not None and cached[0] == user_id and cached[1] == version:
+        user = models.User(**cached[2])
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    # Sürüm sorgudan önce okunur: sorgu sırasında gelen güncelleme kaydı bayat bırakır
+    user = db.query(models.User).filter(models.User.user_id == user_id).first()
+    if user is not None:
+        user_cache.set(token, (user_id, version, {key: getattr(user, key) for key in _COLUMNS}))
+    return user
+
+
+def _evict_users(ids):
+    with _versions_lock:
+        for user_id in ids:
+            _versions[user_id] = _versions.get(user_id, 0) + 1
+
+
+def _evict_all_users():
+    global _generation
+    with _versions_lock:
+        _generation += 1
+    user_cache.clear()
+
+
+def install_auth_cache():
+    """AUTH_USER_CACHE_ENABLED=1 (varsayılan) ise invalidation bus'taki "user" mesajlarına abone ol"""
+    global _installed
+    if AUTH_USER_CACHE_ENABLED:
+        subscribe("user", _evict_users, flush=_evict_all_users)
+        _installed = True
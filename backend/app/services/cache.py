@@ -0,0 +1,546 @@
+"""
+Cache - get / set / delete, TTL, single-flight get_or_compute ve namespace'li
+ortak cache arayüzü
+
+Her kullanıcı kendi namespace'ini alır; anahtarlar backend'de
+"<namespace>:<key>" olarak saklanır ve metrikler namespace label'ıyla
+(reaview_cache_{hits,misses,evictions}_total{cache="..."}) yazılır:
+
+    ratings = get_cache("ratings", ttl=600)
+    ratings.get_or_compute(f"item:{item_id}", lambda: compute_rating(db, item_id))
+    ratings.delete(f"item:{item_id}")
+    ratings.evict_on("item", lambda item_id: f"item:{item_id}")   # invalidation bus
+
+    @cached("featured_lists", ttl=60)
+    def featured_lists(limit: int): ...
+
+get_or_compute aynı anahtar için süreç içinde tek hesaplama yapar: eşzamanlı
+istekler ilk isteğin sonucunu bekler (single-flight). Worker'lar arası
+single-flight yoktur; paylaşımlı backend'de (redis) her worker en fazla bir kez
+hesaplar.
+
+Backend'ler (CACHE_BACKEND):
+    memory   Süreç içi sınırlı LRU (CACHE_MAX_ENTRIES). Değerler kopyalanmadan
+             saklanır; cache'ten dönen nesneler değiştirilmemeli.
+    sqlite   Yerel disk (CACHE_SQLITE_PATH); aynı makinedeki worker'lar paylaşır,
+             yeniden başlatmada korunur. Değerler pickle ile saklanır.
+    redis    RESP protokolü konuşan herhangi bir sunucu (CACHE_REDIS_URL);
+             bağımlılık gerektirmez, testlerde backend/tools/fake_redis.py.
+
+Backend hatası (ör. Redis erişilemez) isteği düşürmez: get miss, set no-op
+olur ve bir uyarı loglanır.
+
+Ayarlar (env):
+    CACHE_BACKEND=memory
+    CACHE_MAX_ENTRIES=10000
+    CACHE_DEFAULT_TTL_S=300              # 0 = süresiz
+    CACHE_SQLITE_PATH=backend/cache/cache.sqlite3
+    CACHE_REDIS_URL=redis://localhost:6379/0
+    CACHE_REDIS_TIMEOUT_S=0.5
+"""
+
+import functools
+import hashlib
+import logging
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from .invalidation import subscribe
+from .metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_DEFAULT_TTL_S = float(os.getenv("CACHE_DEFAULT_TTL_S", "300"))
+CACHE_SQLITE_PATH = os.getenv(
+    "CACHE_SQLITE_PATH",
+    str(Path(__file__).resolve().parent.parent.parent / "cache" / "cache.sqlite3"),
+)
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_REDIS_TIMEOUT_S = float(os.getenv("CACHE_REDIS_TIMEOUT_S", "0.5"))
+
+MISSING = object()
+_MAX_KEY_LENGTH = 200
+
+
+class CacheBackendError(Exception):
+    """Backend'in hata cevabı (ör. Redis -ERR)"""
+
+
+def _record_eviction(key: str):
+    CACHE_EVICTIONS.labels(key.split(":", 1)[0]).inc()
+
+
+# ============ BACKEND'LER ============
+
+class MemoryBackend:
+    """Süreç içi LRU; en az kullanılan kayıt max_entries aşılınca atılır"""
+
+    name = "memory"
+    serializes = False
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires | None, value), en eski başta
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry[0] is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value, ttl: float):
+        expires = time.monotonic() + ttl if ttl > 0 else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                _record_eviction(evicted)
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self, prefix: str):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteBackend:
+    """Yerel disk cache'i; süre duvar saatiyle tutulur, worker'lar ve restart'lar arası paylaşılır"""
+
+    name = "sqlite"
+    serializes = True
+    PRUNE_EVERY = 256  # her N yazmada bir süresi dolanları ve fazlalığı sil
+
+    def __init__(self, path: str = CACHE_SQLITE_PATH, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed ON cache_entries (accessed)")
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM cache_entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return MISSING
+            if row[1] is not None and row[1] <= now:
+                self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                return MISSING
+            self._conn.execute("UPDATE cache_entries SET accessed = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl if ttl > 0 else None, now),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(now)
+
+    def _prune(self, now: float):
+        self._conn.execute("DELETE FROM cache_entries WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        overflow = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.max_entries
+        if overflow <= 0:
+            return
+        evicted = [row[0] for row in self._conn.execute(
+            "SELECT key FROM cache_entries ORDER BY accessed LIMIT ?", (overflow,)
+        )]
+        self._conn.executemany("DELETE FROM cache_entries WHERE key = ?", [(key,) for key in evicted])
+        for key in evicted:
+            _record_eviction(key)
+
+    def prune(self):
+        with self._lock:
+            self._prune(time.time())
+
+    def delete(self, keys):
+        with self._lock:
+            self._conn.executemany("DELETE FROM cache_entries WHERE key = ?", [(key,) for key in keys])
+
+    def clear(self, prefix: str):
+        # LIKE ASCII'de büyük / küçük harf ayırmaz; öneki birebir karşılaştır
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+
+class _RespConnection:
+    def __init__(self, host: str, port: int, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+
+    def command(self, *args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        self.sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise CacheBackendError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Redis connection closed")
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise CacheBackendError(f"Unexpected RESP reply: {line!r}")
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisBackend:
+    """
+    RESP2 istemcisi; redis://[:password@]host:port/db. Boşta bağlantılar
+    pool_size kadar saklanır, hata alan bağlantı kapatılıp atılır.
+    Eviction'lar sunucu tarafındadır (maxmemory-policy), metriklere yansımaz.
+    """
+
+    name = "redis"
+    serializes = True
+
+    def __init__(self, url: str = CACHE_REDIS_URL, timeout: float = CACHE_REDIS_TIMEOUT_S, pool_size: int = 8):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", ""):
+            raise ValueError(f"Unsupported cache URL scheme: {parsed.scheme}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> _RespConnection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        connection = _RespConnection(self.host, self.port, self.timeout)
+        try:
+            if self.password:
+                connection.command("AUTH", self.password)
+            if self.db:
+                connection.command("SELECT", self.db)
+        except Exception:
+            connection.close()
+            raise
+        return connection
+
+    def _release(self, connection: _RespConnection):
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def execute(self, *args):
+        connection = self._acquire()
+        try:
+            reply = connection.command(*args)
+        except CacheBackendError:
+            self._release(connection)  # sunucu cevap verdi, bağlantı sağlam
+            raise
+        except Exception:
+            connection.close()
+            raise
+        self._release(connection)
+        return reply
+
+    def get(self, key: str):
+        value = self.execute("GET", key)
+        return MISSING if value is None else value
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if ttl > 0:
+            self.execute("SET", key, value, "PX", max(1, int(ttl * 1000)))
+        else:
+            self.execute("SET", key, value)
+
+    def delete(self, keys):
+        keys = list(keys)
+        if keys:
+            self.execute("DEL", *keys)
+
+    def clear(self, prefix: str):
+        pattern = "".join("\\" + char if char in "*?[]\\" else char for char in prefix) + "*"
+        cursor = b"0"
+        while True:
+            cursor, keys = self.execute("SCAN", cursor, "MATCH", pattern, "COUNT", 500)
+            if keys:
+                self.execute("DEL", *keys)
+            if cursor in (b"0", "0"):
+                return
+
+    def ping(self) -> bool:
+        return self.execute("PING") in ("PONG", b"PONG")
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+def create_backend(kind: str = CACHE_BACKEND):
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "sqlite":
+        return SqliteBackend()
+    if kind == "redis":
+        return RedisBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND: {kind}")
+
+
+_default_backend = None
+_default_backend_lock = threading.Lock()
+
+
+def default_backend():
+    global _default_backend
+    with _default_backend_lock:
+        if _default_backend is None:
+            _default_backend = create_backend()
+            logger.info("cache backend: %s", _default_backend.name)
+        return _default_backend
+
+
+# ============ CACHE ============
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class Cache:
+    def __init__(self, namespace: str, backend=None, ttl: float = None):
+        if not namespace or ":" in namespace:
+            raise ValueError(f"Invalid cache namespace: {namespace!r}")
+        self.namespace = namespace
+        self.ttl = CACHE_DEFAULT_TTL_S if ttl is None else ttl
+        self._backend = backend
+        self._prefix = namespace + ":"
+        self._hits = CACHE_HITS.labels(namespace)
+        self._misses = CACHE_MISSES.labels(namespace)
+        self._evictions = CACHE_EVICTIONS.labels(namespace)
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = default_backend()
+        return self._backend
+
+    def _key(self, key) -> str:
+        key = str(key)
+        if len(key) > _MAX_KEY_LENGTH:
+            key = "sha1:" + hashlib.sha1(key.encode()).hexdigest()
+        return self._prefix + key
+
+    def _lookup(self, key: str):
+        backend = self.backend
+        try:
+            value = backend.get(key)
+            if value is not MISSING and backend.serializes:
+                value = pickle.loads(value)
+        except Exception as exc:
+            logger.warning("cache get failed (%s, %s): %s", self.namespace, backend.name, exc)
+            value = MISSING
+        if value is MISSING:
+            self._misses.inc()
+        else:
+            self._hits.inc()
+        return value
+
+    def get(self, key, default=None):
+        value = self._lookup(self._key(key))
+        return default if value is MISSING else value
+
+    def set(self, key, value, ttl: float = None):
+        self._store(self._key(key), value, ttl)
+
+    def _store(self, key: str, value, ttl: float = None):
+        backend = self.backend
+        try:
+            backend.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL) if backend.serializes else value,
+                        self.ttl if ttl is None else ttl)
+        except Exception as exc:
+            logger.warning("cache set failed (%s, %s): %s", self.namespace, backend.name, exc)
+
+    def delete(self, *keys):
+        backend = self.backend
+        try:
+            backend.delete([self._key(key) for key in keys])
+        except Exception as exc:
+            logger.warning("cache delete failed (%s, %s): %s", self.namespace, backend.name, exc)
+
+    def clear(self):
+        """Sadece bu namespace'in kayıtlarını sil"""
+        backend = self.backend
+        try:
+            backend.clear(self._prefix)
+        except Exception as exc:
+            logger.warning("cache clear failed (%s, %s): %s", self.namespace, backend.name, exc)
+
+    def get_or_compute(self, key, compute, ttl: float = None):
+        """
+        Cache'te yoksa compute()'u çağırıp sonucu sakla. Aynı anahtar için
+        eşzamanlı çağrılar tek hesaplamayı bekler; compute'un exception'ı
+        bekleyen tüm çağıranlara iletilir ve cache'lenmez.
+        """
+        key = self._key(key)
+        value = self._lookup(key)
+        if value is not MISSING:
+            return value
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            self._store(key, flight.value, ttl)
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def evict_on(self, entity: str, key=str):
+        """invalidation bus'ta entity'nin id'leri gelince key(id) anahtarlarını sil (commit sonrası, tüm worker'lar)"""
+        subscribe(entity, lambda ids: self.delete(*(key(value) for value in ids)), flush=self.clear)
+
+    def stats(self) -> dict:
+        lookups = self._hits.value + self._misses.value
+        return {
+            "namespace": self.namespace,
+            "backend": self.backend.name,
+            "ttl_s": self.ttl,
+            "hits": int(self._hits.value),
+            "misses": int(self._misses.value),
+            "hit_ratio": round(self._hits.value / lookups, 4) if lookups else 0.0,
+            "evictions": int(self._evictions.value),
+        }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace: str, ttl: float = None, backend=None) -> Cache:
+    """Namespace başına tek Cache; backend verilmezse varsayılan (CACHE_BACKEND)"""
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            cache = _caches[namespace] = Cache(namespace, backend, ttl)
+        return cache
+
+
+def find_cache(namespace: str):
+    with _caches_lock:
+        return _caches.get(namespace)
+
+
+def cache_stats() -> list:
+    with _caches_lock:
+        caches = list(_caches.values())
+    return [cache.stats() for cache in caches]
+
+
+def _make_key(args, kwargs) -> str:
+    return repr((args, sorted(kwargs.items()))) if kwargs else repr(args)
+
+
+def cached(namespace: str = None, ttl: float = None, cache: Cache = None, key=None):
+    """
+    Saf fonksiyonlar için get_or_compute dekoratörü; anahtar argümanların
+    repr'idir (key=lambda *args, **kwargs: ... ile değiştirilebilir).
+    Sonuç wrapper.cache üzerinden silinebilir.
+    """
+    def decorate(func):
+        target = cache or get_cache(namespace or f"{func.__module__}.{func.__qualname__}", ttl)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key is not None else _make_key(args, kwargs)
+            return target.get_or_compute(cache_key, lambda: func(*args, **kwargs), ttl)
+
+        wrapper.cache = target
+        return wrapper
+
+    return decorate
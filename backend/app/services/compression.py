@@ -0,0 +1,294 @@
+"""
+Compression - JSON cevaplar için gzip / brotli ASGI middleware'i
+
+Accept-Encoding'e göre brotli (paket kuruluysa) veya gzip seçilir. Sadece
+allowlist'teki content-type'lar ve COMPRESSION_MIN_SIZE'dan büyük gövdeler
+sıkıştırılır; zaten Content-Encoding taşıyan, 204/304 ve text/event-stream
+cevaplara dokunulmaz.
+
+Gövde iki şekilde gelebilir:
+- Tek parça (JSONResponse): COMPRESSION_STREAM_CHUNK'tan büyükse parça parça
+  sıkıştırılıp birden fazla body mesajı olarak gönderilir; istemci ilk
+  byte'ları tüm gövde sıkıştırılmadan alır.
+- Çok parçalı (StreamingResponse, more_body=True): her parça geldiği anda
+  sıkıştırılıp flush edilir, gövde hiçbir zaman bellekte toplanmaz.
+
+Sıkıştırılan cevaplarda strong ETag weak'e çevrilir (W/"..."): temsil değişti
+ama If-None-Match karşılaştırması (conditional.etag_matches) W/ önekini yok
+saydığı için 304 akışı bozulmaz.
+
+Ayarlar (env):
+    COMPRESSION_ENABLED=1
+    COMPRESSION_MIN_SIZE=1024            # byte, altı sıkıştırılmaz
+    COMPRESSION_GZIP_LEVEL=6             # 1-9
+    COMPRESSION_BROTLI_QUALITY=4         # 0-11 (dinamik içerik için 4-5 iyi denge)
+    COMPRESSION_STREAM_CHUNK=65536       # tek parça gövdeyi bu boyutlarda böl
+    COMPRESSION_CONTENT_TYPES=application/json,text/html,...
+"""
+
+import os
+import threading
+import time
+import zlib
+
+from .metrics import Counter
+
+try:
+    import brotli
+except ImportError:  # opsiyonel: pip install brotli
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_STREAM_CHUNK = int(os.getenv("COMPRESSION_STREAM_CHUNK", "65536"))
+COMPRESSION_CONTENT_TYPES = tuple(
+    value.strip() for value in os.getenv(
+        "COMPRESSION_CONTENT_TYPES",
+        "application/json,text/html,text/plain,text/css,application/javascript,image/svg+xml",
+    ).split(",") if value.strip()
+)
+
+COMPRESSED_BYTES_IN = Counter(
+    "reaview_compression_input_bytes_total", "Uncompressed response bytes", ("encoding",)
+)
+COMPRESSED_BYTES_OUT = Counter(
+    "reaview_compression_output_bytes_total", "Compressed response bytes", ("encoding",)
+)
+COMPRESSION_SECONDS = Counter(
+    "reaview_compression_seconds_total", "CPU time spent compressing responses", ("encoding",)
+)
+
+
+def available_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str, encodings=None):
+    """Accept-Encoding header'ından (q-değerleriyle) desteklenen en iyi kodlamayı seç"""
+    encodings = encodings or available_encodings()
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    best = None
+    for encoding in encodings:  # sıra = sunucu tercihi
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (encoding, q)
+    return best[0] if best else None
+
+
+class _Compressor:
+    """gzip / brotli için ortak arayüz: compress(chunk) + flush() + finish()"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._obj = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.flush()
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class CompressionStats:
+    """Route bazında sıkıştırma özeti (/admin/compression ve benchmark için)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route: str, encoding: str, bytes_in: int, bytes_out: int, seconds: float):
+        COMPRESSED_BYTES_IN.labels(encoding).inc(bytes_in)
+        COMPRESSED_BYTES_OUT.labels(encoding).inc(bytes_out)
+        COMPRESSION_SECONDS.labels(encoding).inc(seconds)
+        key = (route, encoding)
+        with self._lock:
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = {"responses": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0}
+            stats["responses"] += 1
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+            stats["seconds"] += seconds
+
+    def snapshot(self) -> list:
+        with self._lock:
+            items = [(key, dict(stats)) for key, stats in self._routes.items()]
+        report = []
+        for (route, encoding), stats in sorted(items, key=lambda x: -x[1]["bytes_in"]):
+            responses = stats["responses"]
+            report.append({
+                "route": route,
+                "encoding": encoding,
+                "responses": responses,
+                "avg_bytes_in": round(stats["bytes_in"] / responses),
+                "avg_bytes_out": round(stats["bytes_out"] / responses),
+                "bytes_saved": stats["bytes_in"] - stats["bytes_out"],
+                "ratio": round(stats["bytes_out"] / stats["bytes_in"], 3) if stats["bytes_in"] else None,
+                "avg_cpu_ms": round(stats["seconds"] * 1000 / responses, 3),
+            })
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+compression_stats = CompressionStats()
+
+
+def _header(headers, name: bytes):
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, app, min_size: int = None, gzip_level: int = None, brotli_quality: int = None,
+                 content_types=None, stream_chunk: int = None, encodings=None):
+        self.app = app
+        self.min_size = COMPRESSION_MIN_SIZE if min_size is None else min_size
+        self.gzip_level = COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level
+        self.brotli_quality = COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality
+        self.content_types = tuple(content_types or COMPRESSION_CONTENT_TYPES)
+        self.stream_chunk = stream_chunk or COMPRESSION_STREAM_CHUNK
+        self.encodings = tuple(encodings or available_encodings())
+
+    def _compressible(self, start_message) -> bool:
+        if start_message["status"] in (204, 304) or start_message["status"] < 200:
+            return False
+        headers = start_message.get("headers", [])
+        if _header(headers, b"content-encoding"):
+            return False
+        content_type = (_header(headers, b"content-type") or "").split(";")[0].strip().lower()
+        return content_type in self.content_types
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = None
+        for key, value in scope.get("headers", ()):
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept, self.encodings) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "compressor": None, "passthrough": False, "bytes_in": 0, "bytes_out": 0,
+                 "seconds": 0.0}
+
+        def route_name():
+            route = scope.get("route")
+            return f"{scope['method']} {getattr(route, 'path', None) or scope.get('path', '')}"
+
+        def compress(data: bytes, final: bool) -> bytes:
+            started = time.process_time()
+            compressor = state["compressor"]
+            out = compressor.compress(data)
+            out += compressor.finish() if final else compressor.flush()
+            state["seconds"] += time.process_time() - started
+            state["bytes_in"] += len(data)
+            state["bytes_out"] += len(out)
+            return out
+
+        def compressed_headers(start_message):
+            headers = []
+            for key, value in start_message.get("headers", []):
+                lowered = key.lower()
+                if lowered == b"content-length":
+                    continue
+                if lowered == b"etag" and value.startswith(b'"'):
+                    value = b"W/" + value
+                if lowered == b"vary":
+                    continue
+                headers.append((key, value))
+            vary = _header(start_message.get("headers", []), b"vary")
+            vary = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+            headers.append((b"vary", vary.encode("latin-1")))
+            headers.append((b"content-encoding", encoding.encode()))
+            return headers
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                if not self._compressible(message):
+                    state["passthrough"] = True
+                    await send(message)
+                else:
+                    state["start"] = message  # gövdenin ilk parçasını görene kadar beklet
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            start = state["start"]
+
+            if start is not None:
+                state["start"] = None
+                if not more_body and len(body) < self.min_size:
+                    # Küçük tek parça gövde: sıkıştırmaya değmez
+                    state["passthrough"] = True
+                    headers = list(start.get("headers", []))
+                    if not _header(headers, b"vary"):
+                        headers.append((b"vary", b"Accept-Encoding"))
+                    await send({**start, "headers": headers})
+                    await send(message)
+                    return
+                state["compressor"] = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                await send({**start, "headers": compressed_headers(start)})
+
+            if not more_body and len(body) > self.stream_chunk:
+                # Büyük tek parça gövde: parçalar halinde sıkıştırıp gönder
+                for offset in range(0, len(body), self.stream_chunk):
+                    piece = body[offset:offset + self.stream_chunk]
+                    final = offset + self.stream_chunk >= len(body)
+                    await send({"type": "http.response.body", "body": compress(piece, final), "more_body": not final})
+            else:
+                await send({"type": "http.response.body", "body": compress(body, not more_body), "more_body": more_body})
+
+            if not more_body:
+                compression_stats.record(route_name(), encoding, state["bytes_in"], state["bytes_out"], state["seconds"])
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def install_compression(app):
+    """COMPRESSION_ENABLED=1 (varsayılan) ise compression middleware'ini ekle"""
+    if not COMPRESSION_ENABLED:
+        return
+    app.add_middleware(CompressionMiddleware)
@@ -0,0 +1,103 @@
+"""
+Conditional GET - ETag / Last-Modified / 304 yardımcıları
+
+Route'lar gövdenin bağlı olduğu satırlardan ucuz bir "validator" üretir
+(payload'ın kendisi veya updated_at + aggregate değerler) ve
+conditional_json() ile cevap verir:
+
+    etag = etag_for(payload)
+    return conditional_json(request, payload, etag=etag, last_modified=item.updated_at)
+
+İstemcinin If-None-Match header'ı ETag ile eşleşirse gövdesiz 304 döner.
+If-Modified-Since bilinçli olarak yok sayılır: silinen bir review veya
+listeden çıkarılan bir item Last-Modified'ı ilerletmez, bu yüzden 304 kararı
+sadece ETag ile verilir (Last-Modified bilgi amaçlı gönderilir).
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from starlette.responses import Response
+
+from .json_response import dumps, project, trusted_json
+
+# Tarayıcı saklayabilir ama her kullanımda yeniden doğrulamalı (304 ile ucuz)
+DEFAULT_CACHE_CONTROL = "private, no-cache"
+
+
+def etag_for(*parts) -> str:
+    """Verilen değerlerin JSON temsilinden strong ETag üret"""
+    digest = hashlib.sha1(dumps(parts)).hexdigest()
+    return f'"{digest}"'
+
+
+def http_date(value):
+    """datetime -> RFC 7231 HTTP-date (naive değerler UTC kabul edilir)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def latest(*values):
+    """None olmayan en yeni datetime (SQLite string döndürebilir, onları da çevir)"""
+    parsed = []
+    for value in values:
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                continue
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            parsed.append(value)
+    return max(parsed) if parsed else None
+
+
+def etag_matches(request, etag: str) -> bool:
+    """If-None-Match karşılaştırması (weak comparison: W/ öneki yok sayılır)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def validator_headers(etag: str, last_modified=None, vary: str = None,
+                      cache_control: str = DEFAULT_CACHE_CONTROL) -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    last_modified = http_date(last_modified)
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    if vary:
+        headers["Vary"] = vary
+    return headers
+
+
+def not_modified(etag: str, last_modified=None, vary: str = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified, vary))
+
+
+def conditional_json(request, content, etag: str = None, last_modified=None, vary: str = None,
+                     model=None) -> Response:
+    """
+    ETag eşleşirse 304, yoksa validator header'larıyla birlikte JSON gövde.
+    Route'un response_model'i varsa model olarak verin: gövde onun alanlarına
+    göre izdüşürülür (trusted_json), çıktı doğrulanmış yanıtla aynı kalır.
+    """
+    if model is not None:
+        content = project(content, model)
+    etag = etag or etag_for(content)
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified, vary)
+    return trusted_json(content, headers=validator_headers(etag, last_modified, vary))
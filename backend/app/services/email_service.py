@@ -7,6 +7,7 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
+from .metrics import track_external_call
 
 
 def send_password_reset_email(user_email: str, reset_link: str) -> bool:
@@ -57,7 +58,7 @@ BiblioNet Ekibi
         # E-postayı gönder
         try:
             # Gmail için TLS bağlantısı
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
+            with track_external_call("smtp"), smtplib.SMTP(smtp_server, smtp_port) as server:
                 server.starttls()  # TLS şifreli bağlantı
                 server.login(sender_email, sender_password)
                 server.sendmail(sender_email, user_email, msg.as_string())
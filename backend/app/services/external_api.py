@@ -1,21 +1,40 @@
 import requests
 from fastapi import HTTPException
 import os
+from .metrics import track_external_call
+from .tracing import span
 
 TMDB_API_KEY = os.getenv("API_KEY")
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
-GOOGLE_BOOKS_URL = "https://www.googleapis.com/books/v1/volumes"
-OPEN_LIBRARY_URL = "https://openlibrary.org/search.json"
+# Base URL'ler env ile değiştirilebilir (ör. backend/tools/fake_providers.py ile offline test)
+TMDB_BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+GOOGLE_BOOKS_URL = os.getenv("GOOGLE_BOOKS_URL", "https://www.googleapis.com/books/v1/volumes")
+OPEN_LIBRARY_URL = os.getenv("OPEN_LIBRARY_URL", "https://openlibrary.org/search.json")
+
+
+def provider_get(provider: str, url: str, **kwargs):
+    """
+    requests.get wrapper'ı - provider bazında latency ve hata metriklerini kaydeder,
+    aktif trace varsa çağrıyı child span olarak işaretler.
+    provider: 'tmdb', 'google_books', 'openlibrary'
+    """
+    with span("http.get", kind="client", provider=provider, **{"http.url": url}) as http_span, \
+            track_external_call(provider) as call:
+        r = requests.get(url, **kwargs)
+        if http_span is not None:
+            http_span.set_attribute("http.status_code", r.status_code)
+        if r.status_code >= 400:
+            call.failed()
+        return r
 
 def search_tmdb(query: str):
     """Search TMDb API for movies and return normalized results."""
     # Eğer "popular" sorgusu ise, popüler filmler endpoint'ini kullan
     if query.lower() == "popular":
         params = {"api_key": TMDB_API_KEY, "language": "tr-TR", "page": 1}
-        r = requests.get(f"{TMDB_BASE_URL}/movie/popular", params=params)
+        r = provider_get("tmdb", f"{TMDB_BASE_URL}/movie/popular", params=params)
     else:
         params = {"api_key": TMDB_API_KEY, "query": query, "language": "tr-TR"}
-        r = requests.get(f"{TMDB_BASE_URL}/search/movie", params=params)
+        r = provider_get("tmdb", f"{TMDB_BASE_URL}/search/movie", params=params)
     
     if r.status_code != 200:
         raise HTTPException(status_code=500, detail="TMDb API hatası")
@@ -41,7 +60,8 @@ def search_tmdb(query: str):
         movie_id = m.get("id")
         if movie_id:
             try:
-                details_r = requests.get(
+                details_r = provider_get(
+                    "tmdb",
                     f"{TMDB_BASE_URL}/movie/{movie_id}",
                     params={"api_key": TMDB_API_KEY, "language": "tr-TR"}
                 )
@@ -50,7 +70,8 @@ def search_tmdb(query: str):
                     genres = [g.get("name") for g in details.get("genres", [])]
                     movie["genres"] = ", ".join(genres) if genres else None
                     
-                    credits_r = requests.get(
+                    credits_r = provider_get(
+                        "tmdb",
                         f"{TMDB_BASE_URL}/movie/{movie_id}/credits",
                         params={"api_key": TMDB_API_KEY}
                     )
@@ -73,7 +94,7 @@ def search_tmdb(query: str):
 def search_google_books(query: str):
     """Search Google Books API and return normalized results."""
     params = {"q": query, "langRestrict": "tr", "maxResults": 10}
-    r = requests.get(GOOGLE_BOOKS_URL, params=params)
+    r = provider_get("google_books", GOOGLE_BOOKS_URL, params=params)
     if r.status_code != 200:
         raise HTTPException(status_code=500, detail="Google Books API hatası")
     
@@ -106,7 +127,7 @@ def search_google_books(query: str):
 def search_openlibrary(query: str):
     """Search OpenLibrary API and return normalized results."""
     params = {"q": query}
-    r = requests.get(OPEN_LIBRARY_URL, params=params)
+    r = provider_get("openlibrary", OPEN_LIBRARY_URL, params=params)
     if r.status_code != 200:
         raise HTTPException(status_code=500, detail="OpenLibrary API hatası")
     
@@ -142,7 +163,7 @@ def get_tmdb_reviews(movie_id: str):
     """Fetch reviews/comments from TMDB API for a specific movie."""
     try:
         params = {"api_key": TMDB_API_KEY, "language": "tr-TR"}
-        r = requests.get(f"{TMDB_BASE_URL}/movie/{movie_id}/reviews", params=params)
+        r = provider_get("tmdb", f"{TMDB_BASE_URL}/movie/{movie_id}/reviews", params=params)
         
         if r.status_code != 200:
             return []
@@ -169,7 +190,7 @@ def get_google_books_reviews(book_id: str):
     """Fetch reviews/ratings from Google Books API for a specific book."""
     try:
         params = {"key": os.getenv("GOOGLE_BOOKS_API_KEY", "")}
-        r = requests.get(f"{GOOGLE_BOOKS_URL}/{book_id}", params=params)
+        r = provider_get("google_books", f"{GOOGLE_BOOKS_URL}/{book_id}", params=params)
         
         if r.status_code != 200:
             return []
@@ -0,0 +1,219 @@
+"""
+Feed Cache - GET /feed/ cevapları için kullanıcı bazlı LRU + TTL cache
+
+İlk FEED_CACHE_PAGES sayfa (user_id, skip, limit) anahtarıyla serialize
+edilmiş JSON gövdesi olarak saklanır. Giriş yapmamış kullanıcıların feed'i
+user_id=0 altında herkes için ortaktır ve FEED_GUEST_CACHE_TTL_S saniye yaşar.
+
+Geçersiz kılma olay bazlıdır ve invalidation bus üzerinden commit edildikten
+sonra tüm worker'larda uygulanır (rollback'te atılır):
+
+    invalidate_actor(db, user_id)       # user_id aktivite ekledi / geri aldı:
+                                        # takipçilerinin ve kendi feed'i
+    invalidate_user(db, user_id)        # follow / unfollow: kullanıcının feed'i
+    invalidate_targets(db, review_ids=[...], item_ids=[...])
+                                        # sayaç / içerik değişti: bu review /
+                                        # item'ı gösteren tüm sayfalar
+
+activity_service'teki record / retract fonksiyonları bunları zaten çağırır;
+route'ların ayrıca bir şey yapması gerekmez. Sayaçlar (beğeni / yorum sayısı)
+hook'u olmayan yazmalarda da en fazla FEED_CACHE_TTL_S kadar bayat kalır.
+
+Commit'ten önce başlamış bir feed isteği eski veriyi cache'e yazamaz: put()
+isteğin başındaki sürüm (begin()) değişmişse kaydı reddeder.
+
+Ayarlar (env):
+    FEED_CACHE_ENABLED=1
+    FEED_CACHE_MAX_ENTRIES=5000
+    FEED_CACHE_PAGES=3
+    FEED_CACHE_TTL_S=30
+    FEED_GUEST_CACHE_TTL_S=5
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .. import models
+from .invalidation import invalidate, subscribe
+from .metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+
+FEED_CACHE_ENABLED = os.getenv("FEED_CACHE_ENABLED", "1") == "1"
+FEED_CACHE_MAX_ENTRIES = int(os.getenv("FEED_CACHE_MAX_ENTRIES", "5000"))
+FEED_CACHE_PAGES = int(os.getenv("FEED_CACHE_PAGES", "3"))
+FEED_CACHE_TTL_S = float(os.getenv("FEED_CACHE_TTL_S", "30"))
+FEED_GUEST_CACHE_TTL_S = float(os.getenv("FEED_GUEST_CACHE_TTL_S", "5"))
+
+GUEST = 0
+
+_hits = CACHE_HITS.labels("feed")
+_misses = CACHE_MISSES.labels("feed")
+_evictions = CACHE_EVICTIONS.labels("feed")
+
+
+class _Entry:
+    __slots__ = ("body", "expires", "review_ids", "item_ids")
+
+    def __init__(self, body: bytes, expires: float, review_ids, item_ids):
+        self.body = body
+        self.expires = expires
+        self.review_ids = review_ids
+        self.item_ids = item_ids
+
+
+class FeedCache:
+    def __init__(self, max_entries: int = FEED_CACHE_MAX_ENTRIES, pages: int = FEED_CACHE_PAGES,
+                 ttl: float = FEED_CACHE_TTL_S, guest_ttl: float = FEED_GUEST_CACHE_TTL_S):
+        self.max_entries = max_entries
+        self.pages = pages
+        self.ttl = ttl
+        self.guest_ttl = guest_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (user_id, skip, limit) -> _Entry, en eski başta
+        self._by_user = {}  # user_id -> {key}
+        self._by_review = {}  # review_id -> {key}
+        self._by_item = {}  # item_id -> {key}
+        self._versions = {}  # user_id -> int
+        self._target_version = 0
+
+    def cacheable(self, skip: int, limit: int) -> bool:
+        return limit > 0 and skip >= 0 and skip < self.pages * limit
+
+    def begin(self, user_id: int) -> tuple:
+        """Miss sonrası hesaplamaya başlamadan önce alınan sürüm; put()'a verilir"""
+        with self._lock:
+            return self._versions.get(user_id, 0), self._target_version
+
+    def get(self, user_id: int, skip: int, limit: int):
+        key = (user_id, skip, limit)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > time.monotonic():
+                self._entries.move_to_end(key)
+                _hits.inc()
+                return entry.body
+            if entry is not None:
+                self._remove(key)
+        _misses.inc()
+        return None
+
+    def put(self, user_id: int, skip: int, limit: int, body: bytes, review_ids, item_ids, version: tuple) -> bool:
+        key = (user_id, skip, limit)
+        ttl = self.guest_ttl if user_id == GUEST else self.ttl
+        with self._lock:
+            if version != (self._versions.get(user_id, 0), self._target_version):
+                return False  # hesaplama sırasında geçersiz kılındı
+            if key in self._entries:
+                self._remove(key)
+            entry = _Entry(body, time.monotonic() + ttl, frozenset(review_ids), frozenset(item_ids))
+            self._entries[key] = entry
+            self._by_user.setdefault(user_id, set()).add(key)
+            for review_id in entry.review_ids:
+                self._by_review.setdefault(review_id, set()).add(key)
+            for item_id in entry.item_ids:
+                self._by_item.setdefault(item_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                _evictions.inc()
+        return True
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for index, ids in ((self._by_user, (key[0],)), (self._by_review, entry.review_ids),
+                           (self._by_item, entry.item_ids)):
+            for value in ids:
+                keys = index.get(value)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[value]
+
+    def invalidate(self, user_ids=(), review_ids=(), item_ids=()):
+        with self._lock:
+            for user_id in user_ids:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+                for key in list(self._by_user.get(user_id, ())):
+                    self._remove(key)
+            if review_ids or item_ids:
+                self._target_version += 1
+                for index, ids in ((self._by_review, review_ids), (self._by_item, item_ids)):
+                    for value in ids:
+                        for key in list(index.get(value, ())):
+                            self._remove(key)
+            # Takip edilmeyen kullanıcıların sürüm sayaçları sınırsız büyümesin
+            if len(self._versions) > 4 * self.max_entries:
+                self._versions = {user_id: self._versions.get(user_id, 0) for user_id in self._by_user}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self._by_review.clear()
+            self._by_item.clear()
+            self._versions.clear()
+            self._target_version += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = len(self._entries)
+            users = len(self._by_user)
+            size = sum(len(entry.body) for entry in self._entries.values())
+        lookups = _hits.value + _misses.value
+        return {
+            "enabled": FEED_CACHE_ENABLED,
+            "entries": entries,
+            "users": users,
+            "bytes": size,
+            "max_entries": self.max_entries,
+            "hits": int(_hits.value),
+            "misses": int(_misses.value),
+            "hit_ratio": round(_hits.value / lookups, 4) if lookups else 0.0,
+            "evictions": int(_evictions.value),
+        }
+
+
+feed_cache = FeedCache()
+
+
+# ============ GEÇERSİZ KILMA (invalidation bus) ============
+
+def invalidate_user(db, user_id: int):
+    if FEED_CACHE_ENABLED:
+        invalidate(db, "feed", user_id)
+
+
+def invalidate_actor(db, user_id: int):
+    """user_id'nin aktivitesi değişti: onu takip edenlerin feed'i (+ kendi feed'i)"""
+    if not FEED_CACHE_ENABLED or user_id is None:
+        return
+    followers = db.query(models.Follow.follower_id).filter(models.Follow.followee_id == user_id).all()
+    invalidate(db, "feed", user_id, *(row[0] for row in followers))
+
+
+def invalidate_targets(db, review_ids=(), item_ids=()):
+    invalidate(db, "review", *review_ids)
+    invalidate(db, "item", *item_ids)
+
+
+def install_feed_cache():
+    """FEED_CACHE_ENABLED=1 (varsayılan) ise invalidation bus mesajlarına abone ol"""
+    if not FEED_CACHE_ENABLED:
+        return
+    subscribe("feed", _evict_feeds, flush=feed_cache.clear)
+    subscribe("review", _evict_reviews, flush=feed_cache.clear)
+    subscribe("item", _evict_items, flush=feed_cache.clear)
+
+
+def _evict_feeds(ids):
+    feed_cache.invalidate(user_ids=ids)
+
+
+def _evict_reviews(ids):
+    feed_cache.invalidate(review_ids=ids)
+
+
+def _evict_items(ids):
+    feed_cache.invalidate(item_ids=ids)
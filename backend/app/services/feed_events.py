@@ -0,0 +1,248 @@
+"""
+Feed Events - GET /feed/stream (SSE) için aktivite pub/sub
+
+activity_service her kayıt / geri almada olayı session'a ekler
+(queue_activity / queue_retraction); olaylar sadece commit'ten sonra yayınlanır:
+
+- Tek worker / SQLite: after_commit'te süreç içi FeedBroker'a verilir.
+- PostgreSQL (FEED_STREAM_NOTIFY=1): before_commit'te aynı transaction'a
+  pg_notify eklenir; commit'te her worker'ın dinleyicisi (pg_notify.PgListener)
+  mesajı alıp kendi broker'ına verir. Yerel yayın yapılmaz, olay bir kez gelir.
+  NOTIFY bir savepoint içinde gönderilir; başarısız olursa commit yine yapılır
+  ve olaylar sadece bu worker'da yerel olarak yayınlanır.
+
+Her SSE bağlantısı bir Subscription'dır: takip ettiği kullanıcılar (misafirde
+herkes) ve sınırlı bir asyncio.Queue. Kuyruk dolarsa (yavaş istemci) abonelik
+düşürülür; stream kapanır ve EventSource Last-Event-ID ile yeniden bağlanıp
+kaçırdıklarını veritabanından tamamlar.
+
+Ayarlar (env):
+    FEED_STREAM_ENABLED=1
+    FEED_STREAM_NOTIFY=1                 # PostgreSQL'de LISTEN / NOTIFY
+    FEED_STREAM_QUEUE_SIZE=256           # bağlantı başına bekleyen olay
+    FEED_STREAM_HEARTBEAT_S=15
+    FEED_STREAM_MAX_CONNECTIONS=1000     # worker başına
+    FEED_STREAM_CATCHUP_LIMIT=50         # yeniden bağlanınca tamamlanan en fazla aktivite
+    FEED_STREAM_TOKEN_TTL_S=60           # POST /feed/stream-token ile verilen bağlantı token'ının ömrü
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import pg_notify
+from .metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+FEED_STREAM_ENABLED = os.getenv("FEED_STREAM_ENABLED", "1") == "1"
+FEED_STREAM_NOTIFY = os.getenv("FEED_STREAM_NOTIFY", "1") == "1"
+FEED_STREAM_QUEUE_SIZE = int(os.getenv("FEED_STREAM_QUEUE_SIZE", "256"))
+FEED_STREAM_HEARTBEAT_S = float(os.getenv("FEED_STREAM_HEARTBEAT_S", "15"))
+FEED_STREAM_MAX_CONNECTIONS = int(os.getenv("FEED_STREAM_MAX_CONNECTIONS", "1000"))
+FEED_STREAM_CATCHUP_LIMIT = int(os.getenv("FEED_STREAM_CATCHUP_LIMIT", "50"))
+FEED_STREAM_TOKEN_TTL_S = int(os.getenv("FEED_STREAM_TOKEN_TTL_S", "60"))
+STREAM_TOKEN_SCOPE = "feed_stream"
+
+CHANNEL = "reaview_feed"
+_PENDING_KEY = "feed_events_pending"
+
+STREAM_CONNECTIONS = Gauge("reaview_feed_stream_connections", "Open /feed/stream connections")
+STREAM_EVENTS = Counter("reaview_feed_stream_events_total", "Activity events delivered to stream queues")
+STREAM_DROPPED = Counter("reaview_feed_stream_dropped_total", "Stream connections dropped for falling behind")
+STREAM_NOTIFY_FAILURES = Counter("reaview_feed_stream_notify_failures_total", "Feed NOTIFYs that fell back to local publish")
+
+_connections = STREAM_CONNECTIONS.labels()
+_delivered = STREAM_EVENTS.labels()
+_dropped = STREAM_DROPPED.labels()
+_notify_failures = STREAM_NOTIFY_FAILURES.labels()
+
+
+class Subscription:
+    """Tek SSE bağlantısı; offer() herhangi bir thread'den çağrılabilir"""
+
+    def __init__(self, user_id: int, followees, loop, queue_size: int):
+        self.user_id = user_id
+        self.followees = set(followees) if followees is not None else None  # None = misafir, herkes
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    def wants(self, activity: dict) -> bool:
+        return self.followees is None or activity["user_id"] in self.followees
+
+    def offer(self, activity: dict):
+        try:
+            self.loop.call_soon_threadsafe(self._put, activity)
+        except RuntimeError:  # event loop kapanmış
+            self.dropped = True
+
+    def _put(self, activity: dict):
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(activity)
+            _delivered.inc()
+        except asyncio.QueueFull:
+            self.dropped = True
+            _dropped.inc()
+            # Bekleyen get()'i uyandır; stream dropped'ı görüp kapanır
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class FeedBroker:
+    def __init__(self, queue_size: int = FEED_STREAM_QUEUE_SIZE, max_connections: int = FEED_STREAM_MAX_CONNECTIONS):
+        self.queue_size = queue_size
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def subscribe(self, user_id: int, followees, loop=None):
+        """Bağlantı sınırı doluysa None döner"""
+        subscription = Subscription(user_id, followees, loop or asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            if len(self._subscriptions) >= self.max_connections:
+                return None
+            self._subscriptions.add(subscription)
+        _connections.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.discard(subscription)
+        _connections.dec()
+
+    def publish(self, events: list):
+        """events: [{"op": "add" | "retract", "activity_id", "user_id", "activity_type", "related_user_id"}]"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for activity in events:
+            for subscription in subscriptions:
+                if activity["activity_type"] == "follow" and activity["user_id"] == subscription.user_id:
+                    # Abonenin kendi follow / unfollow'u: takip kümesini güncelle
+                    if subscription.followees is not None:
+                        if activity["op"] == "add":
+                            subscription.followees.add(activity["related_user_id"])
+                        else:
+                            subscription.followees.discard(activity["related_user_id"])
+                    continue
+                if activity["op"] == "add" and subscription.wants(activity):
+                    subscription.offer(activity)
+
+    def connection_count(self) -> int:
+        with self._lock:
+            return len(self._subscriptions)
+
+
+feed_broker = FeedBroker()
+_use_notify = False
+
+
+# ============ SESSION HOOK'LARI ============
+
+def _pending(db) -> dict:
+    return db.info.setdefault(_PENDING_KEY, {"objects": [], "events": []})
+
+
+def _add_event(activity) -> dict:
+    return {
+        "op": "add", "activity_id": activity.activity_id, "user_id": activity.user_id,
+        "activity_type": activity.activity_type, "related_user_id": activity.related_user_id,
+    }
+
+
+def queue_activity(db, activity):
+    """Yeni / öne taşınan aktivite; activity_id yoksa flush'ta belli olur (upsert'te zaten var)"""
+    if not FEED_STREAM_ENABLED:
+        return
+    if activity.activity_id is not None:
+        _pending(db)["events"].append(_add_event(activity))
+    else:
+        _pending(db)["objects"].append(activity)
+
+
+def queue_retraction(db, user_id: int, activity_type: str, related_user_id: int = None):
+    if FEED_STREAM_ENABLED:
+        _pending(db)["events"].append({
+            "op": "retract", "activity_id": None, "user_id": user_id,
+            "activity_type": activity_type, "related_user_id": related_user_id,
+        })
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.get(_PENDING_KEY)
+    if not pending or not pending["objects"]:
+        return
+    waiting = []
+    for activity in pending["objects"]:
+        if activity.activity_id is None:
+            waiting.append(activity)
+            continue
+        pending["events"].append(_add_event(activity))
+    pending["objects"] = waiting
+
+
+def _before_commit(session):
+    if not _use_notify or _PENDING_KEY not in session.info:
+        return
+    session.flush()  # activity_id'ler belli olsun
+    pending = session.info[_PENDING_KEY]
+    events, pending["events"] = pending["events"], []
+    # Aynı transaction'a NOTIFY ekle; commit'te tüm worker'lara (bu dahil) gider
+    connection = session.connection()
+    try:
+        payloads = pg_notify.json_batches(events)
+        # Savepoint: başarısız pg_notify dış transaction'ı iptal etmesin
+        with connection.begin_nested():
+            for payload in payloads:
+                pg_notify.notify(connection, CHANNEL, payload)
+    except Exception as exc:
+        # Diğer worker'ların stream'leri bu olayları kaçırır; bir sonraki
+        # yeniden bağlanmada Last-Event-ID ile veritabanından tamamlanır
+        _notify_failures.inc()
+        logger.warning("feed NOTIFY failed (%s); publishing %d events on this worker only", exc, len(events))
+        pending["local"] = events
+
+
+def _after_commit(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    events = pending.get("local") if _use_notify else pending["events"]
+    if events:
+        feed_broker.publish(events)
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _on_notify(payload: str):
+    try:
+        events = json.loads(payload)
+    except ValueError:
+        logger.warning("ignoring malformed %s payload", CHANNEL)
+        return
+    feed_broker.publish(events)
+
+
+def install_feed_stream(engine):
+    """FEED_STREAM_ENABLED=1 ise session hook'larını ve (PostgreSQL'de) NOTIFY dinleyicisini bağla"""
+    global _use_notify
+    if not FEED_STREAM_ENABLED or event.contains(Session, "after_commit", _after_commit):
+        return
+    if FEED_STREAM_NOTIFY and pg_notify.supported(engine):
+        pg_notify.get_listener(engine).subscribe(CHANNEL, _on_notify)
+        _use_notify = True
+    event.listen(Session, "after_flush_postexec", _after_flush)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
@@ -0,0 +1,269 @@
+"""
+Invalidation Bus - süreç içi cache'ler için worker'lar arası geçersiz kılma
+
+Yazan route, değişen entity'leri session'a ekler; mesajlar sadece commit'ten
+sonra (rollback'te hiç) ve tüm worker'larda işlenir:
+
+    invalidate(db, "item", item_id)
+    invalidate(db, "user", user_id)      # profil / şifre değişti (auth_cache)
+    db.commit()
+
+Cache tutan modüller entity başına handler kaydeder; handler değişen id'lerin
+listesini alır ve kendi anahtarlarını siler:
+
+    subscribe("review", lambda ids: review_cache.evict_many(ids), flush=review_cache.clear)
+
+flush (opsiyonel) entity'nin tüm kayıtlarını siler; NOTIFY gönderilemezse
+id listesi yerine gönderilen {"e": entity, "all": true} mesajında çağrılır.
+
+Entity'ler: item, review, user, list, feed (feed: cache'i düşecek kullanıcılar),
+session (iptal edilen token'lar, bkz. tokens.py)
+
+Taşıyıcılar (INVALIDATION_BUS):
+    memory    Süreç içi; commit sonrası handler'lar doğrudan çağrılır (tek
+              worker, SQLite, testler).
+    pgnotify  Mesajlar commit'ten hemen önce aynı transaction'a pg_notify olarak
+              eklenir; commit'te gönderen dahil her worker'ın LISTEN thread'i
+              (pg_notify.PgListener) handler'ları çağırır. Payload'lar
+              kodlanmış boyuta göre pg_notify.MAX_PAYLOAD_BYTES altında
+              bölünür. NOTIFY başarısız olursa (savepoint ile) commit
+              engellenmez: flush'ı olan entity'ler için "all" mesajı
+              denenir, o da olmazsa bu worker'da yerel flush yapılır.
+              flush'ı olmayan entity'lerde (session: token iptali) hata
+              yükseltilir ve commit yapılmaz. LISTEN bağlantısı koparsa
+              yeniden bağlanınca (flush_all) flush'ı olan tüm entity'ler
+              boşaltılır; aradaki mesajlar kaybolmuş olabilir.
+    auto      PostgreSQL'de pgnotify, diğerlerinde memory (varsayılan).
+
+Mesaj biçimi (JSON): [{"e": "item", "ids": [1, 2]}, {"e": "feed", "all": true}, ...]
+"""
+
+import json
+import logging
+import os
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import pg_notify
+from .metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_BUS = os.getenv("INVALIDATION_BUS", "auto")
+
+CHANNEL = "reaview_invalidate"
+ENTITIES = ("item", "review", "user", "list", "feed", "session")
+_PENDING_KEY = "invalidation_pending"
+_LOCAL_FLUSH_KEY = "invalidation_local_flush"
+
+INVALIDATIONS = Counter(
+    "reaview_invalidations_total", "Invalidation messages handled by this worker", ("entity",)
+)
+
+NOTIFY_FAILURES = Counter(
+    "reaview_invalidation_notify_failures_total", "NOTIFY sends that failed and fell back to a flush", ("entity",)
+)
+
+_handlers = {}  # entity -> [handler(ids)]
+_flush_handlers = {}  # entity -> [flush()]
+_handlers_lock = threading.Lock()
+
+
+def subscribe(entity: str, handler, flush=None):
+    if entity not in ENTITIES:
+        raise ValueError(f"Bilinmeyen entity: {entity}")
+    with _handlers_lock:
+        handlers = _handlers.setdefault(entity, [])
+        if handler not in handlers:
+            handlers.append(handler)
+        if flush is not None:
+            flushes = _flush_handlers.setdefault(entity, [])
+            if flush not in flushes:
+                flushes.append(flush)
+
+
+def flushable(entity: str) -> bool:
+    with _handlers_lock:
+        return bool(_flush_handlers.get(entity)) or not _handlers.get(entity)
+
+
+def flush_all():
+    """Flush handler'ı olan tüm entity'leri bu worker'da boşalt (kaçırılmış mesajlar için)"""
+    with _handlers_lock:
+        entities = [entity for entity in ENTITIES if _flush_handlers.get(entity)]
+    dispatch([{"e": entity, "all": True} for entity in entities])
+
+
+def dispatch(messages: list):
+    """Mesajları bu worker'daki handler'lara uygula"""
+    for message in messages:
+        entity = message["e"]
+        if message.get("all"):
+            INVALIDATIONS.labels(entity).inc()
+            with _handlers_lock:
+                handlers = [(flush, ()) for flush in _flush_handlers.get(entity, ())]
+        else:
+            ids = message["ids"]
+            INVALIDATIONS.labels(entity).inc(len(ids))
+            with _handlers_lock:
+                handlers = [(handler, (ids,)) for handler in _handlers.get(entity, ())]
+        for handler, args in handlers:
+            try:
+                handler(*args)
+            except Exception:
+                logger.exception("invalidation handler failed for %s", entity)
+
+
+def _messages(pending: dict) -> list:
+    return [{"e": entity, "ids": sorted(ids)} for entity, ids in pending.items()]
+
+
+def _encode(messages: list) -> str:
+    return json.dumps(messages, separators=(",", ":"))
+
+
+def _payloads(messages: list, max_bytes: int = pg_notify.MAX_PAYLOAD_BYTES) -> list:
+    """Mesajları kodlanmış boyutu max_bytes'ı aşmayan JSON payload'larına böl (gerekirse id listesini de)"""
+    payloads = []
+    batch, size = [], 2  # "[" + "]"
+    for message in messages:
+        entity = message["e"]
+        head = len(_encode([{"e": entity, "ids": []}])) - 2 + 1  # mesaj iskeleti + ayırıcı virgül
+        current = None
+        for value in message["ids"]:
+            cost = len(json.dumps(value).encode("utf-8")) + 1
+            if head + cost + 2 > max_bytes:
+                raise ValueError(f"invalidation id too large for NOTIFY: {value!r}")
+            if current is None or size + cost > max_bytes:
+                if batch and size + head + cost > max_bytes:
+                    payloads.append(_encode(batch))
+                    batch, size = [], 2
+                current = {"e": entity, "ids": []}
+                batch.append(current)
+                size += head
+            current["ids"].append(value)
+            size += cost
+    if batch:
+        payloads.append(_encode(batch))
+    return payloads
+
+
+class MemoryTransport:
+    name = "memory"
+    transactional = False
+
+    def send(self, messages: list, bind=None):
+        dispatch(messages)
+
+
+class PgNotifyTransport:
+    name = "pgnotify"
+    transactional = True
+
+    def __init__(self, engine):
+        listener = pg_notify.get_listener(engine)
+        # LISTEN bağlantısı koptuysa aradaki invalidation'lar kayboldu
+        listener.on_reconnect(flush_all)
+        listener.subscribe(CHANNEL, self._on_notify)
+
+    def send(self, messages: list, bind=None):
+        """
+        Commit'ten önce, commit edilecek transaction içinde çağrılır; döndürdüğü
+        mesajlar (NOTIFY gönderilemediyse yerel flush) commit sonrası bu worker'da uygulanır.
+        """
+        try:
+            self._notify(bind, _payloads(messages))
+            return []
+        except Exception as exc:
+            entities = sorted({message["e"] for message in messages})
+            for entity in entities:
+                NOTIFY_FAILURES.labels(entity).inc()
+            strict = [entity for entity in entities if not flushable(entity)]
+            if strict:
+                raise
+            logger.warning("invalidation NOTIFY failed (%s); flushing %s instead", exc, ", ".join(entities))
+        flush = [{"e": entity, "all": True} for entity in entities]
+        try:
+            self._notify(bind, [_encode(flush)])
+            return []
+        except Exception as exc:
+            logger.error("invalidation flush NOTIFY failed (%s); other workers keep %s until TTL",
+                         exc, ", ".join(entities))
+            return flush
+
+    @staticmethod
+    def _notify(bind, payloads: list):
+        # Savepoint: başarısız pg_notify dış transaction'ı iptal etmesin
+        with bind.begin_nested():
+            for payload in payloads:
+                pg_notify.notify(bind, CHANNEL, payload)
+
+    def _on_notify(self, payload: str):
+        try:
+            messages = json.loads(payload)
+        except ValueError:
+            logger.warning("ignoring malformed %s payload", CHANNEL)
+            return
+        dispatch(messages)
+
+
+_transport = MemoryTransport()
+
+
+def transport_name() -> str:
+    return _transport.name
+
+
+# ============ SESSION HOOK'LARI ============
+
+def invalidate(db, entity: str, *ids):
+    """Commit sonrası tüm worker'larda entity'nin bu id'lerini geçersiz kıl"""
+    if entity not in ENTITIES:
+        raise ValueError(f"Bilinmeyen entity: {entity}")
+    ids = [value for value in ids if value is not None]
+    if ids:
+        db.info.setdefault(_PENDING_KEY, {}).setdefault(entity, set()).update(ids)
+
+
+def _before_commit(session):
+    if not _transport.transactional or _PENDING_KEY not in session.info:
+        return
+    pending = session.info.pop(_PENDING_KEY)
+    local = _transport.send(_messages(pending), session.connection())
+    if local:
+        session.info[_LOCAL_FLUSH_KEY] = local
+
+
+def _after_commit(session):
+    local = session.info.pop(_LOCAL_FLUSH_KEY, None)
+    if local:
+        dispatch(local)
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        _transport.send(_messages(pending))
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_LOCAL_FLUSH_KEY, None)
+
+
+event.listen(Session, "before_commit", _before_commit)
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_rollback", _after_rollback)
+
+
+def install_invalidation_bus(engine):
+    """INVALIDATION_BUS'a göre taşıyıcıyı seç (varsayılan memory, PostgreSQL'de pgnotify)"""
+    global _transport
+    mode = INVALIDATION_BUS
+    if mode == "auto":
+        mode = "pgnotify" if pg_notify.supported(engine) else "memory"
+    if mode == "pgnotify" and not isinstance(_transport, PgNotifyTransport):
+        _transport = PgNotifyTransport(engine)
+    elif mode == "memory":
+        _transport = MemoryTransport()
+    logger.info("invalidation bus: %s", _transport.name)
+    return _transport
@@ -0,0 +1,145 @@
+"""
+JSON Response - orjson tabanlı hızlı response sınıfı
+
+FastJSONResponse uygulamanın default_response_class'ıdır: datetime / date /
+UUID / dataclass orjson tarafından native serialize edilir, Decimal ve set
+gibi tipler _default() ile çevrilir. orjson kurulu değilse stdlib json'a
+döner (çıktı aynı, sadece daha yavaş).
+
+FastAPI bir route'un dönüş değerini önce response_model ile doğrular (veya
+response_model yoksa jsonable_encoder'dan geçirir), sonra response sınıfına
+verir. Satırları zaten bizim kurduğumuz, tipleri belli dict'ler olan liste
+endpoint'lerinde bu iki tur gereksizdir; trusted_json() doğrudan Response
+döndürerek ikisini de atlar:
+
+    @router.get("/", response_model=list[schemas.ItemOut])   # OpenAPI şeması için kalır
+    def get_items(...):
+        ...
+        return trusted_json(result, schemas.ItemOut)
+
+Model verilirse dict'ler doğrulanmadan modelin alanlarına göre izdüşürülür:
+alan sırası ve fazla anahtarların atılması, eksik alanlara default, float /
+int alanlarına sayı dönüşümü (Integer kolon -> 8.0) ve datetime'ların
+pydantic'in JSON biçimi (UTC -> "Z") response_model çıktısıyla aynıdır
+(tests/test_json_response.py karşılaştırır). Sadece tipleri bu alanlarla
+uyumlu, bizim kurduğumuz dict'ler için kullanın; harici API'den gelen ham
+veriler doğrulamadan geçmeye devam etmeli.
+"""
+
+import dataclasses
+import json
+import types
+import typing
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - requirements.txt'te var
+    orjson = None
+
+
+def _default(obj):
+    """orjson'ın native desteklemediği tipler"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    # Pydantic modelleri, SQLAlchemy Row'ları vb. için FastAPI'nin genel encoder'ı
+    return jsonable_encoder(obj)
+
+
+def _stdlib_default(obj):
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    return _default(obj)
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_stdlib_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def _iso_datetime(value):
+    # pydantic JSON biçimi: sıfır offset "Z", diğerleri isoformat ile aynı
+    if not isinstance(value, datetime):
+        return value
+    text = value.isoformat()
+    if value.utcoffset() == timedelta(0):
+        text = text[:-6] + "Z"
+    return text
+
+
+def _field_converter(annotation):
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType) and len(args) == 1:
+        annotation = args[0]
+    if annotation is float:
+        return lambda value: None if value is None else float(value)
+    if annotation is int:
+        return lambda value: None if value is None else int(value)
+    if annotation is datetime:
+        return _iso_datetime
+    return None
+
+
+_projections = {}
+
+
+def _projection(model):
+    """model alanlarına göre dict -> dict fonksiyonu (model başına bir kez kurulur)"""
+    projection = _projections.get(model)
+    if projection is None:
+        fields = []
+        for name, field in model.model_fields.items():
+            default = None if field.is_required() else field.get_default(call_default_factory=True)
+            fields.append((name, field.is_required(), default, _field_converter(field.annotation)))
+
+        def projection(row: dict) -> dict:
+            out = {}
+            for name, required, default, convert in fields:
+                value = row[name] if required else row.get(name, default)
+                out[name] = convert(value) if convert is not None else value
+            return out
+
+        _projections[model] = projection
+    return projection
+
+
+def project(content, model):
+    """content (dict veya dict listesi) -> response_model çıktısıyla aynı şekil"""
+    projection = _projection(model)
+    if isinstance(content, dict):
+        return projection(content)
+    return [projection(row) for row in content]
+
+
+def trusted_json(content, model=None, status_code: int = 200, headers: dict = None) -> FastJSONResponse:
+    """
+    Doğrulanmış sayılan içerikten doğrudan response üret
+    (response_model doğrulaması ve jsonable_encoder atlanır; model verilirse
+    alanlarına göre izdüşürülür)
+    """
+    if model is not None:
+        content = project(content, model)
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
@@ -0,0 +1,404 @@
+"""
+Metrics - Prometheus text formatında uygulama metrikleri
+
+Bağımlılık gerektirmeyen küçük bir Counter/Gauge/Histogram implementasyonu.
+Label'lı metriklerin child'ları ilk kullanımda bir kez oluşturulup saklanır;
+sıcak yolda (request başına) sadece önceden bağlanmış child'ların
+inc()/observe() metodları çağrılır, label dict'i oluşturulmaz.
+
+Kullanım:
+    REQUEST_LATENCY.labels("GET", "/items/{item_id}").observe(0.012)
+    provider_call = EXTERNAL_LATENCY.labels("tmdb")  # modül seviyesinde bağla
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        # Son eleman +Inf bucket'ı; sayılar kümülatif değil, render sırasında toplanır
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Label değerlerine bağlı child'ı döndür (yoksa bir kez oluştur)"""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._new_child()
+                    self._children[values] = child
+        return child
+
+    def _unlabelled(self):
+        return self._children[()]
+
+    def render(self) -> list:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._unlabelled().dec(amount)
+
+    def set(self, value: float):
+        self._unlabelled().set(value)
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS, registry=None):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self._unlabelled().observe(value)
+
+    def _render_child(self, values, child) -> list:
+        lines = []
+        cumulative = 0
+        counts = list(child.counts)
+        for bound, count in zip(self.bounds + (float("inf"),), counts):
+            cumulative += count
+            le = f'le="{_format_value(float(bound))}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrikler ve scrape anında çalışan collector fonksiyonları"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def register_collector(self, collector):
+        """
+        collector() -> [(name, type, help, [(labels_dict, value), ...]), ...]
+        Scrape anında hesaplanan değerler için (ör. DB pool durumu).
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render())
+        for collector in list(self._collectors):
+            try:
+                families = collector()
+            except Exception as e:
+                lines.append(f"# collector error: {_escape_label(e)}")
+                continue
+            for name, metric_type, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    label_str = _format_labels(labels.keys(), labels.values())
+                    lines.append(f"{name}{label_str} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ============== HTTP ==============
+
+REQUEST_LATENCY = Histogram(
+    "reaview_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route"),
+)
+REQUEST_COUNT = Counter(
+    "reaview_http_requests_total",
+    "HTTP responses by route template and status code",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "reaview_http_requests_in_flight",
+    "HTTP requests currently being processed",
+)
+
+# ============== EXTERNAL PROVIDERS ==============
+
+EXTERNAL_PROVIDERS = ("tmdb", "google_books", "openlibrary", "smtp")
+
+EXTERNAL_LATENCY = Histogram(
+    "reaview_external_request_duration_seconds",
+    "Latency of calls to external providers",
+    ("provider",),
+)
+EXTERNAL_ERRORS = Counter(
+    "reaview_external_request_errors_total",
+    "Failed calls to external providers (exceptions and HTTP >= 400)",
+    ("provider",),
+)
+
+# ============== CACHES ==============
+
+CACHE_HITS = Counter("reaview_cache_hits_total", "Cache hits", ("cache",))
+CACHE_MISSES = Counter("reaview_cache_misses_total", "Cache misses", ("cache",))
+CACHE_EVICTIONS = Counter("reaview_cache_evictions_total", "Cache evictions", ("cache",))
+
+# Provider child'larını önceden bağla (ilk çağrıda oluşturma maliyeti olmasın)
+for _provider in EXTERNAL_PROVIDERS:
+    EXTERNAL_LATENCY.labels(_provider)
+    EXTERNAL_ERRORS.labels(_provider)
+
+
+def track_external_call(provider: str):
+    """
+    Harici provider çağrısını ölç:
+        with track_external_call("smtp") as call:
+            ...
+            call.failed()  # opsiyonel, exception olmadan hata işaretlemek için
+    """
+    return _ExternalCall(EXTERNAL_LATENCY.labels(provider), EXTERNAL_ERRORS.labels(provider))
+
+
+class _ExternalCall:
+    __slots__ = ("_latency", "_errors", "_start", "_failed")
+
+    def __init__(self, latency, errors):
+        self._latency = latency
+        self._errors = errors
+        self._failed = False
+
+    def failed(self):
+        self._failed = True
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._latency.observe(time.perf_counter() - self._start)
+        if exc_type is not None or self._failed:
+            self._errors.inc()
+        return False
+
+
+def _cache_ratio_collector():
+    samples = []
+    for values, hits in list(CACHE_HITS._children.items()):
+        misses = CACHE_MISSES._children.get(values)
+        total = hits.value + (misses.value if misses else 0)
+        samples.append(({"cache": values[0]}, round(hits.value / total, 4) if total else 0.0))
+    return [("reaview_cache_hit_ratio", "gauge", "Cache hit ratio (hits / lookups)", samples)]
+
+
+REGISTRY.register_collector(_cache_ratio_collector)
+
+
+def register_pool_collector(engine):
+    """DB connection pool durumunu scrape anında oku"""
+    def collect():
+        pool = engine.pool
+        samples = []
+        for name, attr in (
+            ("size", "size"),
+            ("checked_in", "checkedin"),
+            ("checked_out", "checkedout"),
+            ("overflow", "overflow"),
+        ):
+            method = getattr(pool, attr, None)
+            if callable(method):
+                samples.append(({"state": name}, method()))
+        return [("reaview_db_pool_connections", "gauge", "DB connection pool state", samples)]
+
+    REGISTRY.register_collector(collect)
+
+
+# ============== ASGI MIDDLEWARE ==============
+
+class MetricsMiddleware:
+    """
+    Saf ASGI middleware: route şablonu bazında latency histogramı, status sayacı
+    ve in-flight gauge'u. BaseHTTPMiddleware kullanmaz (ekstra task/queue yok).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._in_flight = REQUESTS_IN_FLIGHT._unlabelled()
+        # id(route) -> method -> (latency child, {status: counter child}, method, template)
+        self._bound = {}
+        self._unmatched = {}
+
+    def _children_for(self, route, method):
+        # Route nesneleri hashable değil; uygulama ömrü boyunca yaşadıkları için id() yeterli
+        if route is None:
+            by_method = self._unmatched
+        else:
+            by_method = self._bound.get(id(route))
+            if by_method is None:
+                by_method = self._bound.setdefault(id(route), {})
+        children = by_method.get(method)
+        if children is None:
+            template = getattr(route, "path", None) or "unmatched"
+            children = (REQUEST_LATENCY.labels(method, template), {}, method, template)
+            by_method[method] = children
+        return children
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        in_flight = self._in_flight
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            latency, status_children, method, template = self._children_for(scope.get("route"), scope["method"])
+            latency.observe(elapsed)
+            status = status_holder[0]
+            counter = status_children.get(status)
+            if counter is None:
+                counter = REQUEST_COUNT.labels(method, template, str(status))
+                status_children[status] = counter
+            counter.inc()
+
+
+def install_metrics(app, engine):
+    """Metrics middleware'ini, DB pool collector'ını ve GET /metrics endpoint'ini ekle"""
+    from fastapi.responses import PlainTextResponse
+
+    app.add_middleware(MetricsMiddleware)
+    register_pool_collector(engine)
+
+    def metrics_endpoint():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
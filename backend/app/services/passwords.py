@@ -0,0 +1,203 @@
+"""
+Passwords - PBKDF2 şifre hash'leme, request thread pool'u dışında
+
+hash / verify, ayrı ve sınırlı bir executor'da (varsayılan process pool)
+çalışır; login patlaması FastAPI / Starlette thread pool'unu doldurup ilgisiz
+endpoint'leri bekletmez. Bekleyen + çalışan iş sayısı
+PASSWORD_HASH_MAX_PENDING'i aşarsa PasswordHasherBusy fırlatılır (route'lar 503
++ Retry-After döner).
+
+    password_hash = await hash_password_async(password)
+    if await verify_password_async(password, user.password_hash): ...
+    if needs_rehash(user.password_hash): ...   # login'de yeni parametrelerle tekrar hash'le
+
+Hash biçimi:
+    pbkdf2_sha256$<iterations>$<salt>$<hash hex>
+    <salt>$<hash hex>                           # eski biçim, 100000 iterasyon; hâlâ doğrulanır
+
+Karşılaştırma sabit zamanlıdır (hmac.compare_digest). hash_password /
+verify_password senkron sürümlerdir (script'ler, synthetic data).
+
+Process pool kurulamazsa (ör. /dev/shm olmayan serverless ortam) thread pool'a
+düşülür; hashlib.pbkdf2_hmac hesaplama sırasında GIL'i bırakır, ayrı thread
+pool da request thread'lerini serbest tutar.
+
+Ayarlar (env):
+    PASSWORD_HASH_ITERATIONS=100000
+    PASSWORD_HASH_EXECUTOR=process       # process | thread
+    PASSWORD_HASH_WORKERS=<cpu sayısı>
+    PASSWORD_HASH_MAX_PENDING=<workers * 8>
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import multiprocessing
+import os
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+ALGORITHM = "pbkdf2_sha256"
+LEGACY_ITERATIONS = 100000
+
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", str(LEGACY_ITERATIONS)))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "process")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 8)))
+
+HASH_PENDING = Gauge("reaview_password_hash_pending", "Password hash / verify jobs queued or running")
+HASH_REJECTED = Counter("reaview_password_hash_rejected_total", "Password hash jobs rejected (executor saturated)")
+
+_pending = HASH_PENDING.labels()
+_rejected = HASH_REJECTED.labels()
+
+
+class PasswordHasherBusy(Exception):
+    """Executor kuyruğu dolu; istemci biraz sonra tekrar denemeli"""
+
+
+# ============ HASH / VERIFY (senkron, executor'da çalışır) ============
+
+def _pbkdf2(password: str, salt: str, iterations: int) -> str:
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), iterations).hex()
+
+
+def hash_password(password: str, iterations: int = PASSWORD_HASH_ITERATIONS) -> str:
+    """Şifreyi hash'le"""
+    salt = secrets.token_hex(16)
+    return f"{ALGORITHM}${iterations}${salt}${_pbkdf2(password, salt, iterations)}"
+
+
+def _parse(password_hash: str):
+    """(iterations, salt, hash) - tanınmayan biçimde None"""
+    parts = password_hash.split("$")
+    if len(parts) == 4 and parts[0] == ALGORITHM and parts[1].isdigit():
+        return int(parts[1]), parts[2], parts[3]
+    if len(parts) == 2:
+        return LEGACY_ITERATIONS, parts[0], parts[1]
+    return None
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """Hash'lenmiş şifreyi sabit zamanlı karşılaştırmayla doğrula"""
+    parsed = _parse(password_hash or "")
+    if parsed is None:
+        return False
+    iterations, salt, expected = parsed
+    return hmac.compare_digest(_pbkdf2(password, salt, iterations), expected)
+
+
+def needs_rehash(password_hash: str, iterations: int = PASSWORD_HASH_ITERATIONS) -> bool:
+    """Eski biçim veya farklı iterasyon sayısı: login'de yeniden hash'lenmeli"""
+    parsed = _parse(password_hash or "")
+    return parsed is None or not password_hash.startswith(ALGORITHM + "$") or parsed[0] != iterations
+
+
+# Bilinmeyen e-postada da bir doğrulama yapılır; cevap süresi hesabın varlığını sızdırmasın
+_DUMMY_HASH = f"{ALGORITHM}${PASSWORD_HASH_ITERATIONS}${'0' * 32}${'0' * 64}"
+
+
+# ============ EXECUTOR ============
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
+
+def _create_executor(kind: str):
+    if kind == "process":
+        try:
+            # fork, thread'li (uvicorn, LISTEN dinleyicisi) bir süreçte güvenli değil
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            return ProcessPoolExecutor(PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context(method))
+        except (OSError, NotImplementedError, ValueError) as exc:
+            logger.warning("password hash process pool unavailable (%s); using threads", exc)
+    return ThreadPoolExecutor(PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = _create_executor(PASSWORD_HASH_EXECUTOR)
+        return _executor
+
+
+def _replace_broken(executor):
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            logger.warning("password hash process pool broke; falling back to threads")
+            _executor = _create_executor("thread")
+        return _executor
+
+
+def _release(_future):
+    _pending.dec()
+    _slots.release()
+
+
+def _submit(fn, args):
+    executor = _get_executor()
+    try:
+        return executor, executor.submit(fn, *args)
+    except BrokenProcessPool:
+        executor = _replace_broken(executor)
+        return executor, executor.submit(fn, *args)
+
+
+async def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        _rejected.inc()
+        raise PasswordHasherBusy()
+    _pending.inc()
+    try:
+        executor, future = _submit(fn, args)
+    except Exception:
+        _release(None)
+        raise
+    # Slot iş bitince boşalır (istek iptal edilse bile iş sürerken dolu kalır)
+    future.add_done_callback(_release)
+    try:
+        return await asyncio.wrap_future(future)
+    except BrokenProcessPool:
+        # Worker süreci öldü (OOM vb.): thread pool'a geçip bir kez daha dene
+        _replace_broken(executor)
+        return await _run(fn, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password, PASSWORD_HASH_ITERATIONS)
+
+
+async def verify_password_async(password: str, password_hash: str = None) -> bool:
+    """password_hash None ise (kullanıcı yok) sahte hash'le doğrulayıp False döner"""
+    if password_hash is None:
+        await _run(verify_password, password, _DUMMY_HASH)
+        return False
+    return await _run(verify_password, password, password_hash)
+
+
+def warm_up():
+    """Worker süreçlerini ilk login'den önce başlat (process pool soğuk başlangıcı ~saniyeler)"""
+    executor = _get_executor()
+    try:
+        for _ in range(PASSWORD_HASH_WORKERS):
+            executor.submit(_pbkdf2, "", "warm-up", 1)
+    except Exception as exc:
+        logger.warning("password hash executor warm-up failed: %s", exc)
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
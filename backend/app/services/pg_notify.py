@@ -0,0 +1,182 @@
+"""
+PG Notify - PostgreSQL LISTEN / NOTIFY üzerinden worker'lar arası mesajlaşma
+
+NOTIFY transaction'a bağlıdır: aynı transaction içinde gönderilen mesaj sadece
+commit'te ve gönderen dahil tüm dinleyicilere (her worker'ın PgListener'ı)
+teslim edilir; rollback'te hiç gitmez.
+
+    notify(session_or_connection, "reaview_feed", payload)   # transaction içinde
+    listener = get_listener(engine)
+    listener.subscribe("reaview_feed", handler)               # handler(payload: str)
+
+PgListener tek bir havuz dışı psycopg2 bağlantısıyla kanalları dinleyen bir
+daemon thread'dir; bağlantı koparsa artan beklemeyle yeniden bağlanır ve tüm
+kanallara tekrar LISTEN eder; kopukluk sırasında gelen mesajlar kaybolduğu için
+yeniden bağlanınca on_reconnect() ile kaydedilen callback'leri çağırır (örn.
+cache'leri boşaltmak için). Handler'lar bu thread'de çağrılır, kısa
+tutulmalı. Payload'lar PostgreSQL sınırı gereği 8000 byte'tan küçük olmalı.
+"""
+
+import json
+import logging
+import select
+import threading
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+MAX_PAYLOAD_BYTES = 7900
+_NOTIFY = text("SELECT pg_notify(:channel, :payload)")
+
+
+def supported(engine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def notify(bind, channel: str, payload: str):
+    """bind: Session veya Connection; mesaj bind'in transaction'ı commit edilince gider"""
+    if len(payload.encode("utf-8")) > MAX_PAYLOAD_BYTES:
+        raise ValueError(f"NOTIFY payload too large ({len(payload)} chars)")
+    bind.execute(_NOTIFY, {"channel": channel, "payload": payload})
+
+
+def json_batches(items: list, max_bytes: int = MAX_PAYLOAD_BYTES) -> list:
+    """items'ı kodlanmış boyutu max_bytes'ı aşmayan JSON dizisi payload'larına böl"""
+    payloads = []
+    batch, size = [], 2  # "[" + "]"
+    for item in items:
+        encoded = json.dumps(item, separators=(",", ":"))
+        cost = len(encoded.encode("utf-8")) + 1  # ayırıcı virgül
+        if cost + 1 > max_bytes:
+            raise ValueError(f"NOTIFY item too large ({cost - 1} bytes)")
+        if batch and size + cost > max_bytes:
+            payloads.append("[" + ",".join(batch) + "]")
+            batch, size = [], 2
+        batch.append(encoded)
+        size += cost
+    if batch:
+        payloads.append("[" + ",".join(batch) + "]")
+    return payloads
+
+
+class PgListener:
+    def __init__(self, engine, poll_timeout: float = 5.0):
+        self.engine = engine
+        self.poll_timeout = poll_timeout
+        self._handlers = {}  # channel -> [handler]
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._connection = None
+        self._pending_listens = set()
+        self._reconnect_callbacks = []
+
+    def on_reconnect(self, callback):
+        """callback() ilk bağlantı hariç her yeniden bağlanmada, LISTEN'lar yenilendikten sonra çağrılır"""
+        with self._lock:
+            if callback not in self._reconnect_callbacks:
+                self._reconnect_callbacks.append(callback)
+
+    def subscribe(self, channel: str, handler):
+        with self._lock:
+            handlers = self._handlers.setdefault(channel, [])
+            if handler not in handlers:
+                handlers.append(handler)
+            self._pending_listens.add(channel)
+        self.start()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="pg-listener", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _connect(self):
+        # Havuzdan bir bağlantı al ve havuzdan ayır: LISTEN oturuma bağlı, geri dönmemeli
+        raw = self.engine.raw_connection()
+        raw.detach()
+        connection = raw.driver_connection
+        connection.autocommit = True
+        with self._lock:
+            self._pending_listens = set(self._handlers)
+        return connection
+
+    def _listen_pending(self, connection):
+        with self._lock:
+            channels, self._pending_listens = self._pending_listens, set()
+        if channels:
+            with connection.cursor() as cursor:
+                for channel in channels:
+                    cursor.execute(f'LISTEN "{channel}"')
+
+    def _dispatch(self, channel: str, payload: str):
+        with self._lock:
+            handlers = list(self._handlers.get(channel, ()))
+        for handler in handlers:
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception("NOTIFY handler failed on channel %s", channel)
+
+    def _reconnected(self):
+        with self._lock:
+            callbacks = list(self._reconnect_callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("LISTEN reconnect callback failed")
+
+    def _run(self):
+        backoff = 1.0
+        connected = False
+        while not self._stop.is_set():
+            try:
+                connection = self._connection = self._connect()
+                self._listen_pending(connection)
+                if connected:
+                    # Kopukluk sırasında gönderilen NOTIFY'lar bu worker'a hiç gelmedi
+                    self._reconnected()
+                connected = True
+                backoff = 1.0
+                while not self._stop.is_set():
+                    self._listen_pending(connection)
+                    if select.select([connection], [], [], self.poll_timeout) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        message = connection.notifies.pop(0)
+                        self._dispatch(message.channel, message.payload)
+            except Exception:
+                logger.exception("LISTEN connection lost; reconnecting in %.0fs", backoff)
+                self._close()
+                if self._stop.wait(backoff):
+                    return
+                backoff = min(backoff * 2, 60.0)
+        self._close()
+
+    def _close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+_listeners = {}
+_listeners_lock = threading.Lock()
+
+
+def get_listener(engine) -> PgListener:
+    """Engine başına tek dinleyici (feed stream ve cache invalidation aynı bağlantıyı paylaşır)"""
+    with _listeners_lock:
+        listener = _listeners.get(id(engine))
+        if listener is None:
+            listener = _listeners[id(engine)] = PgListener(engine)
+        return listener
@@ -0,0 +1,353 @@
+"""
+Profiling - Request bazında örneklemeli (sampling) profiler
+
+Staging'de yavaş bir endpoint'i incelemek için isteğe `?__profile=1` eklenir.
+PROFILING_ENABLED=1 ve geçerli X-Admin-Token header'ı yoksa parametre sessizce
+yok sayılır. Profil süresince ayrı bir thread sys._current_frames() ile
+uygulama kodu çalıştıran thread'lerin stack'lerini örnekler; sonuç
+flamegraph.pl / speedscope ile açılabilen collapsed stack dosyası ve en sıcak
+fonksiyonları gösteren bir HTML özeti olarak PROFILE_DIR'e yazılır.
+
+    ?__profile=1          # normal cevap + X-Profile-Id header'ı, raporlar diske yazılır
+    ?__profile=html       # cevap yerine HTML özeti döner
+    ?__profile=collapsed  # cevap yerine collapsed stack metni döner
+
+PROFILE_SAMPLE_EVERY_N > 0 ise her route'un her N'inci isteği de (admin token
+gerekmeden) arka planda profillenir; PROFILE_DIR en yeni PROFILE_MAX_FILES
+rapor kalacak şekilde döner (rolling).
+
+Not: örnekleyici o anda backend/app kodu çalıştıran tüm thread'leri görür;
+eşzamanlı istekler aynı rapora karışabilir. Tek başına tekrarlanan istekle
+kullanıldığında en temiz sonucu verir.
+
+Ayarlar (env):
+    PROFILING_ENABLED=1                # varsayılan kapalı
+    PROFILE_INTERVAL_MS=5              # örnekleme aralığı
+    PROFILE_SAMPLE_EVERY_N=0           # route başına sürekli örnekleme (0 = kapalı)
+    PROFILE_MIN_DURATION_MS=0          # sürekli modda bundan kısa istekleri kaydetme
+    PROFILE_DIR=./profiles
+    PROFILE_MAX_FILES=200
+"""
+
+import hmac
+import html
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_SAMPLE_EVERY_N = int(os.getenv("PROFILE_SAMPLE_EVERY_N", "0"))
+PROFILE_MIN_DURATION_MS = float(os.getenv("PROFILE_MIN_DURATION_MS", "0"))
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR",
+    str(Path(__file__).resolve().parent.parent.parent / "profiles"),
+)
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+
+PROFILE_PARAM = "__profile"
+# Bu dizin altındaki frame'leri içeren stack'ler "uygulama kodu" sayılır
+APP_ROOT = str(Path(__file__).resolve().parent.parent)
+_THIS_FILE = str(Path(__file__).resolve())
+_MAX_DEPTH = 200
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(APP_ROOT):
+        filename = "app" + filename[len(APP_ROOT):]
+    else:
+        # site-packages/.../starlette/routing.py -> starlette/routing.py
+        parts = Path(filename).parts
+        filename = "/".join(parts[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Arka plan thread'i ile periyodik stack örnekleri toplar.
+    Sadece içinde uygulama frame'i olan stack'ler sayılır; böylece boşta bekleyen
+    event loop / threadpool thread'leri rapora girmez.
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = max(interval_ms, 0.5) / 1000
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.duration_ms = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+        return self
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(exclude=own_ident)
+
+    def sample(self, exclude=None):
+        for ident, frame in sys._current_frames().items():
+            if ident == exclude:
+                continue
+            labels = []
+            in_app = False
+            while frame is not None and len(labels) < _MAX_DEPTH:
+                code = frame.f_code
+                if code.co_filename.startswith(APP_ROOT) and code.co_filename != _THIS_FILE:
+                    in_app = True
+                labels.append(_frame_label(code))
+                frame = frame.f_back
+            if in_app:
+                labels.reverse()
+                self.stacks[";".join(labels)] += 1
+                self.samples += 1
+
+    # ---------- raporlar ----------
+
+    def collapsed(self) -> str:
+        """flamegraph.pl / speedscope / inferno uyumlu 'frame;frame;frame count' satırları"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def function_stats(self):
+        """(self_samples, inclusive_samples) sayaçları"""
+        self_counts = Counter()
+        inclusive = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += count
+            for label in set(frames):
+                inclusive[label] += count
+        return self_counts, inclusive
+
+    def html_report(self, title: str, meta: dict, top: int = 40) -> str:
+        self_counts, inclusive = self.function_stats()
+        total = self.samples or 1
+
+        def rows(counter):
+            out = []
+            for label, count in counter.most_common(top):
+                is_app = label.rsplit("(", 1)[-1].startswith("app/")
+                style = ' style="font-weight:bold"' if is_app else ""
+                out.append(
+                    f"<tr{style}><td>{count}</td><td>{count * 100 / total:.1f}%</td>"
+                    f"<td>{html.escape(label)}</td></tr>"
+                )
+            return "\n".join(out)
+
+        meta_rows = "\n".join(
+            f"<tr><th>{html.escape(str(key))}</th><td>{html.escape(str(value))}</td></tr>"
+            for key, value in meta.items()
+        )
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Profile - {html.escape(title)}</title>
+<style>
+body {{ font-family: monospace; margin: 24px; }}
+table {{ border-collapse: collapse; margin-bottom: 24px; }}
+td, th {{ border: 1px solid #ccc; padding: 2px 8px; text-align: left; }}
+</style></head><body>
+<h2>{html.escape(title)}</h2>
+<table>{meta_rows}</table>
+<p>Kalın satırlar uygulama kodudur. Tam flamegraph için .collapsed dosyasını
+flamegraph.pl veya https://www.speedscope.app ile açın.</p>
+<h3>Self (fonksiyonun kendisinde geçen örnekler)</h3>
+<table><tr><th>samples</th><th>%</th><th>function</th></tr>
+{rows(self_counts)}
+</table>
+<h3>Inclusive (stack'te bulunduğu örnekler)</h3>
+<table><tr><th>samples</th><th>%</th><th>function</th></tr>
+{rows(inclusive)}
+</table>
+</body></html>
+"""
+
+
+# ============== RAPOR DİZİNİ ==============
+
+class ProfileStore:
+    """Raporları PROFILE_DIR'e yazar, en yeni PROFILE_MAX_FILES raporu tutar"""
+
+    def __init__(self, directory: str = PROFILE_DIR, max_files: int = PROFILE_MAX_FILES):
+        self.directory = Path(directory)
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def save(self, profile_id: str, profiler: SamplingProfiler, title: str, meta: dict):
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            base = self.directory / profile_id
+            base.with_suffix(".collapsed").write_text(profiler.collapsed(), encoding="utf-8")
+            base.with_suffix(".html").write_text(profiler.html_report(title, meta), encoding="utf-8")
+            self._rotate()
+        return base
+
+    def _rotate(self):
+        reports = sorted(self.directory.glob("*.html"), key=lambda p: p.stat().st_mtime)
+        for old in reports[:max(0, len(reports) - self.max_files)]:
+            for suffix in (".html", ".collapsed"):
+                old.with_suffix(suffix).unlink(missing_ok=True)
+
+    def list(self, limit: int = 50) -> list:
+        if not self.directory.exists():
+            return []
+        reports = sorted(self.directory.glob("*.html"), key=lambda p: p.stat().st_mtime, reverse=True)
+        return [
+            {
+                "id": report.stem,
+                "html": str(report),
+                "collapsed": str(report.with_suffix(".collapsed")),
+                "created_at": report.stat().st_mtime,
+            }
+            for report in reports[:limit]
+        ]
+
+
+profile_store = ProfileStore()
+
+
+# ============== ASGI MIDDLEWARE ==============
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def _route_key(method: str, path: str) -> str:
+    """Sürekli örnekleme sayacı için route anahtarı (/items/42 -> /items/{id})"""
+    return f"{method} {_ID_SEGMENT.sub('/{id}', path)}"
+
+
+def _header(scope, name: bytes):
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _is_admin(scope) -> bool:
+    admin_token = os.getenv("ADMIN_TOKEN")
+    supplied = _header(scope, b"x-admin-token")
+    return bool(admin_token and supplied and hmac.compare_digest(supplied, admin_token))
+
+
+class ProfilingMiddleware:
+    """`?__profile=` isteklerini ve her N'inci isteği SamplingProfiler altında çalıştır"""
+
+    def __init__(self, app, sample_every_n: int = PROFILE_SAMPLE_EVERY_N, store: ProfileStore = None):
+        self.app = app
+        self.sample_every_n = sample_every_n
+        self.store = store or profile_store
+        self._counters = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _continuous_pick(self, key: str) -> bool:
+        if self.sample_every_n <= 0:
+            return False
+        with self._lock:
+            self._counters[key] += 1
+            return self._counters[key] % self.sample_every_n == 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = None
+        query = scope.get("query_string", b"")
+        if PROFILE_PARAM.encode() in query:
+            pairs = parse_qsl(query.decode("latin-1"), keep_blank_values=True)
+            requested = next((value for key, value in pairs if key == PROFILE_PARAM), None)
+            # Parametreyi uygulamaya iletme (cache key'lerini vs. etkilemesin)
+            scope = {**scope, "query_string": urlencode([(k, v) for k, v in pairs if k != PROFILE_PARAM]).encode()}
+            if requested and requested != "0" and _is_admin(scope):
+                mode = requested if requested in ("html", "collapsed") else "save"
+
+        route_key = _route_key(scope["method"], scope.get("path", ""))
+        continuous = mode is None and self._continuous_pick(route_key)
+        if mode is None and not continuous:
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler().start()
+        status = [None]
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}_{int(time.time() * 1000) % 1000:03d}_" \
+                     f"{scope['method']}_{re.sub(r'[^A-Za-z0-9]+', '-', scope.get('path', '')).strip('-') or 'root'}"
+
+        async def send_wrapper(message):
+            if mode in ("html", "collapsed"):
+                # Gerçek cevabı yut; rapor aşağıda döner
+                if message["type"] == "http.response.start":
+                    status[0] = message["status"]
+                return
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or scope.get("path", "")
+            title = f"{scope['method']} {template}"
+            meta = {
+                "path": scope.get("path", ""),
+                "status": status[0],
+                "duration_ms": round(profiler.duration_ms, 1),
+                "samples": profiler.samples,
+                "interval_ms": PROFILE_INTERVAL_MS,
+                "trigger": "continuous" if continuous else "on-demand",
+                "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(profiler.started_at)),
+            }
+            if not continuous or profiler.duration_ms >= PROFILE_MIN_DURATION_MS:
+                try:
+                    self.store.save(profile_id, profiler, title, meta)
+                except OSError as e:
+                    logger.warning("Profile could not be saved: %s", e)
+
+        if mode == "html":
+            body = profiler.html_report(title, meta).encode("utf-8")
+            content_type = b"text/html; charset=utf-8"
+        elif mode == "collapsed":
+            body = profiler.collapsed().encode("utf-8")
+            content_type = b"text/plain; charset=utf-8"
+        else:
+            return
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", content_type),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profile-id", profile_id.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def install_profiling(app):
+    """PROFILING_ENABLED=1 ise profiling middleware'ini ekle"""
+    if not PROFILING_ENABLED:
+        return
+    app.add_middleware(ProfilingMiddleware)
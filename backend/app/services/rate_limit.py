@@ -0,0 +1,236 @@
+"""
+Rate Limit - kimlik doğrulama endpoint'leri için kayan pencereli sınırlayıcı
+
+Her kural "limit / pencere" biçimindedir ve bir anahtara (IP, e-posta,
+kullanıcı adı) uygulanır. Sınır aşılırsa route 429 + Retry-After döner;
+kontrol PBKDF2 ve SMTP'den önce yapılır, saldırı sırasında sunucu kapasitesi
+korunur.
+
+    LOGIN_IP.hit(client_ip(request))          # 0 = izin, > 0 = Retry-After saniyesi
+    enforce(request, (LOGIN_IP, None), (LOGIN_ACCOUNT, account_ip_key(request, email)))
+
+Login'in hesap sayacı (e-posta, IP) çiftine bağlıdır: başka adreslerden
+yanlış şifre deneyen biri hesabı sahibine kilitleyemez; tek adresten
+hesap başına deneme yine sınırlıdır, adres başına toplam LOGIN_IP ile.
+
+Backend'ler (RATE_LIMIT_BACKEND):
+    memory   Worker başına; anahtar başına limit boyutlu bir zaman damgası halkası
+             (deque(maxlen=limit)) - kesin kayan pencere. En fazla
+             RATE_LIMIT_MAX_KEYS anahtar, en eski kullanılan önce atılır.
+    redis    Worker'lar arası paylaşımlı (CACHE_REDIS_URL); iki sabit pencerenin
+             ağırlıklı toplamıyla yaklaşık kayan pencere (INCR + PEXPIRE).
+             Redis erişilemezse o istek için bellek backend'ine düşülür.
+
+IP, RATE_LIMIT_TRUST_PROXY=1 ise X-Forwarded-For'dan, değilse bağlantının
+adresinden alınır. Header'ın soldaki adresleri istemci tarafından
+sahtelenebilir; her proxy kendi gördüğü adresi sağa ekler. Bu yüzden sağdan
+RATE_LIMIT_TRUSTED_HOPS (önümüzdeki güvenilen proxy sayısı) adres sayılır ve
+o adres kullanılır (1: tek proxy, en sağdaki adres). Header daha kısaysa
+en soldaki adres alınır.
+
+Ayarlar (env, "istek/saniye"):
+    RATE_LIMIT_ENABLED=1
+    RATE_LIMIT_BACKEND=memory
+    RATE_LIMIT_TRUST_PROXY=0
+    RATE_LIMIT_TRUSTED_HOPS=1
+    RATE_LIMIT_MAX_KEYS=100000
+    RATE_LIMIT_LOGIN_IP=30/300           RATE_LIMIT_LOGIN_ACCOUNT=10/900
+    RATE_LIMIT_REGISTER_IP=10/3600       RATE_LIMIT_REGISTER_ACCOUNT=5/3600
+    RATE_LIMIT_FORGOT_IP=10/3600         RATE_LIMIT_FORGOT_ACCOUNT=3/3600
+    RATE_LIMIT_RESET_IP=10/3600          RATE_LIMIT_RESET_ACCOUNT=5/3600
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from .cache import CACHE_REDIS_URL, CACHE_REDIS_TIMEOUT_S, RedisBackend
+from .metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+RATE_LIMIT_TRUSTED_HOPS = max(1, int(os.getenv("RATE_LIMIT_TRUSTED_HOPS", "1")))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+RATE_LIMIT_CHECKS = Counter("reaview_rate_limit_checks_total", "Rate limit checks", ("limiter",))
+RATE_LIMIT_REJECTED = Counter("reaview_rate_limit_rejected_total", "Requests rejected by a rate limit", ("limiter",))
+
+
+def _parse_rule(value: str):
+    limit, _, window = value.partition("/")
+    return int(limit), float(window)
+
+
+class MemoryWindow:
+    """Kesin kayan pencere: anahtar başına son `limit` isteğin zamanı"""
+
+    def __init__(self, limit: int, window: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._keys = OrderedDict()  # key -> deque(maxlen=limit), en eski kullanılan başta
+
+    def hit(self, key: str) -> float:
+        now = time.monotonic()
+        with self._lock:
+            stamps = self._keys.get(key)
+            if stamps is None:
+                stamps = self._keys[key] = deque(maxlen=self.limit)
+                if len(self._keys) > self.max_keys:
+                    self._keys.popitem(last=False)
+            else:
+                self._keys.move_to_end(key)
+            # Halka dolu ve en eski istek hâlâ pencere içindeyse sınır aşıldı
+            if len(stamps) == self.limit and stamps[0] > now - self.window:
+                return stamps[0] + self.window - now
+            stamps.append(now)
+            return 0.0
+
+    def reset(self, key: str):
+        with self._lock:
+            self._keys.pop(key, None)
+
+
+class RedisWindow:
+    """Yaklaşık kayan pencere: önceki pencere sayısı, geçen süreyle ağırlıklandırılır"""
+
+    def __init__(self, name: str, limit: int, window: float, client: RedisBackend):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.client = client
+
+    def _key(self, key: str, index: int) -> str:
+        return f"ratelimit:{self.name}:{key}:{index}"
+
+    def hit(self, key: str) -> float:
+        now = time.time()
+        index = int(now // self.window)
+        elapsed = now - index * self.window
+        # Önce say, sonra kontrol et: eşzamanlı worker'lar aynı boş sayacı görüp sınırı aşamaz
+        current_key = self._key(key, index)
+        current = int(self.client.execute("INCR", current_key))
+        if current == 1:
+            self.client.execute("PEXPIRE", current_key, int(self.window * 2000))
+        previous = int(self.client.execute("GET", self._key(key, index - 1)) or 0)
+        if previous * (1 - elapsed / self.window) + current <= self.limit:
+            return 0.0
+        # Reddedilen istek sayılmaz (bellek penceresiyle aynı davranış)
+        self.client.execute("DECR", current_key)
+        current -= 1
+        if current >= self.limit or previous == 0:
+            return self.window - elapsed
+        # Önceki pencerenin ağırlığı sınırın altına inene kadar
+        return max(1.0, (1 - (self.limit - current) / previous) * self.window - elapsed)
+
+    def reset(self, key: str):
+        index = int(time.time() // self.window)
+        self.client.execute("DEL", self._key(key, index - 1), self._key(key, index))
+
+
+_redis_client = None
+
+
+def _shared_client():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = RedisBackend(CACHE_REDIS_URL, CACHE_REDIS_TIMEOUT_S)
+    return _redis_client
+
+
+class RateLimiter:
+    def __init__(self, name: str, rule: str, backend: str = RATE_LIMIT_BACKEND):
+        self.name = name
+        self.limit, self.window = _parse_rule(rule)
+        self.memory = MemoryWindow(self.limit, self.window)
+        self.shared = RedisWindow(name, self.limit, self.window, _shared_client()) if backend == "redis" else None
+        self._checks = RATE_LIMIT_CHECKS.labels(name)
+        self._rejected = RATE_LIMIT_REJECTED.labels(name)
+
+    def hit(self, key: str) -> float:
+        """İsteği say; izin varsa 0, yoksa Retry-After saniyesi"""
+        self._checks.inc()
+        retry_after = 0.0
+        if self.shared is not None:
+            try:
+                retry_after = self.shared.hit(key)
+            except Exception as exc:
+                logger.warning("rate limit backend failed (%s): %s; using in-memory window", self.name, exc)
+                retry_after = self.memory.hit(key)
+        else:
+            retry_after = self.memory.hit(key)
+        if retry_after > 0:
+            self._rejected.inc()
+        return retry_after
+
+    def reset(self, key: str):
+        """Başarılı işlemden sonra (ör. doğru şifre) anahtarın sayacını sıfırla"""
+        self.memory.reset(key)
+        if self.shared is not None:
+            try:
+                self.shared.reset(key)
+            except Exception as exc:
+                logger.warning("rate limit reset failed (%s): %s", self.name, exc)
+
+
+LOGIN_IP = RateLimiter("login_ip", os.getenv("RATE_LIMIT_LOGIN_IP", "30/300"))
+LOGIN_ACCOUNT = RateLimiter("login_account", os.getenv("RATE_LIMIT_LOGIN_ACCOUNT", "10/900"))
+REGISTER_IP = RateLimiter("register_ip", os.getenv("RATE_LIMIT_REGISTER_IP", "10/3600"))
+REGISTER_ACCOUNT = RateLimiter("register_account", os.getenv("RATE_LIMIT_REGISTER_ACCOUNT", "5/3600"))
+FORGOT_IP = RateLimiter("forgot_ip", os.getenv("RATE_LIMIT_FORGOT_IP", "10/3600"))
+FORGOT_ACCOUNT = RateLimiter("forgot_account", os.getenv("RATE_LIMIT_FORGOT_ACCOUNT", "3/3600"))
+RESET_IP = RateLimiter("reset_ip", os.getenv("RATE_LIMIT_RESET_IP", "10/3600"))
+RESET_ACCOUNT = RateLimiter("reset_account", os.getenv("RATE_LIMIT_RESET_ACCOUNT", "5/3600"))
+
+
+def client_ip(request) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        hops = [hop.strip() for hop in ",".join(request.headers.getlist("x-forwarded-for")).split(",")]
+        hops = [hop for hop in hops if hop]
+        if hops:
+            # Güvenilen proxy'lerin eklediği adresler sağda; istemcininki ondan önceki ilk adres
+            return hops[-min(RATE_LIMIT_TRUSTED_HOPS, len(hops))]
+    return request.client.host if request.client else "unknown"
+
+
+def account_key(value: str) -> str:
+    return (value or "").strip().lower()
+
+
+def account_ip_key(request, value: str) -> str:
+    return f"{account_key(value)}@{client_ip(request)}"
+
+
+def enforce(request, *rules):
+    """
+    rules: (limiter, key) çiftleri; key None ise istemci IP'si kullanılır.
+    Sırayla sayılır, ilk aşılan kuralda 429 + Retry-After fırlatılır.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return
+    for limiter, key in rules:
+        retry_after = limiter.hit(client_ip(request) if key is None else key)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Çok fazla deneme yapıldı, lütfen daha sonra tekrar deneyin",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+async def enforce_async(request, *rules):
+    """enforce'un async route sürümü; paylaşımlı backend'de ağ çağrısı event loop'u bloklamaz"""
+    if RATE_LIMIT_BACKEND == "redis":
+        await run_in_threadpool(enforce, request, *rules)
+    else:
+        enforce(request, *rules)
@@ -0,0 +1,233 @@
+"""
+Slow Query Log - Eşik süresini aşan SQL statement'larının kaydı
+
+SLOW_QUERY_THRESHOLD_MS'i aşan her statement için şekli, bind parametre
+tipleri ve süresi bir ring buffer'a ve JSONL log dosyasına yazılır. Planı
+görmek için statement arka plandaki tek bir worker thread'inde ayrı bir
+bağlantı üzerinden `EXPLAIN (ANALYZE, BUFFERS)` ile tekrar çalıştırılır
+(request'i bekletmez). Aynı şekle sahip statement'lar tek kayıtta toplanır:
+sayı, p50/p95/p99 ve son yakalanan plan.
+
+Ayarlar (env):
+    SLOW_QUERY_THRESHOLD_MS=200
+    SLOW_QUERY_EXPLAIN=1
+    SLOW_QUERY_LOG_PATH=slow_queries.log
+"""
+
+import json
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import event
+
+from .sql_instrumentation import statement_shape
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_ENABLED = os.getenv("SLOW_QUERY_LOG", "1") == "1"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"
+SLOW_QUERY_LOG_PATH = os.getenv(
+    "SLOW_QUERY_LOG_PATH",
+    str(Path(__file__).resolve().parent.parent.parent / "slow_queries.log"),
+)
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+# Aynı şekil için tekrar EXPLAIN almadan önce beklenecek süre (saniye)
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+# EXPLAIN ANALYZE statement'ı gerçekten çalıştırır; uzun sürerse kes
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "10000"))
+# Şekil başına percentile hesabı için saklanan son süreler
+MAX_SAMPLES_PER_SHAPE = 500
+
+
+def percentile(sorted_values, fraction: float):
+    """Nearest-rank percentile (sorted_values sıralı olmalı)"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _param_types(parameters):
+    """Bind parametrelerinin sadece tiplerini döndür (değerler loglanmaz)"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def _is_explainable(statement: str) -> bool:
+    # EXPLAIN ANALYZE statement'ı çalıştırır; sadece okuma yapan sorgular güvenli
+    head = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return head in ("SELECT", "WITH")
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=SLOW_QUERY_BUFFER_SIZE)
+        self._shapes = {}
+        self._explain_queue = queue.Queue(maxsize=100)
+        self._worker = None
+        self._engine = None
+
+    # ---------- kayıt ----------
+
+    def record(self, statement: str, parameters, duration_ms: float, dialect: str):
+        shape = statement_shape(statement)
+        entry = {
+            "at": datetime.utcnow().isoformat(),
+            "shape": shape,
+            "param_types": _param_types(parameters),
+            "duration_ms": round(duration_ms, 3),
+            "plan": None,
+        }
+        explain = False
+        with self._lock:
+            self._recent.append(entry)
+            stats = self._shapes.get(shape)
+            if stats is None:
+                stats = {
+                    "count": 0,
+                    "samples": deque(maxlen=MAX_SAMPLES_PER_SHAPE),
+                    "max_ms": 0.0,
+                    "last_seen": None,
+                    "last_plan": None,
+                    "last_explained": 0.0,
+                }
+                self._shapes[shape] = stats
+            stats["count"] += 1
+            stats["samples"].append(duration_ms)
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            stats["last_seen"] = entry["at"]
+            now = time.monotonic()
+            if (
+                SLOW_QUERY_EXPLAIN
+                and self._engine is not None
+                and _is_explainable(statement)
+                and now - stats["last_explained"] >= SLOW_QUERY_EXPLAIN_INTERVAL
+            ):
+                stats["last_explained"] = now
+                explain = True
+
+        if explain:
+            try:
+                self._explain_queue.put_nowait((entry, statement, parameters, dialect))
+                return
+            except queue.Full:
+                pass
+        self._write_log(entry)
+
+    def _write_log(self, entry: dict):
+        try:
+            with open(SLOW_QUERY_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+        except Exception as e:
+            logger.warning("Slow query log write failed: %s", e)
+
+    # ---------- EXPLAIN worker ----------
+
+    def start(self, engine):
+        self._engine = engine
+        if SLOW_QUERY_EXPLAIN and (self._worker is None or not self._worker.is_alive()):
+            self._worker = threading.Thread(target=self._run_explains, name="slow-query-explain", daemon=True)
+            self._worker.start()
+
+    def _run_explains(self):
+        while True:
+            entry, statement, parameters, dialect = self._explain_queue.get()
+            try:
+                entry["plan"] = self._explain(statement, parameters, dialect)
+            except Exception as e:
+                entry["plan"] = f"EXPLAIN failed: {e}"
+            with self._lock:
+                stats = self._shapes.get(entry["shape"])
+                if stats is not None:
+                    stats["last_plan"] = entry["plan"]
+            self._write_log(entry)
+
+    def _explain(self, statement: str, parameters, dialect: str) -> str:
+        # Bu bağlantıdaki statement'lar tekrar slow log'a düşmesin. conn.info değil execution
+        # option: info DBAPI bağlantısıyla havuza geri döner ve sonraki kullanımları da susturur
+        with self._engine.connect().execution_options(slow_query_skip=True) as conn:
+            if dialect == "postgresql":
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {SLOW_QUERY_EXPLAIN_TIMEOUT_MS}")
+                explain_sql = f"EXPLAIN (ANALYZE, BUFFERS) {statement}"
+            else:
+                explain_sql = f"EXPLAIN QUERY PLAN {statement}"
+            rows = conn.exec_driver_sql(explain_sql, parameters or ()).fetchall()
+            conn.rollback()
+        return "\n".join(" ".join(str(col) for col in row) for row in rows)
+
+    # ---------- rapor ----------
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = list(self._recent)
+            shapes = []
+            for shape, stats in self._shapes.items():
+                samples = sorted(stats["samples"])
+                shapes.append({
+                    "shape": shape,
+                    "count": stats["count"],
+                    "p50_ms": round(percentile(samples, 0.50), 3),
+                    "p95_ms": round(percentile(samples, 0.95), 3),
+                    "p99_ms": round(percentile(samples, 0.99), 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                    "last_seen": stats["last_seen"],
+                    "last_plan": stats["last_plan"],
+                })
+        shapes.sort(key=lambda s: s["count"] * s["p50_ms"], reverse=True)
+        return {
+            "threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+            "shapes": shapes,
+            "recent": list(reversed(recent)),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self._shapes.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_slow_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_slow_query_start")
+    if not starts:
+        return
+    duration_ms = (time.perf_counter() - starts.pop()) * 1000
+    if duration_ms < SLOW_QUERY_THRESHOLD_MS or conn.get_execution_options().get("slow_query_skip"):
+        return
+    slow_query_log.record(statement, None if executemany else parameters, duration_ms, conn.dialect.name)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    starts = conn.info.get("_slow_query_start") if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def install_slow_query_log(engine):
+    """Engine'e slow query event'lerini bağla ve EXPLAIN worker'ını başlat"""
+    if not SLOW_QUERY_ENABLED:
+        return
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+    slow_query_log.start(engine)
@@ -0,0 +1,250 @@
+"""
+SQL Instrumentation - Request başına SQL statement sayısı ve DB süresi
+
+SQLAlchemy cursor event'leri her statement'ı o anki request'in istatistiğine
+yazar. Middleware sonuçları `Server-Timing` header'ına koyar, aynı statement
+şeklinin tekrar tekrar çalıştığı (N+1) durumları loglar ve route bazlı
+özet raporu (`/admin/sql-report`) besler.
+"""
+
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+SQL_INSTRUMENTATION_ENABLED = os.getenv("SQL_INSTRUMENTATION", "1") == "1"
+# Aynı statement şekli bir request içinde bu kadar veya daha fazla çalışırsa N+1 say
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+# Route başına raporda tutulacak en fazla N+1 şekli
+MAX_SHAPES_PER_ROUTE = 20
+
+_current_stats = contextvars.ContextVar("sql_request_stats", default=None)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"%\(\w+\)s|(?<!:):\w+|\?|\$\d+")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_POSTCOMPILE_RE = re.compile(r"\(__\[POSTCOMPILE_\w+\]\)")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Statement'ı parametre ve literal'lerden arındırılmış bir şekle indir.
+    Aynı sorgunun farklı ID'lerle çalışmaları aynı şekli üretir.
+    """
+    shape = _WHITESPACE_RE.sub(" ", statement).strip()
+    shape = _POSTCOMPILE_RE.sub("(?)", shape)
+    shape = _STRING_RE.sub("?", shape)
+    shape = _PARAM_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("IN (?)", shape)
+    return shape
+
+
+class RequestSQLStats:
+    """Tek bir request sırasında çalışan statement'ların özeti"""
+
+    __slots__ = ("statement_count", "db_time", "statements")
+
+    def __init__(self):
+        self.statement_count = 0
+        self.db_time = 0.0
+        # Ham statement metni -> çalışma sayısı (şekil hesaplaması sadece raporlamada yapılır)
+        self.statements = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.statement_count += 1
+        self.db_time += duration
+        self.statements[statement] += 1
+
+    def repeated_shapes(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> dict:
+        """threshold veya daha fazla tekrar eden statement şekilleri"""
+        shapes = Counter()
+        for statement, count in self.statements.items():
+            shapes[statement_shape(statement)] += count
+        return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+
+def current_request_stats():
+    """Aktif request'in istatistiği (request dışında None)"""
+    return _current_stats.get()
+
+
+def start_request_stats() -> tuple:
+    """Yeni bir istatistik nesnesi başlat; (stats, reset_token) döner"""
+    stats = RequestSQLStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request_stats(reset_token):
+    _current_stats.reset(reset_token)
+
+
+class RouteSQLReport:
+    """Route şablonu bazında toplanmış SQL istatistikleri (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def add(self, route_key: str, stats: RequestSQLStats, repeated: dict):
+        with self._lock:
+            entry = self._routes.get(route_key)
+            if entry is None:
+                entry = {
+                    "requests": 0,
+                    "statements": 0,
+                    "max_statements": 0,
+                    "db_time_ms": 0.0,
+                    "n_plus_one_requests": 0,
+                    "repeated_shapes": Counter(),
+                }
+                self._routes[route_key] = entry
+            entry["requests"] += 1
+            entry["statements"] += stats.statement_count
+            entry["max_statements"] = max(entry["max_statements"], stats.statement_count)
+            entry["db_time_ms"] += stats.db_time * 1000
+            if repeated:
+                entry["n_plus_one_requests"] += 1
+                shapes = entry["repeated_shapes"]
+                for shape, count in repeated.items():
+                    if shape in shapes or len(shapes) < MAX_SHAPES_PER_ROUTE:
+                        shapes[shape] = max(shapes[shape], count)
+
+    def snapshot(self) -> list:
+        with self._lock:
+            routes = []
+            for route_key, entry in self._routes.items():
+                requests = entry["requests"] or 1
+                routes.append({
+                    "route": route_key,
+                    "requests": entry["requests"],
+                    "avg_statements": round(entry["statements"] / requests, 2),
+                    "max_statements": entry["max_statements"],
+                    "avg_db_time_ms": round(entry["db_time_ms"] / requests, 3),
+                    "total_db_time_ms": round(entry["db_time_ms"], 3),
+                    "n_plus_one_requests": entry["n_plus_one_requests"],
+                    "repeated_shapes": [
+                        {"shape": shape, "max_count": count}
+                        for shape, count in entry["repeated_shapes"].most_common()
+                    ],
+                })
+        routes.sort(key=lambda r: r["total_db_time_ms"], reverse=True)
+        return routes
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_report = RouteSQLReport()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_sql_instrumentation_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_sql_instrumentation_start")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+def _handle_error(exception_context):
+    # Hatalı statement'ların başlangıç zamanını da temizle ki stack kaymasın
+    conn = exception_context.connection
+    if conn is not None:
+        starts = conn.info.get("_sql_instrumentation_start")
+        if starts:
+            starts.pop()
+
+
+def instrument_engine(engine):
+    """Engine'e cursor event'lerini bağla (birden fazla çağrılırsa tekrar bağlamaz)"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def route_key_for(scope) -> str:
+    """'GET /items/{item_id}' gibi route şablonu anahtarı"""
+    route = scope.get("route")
+    # Eşleşmeyen path'ler (404, tarayıcı botları) tek anahtarda toplanır; ham path rapor
+    # sözlüğünü sınırsız büyütürdü (metrics.py ile aynı)
+    path = getattr(route, "path", None) or "unmatched"
+    return f"{scope['method']} {path}"
+
+
+def server_timing_value(stats: RequestSQLStats) -> str:
+    return f'db;dur={stats.db_time * 1000:.2f};desc="{stats.statement_count} queries"'
+
+
+def _with_server_timing(headers, timing: str) -> list:
+    """Var olan Server-Timing header'ına ekle, yoksa yeni header olarak koy"""
+    headers = list(headers)
+    for index, (name, value) in enumerate(headers):
+        if name.lower() == b"server-timing":
+            headers[index] = (name, value + b", " + timing.encode("latin-1"))
+            return headers
+    headers.append((b"server-timing", timing.encode("latin-1")))
+    return headers
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Saf ASGI middleware (metrics / tracing ile aynı): istek boyunca SQL
+    istatistiğini contextvar'da tutar, Server-Timing'i http.response.start'a
+    ekler. BaseHTTPMiddleware'in aksine streaming yanıtları (SSE) tamponlamaz.
+    Header, yanıt başladığı ana kadarki statement'ları gösterir; route raporu
+    isteğin tamamını sayar.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, reset_token = start_request_stats()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": _with_server_timing(message.get("headers", ()),
+                                                                     server_timing_value(stats))}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_request_stats(reset_token)
+            route_key = route_key_for(scope)
+            repeated = stats.repeated_shapes()
+            if repeated:
+                for shape, count in repeated.items():
+                    logger.warning("N+1 suspected on %s: %d x %s", route_key, count, shape)
+            route_report.add(route_key, stats, repeated)
+
+
+def install_sql_instrumentation(app, engine):
+    """Engine event'lerini ve request middleware'ini uygulamaya ekle"""
+    if not SQL_INSTRUMENTATION_ENABLED:
+        return
+
+    instrument_engine(engine)
+    app.add_middleware(SQLInstrumentationMiddleware)
@@ -0,0 +1,51 @@
+"""
+Shared pytest setup for backend tests.
+Adds the project root to sys.path so `backend.app` imports work from any cwd.
+
+Tests that drive the FastAPI app request the `asgi_app` fixture instead of
+importing backend.app.main at module level: the app reads DATABASE_URL and the
+provider base URLs at import time, so the environment is prepared first (and
+restored after the session) by `app_environment`.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+root_dir = Path(__file__).resolve().parents[4]
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+
+@pytest.fixture(scope="session")
+def app_environment():
+    """Fake provider server + env for importing the app; never reaches a real database or provider."""
+    from backend.tools.fake_providers import FakeProviderServer
+
+    defaults = {
+        "DATABASE_URL": f"sqlite:///{Path(tempfile.gettempdir()) / 'reaview_tests.db'}",
+        "NO_PROXY": "127.0.0.1,localhost",
+        "SLOW_QUERY_LOG": "0",
+        "AUTH_TOKEN_SECRET": "test-token-secret-0123456789abcdef",
+        # Statement budgets / plans measure the query path; a cached second request would issue no SQL
+        "FEED_CACHE_ENABLED": "0",
+    }
+    with FakeProviderServer() as providers, pytest.MonkeyPatch.context() as mp:
+        for key, value in {**defaults, **providers.env()}.items():
+            if key not in os.environ:
+                mp.setenv(key, value)
+        yield providers
+
+
+@pytest.fixture(scope="session")
+def asgi_app(app_environment):
+    """(app, ASGIClient) pair; routes' get_db can be overridden per test via app.dependency_overrides."""
+    from backend.app.main import app
+    from backend.benchmarks.asgi_client import ASGIClient
+
+    client = ASGIClient(app)
+    yield app, client
+    client.close()
+    app.dependency_overrides.clear()
@@ -0,0 +1,185 @@
+"""
+services/activity_service.py: tekilleştirme (upsert), geri alma ve compactor.
+
+SQLite üzerinde init_db() ile (migration 036'nın unique index'leri dahil)
+kurulan geçici bir veritabanına karşı çalışır:
+
+    pytest backend/app/services/tests/test_activity_service.py
+
+backend.app modülleri (database import anında DATABASE_URL okur) conftest'teki
+app_environment hazırlandıktan sonra import edilir.
+"""
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture(scope="module")
+def service(app_environment):
+    from backend.app.services import activity_service
+    return activity_service
+
+
+@pytest.fixture
+def engine(service, tmp_path):
+    from backend.app.database import init_db
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'activities.db'}")
+    init_db(bind=engine)
+    yield engine
+    service._upsert_types.pop(id(engine), None)
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _rows(engine, activity_type=None):
+    sql = "SELECT activity_id, user_id, activity_type, review_id, item_id, related_user_id FROM activities"
+    params = {}
+    if activity_type:
+        sql += " WHERE activity_type = :type"
+        params["type"] = activity_type
+    with engine.connect() as conn:
+        return conn.execute(text(sql + " ORDER BY activity_id"), params).fetchall()
+
+
+def _record(session_factory, *args, **kwargs):
+    from backend.app.services.activity_service import record_activity
+
+    db = session_factory()
+    try:
+        activity = record_activity(db, *args, **kwargs)
+        db.commit()
+        return activity
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("activity_type,targets", [
+    ("like_review", {"review_id": 5}),
+    ("like_item", {"item_id": 5}),
+    ("rating", {"item_id": 5}),
+    ("follow", {"related_user_id": 5}),
+])
+def test_deduped_types_keep_one_row_per_target(engine, session_factory, activity_type, targets):
+    first = _record(session_factory, 1, activity_type, **targets)
+    second = _record(session_factory, 1, activity_type, **targets)
+
+    rows = _rows(engine, activity_type)
+    assert len(rows) == 1
+    assert first.activity_id == second.activity_id == rows[0].activity_id
+
+    # Farklı aktör veya hedef ayrı satırdır
+    _record(session_factory, 2, activity_type, **targets)
+    _record(session_factory, 1, activity_type, **{key: 6 for key in targets})
+    assert len(_rows(engine, activity_type)) == 3
+
+
+def test_repeat_event_is_a_single_upsert(engine, session_factory):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    _record(session_factory, 1, "like_review", review_id=5)
+    statements.clear()
+    _record(session_factory, 1, "like_review", review_id=5)
+
+    # Kontrol SELECT'i yok; feed cache'in takipçi sorgusu activities'e dokunmaz
+    on_activities = [s for s in statements if "activities" in s]
+    assert len(on_activities) == 1 and "ON CONFLICT" in on_activities[0].upper()
+
+
+def test_unique_index_rejects_racing_duplicate(service, engine, session_factory):
+    from backend.app import models
+
+    # Eski kontrol-sonra-ekle yolunun eşzamanlı iki isteği: ikinci düz INSERT index'e takılır
+    _record(session_factory, 1, "follow", related_user_id=9)
+    db = session_factory()
+    db.add(models.Activity(user_id=1, activity_type="follow", related_user_id=9))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+    db.close()
+    assert len(_rows(engine, "follow")) == 1
+
+
+def test_missing_index_falls_back_to_locked_insert(service, engine, session_factory):
+    # Migration 036 uygulanamamış (ör. eski tekrarlar yüzünden): ON CONFLICT'e eşleşen index yok
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_activities_like_item"))
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    _record(session_factory, 1, "like_item", item_id=5)
+    _record(session_factory, 1, "like_item", item_id=5)
+    _record(session_factory, 1, "like_review", review_id=5)
+
+    assert len(_rows(engine, "like_item")) == 1
+    upserts = [s for s in statements if "ON CONFLICT" in s.upper()]
+    assert len(upserts) == 1 and "review_id" in upserts[0]
+
+
+def test_non_deduped_types_insert_every_event(engine, session_factory):
+    _record(session_factory, 1, "review", item_id=3, review_id=10)
+    _record(session_factory, 1, "review", item_id=3, review_id=11)
+    _record(session_factory, 1, "comment_review", review_id=10)
+    _record(session_factory, 1, "comment_review", review_id=10)
+    assert len(_rows(engine)) == 4
+
+
+def test_retract_removes_the_row(service, engine, session_factory):
+    _record(session_factory, 1, "like_item", item_id=4)
+    _record(session_factory, 2, "like_item", item_id=4)
+
+    db = session_factory()
+    assert service.retract_activity(db, 1, "like_item", item_id=4) == 1
+    db.commit()
+    db.close()
+
+    assert [row.user_id for row in _rows(engine, "like_item")] == [2]
+
+
+def test_upsert_activity_rejects_non_deduped_type(service, session_factory):
+    db = session_factory()
+    with pytest.raises(ValueError):
+        service.upsert_activity(db, 1, "review", item_id=1)
+    db.close()
+
+
+def test_compactor_removes_duplicates_and_orphans(service, engine):
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_activities_like_review"))  # index öncesi veriyi taklit et
+        for _ in range(3):
+            conn.execute(text(
+                "INSERT INTO activities (user_id, activity_type, review_id) VALUES (1, 'like_review', 5)"
+            ))
+        conn.execute(text("INSERT INTO activities (user_id, activity_type, review_id) VALUES (1, 'like_review', NULL)"))
+        conn.execute(text("INSERT INTO activities (user_id, activity_type, review_id) VALUES (1, 'like_review', NULL)"))
+        conn.execute(text("INSERT INTO review_likes (review_id, user_id) VALUES (5, 1)"))
+        conn.execute(text("INSERT INTO activities (user_id, activity_type, review_id) VALUES (2, 'like_review', 7)"))
+    newest = max(row.activity_id for row in _rows(engine) if row.review_id == 5)
+
+    assert service.compact_activities(engine, batch_size=1, dry_run=True)["duplicates"] == 1
+    removed = service.compact_activities(engine, batch_size=1)
+
+    assert removed["duplicates"] == 2
+    # review 7'nin beğenisi yok; NULL hedefli satırlar da karşılıksız
+    assert removed["unliked_reviews"] == 3
+    assert [row.activity_id for row in _rows(engine)] == [newest]
+
+
+def test_dedupe_index_created_after_compaction(service, engine, session_factory):
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_activities_follow"))
+        for _ in range(2):
+            conn.execute(text("INSERT INTO activities (user_id, activity_type, related_user_id) VALUES (1, 'follow', 9)"))
+        conn.execute(text("INSERT INTO follows (follower_id, followee_id) VALUES (1, 9)"))
+
+    assert service.ensure_dedupe_indexes(engine) == ["uq_activities_follow"]  # tekrarlar hâlâ duruyor
+    assert not service._supports_upsert(session_factory(), "follow")
+
+    service.compact_activities(engine)
+    assert service.ensure_dedupe_indexes(engine) == []
+    assert service._supports_upsert(session_factory(), "follow")
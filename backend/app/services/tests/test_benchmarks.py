@@ -0,0 +1,35 @@
+"""
+Endpoint benchmark regression gate.
+
+Runs backend.benchmarks.harness in a subprocess (the harness has to configure
+DATABASE_URL before the app is imported) and fails if any scenario issues more
+SQL statements than backend/benchmarks/baseline.json records (p95 latency too
+with BENCHMARK_GATE_LATENCY=1). Opt-in because it seeds a dataset and takes a
+while:
+
+    RUN_BENCHMARKS=1 pytest backend/app/services/tests/test_benchmarks.py
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+
+pytestmark = pytest.mark.skipif(
+    os.getenv("RUN_BENCHMARKS") != "1",
+    reason="set RUN_BENCHMARKS=1 to run the endpoint benchmarks",
+)
+
+
+def test_no_regressions_against_baseline():
+    result = subprocess.run(
+        [sys.executable, "-m", "backend.benchmarks.harness"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=1800,
+    )
+    assert result.returncode == 0, result.stdout[-4000:] + result.stderr[-2000:]
@@ -0,0 +1,285 @@
+"""
+services/cache.py: backend'ler, namespace'ler, TTL, single-flight ve dekoratör.
+
+Redis backend'i backend/tools/fake_redis.py'ye karşı çalışır; ağ veya gerçek
+bir Redis gerekmez:
+
+    pytest backend/app/services/tests/test_cache.py
+"""
+import contextlib
+import json
+import threading
+import time
+
+import pytest
+
+from backend.app.services import invalidation
+from backend.app.services.cache import (
+    Cache,
+    MemoryBackend,
+    RedisBackend,
+    SqliteBackend,
+    cached,
+)
+from backend.tools.fake_redis import FakeRedisServer
+
+
+@pytest.fixture(scope="module")
+def fake_redis():
+    with FakeRedisServer() as server:
+        yield server
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(max_entries=100)
+    if request.param == "sqlite":
+        return SqliteBackend(str(tmp_path / "cache.sqlite3"), max_entries=100)
+    server = request.getfixturevalue("fake_redis")
+    server.state.data.clear()
+    return RedisBackend(server.url)
+
+
+def test_get_set_delete_and_namespaces(backend):
+    ratings = Cache("ratings", backend, ttl=60)
+    lists = Cache("lists", backend, ttl=60)
+
+    assert ratings.get("item:1") is None
+    ratings.set("item:1", {"avg": 4.5, "count": 2})
+    ratings.set("none", None)
+    lists.set("item:1", [1, 2, 3])
+
+    assert ratings.get("item:1") == {"avg": 4.5, "count": 2}
+    assert ratings.get("none", "default") is None  # None da cache'lenebilir
+    assert lists.get("item:1") == [1, 2, 3]
+
+    ratings.delete("item:1")
+    assert ratings.get("item:1") is None
+    assert lists.get("item:1") == [1, 2, 3]
+
+    lists.clear()
+    assert lists.get("item:1") is None
+    assert ratings.get("none", "default") is None
+
+
+def test_ttl_expires(backend):
+    cache = Cache("ttl", backend, ttl=0.05)
+    cache.set("short", 1)
+    cache.set("forever", 2, ttl=0)
+    assert cache.get("short") == 1
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    assert cache.get("forever") == 2
+
+
+def test_memory_lru_eviction_counts():
+    cache = Cache("lru_test", MemoryBackend(max_entries=2))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # b en az kullanılan
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sqlite_prune_and_persistence(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    backend = SqliteBackend(path, max_entries=3)
+    cache = Cache("disk_test", backend)
+    for index in range(5):
+        cache.set(index, index)
+    backend.prune()
+    assert len(backend) == 3
+    assert cache.stats()["evictions"] == 2
+
+    reopened = Cache("disk_test", SqliteBackend(path, max_entries=3))
+    assert reopened.get(4) == 4
+
+
+def test_get_or_compute_single_flight():
+    cache = Cache("single_flight", MemoryBackend())
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(1)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+    assert cache.get_or_compute("k", compute) == "value"
+    assert len(calls) == 1
+
+
+def test_get_or_compute_does_not_cache_errors():
+    cache = Cache("errors", MemoryBackend())
+
+    def fail():
+        raise RuntimeError("provider down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("k", fail)
+    assert cache.get_or_compute("k", lambda: 42) == 42
+
+
+def test_cached_decorator(backend):
+    calls = []
+
+    @cached(cache=Cache("decorator", backend))
+    def square(value, offset=0):
+        calls.append(value)
+        return value * value + offset
+
+    assert square(3) == 9
+    assert square(3) == 9
+    assert square(3, offset=1) == 10
+    assert calls == [3, 3]
+    square.cache.clear()
+    assert square(3) == 9
+    assert calls == [3, 3, 3]
+
+
+def test_unreachable_redis_degrades_to_miss():
+    with FakeRedisServer() as server:
+        url = server.url
+    cache = Cache("down", RedisBackend(url, timeout=0.2))
+    cache.set("k", 1)
+    assert cache.get("k") is None
+    assert cache.get_or_compute("k", lambda: 2) == 2
+
+
+def test_evict_on_invalidation_message():
+    cache = Cache("bus_test", MemoryBackend())
+    cache.evict_on("item", lambda item_id: f"item:{item_id}")
+    cache.set("item:1", "a")
+    cache.set("item:2", "b")
+    invalidation.dispatch([{"e": "item", "ids": [1]}])
+    assert cache.get("item:1") is None
+    assert cache.get("item:2") == "b"
+
+
+def test_flush_message_clears_namespace():
+    cache = Cache("bus_flush_test", MemoryBackend())
+    cache.evict_on("review", lambda review_id: f"review:{review_id}")
+    cache.set("review:1", "a")
+    cache.set("review:2", "b")
+    invalidation.dispatch([{"e": "review", "all": True}])
+    assert cache.get("review:1") is None
+    assert cache.get("review:2") is None
+
+
+def test_notify_payloads_stay_under_byte_limit():
+    messages = [
+        {"e": "feed", "ids": list(range(5000))},
+        {"e": "session", "ids": [f"user:{i}:1700000000000" for i in range(800)]},
+        {"e": "item", "ids": [1]},
+    ]
+    payloads = invalidation._payloads(messages)
+    assert len(payloads) > 1
+    received = {}
+    for payload in payloads:
+        assert len(payload.encode("utf-8")) <= invalidation.pg_notify.MAX_PAYLOAD_BYTES
+        for message in json.loads(payload):
+            received.setdefault(message["e"], []).extend(message["ids"])
+    assert received == {message["e"]: message["ids"] for message in messages}
+
+
+class _FakeBind:
+    """Connection yerine: begin_nested() savepoint'i taklit eder"""
+
+    def begin_nested(self):
+        return contextlib.nullcontext()
+
+
+def _failing_notify(bind, channel, payload):
+    raise RuntimeError("database down")
+
+
+@pytest.fixture
+def pg_transport(monkeypatch):
+    monkeypatch.setattr(invalidation, "_handlers", {})
+    monkeypatch.setattr(invalidation, "_flush_handlers", {})
+    sent = []
+    monkeypatch.setattr(invalidation.pg_notify, "notify", lambda bind, channel, payload: sent.append(payload))
+    return invalidation.PgNotifyTransport.__new__(invalidation.PgNotifyTransport), sent
+
+
+def test_failed_notify_falls_back_to_flush_message(pg_transport, monkeypatch):
+    transport, sent = pg_transport
+    invalidation.subscribe("feed", lambda ids: None, flush=lambda: None)
+
+    def notify(bind, channel, payload):
+        if '"ids"' in payload:
+            raise RuntimeError("notify queue full")
+        sent.append(payload)
+
+    monkeypatch.setattr(invalidation.pg_notify, "notify", notify)
+    assert transport.send([{"e": "feed", "ids": [1, 2]}], _FakeBind()) == []
+    assert [json.loads(payload) for payload in sent] == [[{"e": "feed", "all": True}]]
+
+
+def test_failed_flush_notify_flushes_locally(pg_transport, monkeypatch):
+    transport, _ = pg_transport
+    invalidation.subscribe("feed", lambda ids: None, flush=lambda: None)
+    monkeypatch.setattr(invalidation.pg_notify, "notify", _failing_notify)
+    assert transport.send([{"e": "feed", "ids": [1]}], _FakeBind()) == [{"e": "feed", "all": True}]
+
+
+def test_failed_notify_without_flush_aborts_commit(pg_transport, monkeypatch):
+    transport, _ = pg_transport
+    # Token iptalleri toptan "flush" edilemez; gönderilemezse commit yapılmamalı
+    invalidation.subscribe("session", lambda ids: None)
+    monkeypatch.setattr(invalidation.pg_notify, "notify", _failing_notify)
+    with pytest.raises(RuntimeError):
+        transport.send([{"e": "session", "ids": ["jti:abc"]}], _FakeBind())
+
+
+class _InstantStop(threading.Event):
+    """Yeniden bağlanma beklemesini atla"""
+
+    def wait(self, timeout=None):
+        return self.is_set()
+
+
+def test_listener_reconnect_flushes_caches(monkeypatch):
+    monkeypatch.setattr(invalidation, "_handlers", {})
+    monkeypatch.setattr(invalidation, "_flush_handlers", {})
+    flushed = []
+    invalidation.subscribe("feed", lambda ids: None, flush=lambda: flushed.append("feed"))
+    invalidation.subscribe("session", lambda ids: None)  # flush'ı yok, dokunulmaz
+
+    listener = invalidation.pg_notify.PgListener(engine=None)
+    listener._stop = _InstantStop()
+    connects = []
+
+    def connect():
+        connects.append(1)
+        if len(connects) == 2:
+            raise OSError("server closed the connection")
+        return object()
+
+    def select(*args):
+        if len(connects) >= 3:  # ikinci başarılı bağlantı: flush'ı gördük, dur
+            listener.stop()
+            return [], [], []
+        raise OSError("connection lost")
+
+    monkeypatch.setattr(listener, "_connect", connect)
+    monkeypatch.setattr(invalidation.pg_notify.select, "select", select)
+    listener.on_reconnect(invalidation.flush_all)
+    listener._run()
+    assert len(connects) == 3
+    assert flushed == ["feed"]  # ilk bağlantıda değil, sadece yeniden bağlanınca
@@ -0,0 +1,125 @@
+"""
+services/feed_events.py: commit'e bağlı feed olaylarının NOTIFY / yerel yayını.
+
+    pytest backend/app/services/tests/test_feed.py
+"""
+import json
+
+import pytest
+
+from backend.app.services import feed_events, pg_notify
+
+
+def _event(activity_id: int, activity_type: str = "review") -> dict:
+    return {
+        "op": "add", "activity_id": activity_id, "user_id": activity_id % 7,
+        "activity_type": activity_type, "related_user_id": None,
+    }
+
+
+def test_notify_batches_split_on_encoded_size():
+    # Uzun activity_type'lar sayıya göre batch'lemede 8000 byte'ı aşardı
+    events = [_event(i, "ş" * 120) for i in range(300)]
+    payloads = pg_notify.json_batches(events)
+    assert len(payloads) > 1
+    received = []
+    for payload in payloads:
+        assert len(payload.encode("utf-8")) <= pg_notify.MAX_PAYLOAD_BYTES
+        received.extend(json.loads(payload))
+    assert received == events
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.savepoints = 0
+
+    def begin_nested(self):
+        connection = self
+
+        class _Savepoint:
+            def __enter__(self):
+                connection.savepoints += 1
+
+            def __exit__(self, *exc):
+                return False
+
+        return _Savepoint()
+
+
+class _FakeSession:
+    def __init__(self, events):
+        self.info = {feed_events._PENDING_KEY: {"objects": [], "events": list(events)}}
+        self.bind = _FakeConnection()
+
+    def flush(self):
+        pass
+
+    def connection(self):
+        return self.bind
+
+
+@pytest.fixture
+def notify_mode(monkeypatch):
+    monkeypatch.setattr(feed_events, "_use_notify", True)
+    published = []
+    monkeypatch.setattr(feed_events.feed_broker, "publish", published.extend)
+    return published
+
+
+def test_notify_runs_in_savepoint_without_local_publish(notify_mode, monkeypatch):
+    sent = []
+    monkeypatch.setattr(pg_notify, "notify", lambda bind, channel, payload: sent.append(payload))
+    session = _FakeSession([_event(1), _event(2)])
+    feed_events._before_commit(session)
+    feed_events._after_commit(session)
+    assert session.bind.savepoints == 1
+    assert [event["activity_id"] for payload in sent for event in json.loads(payload)] == [1, 2]
+    assert notify_mode == []  # olay dinleyiciden gelecek, iki kez yayınlanmasın
+
+
+def test_failed_notify_publishes_locally(notify_mode, monkeypatch):
+    def notify(bind, channel, payload):
+        raise RuntimeError("notify queue full")
+
+    monkeypatch.setattr(pg_notify, "notify", notify)
+    session = _FakeSession([_event(1), _event(2)])
+    feed_events._before_commit(session)  # commit'i iptal etmemeli
+    feed_events._after_commit(session)
+    assert [event["activity_id"] for event in notify_mode] == [1, 2]
+
+
+@pytest.fixture
+def feed_client(asgi_app, tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from backend.app.database import get_db, init_db
+
+    app, client = asgi_app
+    engine = create_engine(f"sqlite:///{tmp_path / 'feed.db'}")
+    init_db(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield client
+    app.dependency_overrides.pop(get_db, None)
+    engine.dispose()
+
+
+def test_public_feed_ignores_stale_tokens(feed_client):
+    from backend.app.services import tokens
+
+    guest = feed_client.request("GET", "/feed/")
+    assert guest.status_code == 200
+    expired = tokens.issue_token(7, ttl=-(tokens.LEEWAY_S + 5))
+    for token in (expired, "not-a-token"):
+        response = feed_client.request("GET", "/feed/", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response.json() == guest.json()
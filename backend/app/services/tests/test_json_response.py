@@ -0,0 +1,65 @@
+"""
+services/json_response.py: trusted_json'un model izdüşümü response_model
+doğrulamasıyla (FastAPI'nin eski yolu) aynı baytları üretmeli.
+
+    pytest backend/app/services/tests/test_json_response.py
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from backend.app import schemas
+from backend.app.services.json_response import FastJSONResponse, trusted_json
+
+
+def _validated(model, content) -> bytes:
+    field = create_model_field("Response_test", model, mode="serialization")
+    return FastJSONResponse(asyncio.run(serialize_response(field=field, response_content=content))).body
+
+
+ITEM_ROW = {
+    "item_id": 3,
+    "title": "Gece Yarısı Kütüphanesi",
+    "description": None,
+    "item_type": "book",
+    "year": 2020,
+    "poster_url": "https://example.com/p.jpg",
+    "external_api_id": "abc",
+    "external_api_source": "google_books",
+    "genres": "Roman",
+    "authors": "Matt Haig",
+    "director": None,
+    "actors": None,
+    "page_count": 288,
+    "created_at": datetime(2024, 5, 1, 12, 30, 15, 123456),
+    # Integer kolon ve Decimal ortalama: response_model ikisini de float yapar
+    "external_rating": 8,
+    "user_rating": Decimal("7.50"),
+    "combined_rating": 7.75,
+    "review_count": 4,
+    "popularity": 4,
+}
+
+
+@pytest.mark.parametrize("row", [
+    ITEM_ROW,
+    {**ITEM_ROW, "created_at": datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)},
+    {**ITEM_ROW, "created_at": datetime(2024, 5, 1, 12, 30, tzinfo=timezone(timedelta(hours=3)))},
+    {**ITEM_ROW, "external_rating": None, "created_at": None, "extra_key": "dropped"},
+    {"title": "Sadece başlık"},
+])
+def test_item_rows_match_response_model(row):
+    assert trusted_json([row], schemas.ItemOut).body == _validated(list[schemas.ItemOut], [row])
+    assert trusted_json(row, schemas.ItemOut).body == _validated(schemas.ItemOut, row)
+
+
+def test_user_row_matches_response_model():
+    row = {
+        "user_id": 1, "username": "merve", "email": "m@example.com", "bio": None, "avatar_url": None,
+        "created_at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    }
+    assert trusted_json(row, schemas.UserOut).body == _validated(schemas.UserOut, row)
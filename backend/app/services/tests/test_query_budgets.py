@@ -0,0 +1,175 @@
+"""
+Per-endpoint SQL statement budgets.
+
+Every route in ROUTE_BUDGETS is requested against two synthetic datasets of
+different sizes. The statement count must be identical on both (O(1) in the
+number of rows returned) and must not exceed the declared budget. A failure
+prints the statement shapes whose counts differ between the two sizes, which
+is where a new N+1 shows up.
+
+Provider calls go to backend/tools/fake_providers.py (started by the
+`app_environment` fixture in conftest.py), so the suite runs offline on SQLite:
+
+    pytest backend/app/services/tests/test_query_budgets.py
+"""
+from collections import Counter
+from typing import NamedTuple
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+
+class Budget(NamedTuple):
+    method: str
+    path: str
+    max_statements: int
+    params: dict = None
+    auth: bool = False
+
+
+# Path placeholders are filled from the dataset by pick_ids()
+ROUTE_BUDGETS = {
+    "feed_guest": Budget("GET", "/feed/", 7),
+    "feed_follower": Budget("GET", "/feed/", 7, auth=True),
+    "featured_top_rated": Budget("GET", "/items/featured/top-rated", 3),
+    "featured_popular": Budget("GET", "/items/featured/popular", 3),
+    "items_search": Budget("GET", "/items/search", 3, params={"q": "Gece"}),
+    "items_list": Budget("GET", "/items/", 3),
+    "items_filter": Budget("GET", "/items/filter", 3, params={"item_type": "book"}),
+    "item_detail": Budget("GET", "/items/{item}", 1),
+    "item_rating": Budget("GET", "/items/{item}/rating", 3),
+    "item_comments": Budget("GET", "/items/{item}/comments", 2),
+    "item_ratings": Budget("GET", "/items/{item}/ratings", 2),
+    "item_likes": Budget("GET", "/likes/item/{item}/likes", 2),
+    "review_likes": Budget("GET", "/likes/review/{review}/likes", 2),
+    "review_comments": Budget("GET", "/likes/review/{review}/comments", 2),
+    "list_items": Budget("GET", "/items/lists/{list}/items", 5, auth=True),
+    "custom_lists": Budget("GET", "/items/custom-lists/{list_owner}", 2),
+    "user_library": Budget("GET", "/items/library/{follower}", 1),
+    "user_detail": Budget("GET", "/users/{follower}", 1),
+    "user_reviews": Budget("GET", "/users/{follower}/reviews", 1),
+    "user_activities": Budget("GET", "/users/{follower}/activities", 1),
+    "following": Budget("GET", "/users/{follower}/following", 1),
+    "followers": Budget("GET", "/users/{follower}/followers", 1),
+    "follow_stats": Budget("GET", "/users/{follower}/follow-stats", 1),
+}
+
+DATASET_SIZES = {
+    "small": {"users": 60, "items": 40, "ratings": 800, "reviews": 200, "review_likes": 600,
+              "item_likes": 300, "comments": 200, "library": 400, "lists": 30, "follows_avg": 8},
+    "large": {"users": 180, "items": 120, "ratings": 3_000, "reviews": 800, "review_likes": 2_400,
+              "item_likes": 1_200, "comments": 800, "library": 1_600, "lists": 90, "follows_avg": 16},
+}
+
+
+class StatementRecorder:
+    def __init__(self, engine):
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+def pick_ids(engine) -> dict:
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        def scalar(sql):
+            return conn.execute(text(sql)).scalar()
+
+        return {
+            "follower": scalar("SELECT follower_id FROM follows GROUP BY follower_id ORDER BY COUNT(*) DESC, follower_id LIMIT 1"),
+            "item": scalar("SELECT item_id FROM ratings GROUP BY item_id ORDER BY COUNT(*) DESC, item_id LIMIT 1"),
+            "review": scalar("SELECT review_id FROM review_likes GROUP BY review_id ORDER BY COUNT(*) DESC, review_id LIMIT 1"),
+            "list": scalar(
+                "SELECT l.list_id FROM lists l JOIN lists_item li ON li.list_id = l.list_id "
+                "WHERE l.privacy_level = 2 GROUP BY l.list_id ORDER BY COUNT(*) DESC, l.list_id LIMIT 1"
+            ),
+            "list_owner": scalar(
+                "SELECT user_id FROM lists WHERE privacy_level = 2 GROUP BY user_id ORDER BY COUNT(*) DESC, user_id LIMIT 1"
+            ),
+        }
+
+
+@pytest.fixture(scope="module")
+def app_client(asgi_app):
+    app, client = asgi_app
+    yield app, client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="module")
+def datasets(tmp_path_factory):
+    from backend.app.database import init_db
+    from backend.app.routes.auth import hash_password
+    from backend.tools.synthetic_data import Generator, Loader
+
+    password_hash = hash_password("password123")
+    built = {}
+    for name, counts in DATASET_SIZES.items():
+        engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp(name) / 'budget.db'}")
+        init_db(bind=engine)
+        loader = Loader(engine)
+        Generator(loader, dict(counts), 7, 365, 1.1, 5_000, password_hash).run()
+        loader.finish()
+        built[name] = (engine, sessionmaker(autocommit=False, autoflush=False, bind=engine),
+                       StatementRecorder(engine), pick_ids(engine))
+    yield built
+    for engine, _, _, _ in built.values():
+        engine.dispose()
+
+
+def _statements_for(app, client, dataset, budget: Budget) -> list:
+    from backend.app.database import get_db
+    from backend.app.services.tokens import issue_token
+
+    engine, session_factory, recorder, ids = dataset
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    path = budget.path.format(**ids)
+    headers = {"Authorization": f"Bearer {issue_token(ids['follower'])}"} if budget.auth else None
+
+    # The first request may trigger lazy writes (poster enrichment etc.); measure the second one
+    for attempt in range(2):
+        recorder.statements.clear()
+        response = client.request(budget.method, path, params=budget.params, headers=headers)
+        assert response.status_code == 200, f"{budget.method} {path} -> {response.status_code} {response.content[:300]!r}"
+    return list(recorder.statements)
+
+
+def _shape_diff(small: list, large: list) -> str:
+    from backend.app.services.sql_instrumentation import statement_shape
+
+    small_shapes = Counter(statement_shape(s) for s in small)
+    large_shapes = Counter(statement_shape(s) for s in large)
+    lines = []
+    for shape in sorted(set(small_shapes) | set(large_shapes)):
+        if small_shapes[shape] != large_shapes[shape] or large_shapes[shape] > 1:
+            lines.append(f"  small={small_shapes[shape]:<4} large={large_shapes[shape]:<4} {shape[:200]}")
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("name", sorted(ROUTE_BUDGETS))
+def test_statement_budget(name, app_client, datasets):
+    app, client = app_client
+    budget = ROUTE_BUDGETS[name]
+
+    small = _statements_for(app, client, datasets["small"], budget)
+    large = _statements_for(app, client, datasets["large"], budget)
+
+    assert len(small) == len(large), (
+        f"{name}: statement count grows with data size ({len(small)} -> {len(large)}); "
+        f"repeated / changed statement shapes:\n{_shape_diff(small, large)}"
+    )
+    assert len(large) <= budget.max_statements, (
+        f"{name}: {len(large)} statements, budget is {budget.max_statements}:\n{_shape_diff(small, large)}"
+    )
@@ -0,0 +1,54 @@
+"""
+services/rate_limit.py: kayan pencere ve X-Forwarded-For'dan istemci IP'si.
+
+    pytest backend/app/services/tests/test_rate_limit.py
+"""
+import pytest
+from starlette.requests import Request
+
+from backend.app.services import rate_limit
+
+
+def _request(*forwarded, peer="10.0.0.1"):
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded]
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+def test_memory_window_rejects_over_limit():
+    window = rate_limit.MemoryWindow(limit=2, window=60)
+    assert window.hit("a") == 0 and window.hit("a") == 0
+    assert 0 < window.hit("a") <= 60
+    assert window.hit("b") == 0
+    window.reset("a")
+    assert window.hit("a") == 0
+
+
+def test_forwarded_header_ignored_without_trust_proxy(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_TRUST_PROXY", False)
+    assert rate_limit.client_ip(_request("1.1.1.1")) == "10.0.0.1"
+
+
+@pytest.mark.parametrize("hops,forwarded,expected", [
+    # İstemcinin yazdığı soldaki adres sayılmaz; tek proxy'nin eklediği en sağdaki alınır
+    (1, ("6.6.6.6, 203.0.113.5",), "203.0.113.5"),
+    (1, ("203.0.113.5",), "203.0.113.5"),
+    (2, ("6.6.6.6, 203.0.113.5, 198.51.100.7",), "203.0.113.5"),
+    (2, ("6.6.6.6", "203.0.113.5, 198.51.100.7"), "203.0.113.5"),
+    (3, ("203.0.113.5, 198.51.100.7",), "203.0.113.5"),
+    (1, (" , ",), "10.0.0.1"),
+])
+def test_client_ip_skips_trusted_hops(monkeypatch, hops, forwarded, expected):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_TRUST_PROXY", True)
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_TRUSTED_HOPS", hops)
+    assert rate_limit.client_ip(_request(*forwarded)) == expected
+
+
+def test_login_account_lockout_is_per_address(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_TRUST_PROXY", False)
+    limiter = rate_limit.RateLimiter("login_account_test", "2/900", backend="memory")
+    attacker, owner = _request(peer="198.51.100.9"), _request(peer="203.0.113.5")
+    for _ in range(2):
+        assert limiter.hit(rate_limit.account_ip_key(attacker, "Merve@Example.com ")) == 0
+    assert limiter.hit(rate_limit.account_ip_key(attacker, "merve@example.com")) > 0
+    # Aynı hesap, sahibinin adresinden hâlâ denenebilir
+    assert limiter.hit(rate_limit.account_ip_key(owner, "merve@example.com")) == 0
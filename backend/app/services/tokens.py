@@ -0,0 +1,252 @@
+"""
+Tokens - HMAC (HS256) imzalı, süreli oturum token'ları
+
+Login / register imzalı bir JWT döner; doğrulama imza, süre ve iptal
+listesine bakar, veritabanına gitmez:
+
+    header  {"alg": "HS256", "typ": "JWT", "kid": "<anahtar id>"}
+    claims  {"sub": "<user_id>", "username": ..., "iat", "exp", "jti", "iss": "reaview"}
+
+iat milisaniye hassasiyetindedir (kesirli NumericDate): şifre sıfırlamadan
+aynı saniye içinde yapılan yeni giriş, iptal damgasından sonra sayılır.
+
+Sadece kullanıcı id'sine ihtiyaç duyan (okuma) endpoint'ler
+routes/deps.get_token_claims(_optional) ile claim'lerden yetkilendirilir;
+kullanıcı satırı gereken yerler get_current_user ile aynı token'dan
+kullanıcıyı çözer (auth_cache).
+
+Kapsamlı (scope) token'lar tek bir iş için kısa ömürlü verilir, ör. header
+gönderemeyen EventSource'un URL'ine konan canlı akış token'ı
+(issue_token(..., ttl=60, scope="feed_stream")). decode_token sadece istenen
+scope'u kabul eder: oturum token'ı yerine kullanılamazlar, oturum token'ı da
+onların yerine geçmez.
+
+Anahtar rotasyonu: AUTH_TOKEN_KEYS="k2:yeni-gizli,k1:eski-gizli"; ilk anahtar
+imzalar, diğerleri sadece doğrular. Eski anahtar, AUTH_TOKEN_TTL_S geçtikten
+sonra listeden çıkarılabilir.
+
+İptal: logout token'ın jti'sini, şifre sıfırlama kullanıcının o ana kadar
+verilmiş tüm token'larını iptal eder. İptal aynı transaction'da revoked_tokens
+tablosuna (migration 037) yazılır ve invalidation bus'ın "session" mesajlarıyla
+tüm worker'lara dağıtılır; doğrulama sadece küçük bir cache'e
+(services/cache.py, "revoked_tokens") bakar. Yeniden başlayan ya da mesajdan
+sonra açılan worker'lar süresi dolmamış iptalleri startup'ta
+load_revocations(engine) ile tablodan yükler.
+
+Anahtar tanımlı değilse (geçiş dönemi) uygulama yine başlar: imza anahtarı
+DATABASE_URL'den türetilir ("derived"; tüm worker'larda ve yeniden başlatmada
+aynı) ve her açılışta hata loglanır. AUTH_TOKEN_SECRET sonradan tanımlanınca
+türetilmiş anahtarla imzalanmış oturumlar bir kez düşer. DATABASE_URL da yoksa
+veya AUTH_ALLOW_EPHEMERAL_KEY=1 ise süreç başına rastgele anahtar kullanılır
+(sadece yerel geliştirme: yeniden başlatmada ve worker'lar arasında oturumlar
+geçersiz olur).
+
+Eski "token_<id>_<rastgele>" token'ları imzasızdır; geçiş döneminde
+(AUTH_LEGACY_TOKENS=1, varsayılan) kabul edilir ki yayına geçişte herkes
+çıkış yapmış olmasın. Kullanıcılar yeniden giriş yaptıkça imzalı token alır;
+en geç AUTH_TOKEN_TTL_S sonra AUTH_LEGACY_TOKENS=0 yapılmalıdır.
+
+Ayarlar (env):
+    AUTH_TOKEN_SECRET=...                # tek anahtar (kid "default")
+    AUTH_TOKEN_KEYS=k2:...,k1:...        # rotasyon; tanımlıysa AUTH_TOKEN_SECRET'in yerine geçer
+    AUTH_TOKEN_TTL_S=604800              # 7 gün
+    AUTH_LEGACY_TOKENS=1                 # 0: eski "token_<id>_<rastgele>" token'larını reddet (geçiş bitince)
+    AUTH_ALLOW_EPHEMERAL_KEY=0           # 1: anahtar yoksa DATABASE_URL yerine rastgele anahtar (sadece geliştirme)
+"""
+
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import time
+from typing import NamedTuple, Optional
+
+import jwt
+from sqlalchemy import text
+
+from .cache import CACHE_BACKEND, MemoryBackend, get_cache
+from .invalidation import invalidate, subscribe
+
+logger = logging.getLogger(__name__)
+
+AUTH_TOKEN_TTL_S = int(os.getenv("AUTH_TOKEN_TTL_S", str(7 * 24 * 3600)))
+AUTH_LEGACY_TOKENS = os.getenv("AUTH_LEGACY_TOKENS", "1") == "1"
+AUTH_REVOKED_MAX_ENTRIES = int(os.getenv("AUTH_REVOKED_MAX_ENTRIES", "100000"))
+AUTH_ALLOW_EPHEMERAL_KEY = os.getenv("AUTH_ALLOW_EPHEMERAL_KEY", "0") == "1"
+
+ALGORITHM = "HS256"
+ISSUER = "reaview"
+LEEWAY_S = 30
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class TokenClaims(NamedTuple):
+    user_id: int
+    username: Optional[str]
+    jti: Optional[str]
+    issued_at: float  # saniye, milisaniye hassasiyetinde
+    expires_at: Optional[int]
+    legacy: bool = False
+
+
+def _load_keys() -> dict:
+    keys = {}
+    for entry in os.getenv("AUTH_TOKEN_KEYS", "").split(","):
+        kid, _, secret = entry.strip().partition(":")
+        if kid and secret:
+            keys[kid] = secret
+    if not keys and os.getenv("AUTH_TOKEN_SECRET"):
+        keys["default"] = os.getenv("AUTH_TOKEN_SECRET")
+    if keys:
+        return keys
+    database_url = os.getenv("DATABASE_URL")
+    if database_url and not AUTH_ALLOW_EPHEMERAL_KEY:
+        # Geçiş dönemi: anahtarsız deploy'lar çökmesin, oturumlar worker'lar arasında geçerli kalsın
+        logger.error(
+            "AUTH_TOKEN_SECRET is not set; deriving the token signing key from DATABASE_URL. "
+            "Set AUTH_TOKEN_SECRET (sessions signed with the derived key end once it is set)"
+        )
+        keys["derived"] = hmac.new(database_url.encode(), b"reaview-auth-token-key", hashlib.sha256).hexdigest()
+        return keys
+    logger.warning(
+        "AUTH_TOKEN_SECRET is not set; using a random per-process key "
+        "(tokens will not survive a restart or work across workers)"
+    )
+    keys["ephemeral"] = secrets.token_urlsafe(32)
+    return keys
+
+
+_KEYS = _load_keys()
+_SIGNING_KID = next(iter(_KEYS))
+if AUTH_LEGACY_TOKENS:
+    logger.info("accepting unsigned legacy token_<id>_... tokens; set AUTH_LEGACY_TOKENS=0 once sessions have rotated")
+
+# İptal listesi: bellek backend'inde diğer namespace'lerin LRU baskısıyla silinmesin diye ayrı
+revoked_tokens = get_cache(
+    "revoked_tokens",
+    ttl=AUTH_TOKEN_TTL_S + LEEWAY_S,
+    backend=MemoryBackend(max_entries=AUTH_REVOKED_MAX_ENTRIES) if CACHE_BACKEND == "memory" else None,
+)
+
+
+def issue_token(user_id: int, username: str = None, ttl: int = AUTH_TOKEN_TTL_S, scope: str = None) -> str:
+    now = time.time()
+    claims = {
+        "sub": str(user_id),
+        "username": username,
+        "iat": round(now, 3),
+        "exp": int(now) + ttl,
+        "jti": secrets.token_urlsafe(12),
+        "iss": ISSUER,
+    }
+    if scope:
+        claims["scope"] = scope
+    return jwt.encode(claims, _KEYS[_SIGNING_KID], algorithm=ALGORITHM, headers={"kid": _SIGNING_KID})
+
+
+def _decode_legacy(token: str) -> TokenClaims:
+    parts = token.split("_")
+    if len(parts) < 3 or parts[0] != "token":
+        raise InvalidToken("Geçersiz token formatı")
+    try:
+        user_id = int(parts[1])
+    except ValueError:
+        raise InvalidToken("Geçersiz token formatı")
+    return TokenClaims(user_id, None, None, 0, None, legacy=True)
+
+
+def decode_token(token: str, scope: str = None) -> TokenClaims:
+    """İmzayı, süreyi, scope'u ve iptal listesini doğrula; geçersizse InvalidToken"""
+    if token.startswith("token_"):
+        if scope or not AUTH_LEGACY_TOKENS:
+            raise InvalidToken("Eski token formatı artık kabul edilmiyor, tekrar giriş yapın")
+        return _decode_legacy(token)
+
+    try:
+        kid = jwt.get_unverified_header(token).get("kid", "default")
+        key = _KEYS.get(kid)
+        if key is None:
+            raise InvalidToken("Bilinmeyen token anahtarı")
+        payload = jwt.decode(
+            token, key, algorithms=[ALGORITHM], issuer=ISSUER, leeway=LEEWAY_S,
+            options={"require": ["exp", "iat", "sub", "jti"]},
+        )
+        if payload.get("scope") != scope:
+            raise InvalidToken("Token bu işlem için geçerli değil")
+        claims = TokenClaims(int(payload["sub"]), payload.get("username"), payload["jti"],
+                             float(payload["iat"]), int(payload["exp"]))
+    except jwt.ExpiredSignatureError:
+        raise InvalidToken("Oturum süresi doldu")
+    except (jwt.InvalidTokenError, ValueError):
+        raise InvalidToken("Token geçersiz")
+
+    if revoked_tokens.get(f"jti:{claims.jti}") is not None:
+        raise InvalidToken("Oturum sonlandırıldı")
+    revoked_before = revoked_tokens.get(f"user:{claims.user_id}")
+    if revoked_before is not None and _millis(claims.issued_at) <= _stamp_ms(revoked_before):
+        raise InvalidToken("Oturum sonlandırıldı")
+    return claims
+
+
+# ============ İPTAL ============
+
+def _millis(seconds: float) -> int:
+    return int(round(seconds * 1000))
+
+
+def _stamp_ms(stamp: int) -> int:
+    # Milisaniyeye geçişten önce yazılmış (saniye cinsinden) damgalar
+    return stamp * 1000 if stamp < 10 ** 11 else stamp
+
+
+_INSERT_REVOCATION = text("INSERT INTO revoked_tokens (revocation, expires_at) VALUES (:revocation, :expires_at)")
+_PRUNE_REVOCATIONS = text("DELETE FROM revoked_tokens WHERE expires_at <= :now")
+_LOAD_REVOCATIONS = text("SELECT revocation FROM revoked_tokens WHERE expires_at > :now")
+
+
+def _revoke(db, revocation: str, expires_at: int):
+    # Tablo ve bus mesajı aynı commit'e bağlı: biri olmadan diğeri olmaz
+    db.execute(_INSERT_REVOCATION, {"revocation": revocation, "expires_at": expires_at + LEEWAY_S})
+    invalidate(db, "session", revocation)
+
+
+def revoke_token(db, claims: TokenClaims):
+    """Tek token'ı (logout) commit sonrası tüm worker'larda iptal et"""
+    if claims.jti:
+        _revoke(db, f"jti:{claims.jti}", claims.expires_at)
+
+
+def revoke_user_tokens(db, user_id: int):
+    """Kullanıcının şu ana kadar verilmiş tüm token'larını iptal et (şifre sıfırlama)"""
+    now = time.time()
+    _revoke(db, f"user:{user_id}:{_millis(now)}", int(now) + AUTH_TOKEN_TTL_S)
+
+
+def _apply_revocations(ids):
+    for value in ids:
+        kind, _, rest = value.partition(":")
+        if kind == "jti":
+            revoked_tokens.set(f"jti:{rest}", 1)
+        elif kind == "user":
+            user_id, _, issued_before = rest.rpartition(":")
+            current = revoked_tokens.get(f"user:{user_id}")
+            revoked_tokens.set(f"user:{user_id}", max(_stamp_ms(int(issued_before)), _stamp_ms(current or 0)))
+
+
+def load_revocations(bind) -> int:
+    """Süresi dolmamış iptalleri bu worker'ın listesine yükle, dolmuşları sil (startup'ta)"""
+    now = int(time.time())
+    with bind.begin() as conn:
+        conn.execute(_PRUNE_REVOCATIONS, {"now": now})
+        revocations = [row[0] for row in conn.execute(_LOAD_REVOCATIONS, {"now": now})]
+    _apply_revocations(revocations)
+    return len(revocations)
+
+
+def install_token_revocation():
+    """invalidation bus'taki "session" mesajlarını iptal listesine uygula"""
+    subscribe("session", _apply_revocations)
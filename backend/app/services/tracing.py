@@ -0,0 +1,351 @@
+"""
+Tracing - Request başına span ağacı (root span + DB / harici HTTP child span'leri)
+
+Her HTTP request'i için bir root span açılır; SQLAlchemy'nin her execute'u ve
+provider_get() üzerinden yapılan her harici HTTP çağrısı bu root'un altında
+child span olarak kaydedilir. Örneklenen (sampled) trace'ler arka planda
+batch'ler halinde JSONL dosyasına veya OTLP/HTTP JSON kabul eden bir
+collector'a gönderilir. Aktif trace_id / span_id her log kaydına eklenir.
+
+Ayarlar (env):
+    TRACING_ENABLED=1              # varsayılan kapalı
+    TRACE_SAMPLE_RATE=0.1          # 0.0 - 1.0 arası
+    TRACE_EXPORT_PATH=traces.jsonl # JSONL exporter hedefi
+    TRACE_OTLP_ENDPOINT=http://localhost:4318/v1/traces  # verilirse JSONL yerine kullanılır
+    TRACE_TRUST_PARENT=0           # 1: gelen traceparent'ın sampled bayrağına uy
+
+Gelen traceparent'ın trace_id'si her zaman sürdürülür; örnekleme kararı ise
+varsayılan olarak yerel TRACE_SAMPLE_RATE ile verilir. Aksi halde her istemci
+"-01" göndererek örneklemeyi zorlayıp exporter'ı doldurabilirdi. Sadece
+header'ı kendisi yazan güvenilir bir proxy / gateway arkasında
+TRACE_TRUST_PARENT=1 açın.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "0") == "1"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+TRACE_EXPORT_PATH = os.getenv(
+    "TRACE_EXPORT_PATH",
+    str(Path(__file__).resolve().parent.parent.parent / "traces.jsonl"),
+)
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")
+TRACE_TRUST_PARENT = os.getenv("TRACE_TRUST_PARENT", "0") == "1"
+TRACE_EXPORT_BATCH_SIZE = int(os.getenv("TRACE_EXPORT_BATCH_SIZE", "256"))
+TRACE_EXPORT_INTERVAL = float(os.getenv("TRACE_EXPORT_INTERVAL", "2.0"))
+# Exporter geride kalırsa bellekte tutulacak en fazla span (fazlası düşürülür)
+TRACE_MAX_QUEUE = int(os.getenv("TRACE_MAX_QUEUE", "10000"))
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "reaview-api")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id=None, kind: str = "internal", attributes=None):
+        self.trace_id = trace_id
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.error = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            exporter.enqueue(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            "attributes": self.attributes,
+            "error": self.error,
+            "service": SERVICE_NAME,
+        }
+
+
+def current_span():
+    return _current_span.get()
+
+
+def current_trace_id():
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+def start_child_span(name: str, kind: str = "internal", **attributes):
+    """Aktif span varsa onun altında yeni span aç (yoksa None döner, çağıran no-op geçer)"""
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """
+    Child span context manager'ı. Örneklenmemiş request'lerde hiçbir şey yapmaz.
+        with span("http.get", kind="client", provider="tmdb"):
+            ...
+    """
+    child = start_child_span(name, kind, **attributes)
+    if child is None:
+        yield None
+        return
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+# ============== EXPORTER ==============
+
+class BatchSpanExporter:
+    """Span'leri kuyrukta biriktirir, arka plan thread'i ile batch halinde yazar"""
+
+    def __init__(self):
+        self._queue = deque(maxlen=TRACE_MAX_QUEUE)
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def enqueue(self, finished_span: Span):
+        if len(self._queue) >= TRACE_MAX_QUEUE:
+            self.dropped += 1
+        self._queue.append(finished_span)
+        if len(self._queue) >= TRACE_EXPORT_BATCH_SIZE:
+            self._wakeup.set()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(TRACE_EXPORT_INTERVAL)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        batch = []
+        while self._queue and len(batch) < TRACE_EXPORT_BATCH_SIZE * 4:
+            batch.append(self._queue.popleft())
+        if not batch:
+            return
+        try:
+            if TRACE_OTLP_ENDPOINT:
+                self._export_otlp(batch)
+            else:
+                self._export_jsonl(batch)
+        except Exception as e:
+            logger.warning("Trace export failed (%d spans dropped): %s", len(batch), e)
+
+    def _export_jsonl(self, batch):
+        with open(TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+            for finished_span in batch:
+                f.write(json.dumps(finished_span.to_dict(), default=str) + "\n")
+
+    def _export_otlp(self, batch):
+        import requests
+
+        otlp_kind = {"internal": 1, "server": 2, "client": 3}
+        spans = []
+        for s in batch:
+            spans.append({
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "parentSpanId": s.parent_id or "",
+                "name": s.name,
+                "kind": otlp_kind.get(s.kind, 1),
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [
+                    {"key": key, "value": {"stringValue": str(value)}}
+                    for key, value in s.attributes.items()
+                ],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            })
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": "reaview.tracing"}, "spans": spans}],
+            }]
+        }
+        requests.post(TRACE_OTLP_ENDPOINT, json=payload, timeout=5)
+
+
+exporter = BatchSpanExporter()
+
+
+# ============== SQLALCHEMY ==============
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    child = start_child_span("db.query", kind="client", **{"db.statement": statement[:500]})
+    conn.info.setdefault("_trace_spans", []).append(child)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("_trace_spans")
+    if spans:
+        child = spans.pop()
+        if child is not None:
+            child.set_attribute("db.rowcount", cursor.rowcount)
+            child.end()
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get("_trace_spans") if conn is not None else None
+    if spans:
+        child = spans.pop()
+        if child is not None:
+            child.error = str(exception_context.original_exception)
+            child.end()
+
+
+def instrument_engine(engine):
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+# ============== LOGGING ==============
+
+def _install_log_record_factory():
+    """Her log kaydına trace_id / span_id alanlarını ekle (%(trace_id)s ile kullanılabilir)"""
+    previous_factory = logging.getLogRecordFactory()
+    if getattr(previous_factory, "_adds_trace_ids", False):
+        return
+
+    def factory(*args, **kwargs):
+        record = previous_factory(*args, **kwargs)
+        active = _current_span.get()
+        record.trace_id = active.trace_id if active is not None else "-"
+        record.span_id = active.span_id if active is not None else "-"
+        return record
+
+    factory._adds_trace_ids = True
+    logging.setLogRecordFactory(factory)
+
+
+# ============== ASGI MIDDLEWARE ==============
+
+def _parse_traceparent(headers):
+    """W3C traceparent header'ından (trace_id, parent_span_id, sampled) çıkar"""
+    for key, value in headers:
+        if key == b"traceparent":
+            parts = value.decode("latin-1").split("-")
+            if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16 and len(parts[3]) == 2:
+                try:
+                    sampled = bool(int(parts[3], 16) & 0x01)
+                except ValueError:
+                    return None
+                return parts[1], parts[2], sampled
+    return None
+
+
+class TracingMiddleware:
+    """Her HTTP request'i için root span aç, örnekleme kararını ver"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = _parse_traceparent(scope.get("headers", ()))
+        if incoming is not None:
+            trace_id, parent_id, parent_sampled = incoming
+        else:
+            trace_id, parent_id, parent_sampled = None, None, None
+        if parent_sampled is not None and TRACE_TRUST_PARENT:
+            sampled = parent_sampled
+        else:
+            # Güvenilmeyen istemci örneklemeyi zorlayamaz
+            sampled = random.random() < TRACE_SAMPLE_RATE
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        root = Span(scope["method"], trace_id or _new_trace_id(), parent_id, kind="server")
+        root.set_attribute("http.method", scope["method"])
+        root.set_attribute("http.target", scope.get("path", ""))
+        token = _current_span.set(root)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                headers = list(message.get("headers", []))
+                headers.append((b"x-trace-id", root.trace_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or scope.get("path", "")
+            root.name = f"{scope['method']} {template}"
+            root.set_attribute("http.route", template)
+            _current_span.reset(token)
+            root.end()
+
+
+def install_tracing(app, engine):
+    """Tracing middleware'ini, SQLAlchemy span'lerini ve log trace_id alanlarını etkinleştir"""
+    if not TRACING_ENABLED:
+        return
+    instrument_engine(engine)
+    _install_log_record_factory()
+    app.add_middleware(TracingMiddleware)
+    exporter.start()
@@ -0,0 +1,85 @@
+"""
+In-process ASGI client - uygulamayı HTTP sunucusu olmadan çağırır
+
+Benchmark'lar soket/sunucu maliyetini ölçmesin diye istekler doğrudan ASGI
+app'ine verilir. Tüm istekler tek bir event loop üzerinde çalışır.
+"""
+
+import asyncio
+import json
+from urllib.parse import urlencode
+
+
+class ASGIResponse:
+    __slots__ = ("status_code", "headers", "content")
+
+    def __init__(self, status_code: int, headers: dict, content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ASGIClient:
+    def __init__(self, app):
+        self.app = app
+        self.loop = asyncio.new_event_loop()
+
+    def close(self):
+        self.loop.close()
+
+    def request(self, method: str, path: str, params=None, headers=None, json_body=None) -> ASGIResponse:
+        return self.loop.run_until_complete(self._request(method, path, params, headers, json_body))
+
+    async def _request(self, method, path, params, headers, json_body):
+        body = json.dumps(json_body).encode() if json_body is not None else b""
+        raw_headers = [(key.lower().encode("latin-1"), str(value).encode("latin-1")) for key, value in (headers or {}).items()]
+        if json_body is not None:
+            raw_headers.append((b"content-type", b"application/json"))
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method.upper(),
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode(params or {}, doseq=True).encode(),
+            "root_path": "",
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+
+        request_sent = False
+        disconnect = asyncio.Event()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        status = [500]
+        response_headers = {}
+        chunks = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                for key, value in message.get("headers", []):
+                    response_headers[key.decode("latin-1").lower()] = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            disconnect.set()
+        return ASGIResponse(status[0], response_headers, b"".join(chunks))
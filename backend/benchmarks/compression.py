@@ -0,0 +1,114 @@
+"""
+Compression Benchmark
+
+Benchmark veri setindeki GET senaryolarını (harness.build_scenarios ve daha
+büyük sayfalar) farklı kodlama / seviye ayarlarıyla CompressionMiddleware
+üzerinden çalıştırır; route başına ham ve sıkıştırılmış boyutu, kazanılan
+byte oranını ve cevap başına sıkıştırma CPU süresini raporlar.
+
+Kullanım:
+    python -m backend.benchmarks.compression
+    python -m backend.benchmarks.compression --iterations 20 --configs gzip:1,gzip:6,br:4
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from .harness import BENCH_DATASET, BENCH_SEED, _prepare_environment, build_scenarios, pick_ids
+
+DEFAULT_CONFIGS = "gzip:1,gzip:6,gzip:9,br:4,br:11"
+
+
+def get_scenarios(ids: dict) -> list:
+    """Harness'taki GET senaryoları + büyük sayfa varyantları"""
+    scenarios = [s for s in build_scenarios(ids) if s.make_request(0)[0] == "GET"]
+    extra = (
+        ("feed_guest_50", "/feed/", {"limit": 50}),
+        ("items_list_100", "/items/", {"limit": 100}),
+        ("top_rated_50", "/items/featured/top-rated", {"limit": 50}),
+    )
+    for name, path, params in extra:
+        scenarios.append(type(scenarios[0])(name, lambda i, path=path, params=params: ("GET", path, params, None, None)))
+    return scenarios
+
+
+def parse_configs(value: str, available: tuple) -> list:
+    configs = []
+    for part in value.split(","):
+        encoding, _, level = part.strip().partition(":")
+        if encoding not in available:
+            print(f"[WARNING] {encoding} not available (pip install brotli); skipping {part}")
+            continue
+        configs.append((encoding, int(level)))
+    return configs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure compression ratio and CPU cost per route")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--configs", default=DEFAULT_CONFIGS, help="encoding:level listesi")
+    parser.add_argument("--min-size", type=int, default=None, help="Varsayılan: COMPRESSION_MIN_SIZE")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.TemporaryDirectory(prefix="reaview-compression-bench-")
+    from backend.tools.fake_providers import FakeProviderServer
+
+    providers = FakeProviderServer().start()
+    _prepare_environment(f"sqlite:///{Path(workdir.name) / 'bench.db'}", providers.env())
+    # Uygulamanın kendi middleware'i kapalı; her ayar için ayrı bir instance sarılır
+    os.environ["COMPRESSION_ENABLED"] = "0"
+    os.environ["SQL_INSTRUMENTATION"] = "0"
+
+    from backend.app.database import engine, init_db
+    from backend.app.main import app
+    from backend.app.routes.auth import hash_password
+    from backend.app.services.compression import CompressionMiddleware, available_encodings, compression_stats
+    from backend.tools.synthetic_data import Generator, Loader
+    from .asgi_client import ASGIClient
+
+    init_db()
+    loader = Loader(engine)
+    Generator(loader, dict(BENCH_DATASET), BENCH_SEED, 365, 1.1, 10_000, hash_password("password123")).run()
+    loader.finish()
+
+    scenarios = get_scenarios(pick_ids(engine))
+    configs = parse_configs(args.configs, available_encodings())
+
+    print(f"{'scenario':<20} {'config':<8} {'raw bytes':>10} {'compressed':>11} {'saved':>7} {'cpu ms':>8}")
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    try:
+        for encoding, level in configs:
+            kwargs = {"gzip_level": level} if encoding == "gzip" else {"brotli_quality": level}
+            client = ASGIClient(CompressionMiddleware(app, min_size=args.min_size, encodings=(encoding,), **kwargs))
+            for scenario in scenarios:
+                compression_stats.reset()
+                for i in range(args.iterations):
+                    method, path, params, headers, body = scenario.make_request(i)
+                    headers = {**(headers or {}), "Accept-Encoding": encoding}
+                    with contextlib.redirect_stdout(devnull):
+                        response = client.request(method, path, params=params, headers=headers, json_body=body)
+                    if response.status_code != 200:
+                        raise RuntimeError(f"{scenario.name}: {path} -> {response.status_code}")
+                report = compression_stats.snapshot()
+                if not report:
+                    print(f"{scenario.name:<20} {encoding}:{level:<6} {len(response.content):>10} {'(below min size)':>11}")
+                    continue
+                row = report[0]
+                saved = 1 - row["ratio"] if row["ratio"] is not None else 0
+                print(f"{scenario.name:<20} {encoding}:{level:<{7 - len(encoding)}} {row['avg_bytes_in']:>10} "
+                      f"{row['avg_bytes_out']:>11} {saved * 100:>6.1f}% {row['avg_cpu_ms']:>8.3f}")
+            client.close()
+    finally:
+        devnull.close()
+        providers.stop()
+        engine.dispose()
+        workdir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
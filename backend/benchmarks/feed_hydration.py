@@ -0,0 +1,265 @@
+"""
+Feed Hydration Benchmark
+
+GET /feed/'in eski tek-sorgu yolunu (tüm join'ler ve korele COUNT'lar sayfa
+seçilmeden önce çalışır) iki fazlı yolla (routes.feed: ID sayfası +
+_hydrate_feed) benchmark veri seti üzerinde karşılaştırır. Her sayfa boyutu
+(varsayılan 15, 50, 200) için guest ve follower feed'inde statement sayısını,
+SQLite VM'in çalıştırdığı instruction sayısını (progress handler ile; süreden
+bağımsız, deterministik "DB CPU" ölçüsü) ve istek başına toplam CPU süresini
+raporlar. Ölçümden önce iki yolun aynı satırları ürettiği kontrol edilir.
+
+Kullanım:
+    python -m backend.benchmarks.feed_hydration
+    python -m backend.benchmarks.feed_hydration --limits 15,50,200,500 --repeat 50
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .harness import BENCH_DATASET, BENCH_SEED, _prepare_environment, pick_ids
+
+# routes/feed.py'deki iki fazlı yoldan önceki feed sorgusu (karşılaştırma için birebir)
+LEGACY_FEED_SQL = """
+    SELECT
+        a.activity_id,
+        a.user_id,
+        u.username,
+        u.avatar_url,
+        a.activity_type,
+        a.item_id,
+        CASE
+            WHEN a.review_id IS NOT NULL THEN a.review_id
+            WHEN a.activity_type = 'rating' THEN (
+                SELECT rev.review_id FROM reviews rev
+                WHERE rev.user_id = a.user_id AND rev.item_id = a.item_id
+                ORDER BY rev.created_at DESC LIMIT 1
+            )
+            ELSE a.review_id
+        END AS review_id,
+        a.list_id,
+        a.related_user_id,
+        a.created_at,
+        -- Review/Item details (review veya rating için)
+        CASE
+            WHEN a.activity_type = 'like_review' THEN COALESCE(NULLIF(ri.title, ''), NULLIF(ri.title, 'Unknown'), '')
+            ELSE COALESCE(NULLIF(i.title, ''), NULLIF(i.title, 'Unknown'), '')
+        END AS title,
+        CASE
+            WHEN a.activity_type = 'like_review' THEN COALESCE(ri.item_type, '')
+            ELSE COALESCE(i.item_type, '')
+        END AS item_type,
+        CASE
+            WHEN a.activity_type = 'like_review' THEN NULLIF(ri.poster_url, '')
+            ELSE NULLIF(i.poster_url, '')
+        END AS poster_url,
+        CASE
+            WHEN a.activity_type = 'like_review' THEN COALESCE(ri.year, 0)
+            ELSE COALESCE(i.year, 0)
+        END AS year,
+        CASE
+            WHEN a.activity_type = 'like_review' THEN COALESCE(ri.description, '')
+            ELSE COALESCE(i.description, '')
+        END AS description,
+        -- Review details (review ise)
+        COALESCE(r.review_text, '') AS review_text,
+        COALESCE(r.rating, 0) AS review_rating,
+        -- Rating details (rating ise) - ratings tablosundan direct
+        CASE
+            WHEN a.activity_type = 'rating' THEN COALESCE(rat.score, 0)
+            ELSE 0
+        END AS rating_score,
+        -- Beğeni sayısı (review için)
+        CASE
+            WHEN a.activity_type IN ('review', 'like_review') THEN
+                COALESCE((SELECT COUNT(*) FROM review_likes WHERE review_id = a.review_id), 0)
+            WHEN a.activity_type IN ('rating', 'like_item') THEN
+                COALESCE((SELECT COUNT(*) FROM item_likes WHERE item_id = a.item_id), 0)
+            ELSE 0
+        END AS like_count,
+        -- Yorum sayısı
+        COALESCE((SELECT COUNT(*) FROM review_comments WHERE review_id = a.review_id), 0) AS comment_count,
+        -- Current user'ın beğenip beğenmediği (review için)
+        CASE
+            WHEN a.activity_type IN ('review', 'like_review') THEN
+                COALESCE((SELECT 1 FROM review_likes WHERE review_id = a.review_id AND user_id = :uid LIMIT 1), 0)
+            ELSE 0
+        END AS is_liked_by_user,
+        -- Current user'ın beğenip beğenmediği (item için)
+        CASE
+            WHEN a.activity_type IN ('rating', 'like_item') THEN
+                COALESCE((SELECT 1 FROM item_likes WHERE item_id = a.item_id AND user_id = :uid LIMIT 1), 0)
+            ELSE 0
+        END AS is_item_liked_by_user,
+        -- Yorum yapılan review'un sahibinin username'i (comment_review ve like_review için)
+        COALESCE(ru.username, '') AS review_owner_username,
+        -- Yorum yapılan review'un text'i (comment_review ve like_review için)
+        COALESCE(r.review_text, '') AS referenced_review_text,
+        -- API items'in source_id'si (metadata referansı)
+        COALESCE(r.source_id, '') AS source_id,
+        -- External API info for poster enrichment
+        CASE
+            WHEN a.activity_type = 'like_review' THEN COALESCE(ri.external_api_source, '')
+            ELSE COALESCE(i.external_api_source, '')
+        END AS external_api_source,
+        CASE
+            WHEN a.activity_type = 'like_review' THEN COALESCE(ri.external_api_id, '')
+            ELSE COALESCE(i.external_api_id, '')
+        END AS external_api_id
+    FROM activities a
+    JOIN users u ON u.user_id = a.user_id
+    LEFT JOIN items i ON i.item_id = a.item_id
+    LEFT JOIN reviews r ON r.review_id = a.review_id
+    LEFT JOIN items ri ON ri.item_id = r.item_id
+    LEFT JOIN ratings rat ON rat.user_id = a.user_id AND rat.item_id = a.item_id
+    LEFT JOIN users ru ON ru.user_id = r.user_id
+    WHERE (:guest = 1 OR a.user_id IN (
+        SELECT followee_id FROM follows WHERE follower_id = :uid
+    ))
+    AND a.activity_type IN ('review', 'rating', 'like_review', 'like_item', 'comment_review')
+    ORDER BY a.created_at DESC
+    LIMIT :limit OFFSET :skip;
+"""
+
+
+def legacy_feed(db, user_id: int, guest: bool, limit: int, skip: int = 0) -> list:
+    from sqlalchemy import text
+
+    params = {"uid": user_id, "guest": 1 if guest else 0, "limit": limit, "skip": skip}
+    return [dict(r._mapping) for r in db.execute(text(LEGACY_FEED_SQL), params).fetchall()]
+
+
+def two_phase_feed(db, user_id: int, guest: bool, limit: int, skip: int = 0) -> list:
+    """İki fazlı yol, beğeni toplaması kapalı (eski sorguyla satır satır karşılaştırılabilir)"""
+    from backend.app.routes import feed
+
+    params = {"types": list(feed.FEED_ACTIVITY_TYPES), "limit": limit, "skip": skip}
+    if not guest:
+        params["uid"] = user_id
+    page_query = feed._feed_page_query(not guest)
+    activity_ids = [row[0] for row in db.execute(page_query, params)]
+    return feed._hydrate_feed(db, activity_ids, user_id) if activity_ids else []
+
+
+class DBWork:
+    """Statement sayısı (engine event'i) + SQLite VM instruction sayısı (progress handler)"""
+
+    STEP = 100  # handler her STEP instruction'da bir çağrılır
+
+    def __init__(self, engine, db):
+        from sqlalchemy import event
+
+        self.statements = 0
+        self._ticks = 0
+        event.listen(engine, "after_cursor_execute", self._after)
+        db.connection().connection.driver_connection.set_progress_handler(self._tick, self.STEP)
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+
+    def _tick(self):
+        self._ticks += 1
+        return 0
+
+    @property
+    def vm_ops(self) -> int:
+        return self._ticks * self.STEP
+
+    def reset(self):
+        self.statements = 0
+        self._ticks = 0
+
+
+def check_equivalence(db, user_id: int, guest: bool, limit: int):
+    """
+    Aynı sayfada iki yolun ürettiği satırlar aynı olmalı. Eski sorgu eşit
+    created_at değerlerinde sırayı garanti etmediği (ve bir kullanıcının aynı
+    item için birden fazla rating'i olduğunda satırı çoğalttığı) için
+    karşılaştırma activity_id üzerinden, ortak satırlarda yapılır.
+    """
+    old = {}
+    for row in legacy_feed(db, user_id, guest, limit):
+        old.setdefault(row["activity_id"], row)
+    new = {row["activity_id"]: row for row in two_phase_feed(db, user_id, guest, limit)}
+    mismatches = []
+    for activity_id in old.keys() & new.keys():
+        for key, value in old[activity_id].items():
+            if key == "rating_score":
+                continue  # eski LEFT JOIN ratings birden fazla rating'ten herhangi birini seçebilir
+            if new[activity_id].get(key) != value:
+                mismatches.append((activity_id, key, value, new[activity_id].get(key)))
+    if mismatches:
+        for mismatch in mismatches[:10]:
+            print("[MISMATCH] activity=%s %s: legacy=%r two_phase=%r" % mismatch)
+        raise SystemExit(f"{len(mismatches)} field mismatches (limit={limit}, guest={guest})")
+    return len(old.keys() & new.keys()), len(new)
+
+
+def measure(fn, db, work, user_id: int, guest: bool, limit: int, repeat: int) -> dict:
+    fn(db, user_id, guest, limit)  # warmup
+    cpu = []
+    for _ in range(repeat):
+        work.reset()
+        started = time.thread_time()
+        rows = fn(db, user_id, guest, limit)
+        cpu.append((time.thread_time() - started) * 1000)
+    return {"rows": len(rows), "statements": work.statements, "vm_ops": work.vm_ops,
+            "cpu_ms": statistics.median(cpu)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare single-query and two-phase feed hydration")
+    parser.add_argument("--limits", default="15,50,200", help="Sayfa boyutları")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args(argv)
+    limits = [int(value) for value in args.limits.split(",") if value.strip()]
+
+    workdir = tempfile.TemporaryDirectory(prefix="reaview-feed-bench-")
+    from backend.tools.fake_providers import FakeProviderServer
+
+    providers = FakeProviderServer().start()
+    _prepare_environment(f"sqlite:///{Path(workdir.name) / 'bench.db'}", providers.env())
+
+    from backend.app.database import SessionLocal, engine, init_db
+    from backend.app.routes.auth import hash_password
+    from backend.tools.synthetic_data import Generator, Loader
+
+    init_db()
+    loader = Loader(engine)
+    Generator(loader, dict(BENCH_DATASET), BENCH_SEED, 365, 1.1, 10_000, hash_password("password123")).run()
+    loader.finish()
+
+    follower = pick_ids(engine)["follower"]
+    db = SessionLocal()
+    work = DBWork(engine, db)
+    try:
+        for limit in limits:
+            for guest in (True, False):
+                check_equivalence(db, follower, guest, limit)
+
+        print(f"{'feed':<10} {'limit':>5} {'path':<10} {'rows':>5} {'stmts':>6} {'vm ops':>9} {'cpu ms':>8} {'vm saved':>9}")
+        for limit in limits:
+            for guest in (True, False):
+                name = "guest" if guest else "follower"
+                old = measure(legacy_feed, db, work, follower, guest, limit, args.repeat)
+                new = measure(two_phase_feed, db, work, follower, guest, limit, args.repeat)
+                for path, row in (("legacy", old), ("two_phase", new)):
+                    saved = ""
+                    if path == "two_phase" and old["vm_ops"]:
+                        saved = f"{(1 - new['vm_ops'] / old['vm_ops']) * 100:>8.1f}%"
+                    print(f"{name:<10} {limit:>5} {path:<10} {row['rows']:>5} {row['statements']:>6} "
+                          f"{row['vm_ops']:>9} {row['cpu_ms']:>8.2f} {saved:>9}")
+    finally:
+        db.close()
+        providers.stop()
+        engine.dispose()
+        workdir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
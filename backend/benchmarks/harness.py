@@ -0,0 +1,295 @@
+"""
+Endpoint Benchmark Harness
+
+Uygulamayı process içinde, seed'li sentetik bir veri seti üzerinde ayağa kaldırır
+ve her senaryo için p50/p95/p99 latency ile request başına SQL statement sayısını
+ölçer. Sonuçlar commit'lenmiş baseline.json ile karşılaştırılır; statement
+sayısı artan senaryolarda çıkış kodu 1 olur.
+
+Kullanım:
+    python -m backend.benchmarks.harness
+    python -m backend.benchmarks.harness --only feed_guest,item_detail --iterations 50
+    python -m backend.benchmarks.harness --update-baseline
+    python -m backend.benchmarks.harness --gate-latency     # veya BENCHMARK_GATE_LATENCY=1
+
+Statement sayıları veri seti seed'ine göre deterministiktir ve birebir
+karşılaştırılır. Latency makineye ve yüke bağlıdır: varsayılan olarak p95
+gerilemeleri sadece uyarı olarak yazılır; --gate-latency ile kapıya dahil
+edilir (baseline'ı aynı makinede kaydedin). Limit, baseline p95'inin
+(1 + --latency-tolerance) katı artı --latency-slack-ms'tir; ısınma turları
+(--warmup) ölçüme dahil edilmez.
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# Benchmark veri seti; synthetic_data profilleriyle aynı anahtarlar
+BENCH_DATASET = {
+    "users": 300, "items": 200, "ratings": 6_000, "reviews": 1_500, "review_likes": 4_000,
+    "item_likes": 2_000, "comments": 1_500, "library": 3_000, "lists": 150, "follows_avg": 20,
+}
+BENCH_SEED = 1234
+
+_SERVER_TIMING_QUERIES_RE = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def _prepare_environment(database_url: str, provider_env: dict):
+    """backend.app import edilmeden önce çağrılmalı (engine ve provider URL'leri import anında okunur)"""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["SQL_INSTRUMENTATION"] = "1"
+    os.environ["TRACING_ENABLED"] = "0"
+    os.environ["SLOW_QUERY_LOG"] = "0"
+    # Senaryolar aynı isteği tekrarlar; feed cache açıkken sorgu yolu hiç ölçülmez
+    # (cache hit'lerini ölçmek için FEED_CACHE_ENABLED=1 ile çalıştırın)
+    os.environ.setdefault("FEED_CACHE_ENABLED", "0")
+    # Harici provider çağrıları yerel sahte sunucuya gider; ağa çıkılmaz
+    os.environ.update(provider_env)
+    os.environ["API_KEY"] = "benchmark"
+    os.environ.setdefault("AUTH_TOKEN_SECRET", "benchmark-token-secret-0123456789")
+    os.environ["NO_PROXY"] = os.environ["no_proxy"] = "127.0.0.1,localhost"
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    from backend.app.services.slow_query_log import percentile as nearest_rank
+    return nearest_rank(sorted_values, fraction)
+
+
+class Scenario:
+    """
+    Tek bir endpoint ölçümü. make_request(i) -> (method, path, params, headers, json_body);
+    toggle gibi yazma senaryoları iterasyona göre farklı istek üretebilir.
+    """
+
+    def __init__(self, name: str, make_request, expect=(200,)):
+        self.name = name
+        self.make_request = make_request
+        self.expect = expect
+
+
+def build_scenarios(ids: dict) -> list:
+    from backend.app.services.tokens import issue_token
+
+    auth = {"Authorization": f"Bearer {issue_token(ids['follower'])}"}
+    other_auth = {"Authorization": f"Bearer {issue_token(ids['writer'])}"}
+
+    def get(path, params=None, headers=None):
+        return lambda i: ("GET", path, params, headers, None)
+
+    def follow_toggle(i):
+        if i % 2 == 0:
+            return "POST", f"/users/{ids['follow_target']}/follow", None, other_auth, None
+        return "DELETE", f"/users/{ids['follow_target']}/unfollow", None, other_auth, None
+
+    return [
+        Scenario("feed_guest", get("/feed/")),
+        Scenario("feed_follower", get("/feed/", headers=auth)),
+        Scenario("featured_top_rated", get("/items/featured/top-rated")),
+        Scenario("featured_popular", get("/items/featured/popular")),
+        Scenario("items_search", get("/items/search", {"q": ids["search_term"]})),
+        Scenario("item_detail", get(f"/items/{ids['item']}")),
+        Scenario("review_likes", get(f"/likes/review/{ids['review']}/likes")),
+        Scenario("list_items", get(f"/items/lists/{ids['list']}/items", headers=auth)),
+        Scenario("create_review", lambda i: (
+            "POST", "/reviews/", None, None,
+            {"user_id": ids["writer"], "item_id": ids["item"], "review_text": f"Benchmark yorumu {i}", "rating": 7},
+        )),
+        Scenario("rate_item", lambda i: (
+            "POST", f"/items/{ids['item']}/rate", None, None, {"user_id": ids["writer"], "rating": 1 + i % 10},
+        )),
+        Scenario("like_review_toggle", lambda i: (
+            "POST", f"/likes/review/{ids['review']}/like", None, None, {"user_id": ids["writer"]},
+        )),
+        Scenario("follow_toggle", follow_toggle),
+    ]
+
+
+def pick_ids(engine) -> dict:
+    """Senaryolarda kullanılacak temsilî ID'leri veri setinden seç"""
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        def scalar(sql):
+            return conn.execute(text(sql)).scalar()
+
+        follower = scalar("SELECT follower_id FROM follows GROUP BY follower_id ORDER BY COUNT(*) DESC, follower_id LIMIT 1")
+        writer = scalar(f"SELECT MIN(user_id) FROM users WHERE user_id <> {follower}")
+        follow_target = scalar(
+            f"SELECT MIN(user_id) FROM users WHERE user_id <> {writer} AND user_id NOT IN "
+            f"(SELECT followee_id FROM follows WHERE follower_id = {writer})"
+        )
+        return {
+            "follower": follower,
+            "writer": writer,
+            "follow_target": follow_target,
+            "item": scalar("SELECT item_id FROM ratings GROUP BY item_id ORDER BY COUNT(*) DESC, item_id LIMIT 1"),
+            "review": scalar("SELECT review_id FROM review_likes GROUP BY review_id ORDER BY COUNT(*) DESC, review_id LIMIT 1"),
+            "list": scalar(
+                "SELECT l.list_id FROM lists l JOIN lists_item li ON li.list_id = l.list_id "
+                "WHERE l.privacy_level = 2 GROUP BY l.list_id ORDER BY COUNT(*) DESC, l.list_id LIMIT 1"
+            ),
+            "search_term": "Gece",
+        }
+
+
+def run_scenario(client, scenario: Scenario, iterations: int, warmup: int) -> dict:
+    latencies = []
+    statements = []
+    # Route'lardaki debug print'leri sonuç tablosunu bozmasın (print maliyeti ölçüme dahil kalır)
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    for i in range(warmup + iterations):
+        method, path, params, headers, body = scenario.make_request(i)
+        with contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            response = client.request(method, path, params=params, headers=headers, json_body=body)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        if response.status_code not in scenario.expect:
+            raise RuntimeError(
+                f"{scenario.name}: {method} {path} -> {response.status_code} {response.content[:200]!r}"
+            )
+        if i < warmup:
+            continue
+        latencies.append(elapsed_ms)
+        match = _SERVER_TIMING_QUERIES_RE.search(response.headers.get("server-timing", ""))
+        statements.append(int(match.group(1)) if match else 0)
+    devnull.close()
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "statements": max(statements),
+    }
+
+
+def compare(results: dict, baseline: dict, latency_tolerance: float, latency_slack_ms: float) -> tuple:
+    """Baseline'a göre gerilemeler: ([(senaryo, mesaj)] statement, [(senaryo, mesaj)] latency)"""
+    statements, latency = [], []
+    for name, current in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if current["statements"] > expected["statements"]:
+            statements.append((name, f"statements {expected['statements']} -> {current['statements']}"))
+        limit = expected["p95_ms"] * (1 + latency_tolerance) + latency_slack_ms
+        if current["p95_ms"] > limit:
+            latency.append((name, f"p95 {expected['p95_ms']}ms -> {current['p95_ms']}ms (limit {limit:.2f}ms)"))
+    return statements, latency
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ReaView endpoint benchmarks")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--only", help="Virgülle ayrılmış senaryo isimleri")
+    parser.add_argument("--database-url", help="Varsayılan: geçici bir SQLite dosyası")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--provider-latency-ms", type=float, default=0.0,
+                        help="Sahte provider sunucusuna enjekte edilecek gecikme")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--latency-tolerance", type=float, default=float(os.getenv("BENCH_LATENCY_TOLERANCE", "0.5")),
+                        help="İzin verilen göreli p95 artışı (0.5 = %%50)")
+    parser.add_argument("--latency-slack-ms", type=float, default=5.0,
+                        help="Çok hızlı endpoint'lerde gürültü için mutlak pay")
+    parser.add_argument("--gate-latency", action="store_true", default=os.getenv("BENCHMARK_GATE_LATENCY") == "1",
+                        help="p95 gerilemelerinde de başarısız ol (varsayılan: sadece uyarı)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = None
+    database_url = args.database_url
+    if not database_url:
+        workdir = tempfile.TemporaryDirectory(prefix="reaview-bench-")
+        database_url = f"sqlite:///{Path(workdir.name) / 'bench.db'}"
+    from backend.tools.fake_providers import FakeProviderServer
+
+    providers = FakeProviderServer(latency_ms=args.provider_latency_ms).start()
+    _prepare_environment(database_url, providers.env())
+
+    from backend.app.database import engine, init_db
+    from backend.app.main import app
+    from backend.app.routes.auth import hash_password
+    from backend.tools.synthetic_data import Generator, Loader
+    from .asgi_client import ASGIClient
+
+    # N+1 uyarıları statement sayısında zaten görünüyor; çıktıyı kirletmesin
+    logging.getLogger("backend.app.services.sql_instrumentation").setLevel(logging.ERROR)
+    init_db()
+    loader = Loader(engine)
+    Generator(loader, dict(BENCH_DATASET), BENCH_SEED, 365, 1.1, 10_000, hash_password("password123")).run()
+    loader.finish()
+
+    ids = pick_ids(engine)
+    scenarios = build_scenarios(ids)
+    if args.only:
+        wanted = set(args.only.split(","))
+        scenarios = [s for s in scenarios if s.name in wanted]
+
+    client = ASGIClient(app)
+    results = {}
+    print(f"{'scenario':<22} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'stmts':>7}")
+    try:
+        for scenario in scenarios:
+            result = run_scenario(client, scenario, args.iterations, args.warmup)
+            results[scenario.name] = result
+            print(f"{scenario.name:<22} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                  f"{result['p99_ms']:>9.2f} {result['statements']:>7}")
+    finally:
+        client.close()
+        providers.stop()
+        engine.dispose()
+        if workdir is not None:
+            workdir.cleanup()
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        existing = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+        scenarios_baseline = existing.get("scenarios", {})
+        scenarios_baseline.update(results)
+        payload = {
+            "dataset": {"seed": BENCH_SEED, **BENCH_DATASET},
+            "iterations": args.iterations,
+            "scenarios": scenarios_baseline,
+        }
+        baseline_path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"[OK] Baseline updated: {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"[WARNING] No baseline at {baseline_path}; run with --update-baseline")
+        return 0
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline.get("dataset") != {"seed": BENCH_SEED, **BENCH_DATASET}:
+        print("[WARNING] Baseline was recorded with a different dataset; statement counts may not be comparable")
+    regressions, slower = compare(results, baseline.get("scenarios", {}), args.latency_tolerance, args.latency_slack_ms)
+    if args.gate_latency:
+        regressions += slower
+    else:
+        for name, message in slower:
+            print(f"[WARNING] {name}: {message} (not gated; use --gate-latency)")
+    for name, message in regressions:
+        print(f"[REGRESSION] {name}: {message}")
+    for name, current in results.items():
+        expected = baseline.get("scenarios", {}).get(name)
+        if expected and current["statements"] < expected["statements"]:
+            print(f"[INFO] {name}: statements improved {expected['statements']} -> {current['statements']} "
+                  f"(consider --update-baseline)")
+    if regressions:
+        return 1
+    print("[OK] No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+JSON Encoding Micro-Benchmark
+
+Gerçek endpoint payload'larını (benchmark veri setinden /feed, /items/ ve
+/items/featured/top-rated) eski ve yeni serialize yollarıyla encode eder:
+
+    validate+json     FastAPI'nin eski yolu: response_model doğrulaması (yoksa
+                      jsonable_encoder) + Starlette JSONResponse (json.dumps)
+    validate+orjson   default_response_class=FastJSONResponse: doğrulama aynı,
+                      encode orjson ile
+    trusted_json      services.json_response.trusted_json: doğrulama ve
+                      jsonable_encoder yerine model alanlarına izdüşüm, orjson
+
+Kullanım:
+    python -m backend.benchmarks.json_encoding
+    python -m backend.benchmarks.json_encoding --limit 200 --repeat 200
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+import typing
+from datetime import datetime
+from pathlib import Path
+
+from .harness import BENCH_DATASET, BENCH_SEED, _prepare_environment
+
+
+def _revive_datetimes(rows: list) -> list:
+    """JSON'dan geri okunan created_at string'lerini DB'den gelmiş gibi datetime'a çevir"""
+    for row in rows:
+        value = row.get("created_at")
+        if isinstance(value, str):
+            try:
+                row["created_at"] = datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    return rows
+
+
+def collect_payloads(client, limit: int) -> dict:
+    from backend.app import schemas
+
+    payloads = {}
+    for name, path, params, model in (
+        ("feed", "/feed/", {"limit": limit}, None),
+        ("items_list", "/items/", {"limit": limit}, list[schemas.ItemOut]),
+        ("featured_top_rated", "/items/featured/top-rated", {"limit": min(limit, 50)}, list[schemas.ItemOut]),
+    ):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            response = client.request("GET", path, params=params)
+        assert response.status_code == 200, (path, response.status_code)
+        payloads[name] = (_revive_datetimes(response.json()), model)
+    return payloads
+
+
+def build_encoders(model):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from starlette.responses import JSONResponse
+    from backend.app.services.json_response import FastJSONResponse, trusted_json
+
+    loop = asyncio.new_event_loop()
+    field = create_model_field("Response_benchmark", model, mode="serialization") if model is not None else None
+    row_model = typing.get_args(model)[0] if typing.get_origin(model) is list else model
+
+    def validate(content):
+        if field is None:
+            return jsonable_encoder(content)
+        return loop.run_until_complete(serialize_response(field=field, response_content=content))
+
+    return loop, {
+        "validate+json": lambda content: JSONResponse(validate(content)).body,
+        "validate+orjson": lambda content: FastJSONResponse(validate(content)).body,
+        "trusted_json": lambda content: trusted_json(content, row_model).body,
+    }
+
+
+def time_encoder(encode, content, repeat: int) -> list:
+    encode(content)  # warmup
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encode(content)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare JSON response encoders on real payloads")
+    parser.add_argument("--limit", type=int, default=100, help="Payload başına satır sayısı")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.TemporaryDirectory(prefix="reaview-json-bench-")
+    from backend.tools.fake_providers import FakeProviderServer
+
+    providers = FakeProviderServer().start()
+    _prepare_environment(f"sqlite:///{Path(workdir.name) / 'bench.db'}", providers.env())
+    os.environ["SQL_INSTRUMENTATION"] = "0"
+
+    from backend.app.database import engine, init_db
+    from backend.app.main import app
+    from backend.app.routes.auth import hash_password
+    from backend.tools.synthetic_data import Generator, Loader
+    from .asgi_client import ASGIClient
+
+    init_db()
+    loader = Loader(engine)
+    Generator(loader, dict(BENCH_DATASET), BENCH_SEED, 365, 1.1, 10_000, hash_password("password123")).run()
+    loader.finish()
+
+    client = ASGIClient(app)
+    try:
+        payloads = collect_payloads(client, args.limit)
+    finally:
+        client.close()
+        providers.stop()
+        engine.dispose()
+        workdir.cleanup()
+
+    print(f"{'payload':<20} {'rows':>5} {'bytes':>8} {'encoder':<16} {'median ms':>10} {'p95 ms':>8} {'speedup':>8}")
+    for name, (content, model) in payloads.items():
+        loop, encoders = build_encoders(model)
+        reference = None
+        try:
+            for encoder_name, encode in encoders.items():
+                timings = sorted(time_encoder(encode, content, args.repeat))
+                median = statistics.median(timings)
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                reference = reference or median
+                size = len(encode(content))
+                print(f"{name:<20} {len(content):>5} {size:>8} {encoder_name:<16} {median:>10.3f} {p95:>8.3f} "
+                      f"{reference / median:>7.1f}x")
+        finally:
+            loop.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+-- Migration: Indexes for hot lookup predicates
+-- Description: Cover the WHERE / ORDER BY columns used by the most frequent
+-- route queries so they stop falling back to sequential scans.
+
+-- Item detail: reviews by item (calculate_hybrid_rating, comments) and by API source
+CREATE INDEX IF NOT EXISTS idx_reviews_item_created ON reviews(item_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_reviews_source_created ON reviews(source_id, created_at DESC);
+
+-- Feed: latest review of a user for an item (rating activities)
+CREATE INDEX IF NOT EXISTS idx_reviews_user_item_created ON reviews(user_id, item_id, created_at DESC);
+
+-- Ratings: per-item aggregates and "did this user rate this item" lookups
+CREATE INDEX IF NOT EXISTS idx_ratings_item_user ON ratings(item_id, user_id);
+
+-- API items are resolved by (source, id) and sometimes by id alone
+CREATE INDEX IF NOT EXISTS idx_items_external_source_id ON items(external_api_source, external_api_id);
+CREATE INDEX IF NOT EXISTS idx_items_external_id ON items(external_api_id);
+
+-- Lists: items of a list in display order, lists of a user newest first
+CREATE INDEX IF NOT EXISTS idx_lists_item_list_position ON lists_item(list_id, position);
+CREATE INDEX IF NOT EXISTS idx_lists_user_created ON lists(user_id, created_at DESC);
+
+-- Review comments newest first
+CREATE INDEX IF NOT EXISTS idx_review_comments_review_created ON review_comments(review_id, created_at DESC);
+
+-- Library: one entry per (user, item)
+CREATE INDEX IF NOT EXISTS idx_user_library_user_item ON user_library(user_id, item_id);
+
+-- Case-insensitive e-mail lookups (forgot_password / reset_password)
+CREATE INDEX IF NOT EXISTS idx_users_email_lower ON users(lower(email));
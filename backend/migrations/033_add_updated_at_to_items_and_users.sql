@@ -0,0 +1,15 @@
+-- Migration: updated_at columns for conditional GET
+-- Description: Items and users get an updated_at timestamp that the ORM bumps on
+-- every update (onupdate=func.now()). Item / profile responses send it as
+-- Last-Modified next to their ETag. Existing rows start at the time the
+-- migration first runs (init_db re-applies every migration on startup, so
+-- there is deliberately no backfill UPDATE here).
+
+ALTER TABLE items ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE items ALTER COLUMN updated_at SET NOT NULL;
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE users ALTER COLUMN updated_at SET NOT NULL;
+
+-- List item pages validate against MAX(items.updated_at) of the listed items
+CREATE INDEX IF NOT EXISTS idx_lists_item_list_item ON lists_item(list_id, item_id);
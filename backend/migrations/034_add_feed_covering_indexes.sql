@@ -0,0 +1,20 @@
+-- Migration: Covering indexes for the two-phase feed
+-- Description: Phase 1 of GET /feed/ only reads (user_id, created_at,
+-- activity_id, activity_type) to pick the page; these indexes let it run as an
+-- index-only scan. Phase 2 counter lookups read (target_id, user_id) pairs.
+
+-- Guest feed: newest activities of any user
+CREATE INDEX IF NOT EXISTS idx_activities_created_id_type ON activities(created_at DESC, activity_id DESC, activity_type);
+
+-- Follower feed: newest activities of the followed users
+CREATE INDEX IF NOT EXISTS idx_activities_user_created_id_type ON activities(user_id, created_at DESC, activity_id DESC, activity_type);
+
+-- Follower feed: followees of a user without touching the heap
+CREATE INDEX IF NOT EXISTS idx_follows_follower_followee ON follows(follower_id, followee_id);
+
+-- Feed counters: like totals + "liked by current user" per review / item
+CREATE INDEX IF NOT EXISTS idx_review_likes_review_user ON review_likes(review_id, user_id);
+CREATE INDEX IF NOT EXISTS idx_item_likes_item_user ON item_likes(item_id, user_id);
+
+-- Feed: latest rating of a user for an item (rating activities)
+CREATE INDEX IF NOT EXISTS idx_ratings_user_item_id ON ratings(user_id, item_id, rating_id DESC);
@@ -0,0 +1,18 @@
+-- Migration: Archive table for activity retention
+-- Description: Activities older than ACTIVITY_RETENTION_MONTHS are moved here
+-- (ACTIVITY_RETENTION_MODE=archive) by services/activity_partitions.py. No
+-- foreign keys on purpose: archived rows outlive deleted users / reviews.
+
+CREATE TABLE IF NOT EXISTS activities_archive (
+    activity_id INTEGER PRIMARY KEY,
+    activity_type VARCHAR(50) NOT NULL,
+    user_id INTEGER NOT NULL,
+    item_id INTEGER,
+    review_id INTEGER,
+    list_id INTEGER,
+    related_user_id INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_activities_archive_user_created ON activities_archive(user_id, created_at DESC);
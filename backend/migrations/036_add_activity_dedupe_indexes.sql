@@ -0,0 +1,16 @@
+-- Migration: One activity row per (actor, type, target) for deduplicated types
+-- Description: record_activity() upserts like_review / like_item / rating /
+-- follow activities with INSERT ... ON CONFLICT against these partial unique
+-- indexes, so concurrent likes / follows can no longer insert duplicates.
+-- init_db re-runs this file on every start, so it only creates the indexes.
+-- On a table that still holds duplicates the CREATE fails (record_activity then
+-- uses advisory-lock inserts for that type); remove them once with
+-- `python -m backend.tools.compact_activities`, which also creates the indexes.
+-- A table converted to monthly partitions (services/activity_partitions.py) cannot carry
+-- them (a unique index there must include created_at); record_activity falls
+-- back to an advisory lock per key in that case.
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_activities_like_review ON activities(user_id, review_id) WHERE activity_type = 'like_review';
+CREATE UNIQUE INDEX IF NOT EXISTS uq_activities_like_item ON activities(user_id, item_id) WHERE activity_type = 'like_item';
+CREATE UNIQUE INDEX IF NOT EXISTS uq_activities_rating ON activities(user_id, item_id) WHERE activity_type = 'rating';
+CREATE UNIQUE INDEX IF NOT EXISTS uq_activities_follow ON activities(user_id, related_user_id) WHERE activity_type = 'follow';
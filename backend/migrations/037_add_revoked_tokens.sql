@@ -0,0 +1,13 @@
+-- Migration: Persisted session token revocations
+-- Description: Logout (jti:<jti>) and password-reset (user:<id>:<ms>) revocations
+-- written by services/tokens.py in the same transaction as the request. Every
+-- worker loads the unexpired rows at startup, so revocations survive restarts
+-- and reach workers that start after the invalidation bus message went out.
+-- expires_at is epoch seconds; expired rows are pruned on startup.
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    revocation VARCHAR(200) PRIMARY KEY,
+    expires_at BIGINT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires ON revoked_tokens(expires_at);
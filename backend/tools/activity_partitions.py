@@ -0,0 +1,71 @@
+"""
+Activity Partitions CLI - activities tablosunun aylık partition'ları ve
+retention'ı. Mantık services/activity_partitions.py'de; ensure + retention'ı
+uygulama içinde ACTIVITY_PARTITIONING=1 ile günlük bir arka plan thread'i yapar.
+
+Kullanım:
+    python -m backend.tools.activity_partitions status
+    python -m backend.tools.activity_partitions convert --batch-size 10000
+    python -m backend.tools.activity_partitions ensure --months-ahead 6
+    python -m backend.tools.activity_partitions retention --months 12 --mode jsonl
+    DATABASE_URL=sqlite:///./bench.db python -m backend.tools.activity_partitions retention --months 6
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from sqlalchemy import create_engine
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Monthly partitioning and retention for the activities table")
+    parser.add_argument("--database-url", help="Varsayılan: backend.app.database engine'i (DATABASE_URL)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="Partition'ları ve satır sayılarını göster")
+
+    convert = commands.add_parser("convert", help="activities'i online olarak partitioned tabloya dönüştür (PostgreSQL)")
+    convert.add_argument("--batch-size", type=int, default=None, help="Varsayılan: ACTIVITY_PARTITION_BATCH_SIZE")
+    convert.add_argument("--months-ahead", type=int, default=None, help="Varsayılan: ACTIVITY_PARTITION_MONTHS_AHEAD")
+
+    ensure = commands.add_parser("ensure", help="Gelecek aylar için partition yarat")
+    ensure.add_argument("--months-ahead", type=int, default=None, help="Varsayılan: ACTIVITY_PARTITION_MONTHS_AHEAD")
+
+    retention = commands.add_parser("retention", help="Eski aktiviteleri arşivle ve sil")
+    retention.add_argument("--months", type=int, default=None, help="Varsayılan: ACTIVITY_RETENTION_MONTHS")
+    retention.add_argument("--mode", choices=("archive", "jsonl"), default=None, help="Varsayılan: ACTIVITY_RETENTION_MODE")
+    retention.add_argument("--batch-size", type=int, default=None, help="Varsayılan: ACTIVITY_PARTITION_BATCH_SIZE")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        from backend.app.database import engine
+    from backend.app.services import activity_partitions
+
+    started = time.perf_counter()
+    if args.command == "status":
+        print(json.dumps(activity_partitions.partition_status(engine), indent=2))
+        return 0
+    if args.command == "convert":
+        activity_partitions.convert_to_partitioned(engine, args.batch_size, args.months_ahead)
+    elif args.command == "ensure":
+        created = activity_partitions.ensure_partitions(engine, args.months_ahead)
+        print(f"[OK] created {len(created)} partitions: {', '.join(created) or '-'}")
+    elif args.command == "retention":
+        if (args.months if args.months is not None else activity_partitions.ACTIVITY_RETENTION_MONTHS) <= 0:
+            print("[WARNING] retention disabled (--months or ACTIVITY_RETENTION_MONTHS must be > 0)")
+            return 1
+        report = activity_partitions.apply_retention(engine, args.months, args.mode, args.batch_size)
+        print(f"[OK] moved {report['moved']:,} activities before {report['cutoff']} -> {report['mode']}")
+    print(f"[OK] done in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
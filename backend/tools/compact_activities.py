@@ -0,0 +1,60 @@
+"""
+Activity Compactor CLI - activities tablosundaki tekrarları ve karşılığı
+kalmamış satırları (beğenisi kaldırılmış like_*, bırakılmış follow, silinmiş
+rating) batch'ler halinde temizler, ardından migration 036'nın unique
+index'lerini (tekrarlar yüzünden yaratılamamışsa) yaratır; çalışan worker'lar
+index'leri yeniden başlatılınca kullanır. Mantık services/activity_service.py'de;
+aynı işi uygulama içinde ACTIVITY_COMPACTOR_INTERVAL_S ile arka plan thread'i
+veya POST /admin/activities/compact yapar.
+
+Kullanım:
+    python -m backend.tools.compact_activities --dry-run
+    python -m backend.tools.compact_activities --batch-size 5000
+    DATABASE_URL=sqlite:///./bench.db python -m backend.tools.compact_activities
+"""
+
+import argparse
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Remove duplicate and orphaned activity rows in batches")
+    parser.add_argument("--database-url", help="Varsayılan: backend.app.database engine'i (DATABASE_URL)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Varsayılan: ACTIVITY_COMPACTOR_BATCH_SIZE")
+    parser.add_argument("--max-batches", type=int, default=None, help="Kural başına en fazla batch")
+    parser.add_argument("--dry-run", action="store_true", help="Silmeden sadece say (kural başına bir batch)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        from backend.app.database import engine
+    from backend.app.services.activity_service import compact_activities, ensure_dedupe_indexes
+
+    with engine.connect() as conn:
+        before = conn.execute(text("SELECT COUNT(*) FROM activities")).scalar()
+    started = time.perf_counter()
+    removed = compact_activities(engine, args.batch_size, args.max_batches, dry_run=args.dry_run)
+    elapsed = time.perf_counter() - started
+    for rule, count in removed.items():
+        print(f"  {rule:<16} {count:>10,}")
+    verb = "would remove" if args.dry_run else "removed"
+    print(f"[OK] {verb} {sum(removed.values()):,} of {before:,} activities in {elapsed:.1f}s")
+    if args.dry_run:
+        return 0
+    failed = ensure_dedupe_indexes(engine)
+    if failed:
+        print(f"[WARNING] could not create {', '.join(failed)} (duplicates left? run again)")
+        return 1
+    print("[OK] dedupe indexes in place")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""
+Fake Providers - TMDB, Google Books ve OpenLibrary için yerel sahte sunucu
+
+external_api.py'nin çağırdığı endpoint'leri fixtures/fake_providers.json'daki
+verilerle cevaplar; böylece benchmark'lar ve dayanıklılık testleri ağ ve API
+anahtarı olmadan çalışır. Gecikme, hata oranı ve rate-limit enjekte edilebilir.
+
+Sunulan yollar:
+    /tmdb/3/search/movie             /tmdb/3/movie/popular
+    /tmdb/3/movie/{id}               /tmdb/3/movie/{id}/credits
+    /tmdb/3/movie/{id}/reviews
+    /books/v1/volumes?q=...          /books/v1/volumes/{id}
+    /openlibrary/search.json?q=...
+    GET /__stats, POST /__control    (sayaçlar / çalışma anında ayar değiştirme)
+
+Kullanım:
+    python -m backend.tools.fake_providers --port 8765 --latency-ms 80 --error-rate 0.05 --rate-limit 20
+    # çıktıdaki export satırlarını uygulamayı başlatmadan önce çalıştırın
+
+    with FakeProviderServer(latency_ms=50) as server:
+        os.environ.update(server.env())
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+FIXTURE_PATH = Path(__file__).resolve().parent / "fixtures" / "fake_providers.json"
+
+PROVIDER_PREFIXES = (
+    ("/tmdb/3", "tmdb"),
+    ("/books/v1/volumes", "google_books"),
+    ("/openlibrary", "openlibrary"),
+)
+
+
+class FaultConfig:
+    """Provider başına enjekte edilen gecikme / hata / rate-limit ayarları"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        # Saniye başına izin verilen istek (0 = sınırsız); aşılırsa 429 + Retry-After
+        self.rate_limit = rate_limit
+
+    def update(self, values: dict):
+        for key in ("latency_ms", "jitter_ms", "error_rate", "rate_limit"):
+            if key in values:
+                setattr(self, key, type(getattr(self, key))(values[key]))
+
+    def to_dict(self) -> dict:
+        return {
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "error_rate": self.error_rate,
+            "rate_limit": self.rate_limit,
+        }
+
+
+def _matches(query: str, *fields) -> bool:
+    query = (query or "").strip().lower()
+    if not query:
+        return True
+    return any(query in (field or "").lower() for field in fields)
+
+
+class FakeProviderState:
+    def __init__(self, fixtures: dict, faults: dict, seed: int = 0):
+        self.fixtures = fixtures
+        self.faults = faults
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.injected = Counter()
+        self._windows = {provider: deque() for provider in faults}
+        self.movies = {movie["id"]: movie for movie in fixtures["tmdb"]["movies"]}
+        self.volumes = {volume["id"]: volume for volume in fixtures["google_books"]["volumes"]}
+
+    def admit(self, provider: str):
+        """
+        Enjekte edilecek hatayı belirle: None (normal cevap), (429, retry_after) veya (500, None).
+        Gecikme çağıran thread'de uygulanır.
+        """
+        config = self.faults[provider]
+        with self.lock:
+            self.requests[provider] += 1
+            if config.rate_limit:
+                now = time.monotonic()
+                window = self._windows[provider]
+                while window and now - window[0] >= 1.0:
+                    window.popleft()
+                if len(window) >= config.rate_limit:
+                    self.injected[f"{provider}:429"] += 1
+                    return 429, max(1, int(1.0 - (now - window[0]) + 0.999))
+                window.append(now)
+            if config.error_rate and self.rng.random() < config.error_rate:
+                self.injected[f"{provider}:500"] += 1
+                return 500, None
+            delay = config.latency_ms + (self.rng.uniform(0, config.jitter_ms) if config.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+        return None
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "injected": dict(self.injected),
+                "faults": {provider: config.to_dict() for provider, config in self.faults.items()},
+            }
+
+    # ---------- TMDB ----------
+
+    def _tmdb_summary(self, movie: dict) -> dict:
+        return {key: movie[key] for key in ("id", "title", "overview", "release_date", "vote_average", "poster_path")}
+
+    def tmdb(self, path: str, params: dict):
+        movies = self.fixtures["tmdb"]["movies"]
+        if path == "/search/movie":
+            query = params.get("query", "")
+            results = [self._tmdb_summary(m) for m in movies if _matches(query, m["title"], m["overview"])]
+            return 200, {"page": 1, "results": results, "total_results": len(results), "total_pages": 1}
+        if path == "/movie/popular":
+            results = [self._tmdb_summary(m) for m in sorted(movies, key=lambda m: -m["vote_average"])]
+            return 200, {"page": 1, "results": results, "total_results": len(results), "total_pages": 1}
+
+        match = re.fullmatch(r"/movie/(\d+)(/credits|/reviews)?", path)
+        if not match:
+            return 404, {"status_code": 34, "status_message": "The resource you requested could not be found."}
+        movie = self.movies.get(int(match.group(1)))
+        if movie is None:
+            return 404, {"status_code": 34, "status_message": "The resource you requested could not be found."}
+        if match.group(2) == "/credits":
+            return 200, {"id": movie["id"], **movie["credits"]}
+        if match.group(2) == "/reviews":
+            reviews = self.fixtures["tmdb"]["reviews"].get(str(movie["id"]), [])
+            return 200, {"id": movie["id"], "page": 1, "results": reviews, "total_results": len(reviews)}
+        details = {key: value for key, value in movie.items() if key != "credits"}
+        return 200, details
+
+    # ---------- Google Books ----------
+
+    def google_books(self, path: str, params: dict):
+        if path in ("", "/"):
+            query = params.get("q", "")
+            max_results = int(params.get("maxResults", 10))
+            volumes = [
+                v for v in self.fixtures["google_books"]["volumes"]
+                if _matches(query, v["volumeInfo"]["title"], " ".join(v["volumeInfo"].get("authors", [])))
+            ][:max_results]
+            return 200, {"kind": "books#volumes", "totalItems": len(volumes), "items": volumes}
+        volume = self.volumes.get(path.strip("/"))
+        if volume is None:
+            return 404, {"error": {"code": 404, "message": "The volume ID could not be found."}}
+        return 200, {"kind": "books#volume", **volume}
+
+    # ---------- OpenLibrary ----------
+
+    def openlibrary(self, path: str, params: dict):
+        if path != "/search.json":
+            return 404, {"error": "notfound"}
+        query = params.get("q", "")
+        docs = [
+            d for d in self.fixtures["openlibrary"]["docs"]
+            if _matches(query, d["title"], " ".join(d.get("author_name", [])))
+        ]
+        return 200, {"numFound": len(docs), "start": 0, "docs": docs}
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    server_version = "FakeProviders/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self) -> FakeProviderState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == "/__stats":
+            self._send_json(200, self.state.stats())
+            return
+
+        for prefix, provider in PROVIDER_PREFIXES:
+            if url.path == prefix or url.path.startswith(prefix + "/"):
+                fault = self.state.admit(provider)
+                if fault is not None:
+                    status, retry_after = fault
+                    headers = {"Retry-After": str(retry_after)} if retry_after else None
+                    self._send_json(status, {"error": "injected fault", "provider": provider}, headers)
+                    return
+                status, payload = getattr(self.state, provider)(url.path[len(prefix):], params)
+                self._send_json(status, payload)
+                return
+        self._send_json(404, {"error": "unknown path"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/__control":
+            self._send_json(404, {"error": "unknown path"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        values = json.loads(self.rfile.read(length) or b"{}")
+        # {"tmdb": {"latency_ms": 200}} veya tüm provider'lar için {"error_rate": 0.1}
+        for provider, config in self.state.faults.items():
+            config.update(values.get(provider, values))
+        self._send_json(200, self.state.stats())
+
+
+class FakeProviderServer:
+    """Arka plan thread'inde çalışan sahte provider sunucusu"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: int = 0, seed: int = 0, fixture_path=FIXTURE_PATH,
+                 verbose: bool = False):
+        fixtures = json.loads(Path(fixture_path).read_text(encoding="utf-8"))
+        faults = {provider: FaultConfig(latency_ms, jitter_ms, error_rate, rate_limit)
+                  for _, provider in PROVIDER_PREFIXES}
+        self.httpd = ThreadingHTTPServer((host, port), FakeProviderHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = FakeProviderState(fixtures, faults, seed)
+        self.httpd.verbose = verbose
+        self._thread = None
+
+    @property
+    def state(self) -> FakeProviderState:
+        return self.httpd.state
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict:
+        """external_api.py'nin okuduğu base URL env değişkenleri"""
+        return {
+            "TMDB_BASE_URL": f"{self.base_url}/tmdb/3",
+            "GOOGLE_BOOKS_URL": f"{self.base_url}/books/v1/volumes",
+            "OPEN_LIBRARY_URL": f"{self.base_url}/openlibrary/search.json",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-providers", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake TMDB / Google Books / OpenLibrary server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="0.0 - 1.0 arası, 500 dönen istek oranı")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Provider başına saniyede izin verilen istek (0 = sınırsız)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    server = FakeProviderServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate,
+                                args.rate_limit, args.seed, verbose=args.verbose)
+    for key, value in server.env().items():
+        print(f"export {key}={value}")
+    print(f"[OK] Fake providers listening on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
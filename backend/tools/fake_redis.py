@@ -0,0 +1,238 @@
+"""
+Fake Redis - services/cache.py'nin RedisBackend'i için yerel sahte RESP sunucusu
+
+Gerçek bir Redis kurmadan cache testlerinin ve benchmark'ların çalışması için
+RESP2 protokolünün küçük bir alt kümesini bellekte cevaplar:
+
+    PING  AUTH  SELECT  GET  SET key value [EX s | PX ms] [NX]  DEL  EXISTS
+    INCR  DECR  PEXPIRE  PTTL  SCAN cursor [MATCH pattern] [COUNT n]  FLUSHDB  DBSIZE
+
+Gecikme enjekte edilebilir; bağlantılar kapatılarak ağ hatası denenebilir.
+
+Kullanım:
+    python -m backend.tools.fake_redis --port 6390
+    # CACHE_BACKEND=redis CACHE_REDIS_URL=redis://127.0.0.1:6390/0
+
+    with FakeRedisServer() as server:
+        backend = RedisBackend(server.url)
+"""
+
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class FakeRedisState:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.lock = threading.Lock()
+        self.data = {}  # key(bytes) -> (value(bytes), expires_at | None)
+        self.commands = 0
+
+    def _alive(self, key: bytes):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def execute(self, args: list):
+        command = args[0].upper().decode()
+        with self.lock:
+            self.commands += 1
+            handler = getattr(self, f"_cmd_{command.lower()}", None)
+            if handler is None:
+                return ValueError(f"ERR unknown command '{command}'")
+            try:
+                return handler(*args[1:])
+            except TypeError:
+                return ValueError(f"ERR wrong number of arguments for '{command.lower()}' command")
+
+    def _cmd_ping(self, *args):
+        return args[0] if args else "PONG"
+
+    def _cmd_auth(self, *args):
+        return "OK"
+
+    def _cmd_select(self, db):
+        return "OK"
+
+    def _cmd_get(self, key):
+        entry = self._alive(key)
+        return entry[0] if entry else None
+
+    def _cmd_set(self, key, value, *options):
+        expires = None
+        options = [option.upper() for option in options]
+        if b"EX" in options:
+            expires = time.monotonic() + int(options[options.index(b"EX") + 1])
+        elif b"PX" in options:
+            expires = time.monotonic() + int(options[options.index(b"PX") + 1]) / 1000
+        if b"NX" in options and self._alive(key):
+            return None
+        self.data[key] = (value, expires)
+        return "OK"
+
+    def _cmd_del(self, *keys):
+        return sum(1 for key in keys if self._alive(key) and self.data.pop(key))
+
+    def _cmd_exists(self, *keys):
+        return sum(1 for key in keys if self._alive(key))
+
+    def _incr_by(self, key, amount: int):
+        entry = self._alive(key)
+        try:
+            value = (int(entry[0]) if entry else 0) + amount
+        except ValueError:
+            return ValueError("ERR value is not an integer or out of range")
+        self.data[key] = (str(value).encode(), entry[1] if entry else None)
+        return value
+
+    def _cmd_incr(self, key):
+        return self._incr_by(key, 1)
+
+    def _cmd_decr(self, key):
+        return self._incr_by(key, -1)
+
+    def _cmd_pexpire(self, key, milliseconds):
+        entry = self._alive(key)
+        if entry is None:
+            return 0
+        self.data[key] = (entry[0], time.monotonic() + int(milliseconds) / 1000)
+        return 1
+
+    def _cmd_pttl(self, key):
+        entry = self._alive(key)
+        if entry is None:
+            return -2
+        return -1 if entry[1] is None else int((entry[1] - time.monotonic()) * 1000)
+
+    def _cmd_scan(self, cursor, *options):
+        options = list(options)
+        pattern = b"*"
+        count = 10
+        for index in range(0, len(options) - 1, 2):
+            if options[index].upper() == b"MATCH":
+                pattern = options[index + 1]
+            elif options[index].upper() == b"COUNT":
+                count = int(options[index + 1])
+        keys = sorted(key for key in list(self.data) if self._alive(key))
+        start = int(cursor)
+        page = keys[start:start + count]
+        next_cursor = start + count if start + count < len(keys) else 0
+        matched = [key for key in page if fnmatch.fnmatchcase(key.decode(), pattern.decode())]
+        return [str(next_cursor).encode(), matched]
+
+    def _cmd_flushdb(self, *args):
+        self.data.clear()
+        return "OK"
+
+    def _cmd_dbsize(self):
+        return sum(1 for key in list(self.data) if self._alive(key))
+
+
+def _encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, ValueError):
+        return f"-{reply}\r\n".encode()
+    if isinstance(reply, str):
+        return f"+{reply}\r\n".encode()
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode()
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # inline komut (redis-cli / telnet)
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        state = self.server.state
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            if not args:
+                continue
+            if state.latency_ms:
+                time.sleep(state.latency_ms / 1000)
+            self.wfile.write(_encode(state.execute(args)))
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeRedisServer:
+    """Arka plan thread'inde çalışan sahte Redis sunucusu"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0):
+        self.server = _Server((host, port), FakeRedisHandler)
+        self.server.state = FakeRedisState(latency_ms)
+        self._thread = None
+
+    @property
+    def state(self) -> FakeRedisState:
+        return self.server.state
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-redis", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Redis (RESP2 subset) for cache tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeRedisServer(args.host, args.port, args.latency_ms)
+    print(f"Fake Redis listening on {server.url}")
+    print("export CACHE_BACKEND=redis")
+    print(f"export CACHE_REDIS_URL={server.url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
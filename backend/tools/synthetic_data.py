@@ -0,0 +1,468 @@
+"""
+Synthetic Data Generator - Ölçek testleri için gerçekçi, seed'li sahte veri
+
+models.py ile tutarlı tüm tabloları doldurur: kullanıcılar, power-law dağılımlı
+takip grafiği, book/movie item'ları (türleriyle), Zipf dağılımlı puanlar,
+review'lar, beğeniler, yorumlar, kütüphane kayıtları, listeler ve her olay için
+activity satırı. Satırlar bellekte biriktirilmeden batch'ler halinde yazılır:
+Postgres'te COPY (psycopg2 copy_expert), SQLite'ta executemany.
+
+Kullanım:
+    python -m backend.tools.synthetic_data --profile medium --seed 42
+    python -m backend.tools.synthetic_data --users 5000 --items 2000 --ratings 200000
+    DATABASE_URL=sqlite:///./bench.db python -m backend.tools.synthetic_data --profile small
+
+ID'ler tablodaki mevcut MAX(id)'den devam eder, bu yüzden dolu bir veritabanına
+da eklenebilir; Postgres sequence'ları yükleme sonunda ilerletilir.
+"""
+
+import argparse
+import csv
+import io
+import random
+import sys
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import create_engine
+
+# Ön tanımlı ölçekler; "large" ~10M activity üretir
+PROFILES = {
+    "small": {"users": 500, "items": 300, "ratings": 10_000, "reviews": 2_000, "review_likes": 6_000,
+              "item_likes": 4_000, "comments": 2_000, "library": 5_000, "lists": 300, "follows_avg": 15},
+    "medium": {"users": 20_000, "items": 10_000, "ratings": 500_000, "reviews": 100_000, "review_likes": 300_000,
+               "item_likes": 200_000, "comments": 100_000, "library": 250_000, "lists": 10_000, "follows_avg": 25},
+    "large": {"users": 200_000, "items": 50_000, "ratings": 4_000_000, "reviews": 1_000_000, "review_likes": 2_500_000,
+              "item_likes": 1_000_000, "comments": 600_000, "library": 2_000_000, "lists": 100_000, "follows_avg": 30},
+}
+
+BOOK_GENRES = ["Roman", "Fantastik", "Bilim Kurgu", "Polisiye", "Tarih", "Biyografi", "Klasik", "Felsefe", "Şiir", "Macera"]
+MOVIE_GENRES = ["Dram", "Komedi", "Aksiyon", "Bilim Kurgu", "Korku", "Gerilim", "Animasyon", "Belgesel", "Romantik", "Suç"]
+TITLE_WORDS = [
+    "Gece", "Deniz", "Sessiz", "Kayıp", "Son", "Kırmızı", "Zaman", "Şehir", "Rüya", "Yol", "Ayna", "Gölge",
+    "Yıldız", "Kış", "Ateş", "Orman", "Eski", "Uzak", "Kuzey", "Işık", "Sır", "Kum", "Taş", "Bahar",
+]
+FIRST_NAMES = ["Ayşe", "Mehmet", "Elif", "Can", "Zeynep", "Emre", "Deniz", "Selin", "Burak", "Ece", "Mert", "Derya"]
+LAST_NAMES = ["Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Aydın", "Öztürk", "Arslan", "Doğan", "Koç"]
+REVIEW_SNIPPETS = [
+    "Beklediğimden çok daha iyiydi.", "Karakterler çok iyi işlenmiş.", "Ortalarda biraz yavaşlıyor.",
+    "Sonu tahmin edilebilirdi ama keyifliydi.", "Kesinlikle tekrar açarım.", "Pek bana göre değildi.",
+    "Atmosferi muhteşem.", "Herkese tavsiye ederim.", "Abartıldığı kadar iyi değil.", "Bir başyapıt.",
+]
+COMMENT_SNIPPETS = ["Katılıyorum!", "Bence de öyle.", "Ben o kadar sevmedim.", "Güzel yorum.", "Tam olarak bu."]
+LIST_NAMES = ["Favorilerim", "Hafta sonu", "Okunacaklar", "Klasikler", "Yaz listesi", "Tekrar izlenecek"]
+
+# (tablo, id kolonu, kolonlar) - yükleme sırası foreign key sırasıdır
+TABLES = {
+    "users": ("user_id", ["user_id", "username", "email", "password_hash", "bio", "avatar_url", "created_at"]),
+    "items": ("item_id", ["item_id", "title", "item_type", "year", "description", "genres", "authors",
+                          "page_count", "director", "actors", "external_rating", "created_at"]),
+    "follows": (None, ["follower_id", "followee_id", "followed_at"]),
+    "ratings": ("rating_id", ["rating_id", "user_id", "item_id", "score", "created_at"]),
+    "reviews": ("review_id", ["review_id", "user_id", "item_id", "review_text", "rating", "created_at"]),
+    "review_likes": ("like_id", ["like_id", "review_id", "user_id", "liked_at"]),
+    "item_likes": ("like_id", ["like_id", "item_id", "user_id", "liked_at"]),
+    "review_comments": ("comment_id", ["comment_id", "review_id", "user_id", "comment_text", "created_at"]),
+    "user_library": ("library_id", ["library_id", "user_id", "item_id", "status", "added_at"]),
+    "lists": ("list_id", ["list_id", "user_id", "name", "description", "is_public", "privacy_level",
+                          "created_at", "updated_at"]),
+    "lists_item": ("list_item_id", ["list_item_id", "list_id", "item_id", "position", "added_at"]),
+    "activities": ("activity_id", ["activity_id", "activity_type", "user_id", "item_id", "review_id",
+                                   "list_id", "related_user_id", "created_at"]),
+}
+
+
+class ZipfSampler:
+    """rank^-s ağırlıklı örnekleme (rank 1 en popüler); O(log n) örnek başına"""
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.rng = rng
+        self.cumulative = list(accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+        self.total = self.cumulative[-1]
+
+    def sample(self) -> int:
+        """0 tabanlı index döndür"""
+        return bisect_left(self.cumulative, self.rng.random() * self.total)
+
+    def sample_distinct(self, k: int) -> set:
+        k = min(k, len(self.cumulative))
+        chosen = set()
+        # Popüler uçta çakışmalar sık olduğundan deneme sayısını sınırla
+        attempts = 0
+        while len(chosen) < k and attempts < k * 20:
+            chosen.add(self.sample())
+            attempts += 1
+        return chosen
+
+
+class BulkWriter:
+    """Bir tablo için satırları biriktirip batch halinde yazar"""
+
+    def __init__(self, loader, table: str, batch_size: int, before_flush=None):
+        self.loader = loader
+        self.table = table
+        self.columns = TABLES[table][1]
+        self.batch_size = batch_size
+        self.before_flush = before_flush
+        self.rows = []
+        self.count = 0
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            if self.before_flush is not None:
+                self.before_flush()
+            self.loader.write(self.table, self.columns, self.rows)
+            self.count += len(self.rows)
+            self.rows = []
+
+
+class Loader:
+    """Dialect'e göre toplu yazma yolu (COPY veya executemany)"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.dialect = engine.dialect.name
+        self.raw = engine.raw_connection()
+        if self.dialect == "sqlite":
+            cursor = self.raw.cursor()
+            cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute("PRAGMA synchronous = OFF")
+            cursor.execute("PRAGMA foreign_keys = OFF")
+            cursor.close()
+
+    def next_id(self, table: str) -> int:
+        id_column = TABLES[table][0]
+        cursor = self.raw.cursor()
+        cursor.execute(f"SELECT COALESCE(MAX({id_column}), 0) FROM {table}")
+        value = cursor.fetchone()[0]
+        cursor.close()
+        return int(value) + 1
+
+    def write(self, table: str, columns, rows):
+        cursor = self.raw.cursor()
+        if self.dialect == "postgresql":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+            for row in rows:
+                # COPY csv formatında boş alan NULL demek; None'ları boş bırak
+                writer.writerow(["" if value is None else value for value in row])
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        else:
+            placeholders = ", ".join("?" for _ in columns)
+            cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+        cursor.close()
+        self.raw.commit()
+
+    def finish(self):
+        cursor = self.raw.cursor()
+        if self.dialect == "postgresql":
+            # Açık ID'lerle yüklendiği için serial sequence'ları ileri al
+            for table, (id_column, _) in TABLES.items():
+                if id_column is None:
+                    continue
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', '{id_column}'), "
+                    f"COALESCE((SELECT MAX({id_column}) FROM {table}), 0) + 1, false)"
+                )
+            self.raw.commit()
+            self.raw.set_isolation_level(0)  # ANALYZE için autocommit
+            cursor.execute("ANALYZE")
+        else:
+            cursor.execute("ANALYZE")
+            self.raw.commit()
+        cursor.close()
+        self.raw.close()
+
+
+class Generator:
+    def __init__(self, loader: Loader, counts: dict, seed: int, days: int, zipf_s: float,
+                 batch_size: int, password_hash: str):
+        self.loader = loader
+        self.counts = counts
+        self.rng = random.Random(seed)
+        self.zipf_s = zipf_s
+        self.batch_size = batch_size
+        self.password_hash = password_hash
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.start = self.now - timedelta(days=days)
+        self.span_seconds = days * 86400
+        self.writers = {table: BulkWriter(loader, table, batch_size) for table in TABLES if table != "activities"}
+        # Activity satırları review/list/item'lara referans verir; önce onlar yazılmalı (FK)
+        self.writers["activities"] = BulkWriter(loader, "activities", batch_size, before_flush=self._flush_entities)
+        self.ids = {table: loader.next_id(table) for table, (id_column, _) in TABLES.items() if id_column}
+
+    # ---------- yardımcılar ----------
+
+    def _next(self, table: str) -> int:
+        value = self.ids[table]
+        self.ids[table] = value + 1
+        return value
+
+    def _timestamp(self, after: datetime = None) -> datetime:
+        # Yakın zamana doğru yoğunlaşan dağılım (feed'in üst kısmı dolu olsun)
+        lower = after or self.start
+        window = max(1, int((self.now - lower).total_seconds()))
+        offset = int(window * (1 - self.rng.random() ** 2))
+        return lower + timedelta(seconds=offset)
+
+    def _activity(self, activity_type, user_id, created_at, item_id=None, review_id=None,
+                  list_id=None, related_user_id=None):
+        self.writers["activities"].add((
+            self._next("activities"), activity_type, user_id, item_id, review_id, list_id, related_user_id, created_at,
+        ))
+
+    def _flush_entities(self):
+        for table, writer in self.writers.items():
+            if table != "activities":
+                writer.flush()
+
+    def _progress(self, label: str, started: float):
+        print(f"[OK] {label}: {time.perf_counter() - started:.1f}s")
+
+    # ---------- tablolar ----------
+
+    def users(self):
+        writer = self.writers["users"]
+        self.user_ids = []
+        self.user_joined = []
+        for _ in range(self.counts["users"]):
+            user_id = self._next("users")
+            created_at = self._timestamp()
+            name = f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+            writer.add((
+                user_id, f"user{user_id}", f"user{user_id}@example.com", self.password_hash,
+                f"Merhaba, ben {name}.", None, created_at,
+            ))
+            self.user_ids.append(user_id)
+            self.user_joined.append(created_at)
+        writer.flush()
+        # Popülerlik sırası kullanıcı sırasından bağımsız olsun
+        self.user_rank = self.user_ids[:]
+        self.rng.shuffle(self.user_rank)
+
+    def items(self):
+        writer = self.writers["items"]
+        self.item_ids = []
+        self.item_types = []
+        self.item_quality = []
+        for _ in range(self.counts["items"]):
+            item_id = self._next("items")
+            is_book = self.rng.random() < 0.5
+            genres = BOOK_GENRES if is_book else MOVIE_GENRES
+            title = " ".join(self.rng.sample(TITLE_WORDS, self.rng.randint(1, 3)))
+            person = f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+            quality = min(10.0, max(1.0, self.rng.gauss(6.5, 1.5)))
+            writer.add((
+                item_id, title, "book" if is_book else "movie", self.rng.randint(1950, self.now.year),
+                f"{title} hakkında sentetik açıklama.", ", ".join(self.rng.sample(genres, self.rng.randint(1, 3))),
+                person if is_book else None, self.rng.randint(120, 900) if is_book else None,
+                None if is_book else person,
+                None if is_book else ", ".join(f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}" for _ in range(3)),
+                int(round(quality)), self._timestamp(),
+            ))
+            self.item_ids.append(item_id)
+            self.item_types.append("book" if is_book else "movie")
+            self.item_quality.append(quality)
+        writer.flush()
+        self.item_sampler = ZipfSampler(len(self.item_ids), self.zipf_s, self.rng)
+        # Rastgele item'ı popüler uca koy (ID sırası popülerlik sırası olmasın)
+        self.item_order = list(range(len(self.item_ids)))
+        self.rng.shuffle(self.item_order)
+
+    def _zipf_item(self) -> int:
+        return self.item_order[self.item_sampler.sample()]
+
+    def follows(self):
+        """Out-degree Pareto dağılımlı, hedefler Zipf popülerliğine göre (power-law graf)"""
+        writer = self.writers["follows"]
+        user_sampler = ZipfSampler(len(self.user_ids), 1.0, self.rng)
+        mean = self.counts["follows_avg"]
+        alpha = 2.0
+        scale = mean * (alpha - 1) / alpha
+        for index, follower_id in enumerate(self.user_ids):
+            degree = min(len(self.user_ids) - 1, int(scale * self.rng.paretovariate(alpha)))
+            followees = {self.user_rank[i] for i in user_sampler.sample_distinct(degree)}
+            followees.discard(follower_id)
+            for followee_id in followees:
+                followed_at = self._timestamp(self.user_joined[index])
+                writer.add((follower_id, followee_id, followed_at))
+                self._activity("follow", follower_id, followed_at, related_user_id=followee_id)
+
+    def _per_user(self, total: int):
+        """Toplamı kullanıcılara ağır kuyruklu şekilde dağıt (ortalama total / users)"""
+        mean = total / max(1, len(self.user_ids))
+        for index, user_id in enumerate(self.user_ids):
+            yield index, user_id, int(self.rng.expovariate(1.0 / mean) + 0.5) if mean > 0 else 0
+
+    def ratings_and_reviews(self):
+        ratings = self.writers["ratings"]
+        reviews = self.writers["reviews"]
+        review_share = self.counts["reviews"] / max(1, self.counts["ratings"])
+        self.review_ids = []
+        self.review_authors = []
+        self.review_times = []
+        for index, user_id, k in self._per_user(self.counts["ratings"]):
+            for item_index in self.item_sampler.sample_distinct(k):
+                item_index = self.item_order[item_index]
+                item_id = self.item_ids[item_index]
+                score = int(min(10, max(1, round(self.rng.gauss(self.item_quality[item_index], 1.5)))))
+                created_at = self._timestamp(self.user_joined[index])
+                ratings.add((self._next("ratings"), user_id, item_id, score, created_at))
+                self._activity("rating", user_id, created_at, item_id=item_id)
+                if self.rng.random() < review_share:
+                    review_id = self._next("reviews")
+                    text_ = " ".join(self.rng.sample(REVIEW_SNIPPETS, self.rng.randint(1, 3)))
+                    reviews.add((review_id, user_id, item_id, text_, score, created_at))
+                    self._activity("review", user_id, created_at, item_id=item_id, review_id=review_id)
+                    self.review_ids.append(review_id)
+                    self.review_authors.append(user_id)
+                    self.review_times.append(created_at)
+
+    def likes_and_comments(self):
+        review_likes = self.writers["review_likes"]
+        item_likes = self.writers["item_likes"]
+        comments = self.writers["review_comments"]
+        review_sampler = ZipfSampler(len(self.review_ids), self.zipf_s, self.rng) if self.review_ids else None
+
+        for index, user_id, k in self._per_user(self.counts["review_likes"]):
+            if review_sampler is None:
+                break
+            for review_index in review_sampler.sample_distinct(k):
+                if self.review_authors[review_index] == user_id:
+                    continue
+                liked_at = self._timestamp(max(self.review_times[review_index], self.user_joined[index]))
+                review_id = self.review_ids[review_index]
+                review_likes.add((self._next("review_likes"), review_id, user_id, liked_at))
+                self._activity("like_review", user_id, liked_at, review_id=review_id)
+
+        for index, user_id, k in self._per_user(self.counts["item_likes"]):
+            for item_index in self.item_sampler.sample_distinct(k):
+                item_id = self.item_ids[self.item_order[item_index]]
+                liked_at = self._timestamp(self.user_joined[index])
+                item_likes.add((self._next("item_likes"), item_id, user_id, liked_at))
+                self._activity("like_item", user_id, liked_at, item_id=item_id)
+
+        for index, user_id, k in self._per_user(self.counts["comments"]):
+            if review_sampler is None:
+                break
+            for _ in range(k):
+                review_index = review_sampler.sample()
+                created_at = self._timestamp(max(self.review_times[review_index], self.user_joined[index]))
+                review_id = self.review_ids[review_index]
+                comments.add((self._next("review_comments"), review_id, user_id,
+                              self.rng.choice(COMMENT_SNIPPETS), created_at))
+                self._activity("comment_review", user_id, created_at, review_id=review_id)
+
+    def library(self):
+        writer = self.writers["user_library"]
+        for index, user_id, k in self._per_user(self.counts["library"]):
+            for item_index in self.item_sampler.sample_distinct(k):
+                item_index = self.item_order[item_index]
+                done = self.rng.random() < 0.6
+                if self.item_types[item_index] == "book":
+                    status = "read" if done else "toread"
+                else:
+                    status = "watched" if done else "towatch"
+                writer.add((self._next("user_library"), user_id, self.item_ids[item_index], status,
+                            self._timestamp(self.user_joined[index])))
+
+    def lists(self):
+        lists = self.writers["lists"]
+        list_items = self.writers["lists_item"]
+        pending = []
+        for _ in range(self.counts["lists"]):
+            index = self.rng.randrange(len(self.user_ids))
+            user_id = self.user_ids[index]
+            list_id = self._next("lists")
+            created_at = self._timestamp(self.user_joined[index])
+            privacy_level = self.rng.choice((0, 1, 2, 2))
+            lists.add((list_id, user_id, self.rng.choice(LIST_NAMES), None,
+                       1 if privacy_level == 2 else 0, privacy_level, created_at, created_at))
+            pending.append((list_id, user_id, created_at))
+        lists.flush()
+        for list_id, user_id, created_at in pending:
+            size = min(len(self.item_ids), max(1, int(self.rng.expovariate(1 / 8.0))))
+            for position, item_index in enumerate(self.item_sampler.sample_distinct(size)):
+                item_id = self.item_ids[self.item_order[item_index]]
+                added_at = self._timestamp(created_at)
+                list_items.add((self._next("lists_item"), list_id, item_id, position, added_at))
+                self._activity("list_add", user_id, added_at, item_id=item_id, list_id=list_id)
+
+    def run(self):
+        steps = [
+            ("users", self.users),
+            ("items", self.items),
+            ("follows", self.follows),
+            ("ratings + reviews", self.ratings_and_reviews),
+            ("likes + comments", self.likes_and_comments),
+            ("library", self.library),
+            ("lists", self.lists),
+        ]
+        for label, step in steps:
+            started = time.perf_counter()
+            step()
+            # FK sırası: bir adımın ürettiği her şey sonraki adımdan önce yazılsın
+            self._flush_entities()
+            self._progress(label, started)
+        self.writers["activities"].flush()
+        return {table: writer.count for table, writer in self.writers.items()}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ReaView synthetic data generator")
+    parser.add_argument("--database-url", help="Hedef veritabanı (varsayılan: uygulamanın DATABASE_URL'i)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=365, help="Zaman damgalarının yayılacağı gün sayısı")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Item/review popülerliği için Zipf üssü")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--password", default="password123", help="Tüm sentetik kullanıcıların şifresi")
+    parser.add_argument("--skip-init", action="store_true", help="init_db() (tablolar + migration'lar) çalıştırma")
+    for key in PROFILES["small"]:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, dest=key, help=f"Profildeki {key} değerini ez")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    counts = dict(PROFILES[args.profile])
+    for key in counts:
+        override = getattr(args, key)
+        if override is not None:
+            counts[key] = override
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        from backend.app.database import engine
+    if not args.skip_init:
+        from backend.app.database import init_db
+        init_db(bind=engine)
+
+    from backend.app.routes.auth import hash_password
+
+    loader = Loader(engine)
+    generator = Generator(loader, counts, args.seed, args.days, args.zipf, args.batch_size,
+                          hash_password(args.password))
+    print(f"[INFO] Generating {args.profile} dataset on {loader.dialect}: {counts}")
+    started = time.perf_counter()
+    written = generator.run()
+    loader.finish()
+    elapsed = time.perf_counter() - started
+    for table, count in written.items():
+        print(f"  {table:<16} {count:>12,}")
+    total = sum(written.values())
+    print(f"[OK] {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -182,10 +182,10 @@ function setupNavbarEvents() {
   });
 
   // Logout handler
-  logoutBtn?.addEventListener("click", (e) => {
+  logoutBtn?.addEventListener("click", async (e) => {
     e.preventDefault();
     if (confirm("Çıkış yapmak istediğinize emin misiniz?")) {
-      handleLogout();
+      await handleLogout();
       window.location.href = "./login.html";
     }
   });
@@ -6,6 +6,57 @@
 import { sessionManager } from "./session-manager.js";
 import { API_CONFIG, ROUTES } from "../utils/constants.js";
 
+/**
+ * ETag store
+ * Caches GET bodies next to their ETag in sessionStorage so repeated reads
+ * (item detail, list items, profiles, follow stats) can be revalidated with
+ * If-None-Match and answered by a body-less 304.
+ */
+const ETAG_STORAGE_PREFIX = "etag:";
+const ETAG_MAX_ENTRIES = 100;
+
+class ETagStore {
+  constructor() {
+    this.memory = new Map();
+  }
+
+  key(url, token) {
+    // Responses can depend on the caller (e.g. is_owner), so the token is part of the key
+    return `${ETAG_STORAGE_PREFIX}${token || "guest"}:${url}`;
+  }
+
+  get(key) {
+    if (this.memory.has(key)) return this.memory.get(key);
+    try {
+      const raw = sessionStorage.getItem(key);
+      if (!raw) return null;
+      const entry = JSON.parse(raw);
+      this.memory.set(key, entry);
+      return entry;
+    } catch (err) {
+      return null;
+    }
+  }
+
+  set(key, etag, body) {
+    const entry = { etag, body };
+    this.memory.delete(key);
+    this.memory.set(key, entry);
+    if (this.memory.size > ETAG_MAX_ENTRIES) {
+      const oldest = this.memory.keys().next().value;
+      this.memory.delete(oldest);
+      try { sessionStorage.removeItem(oldest); } catch (err) { /* ignore */ }
+    }
+    try {
+      sessionStorage.setItem(key, JSON.stringify(entry));
+    } catch (err) {
+      // Quota exceeded or storage disabled: keep the in-memory copy only
+    }
+  }
+}
+
+const etagStore = new ETagStore();
+
 class ApiClient {
   constructor() {
     this.baseURL = API_CONFIG.BASE_URL;
@@ -38,11 +89,23 @@ class ApiClient {
       options.body = JSON.stringify(data);
     }
 
+    // Conditional GET: send the stored ETag, reuse the stored body on 304
+    const etagKey = method === "GET" ? etagStore.key(url, sessionManager.getToken()) : null;
+    const cached = etagKey ? etagStore.get(etagKey) : null;
+    if (cached) {
+      options.headers["If-None-Match"] = cached.etag;
+    }
+
     try {
       console.log(`📡 [${method}] ${url}`, data || '');
       
       const response = await fetch(url, options);
 
+      if (response.status === 304 && cached) {
+        console.log(`✅ [${method}] ${url} (304 Not Modified)`);
+        return JSON.parse(JSON.stringify(cached.body));
+      }
+
       if (!response.ok) {
         const error = await response.json();
         const errorMsg = error.detail || `HTTP ${response.status}`;
@@ -52,6 +115,10 @@ class ApiClient {
 
       const result = await response.json();
       console.log(`✅ [${method}] ${url}`, result);
+      const etag = etagKey ? response.headers.get("ETag") : null;
+      if (etag) {
+        etagStore.set(etagKey, etag, result);
+      }
       return result;
     } catch (err) {
       console.error(`🔴 API ERROR [${method}] ${url}:`, err.message);
@@ -100,6 +167,11 @@ export async function registerUser(username, email, password) {
   return client.post(ROUTES.AUTH.REGISTER, { username, email, password });
 }
 
+export async function logoutUser() {
+  const client = new ApiClient();
+  return client.post(ROUTES.AUTH.LOGOUT, {});
+}
+
 export async function getCurrentUser() {
   const client = new ApiClient();
   return client.get(ROUTES.AUTH.CURRENT_USER);
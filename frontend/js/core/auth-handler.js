@@ -3,7 +3,7 @@
  * Authentication logic
  */
 
-import { loginUser, registerUser } from "./api-client.js";
+import { loginUser, logoutUser, registerUser } from "./api-client.js";
 import { sessionManager } from "./session-manager.js";
 
 /**
@@ -45,7 +45,15 @@ export async function handleRegister(username, email, password) {
 /**
  * Handle logout
  */
-export function handleLogout() {
+export async function handleLogout() {
+  // Revoke the token server-side; the local session is cleared either way
+  if (sessionManager.getToken()) {
+    try {
+      await logoutUser();
+    } catch (error) {
+      console.warn("⚠️ Logout request failed:", error.message);
+    }
+  }
   sessionManager.clearSession();
   console.log("✅ Logout successful");
   return true;
@@ -33,6 +33,10 @@ const pageSize = 15;
 let isLoading = false;
 let hasMore = true;
 
+// Canlı akış (GET /feed/stream, Server-Sent Events)
+let feedStream = null;
+let latestActivityId = 0;
+
 /**
  * Başlat
  */
@@ -48,6 +52,9 @@ async function initializeFeed() {
     console.log(sessionManager.isLoggedIn() ? "✅ Kullanıcı giriş yaptı, akış yükleniyor..." : "👋 Misafir akışı yükleniyor...");
     await loadFeed();
 
+    // Yeni aktiviteler sayfayı yeniden yüklemeden en üste eklenir
+    connectFeedStream();
+
     // "Daha Fazla Yükle" butonuna listener ekle
     loadMoreBtn.addEventListener("click", loadMoreActivities);
 
@@ -59,6 +66,72 @@ async function initializeFeed() {
   }
 }
 
+/**
+ * Canlı akışa bağlan: latestActivityId'den sonraki aktiviteler gelir.
+ * EventSource header gönderemediği için oturum token'ı URL'e konmaz; önce
+ * Authorization header'ıyla kısa ömürlü bir stream token'ı alınır.
+ * Bağlantı koparsa (veya sunucu "overflow" ile kapatırsa) EventSource kendisi
+ * yeniden bağlanır ve Last-Event-ID ile kaçırılanlar tamamlanır; token'ın
+ * süresi dolduysa sunucu 401 döner, yeni token ile baştan bağlanılır.
+ */
+async function connectFeedStream() {
+  if (!window.EventSource || feedStream) return;
+
+  const params = new URLSearchParams({ since: String(latestActivityId) });
+  const token = sessionManager.getToken();
+  if (token) {
+    try {
+      const response = await fetch(`${API_BASE_URL}/feed/stream-token`, {
+        method: "POST",
+        headers: { "Authorization": `Bearer ${token}` }
+      });
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      params.set("token", (await response.json()).token);
+    } catch (error) {
+      console.warn("⚠️ Canlı akış token'ı alınamadı:", error);
+      return;
+    }
+  }
+  if (feedStream) return;
+
+  feedStream = new EventSource(`${API_BASE_URL}/feed/stream?${params}`);
+  feedStream.addEventListener("activity", (event) => {
+    try {
+      prependActivity(JSON.parse(event.data));
+    } catch (error) {
+      console.error("Canlı akış mesajı okunamadı:", error);
+    }
+  });
+  feedStream.addEventListener("overflow", () => {
+    console.warn("⚠️ Canlı akış geride kaldı, yeniden bağlanılıyor...");
+  });
+  feedStream.onerror = () => {
+    console.warn("⚠️ Canlı akış bağlantısı koptu, tekrar deneniyor...");
+    if (feedStream && feedStream.readyState === EventSource.CLOSED) {
+      // Tarayıcı vazgeçti (ör. stream token'ının süresi doldu): yeni token ile bağlan
+      feedStream = null;
+      setTimeout(connectFeedStream, 5000);
+    }
+  };
+}
+
+window.addEventListener("pagehide", () => {
+  feedStream?.close();
+  feedStream = null;
+});
+
+/**
+ * Canlı akıştan gelen aktiviteyi en üste ekle (aynı aktivite zaten varsa taşınır)
+ */
+function prependActivity(activity) {
+  feedContainer.querySelector(".empty-state")?.remove();
+  feedContainer.querySelector(`.activity-card[data-activity-id="${activity.activity_id}"]`)?.remove();
+
+  feedContainer.insertAdjacentHTML("afterbegin", renderActivityCard(activity));
+  latestActivityId = Math.max(latestActivityId, activity.activity_id);
+  bindActivityEvents();
+}
+
 /**
  * Sonsuz kaydırma - sayfanın sonuna gelinceyi yeni aktiviteler yükle
  */
@@ -112,6 +185,8 @@ async function loadFeed() {
     const html = activities.map(activity => renderActivityCard(activity)).join("");
     feedContainer.innerHTML = html;
 
+    latestActivityId = Math.max(latestActivityId, ...activities.map(a => a.activity_id));
+
     // Sayfalandırma durumunu güncelle
     currentPage = 0;
     hasMore = activities.length === pageSize;
@@ -154,8 +229,10 @@ async function loadMoreActivities() {
 
     console.log(`✅ ${activities.length} daha aktivite yüklendi`);
 
-    // Yeni aktiviteleri ekle
-    const html = activities.map(activity => renderActivityCard(activity)).join("");
+    // Yeni aktiviteleri ekle (canlı akışla üste eklenenler sayfa sınırını kaydırır; tekrarları atla)
+    const html = activities
+      .filter(activity => !feedContainer.querySelector(`.activity-card[data-activity-id="${activity.activity_id}"]`))
+      .map(activity => renderActivityCard(activity)).join("");
     feedContainer.insertAdjacentHTML("beforeend", html);
 
     // Event listener'ları yeni kartlara bağla
@@ -185,12 +262,29 @@ function renderActivityCard(activity) {
   const { activity_id, activity_type, created_at, user_id, username, avatar_url,
     item_id, title, item_type, poster_url, year, review_text, rating_score, review_rating,
     review_id, like_count = 0, comment_count = 0, is_liked_by_user = 0, is_item_liked_by_user = 0,
-    review_owner_username = '', referenced_review_text = '', source_id = '' } = activity;
+    review_owner_username = '', referenced_review_text = '', source_id = '',
+    actor_count = 1, sample_actors = [] } = activity;
 
   const timestamp = formatRelativeTime(created_at);
   const displayName = username || `Kullanıcı #${user_id}`;
   const profileLink = `./profile.html?user=${user_id}`;
 
+  // Toplanmış beğeniler: "X, Y ve N kişi daha beğendi"
+  const actorLinks = [`<a href="${profileLink}" class="activity-username">${displayName}</a>`];
+  if (actor_count > 1) {
+    const others = sample_actors.filter(actor => actor.user_id !== user_id);
+    others.forEach(actor => {
+      actorLinks.push(`<a href="./profile.html?user=${actor.user_id}" class="activity-username">${actor.username}</a>`);
+    });
+    const remaining = actor_count - 1 - others.length;
+    if (remaining > 0) {
+      actorLinks.push(`${remaining} kişi daha`);
+    }
+  }
+  const actorsHtml = actorLinks.length > 1
+    ? `${actorLinks.slice(0, -1).join(", ")} ve ${actorLinks[actorLinks.length - 1]}`
+    : actorLinks[0];
+
   // Title'ı güvenli hale getir - empty ise fallback göster
   const displayTitle = title && title.trim() !== '' ? title : 'İçerik';
 
@@ -254,7 +348,7 @@ function renderActivityCard(activity) {
           ${avatar_url ? `<img src="${avatar_url}" alt="${displayName}" />` : `👤`}
         </div>
         <div class="activity-user-info">
-          <a href="${profileLink}" class="activity-username">${displayName}</a>
+          ${actorsHtml}
           <div class="activity-action-text">${actionText}</div>
         </div>
         <div class="activity-timestamp">${timestamp}</div>
@@ -81,7 +81,8 @@ export const ROUTES = {
   AUTH: {
     LOGIN: "/auth/login",
     REGISTER: "/auth/register",
-    CURRENT_USER: "/auth/current-user"
+    CURRENT_USER: "/auth/current-user",
+    LOGOUT: "/auth/logout"
   },
   ITEMS: {
     LIST: "/items",